@@ -12,7 +12,8 @@ set -e
 : ${WORKERS:=4}
 : ${THREADS:=2}
 : ${CELERY_WORKERS:=4}
-: ${CELERY_QUEUES:=celery,default,critical,low}
+: ${CELERY_QUEUES:=celery,default,critical,low,heavy-io,cpu-validation,summaries,notebooks,maintenance,integrity-scrub}
+: ${CELERY_WORKLOAD:=}  # Space-separated workload queues, e.g. "heavy-io" or "cpu-validation summaries"
 : ${DEV_MODE:=false}
 : ${AUTO_RELOAD:=true}
 
@@ -96,6 +97,13 @@ case "$SERVICE_TYPE" in
 
     celery)
         echo "Starting Celery worker..."
+        if [ -n "$CELERY_WORKLOAD" ]; then
+            # Pool sized per workload class (depot/config/celery_queues.py)
+            CELERY_POOL_ARGS=$(python -m depot.config.celery_queues $CELERY_WORKLOAD)
+        else
+            CELERY_POOL_ARGS="-Q $CELERY_QUEUES -c $CELERY_WORKERS"
+        fi
+        echo "Celery pool arguments: $CELERY_POOL_ARGS"
         if [ "$DEV_MODE" = "true" ] && [ "$AUTO_RELOAD" = "true" ]; then
             # Use watchdog for auto-reload in development
             exec env \
@@ -109,9 +117,8 @@ case "$SERVICE_TYPE" in
                 --pattern='*.py' \
                 --recursive \
                 -- celery -A depot worker \
-                -Q $CELERY_QUEUES \
+                $CELERY_POOL_ARGS \
                 -l ${LOG_LEVEL:-info} \
-                -c $CELERY_WORKERS \
                 --max-tasks-per-child=100
         else
             exec env \
@@ -121,9 +128,8 @@ case "$SERVICE_TYPE" in
                 DB_USER="$DB_USER" \
                 DB_PASSWORD="$DB_PASSWORD" \
                 celery -A depot worker \
-                -Q $CELERY_QUEUES \
+                $CELERY_POOL_ARGS \
                 -l ${LOG_LEVEL:-info} \
-                -c $CELERY_WORKERS \
                 --max-tasks-per-child=100
         fi
         ;;
@@ -19,7 +19,9 @@ from depot.models import (
     DataTableFile,
     SubmissionActivity,
     PrecheckValidation,
+    ValidationRun,
 )
+from depot.utils.instrumentation import summarize_spans
 
 
 class SAMLAdminSite(AdminSite):
@@ -394,6 +396,38 @@ class CohortSubmissionAdmin(admin.ModelAdmin):
         return qs.filter(cohort__in=user_cohorts)
 
 
+def render_span_timeline(spans):
+    """Render a pipeline span timeline and per-span totals as HTML tables."""
+    from django.utils.html import format_html, format_html_join
+
+    if not spans:
+        return '-'
+
+    def size(value):
+        return f"{value / 2**20:.1f} MB" if value else ''
+
+    timeline = format_html_join(
+        '', '<tr><td>{}</td><td style="padding-left:{}em">{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+        (
+            (entry['at'][11:23], entry.get('depth', 0), entry['name'], entry['ms'], size(entry.get('bytes')),
+             entry.get('peak_rss_mb', ''), entry.get('error') or ', '.join(f"{k}={v}" for k, v in entry.get('attrs', {}).items()))
+            for entry in spans
+        ),
+    )
+    totals = format_html_join(
+        '', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+        (
+            (name, stats['count'], round(stats['seconds'], 3), size(stats['bytes']))
+            for name, stats in sorted(summarize_spans(spans).items(), key=lambda item: -item[1]['seconds'])
+        ),
+    )
+    return format_html(
+        '<table><tr><th>Span</th><th>Count</th><th>Seconds</th><th>Bytes</th></tr>{}</table>'
+        '<table><tr><th>Start (UTC)</th><th>Span</th><th>ms</th><th>Bytes</th><th>Peak RSS MB</th><th>Details</th></tr>{}</table>',
+        totals, timeline,
+    )
+
+
 # CohortSubmissionFile is deprecated - use DataTableFile instead
 # Old admin registration removed
 
@@ -412,7 +446,7 @@ class DataTableFileAdmin(admin.ModelAdmin):
     list_display = ['id', 'data_table_link', 'data_file_type', 'version', 'is_current', 'uploaded_by', 'uploaded_at']
     list_filter = ['is_current', 'data_table__data_file_type', 'data_table__submission__cohort']
     search_fields = ['data_table__submission__cohort__name', 'original_filename', 'name', 'uploaded_by__email']
-    readonly_fields = ['created_at', 'updated_at', 'version', 'uploaded_at', 'file_hash', 'file_size', 'duckdb_created_at']
+    readonly_fields = ['created_at', 'updated_at', 'version', 'uploaded_at', 'file_hash', 'file_size', 'duckdb_created_at', 'pipeline_timeline']
     autocomplete_fields = ['uploaded_by']  # Makes it easier to select users
     date_hierarchy = 'uploaded_at'
 
@@ -429,6 +463,10 @@ class DataTableFileAdmin(admin.ModelAdmin):
         ('Processing', {
             'fields': ('duckdb_conversion_error', 'duckdb_created_at', 'raw_file_path', 'duckdb_file_path')
         }),
+        ('Pipeline Timeline', {
+            'fields': ('pipeline_timeline',),
+            'classes': ('collapse',)
+        }),
         ('Comments', {
             'fields': ('comments',)
         }),
@@ -453,6 +491,11 @@ class DataTableFileAdmin(admin.ModelAdmin):
     data_file_type.short_description = 'File Type'
     data_file_type.admin_order_field = 'data_table__data_file_type__name'
 
+    def pipeline_timeline(self, obj):
+        """Span timeline recorded by the upload workflow tasks."""
+        return render_span_timeline(obj.pipeline_spans)
+    pipeline_timeline.short_description = 'Spans'
+
     def get_queryset(self, request):
         """Filter files based on user's cohort access."""
         qs = super().get_queryset(request).select_related(
@@ -651,3 +694,51 @@ class PrecheckValidationAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         return request.user.is_superuser  # Only superusers can delete
+
+
+@admin.register(ValidationRun, site=admin_site)
+class ValidationRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'content_type', 'object_id', 'data_file_type', 'status', 'started_at', 'completed_at']
+    list_filter = ['status', 'data_file_type']
+    search_fields = ['object_id']
+    readonly_fields = [
+        'content_type', 'object_id', 'data_file_type', 'duckdb_path', 'raw_file_path', 'processed_file_path',
+        'status', 'started_at', 'completed_at', 'error_message', 'total_variables', 'completed_variables',
+        'variables_with_warnings', 'variables_with_errors', 'pipeline_timeline', 'created_at', 'updated_at'
+    ]
+    date_hierarchy = 'created_at'
+
+    fieldsets = (
+        ('Run', {
+            'fields': ('content_type', 'object_id', 'data_file_type', 'status', 'started_at', 'completed_at', 'error_message')
+        }),
+        ('Files', {
+            'fields': ('duckdb_path', 'raw_file_path', 'processed_file_path'),
+            'classes': ('collapse',)
+        }),
+        ('Variables', {
+            'fields': ('total_variables', 'completed_variables', 'variables_with_warnings', 'variables_with_errors')
+        }),
+        ('Pipeline Timeline', {
+            'fields': ('pipeline_timeline',),
+            'classes': ('collapse',)
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
+        })
+    )
+
+    def pipeline_timeline(self, obj):
+        """Span timeline of the run and its per-variable validation and summary tasks."""
+        spans = list(obj.pipeline_spans or [])
+        for timeline in obj.variables.values_list('pipeline_spans', flat=True):
+            spans.extend(timeline or [])
+        return render_span_timeline(sorted(spans, key=lambda entry: entry['at']))
+    pipeline_timeline.short_description = 'Spans'
+
+    def has_add_permission(self, request):
+        return False  # Validation runs are created by the upload workflow
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser  # Only superusers can delete
@@ -0,0 +1,14 @@
+"""
+Pipeline benchmarks.
+
+Stages (``stages.py``) run the real ingestion and validation code on
+generated datasets; ``harness.py`` measures them and tracks results in a
+JSON history so regressions can fail a run. Entry point:
+
+    python manage.py run_benchmarks --profile 10mb
+
+``startup.py`` profiles web worker cold start (imports, wall time, RSS)
+against fixed targets:
+
+    python manage.py profile_startup
+"""
@@ -0,0 +1,192 @@
+"""
+Measurement, stage registry and regression tracking for pipeline benchmarks.
+"""
+import json
+import logging
+import statistics
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import psutil
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+logger = logging.getLogger(__name__)
+
+
+# Metrics recorded for every stage. Lower is better for all of them.
+METRICS = ('wall_seconds', 'peak_rss_bytes', 'bytes_read', 'bytes_written', 'db_queries')
+
+# Allowed relative increase over the baseline before a run counts as a regression
+DEFAULT_THRESHOLDS = {
+    'wall_seconds': 0.25,
+    'peak_rss_bytes': 0.25,
+    'bytes_read': 0.10,
+    'bytes_written': 0.10,
+    'db_queries': 0.0,
+}
+
+# Absolute differences below these never count as regressions (timer/allocator noise)
+NOISE_FLOORS = {
+    'wall_seconds': 0.05,
+    'peak_rss_bytes': 16 * 1024 * 1024,
+    'bytes_read': 1024 * 1024,
+    'bytes_written': 1024 * 1024,
+    'db_queries': 0,
+}
+
+# Stage name -> callable(context); filled by @benchmark_stage in registration order
+BENCHMARK_STAGES: Dict[str, Callable] = {}
+
+
+def benchmark_stage(name: str):
+    """
+    Mark a function as a benchmark stage.
+
+    Stages run in registration order, receive the shared BenchmarkContext
+    and return ``{result_name: metrics}``; most return a single entry, but a
+    stage may report several (e.g. one per variable type).
+    """
+    def decorator(func):
+        BENCHMARK_STAGES[name] = func
+        return func
+    return decorator
+
+
+def _io_counters(process):
+    try:
+        counters = process.io_counters()
+    except (AttributeError, psutil.Error):
+        return 0, 0
+    # read_chars/write_chars include page-cache hits (Linux); fall back to block I/O
+    return (
+        getattr(counters, 'read_chars', counters.read_bytes),
+        getattr(counters, 'write_chars', counters.write_bytes),
+    )
+
+
+@contextmanager
+def measure(sample_interval: float = 0.05):
+    """
+    Measure wall time, peak RSS, I/O bytes and Django DB queries of a block.
+
+    Yields a dict that is filled in when the block exits.
+    """
+    process = psutil.Process()
+    metrics = {}
+    peak = [process.memory_info().rss]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(sample_interval):
+            try:
+                peak[0] = max(peak[0], process.memory_info().rss)
+            except psutil.Error:
+                return
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    read_before, written_before = _io_counters(process)
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            yield metrics
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        sampler.join()
+        peak[0] = max(peak[0], process.memory_info().rss)
+        read_after, written_after = _io_counters(process)
+        metrics.update({
+            'wall_seconds': round(elapsed, 4),
+            'peak_rss_bytes': peak[0],
+            'bytes_read': read_after - read_before,
+            'bytes_written': written_after - written_before,
+            'db_queries': len(queries.captured_queries),
+        })
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkHistory:
+    """
+    JSON history of benchmark runs.
+
+    Format::
+
+        {"runs": [{"timestamp": ..., "commit": ..., "profile": "10mb",
+                   "stages": {"process_file": {"wall_seconds": ..., ...}}}]}
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.runs: List[Dict] = []
+        if self.path.exists():
+            with open(self.path) as f:
+                self.runs = json.load(f).get('runs', [])
+
+    def baseline(self, profile: str, stage: str, metric: str, window: int = 5) -> Optional[float]:
+        """Median of ``metric`` over the last ``window`` runs of a stage/profile."""
+        values = [
+            run['stages'][stage][metric]
+            for run in self.runs
+            if run.get('profile') == profile and metric in run.get('stages', {}).get(stage, {})
+        ][-window:]
+        return statistics.median(values) if values else None
+
+    def check_regressions(self, run: Dict, thresholds: Dict[str, float] = None, window: int = 5) -> List[Dict]:
+        """
+        Compare a run against the recorded baseline.
+
+        Returns:
+            List of regressions: {stage, metric, baseline, value, change}
+        """
+        thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        regressions = []
+        for stage, metrics in run['stages'].items():
+            for metric, threshold in thresholds.items():
+                value = metrics.get(metric)
+                baseline = self.baseline(run['profile'], stage, metric, window)
+                if value is None or baseline is None:
+                    continue
+                if value - baseline <= NOISE_FLOORS.get(metric, 0):
+                    continue
+                change = (value - baseline) / baseline if baseline else float('inf')
+                if change > threshold:
+                    regressions.append({
+                        'stage': stage,
+                        'metric': metric,
+                        'baseline': baseline,
+                        'value': value,
+                        'change': round(change, 4),
+                    })
+        return regressions
+
+    def record(self, profile: str, stages: Dict[str, Dict], extra: Dict = None) -> Dict:
+        """Append a run and write the history file."""
+        run = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'profile': profile,
+            'stages': stages,
+            **(extra or {}),
+        }
+        self.runs.append(run)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({'runs': self.runs}, f, indent=2)
+        return run
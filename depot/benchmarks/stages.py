@@ -0,0 +1,386 @@
+"""
+Benchmark stages exercising the real ingestion and validation pipeline.
+
+Each stage runs production code on generated datasets; ``BenchmarkContext``
+carries the fixture records and artifacts (DuckDB paths etc.) that later
+stages build on. Stages must run inside a disposable database and inside
+``isolated_storage``, so synthetic files never reach real storage disks.
+"""
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+from unittest import mock
+
+import duckdb
+from django.conf import settings
+from django.test.utils import override_settings
+
+from depot.benchmarks.harness import benchmark_stage, measure
+from depot.data.definition_loader import definition_registry
+from depot.factories.data.bulk_generator import BulkDataGenerator
+
+logger = logging.getLogger(__name__)
+
+
+# Dataset profile -> approximate size of the generated table file
+SIZE_PROFILES = {
+    '10mb': 10 * 1024 * 1024,
+    '500mb': 500 * 1024 * 1024,
+    '2gb': 2 * 1024 * 1024 * 1024,
+}
+
+# Table used for the per-stage measurements; the patient table is generated
+# alongside it to keep the cohortPatientId universe consistent
+BENCHMARK_TABLE = 'laboratory'
+ROWS_PER_PATIENT = 50
+# Cohort mapped through the CNICS group, so the mapping stages do real renames
+BENCHMARK_COHORT = 'UNC - Chapel Hill'
+
+
+def dataset_paths(data_dir: Path, profile: str, size_bytes: int, seed: int = 0) -> Dict[str, Path]:
+    """
+    Generate (or reuse) the benchmark dataset for a profile.
+
+    Datasets are cached under ``data_dir/<profile>`` so repeated runs compare
+    like with like.
+    """
+    target = Path(data_dir) / profile
+    paths = {
+        'patient': target / 'patient.csv',
+        BENCHMARK_TABLE: target / f'{BENCHMARK_TABLE}.csv',
+    }
+    if all(path.exists() for path in paths.values()):
+        return paths
+
+    # Estimate bytes per row from a sample chunk
+    sample = BulkDataGenerator(BENCHMARK_TABLE, seed=seed).generate_chunk(1000)
+    bytes_per_row = max(1, len(sample.to_csv(index=False)) // 1000)
+    rows = max(1000, size_bytes // bytes_per_row)
+    patients = max(100, rows // ROWS_PER_PATIENT)
+
+    logger.info(f"Generating {profile} benchmark dataset: {rows} {BENCHMARK_TABLE} rows, {patients} patients")
+    BulkDataGenerator('patient', patient_count=patients, seed=seed).write(paths['patient'], patients)
+    BulkDataGenerator(BENCHMARK_TABLE, patient_count=patients, seed=seed + 1).write(paths[BENCHMARK_TABLE], rows)
+    return paths
+
+
+@contextmanager
+def isolated_storage():
+    """
+    Point every storage disk and the PHI workspace at a throwaway local root.
+
+    Cached storage instances are set aside for the duration, so code that
+    resolves storage through StorageManager writes under the temporary root;
+    the root is removed afterwards.
+    """
+    from depot.storage.manager import StorageManager
+
+    root = Path(tempfile.mkdtemp(prefix='naaccord_bench_storage_'))
+    disk_names = set(getattr(settings, 'STORAGE_CONFIG', {}).get('disks', {}))
+    disk_names.update({'local', 'uploads', 'workspace', 'scratch', 'reports'})
+    disks = {name: {'driver': 'local', 'type': 'local', 'root': str(root / name)} for name in disk_names}
+    environ = {
+        'WORKSPACE_STORAGE_DISK': 'workspace',
+        'SCRATCH_STORAGE_DISK': 'scratch',
+        'NAS_WORKSPACE_PATH': str(root / 'nas_workspace'),
+    }
+
+    cached = dict(StorageManager._instances)
+    StorageManager._instances.clear()
+    try:
+        with override_settings(STORAGE_CONFIG={'disks': disks}), \
+                mock.patch.dict(os.environ, environ):
+            yield root
+    finally:
+        StorageManager._instances.clear()
+        StorageManager._instances.update(cached)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+class BenchmarkContext:
+    """Fixture records and artifacts shared by benchmark stages."""
+
+    def __init__(self, dataset: Dict[str, Path], workspace: Path = None):
+        from django.contrib.auth import get_user_model
+        from depot.models import (
+            Cohort, CohortSubmission, CohortSubmissionDataTable, DataFileType, ProtocolYear,
+        )
+        from depot.storage.phi_manager import PHIStorageManager
+
+        self.dataset = dataset
+        self.workspace = Path(workspace or tempfile.mkdtemp(prefix='naaccord_bench_'))
+        self.workspace.mkdir(parents=True, exist_ok=True)
+        self.phi_manager = PHIStorageManager()
+        self.storage = self.phi_manager.storage
+
+        self.user, _ = get_user_model().objects.get_or_create(username='benchmark')
+        self.cohort, _ = Cohort.objects.get_or_create(name=BENCHMARK_COHORT)
+        protocol_year, _ = ProtocolYear.objects.get_or_create(year=2099)
+        self.submission = CohortSubmission.objects.create(
+            cohort=self.cohort,
+            protocol_year=protocol_year,
+            status='in_progress',
+            started_by=self.user,
+        )
+        self.file_type, _ = DataFileType.objects.get_or_create(
+            name=BENCHMARK_TABLE, defaults={'label': BENCHMARK_TABLE.title()}
+        )
+        self.data_table = CohortSubmissionDataTable.objects.create(
+            submission=self.submission,
+            data_file_type=self.file_type,
+        )
+
+        # Artifacts produced by earlier stages
+        self.raw_nas_path = None
+        self.duckdb_nas_path = None
+        self.duckdb_local_path = None
+        self.data_file = None
+
+        # Storage paths written during the run, removed by cleanup()
+        self.nas_artifacts: List[str] = []
+
+        self._prepare_patient_table()
+
+    def _prepare_patient_table(self):
+        """
+        Register the patient table (not measured) so in_file validation and
+        patient ID checks compare against a real reference file.
+        """
+        from depot.models import CohortSubmissionDataTable, DataFileType, DataTableFile
+        from depot.services.data_mapping import DataMappingService
+        from depot.services.patient_id_extractor import PatientIDExtractor
+
+        patient_type, _ = DataFileType.objects.get_or_create(name='patient', defaults={'label': 'Patient'})
+        patient_table = CohortSubmissionDataTable.objects.create(
+            submission=self.submission,
+            data_file_type=patient_type,
+        )
+
+        local_db = self.workspace / 'patient.duckdb'
+        conn = duckdb.connect(str(local_db))
+        try:
+            DataMappingService(self.cohort.name, 'patient').load_into_duckdb(conn, [str(self.dataset['patient'])])
+        finally:
+            conn.close()
+        with open(local_db, 'rb') as f:
+            duckdb_nas_path = self.storage.save(f"benchmarks/{self.submission.id}/duckdb/patient.duckdb", f)
+        self.nas_artifacts.append(duckdb_nas_path)
+        local_db.unlink()
+
+        patient_file = DataTableFile.objects.create(
+            data_table=patient_table,
+            uploaded_by=self.user,
+            duckdb_file_path=duckdb_nas_path,
+        )
+        PatientIDExtractor().extract_from_data_table_file(patient_file, self.user)
+
+    def store_raw(self, local_path: Path, name: str) -> str:
+        """Place a raw file on the uploads storage (not measured)."""
+        nas_path = f"benchmarks/{self.submission.id}/raw/{name}"
+        with open(local_path, 'rb') as f:
+            saved_path = self.storage.save(nas_path, f)
+        self.nas_artifacts.append(saved_path)
+        return saved_path
+
+    def cleanup(self):
+        import shutil
+        for path in self.nas_artifacts:
+            try:
+                self.storage.delete(path)
+            except Exception as e:
+                logger.warning(f"Failed to delete benchmark artifact {path}: {e}")
+        shutil.rmtree(self.workspace, ignore_errors=True)
+
+
+@benchmark_stage('process_file')
+def bench_process_file(ctx: BenchmarkContext) -> Dict:
+    from depot.services.data_mapping import DataMappingService
+
+    output = ctx.workspace / 'processed.csv'
+    service = DataMappingService(cohort_name=ctx.cohort.name, data_file_type=BENCHMARK_TABLE)
+    with measure() as metrics:
+        changes = service.process_file(str(ctx.dataset[BENCHMARK_TABLE]), str(output))
+    if changes['errors']:
+        raise RuntimeError(f"process_file failed: {changes['errors']}")
+    output.unlink(missing_ok=True)
+    return {'process_file': metrics}
+
+
+@benchmark_stage('convert_to_duckdb')
+def bench_convert_to_duckdb(ctx: BenchmarkContext) -> Dict:
+    from depot.models import DataTableFile
+
+    ctx.raw_nas_path = ctx.store_raw(ctx.dataset[BENCHMARK_TABLE], f'{BENCHMARK_TABLE}.csv')
+    with measure() as metrics:
+        result = ctx.phi_manager.convert_to_duckdb(
+            ctx.raw_nas_path, ctx.submission, BENCHMARK_TABLE, ctx.user
+        )
+    if result is None:
+        raise RuntimeError("convert_to_duckdb failed")
+
+    ctx.duckdb_nas_path = result[0]
+    ctx.duckdb_local_path = ctx.storage.get_absolute_path(ctx.duckdb_nas_path)
+    ctx.data_file = DataTableFile.objects.create(
+        data_table=ctx.data_table,
+        uploaded_by=ctx.user,
+        raw_file_path=ctx.raw_nas_path,
+        duckdb_file_path=ctx.duckdb_nas_path,
+    )
+    ctx.nas_artifacts.extend(path for path in result[:2] if path)
+    return {'convert_to_duckdb': metrics}
+
+
+@benchmark_stage('convert_multiple_files_to_duckdb')
+def bench_convert_multiple(ctx: BenchmarkContext) -> Dict:
+    # Split the table into two uploads sharing the header (streamed, by size)
+    source = ctx.dataset[BENCHMARK_TABLE]
+    parts = [ctx.workspace / 'part_1.csv', ctx.workspace / 'part_2.csv']
+    half = source.stat().st_size // 2
+    with open(source, 'rb') as src:
+        header = src.readline()
+        for index, part in enumerate(parts):
+            with open(part, 'wb') as out:
+                out.write(header)
+                for line in src:
+                    out.write(line)
+                    if index == 0 and src.tell() >= half:
+                        break
+
+    files_with_raw = []
+    for index, part in enumerate(parts, start=1):
+        nas_path = ctx.store_raw(part, part.name)
+        files_with_raw.append((index, nas_path))
+        part.unlink()
+
+    with measure() as metrics:
+        result = ctx.phi_manager.convert_multiple_files_to_duckdb(
+            files_with_raw, ctx.submission, BENCHMARK_TABLE, ctx.user
+        )
+    ctx.nas_artifacts.extend(path for path in result[:2] if path)
+    return {'convert_multiple_files_to_duckdb': metrics}
+
+
+@benchmark_stage('extract_patient_ids_task')
+def bench_extract_patient_ids(ctx: BenchmarkContext) -> Dict:
+    from depot.tasks.patient_extraction import extract_patient_ids_task
+
+    task_data = {'data_file_id': ctx.data_file.id, 'user_id': ctx.user.id}
+    with measure() as metrics:
+        extract_patient_ids_task.apply(args=[task_data], throw=True)
+    return {'extract_patient_ids_task': metrics}
+
+
+def _validation_run(ctx: BenchmarkContext):
+    from depot.models import ValidationRun
+
+    return ValidationRun.objects.create(
+        content_object=ctx.data_file,
+        data_file_type=ctx.file_type,
+        duckdb_path=ctx.duckdb_local_path,
+        status='running',
+    )
+
+
+@benchmark_stage('variable_validator')
+def bench_variable_validator(ctx: BenchmarkContext) -> Dict:
+    """One measurement per variable type, on the first variable of that type."""
+    from depot.models import ValidationVariable
+    from depot.validators.variable_validator import VariableValidator
+
+    definition = definition_registry.get_definition(BENCHMARK_TABLE)
+    run = _validation_run(ctx)
+    results = {}
+    for name in definition.get_variable_names():
+        var_def = definition.get_variable(name)
+        key = f"validate_{var_def.get('type', 'string')}"
+        if key in results:
+            continue
+        variable = ValidationVariable.objects.create(
+            validation_run=run,
+            column_name=name,
+            column_type=var_def.get('type', 'string'),
+            display_name=var_def.get('label', name),
+        )
+        with measure() as metrics:
+            with VariableValidator(ctx.duckdb_local_path, var_def, variable,
+                                   submission=ctx.submission, data_file=ctx.data_file) as validator:
+                validator.validate()
+        results[key] = metrics
+    return results
+
+
+@benchmark_stage('generate_summary')
+def bench_generate_summary(ctx: BenchmarkContext) -> Dict:
+    from depot.models import ValidationVariable
+    from depot.services.variable_summary_service import VariableSummaryService
+
+    definition = definition_registry.get_definition(BENCHMARK_TABLE)
+    run = _validation_run(ctx)
+    variables = [
+        ValidationVariable.objects.create(
+            validation_run=run,
+            column_name=name,
+            column_type=definition.get_variable(name).get('type', 'string'),
+            display_name=name,
+        )
+        for name in definition.get_variable_names()
+    ]
+    service = VariableSummaryService()
+    with measure() as metrics:
+        for variable in variables:
+            service.generate_summary(variable)
+    return {'generate_summary': metrics}
+
+
+@benchmark_stage('combine_files')
+def bench_combine_files(ctx: BenchmarkContext) -> Dict:
+    from depot.models import DataTableFile
+    from depot.services.duckdb_combiner import DuckDBCombinerService
+
+    # The combiner reads Parquet exports of the per-file tables
+    parquet = ctx.workspace / f'{BENCHMARK_TABLE}.parquet'
+    conn = duckdb.connect(ctx.duckdb_local_path, read_only=True)
+    try:
+        conn.execute(f"COPY data TO '{parquet}' (FORMAT PARQUET)")
+    finally:
+        conn.close()
+
+    data_files = [
+        DataTableFile.objects.create(
+            data_table=ctx.data_table,
+            uploaded_by=ctx.user,
+            version=version,
+            duckdb_file_path=str(parquet),
+        )
+        for version in (2, 3)
+    ]
+    combiner = DuckDBCombinerService(ctx.workspace / 'combined')
+    with measure() as metrics:
+        combined_path = combiner.combine_files(data_files, ctx.cohort, ctx.user)
+    Path(combined_path).unlink(missing_ok=True)
+    return {'combine_files': metrics}
+
+
+def run_stages(ctx: BenchmarkContext, selected: List[str] = None) -> Dict[str, Dict]:
+    """
+    Run registered stages in order.
+
+    Stages that later stages depend on (conversion) always run; ``selected``
+    only limits which results are reported.
+    """
+    from depot.benchmarks.harness import BENCHMARK_STAGES
+
+    results = {}
+    for name, stage in BENCHMARK_STAGES.items():
+        required = name == 'convert_to_duckdb'
+        if selected and name not in selected and not required:
+            continue
+        logger.info(f"Running benchmark stage {name}")
+        stage_results = stage(ctx)
+        if not selected or name in selected:
+            results.update(stage_results)
+    return results
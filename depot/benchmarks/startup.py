@@ -0,0 +1,141 @@
+"""
+Cold-start import profile for web workers.
+
+``profile_web_startup`` boots Django the way a Gunicorn worker does (settings,
+apps, middleware, URLconf) in a fresh interpreter under ``python -X
+importtime`` with ``SERVER_ROLE=web`` and reports what it imported, how long
+it took and the peak RSS. ``check_web_startup`` compares a profile with the
+targets below; the test suite and ``manage.py profile_startup`` both use it
+to keep services-only dependencies out of web workers.
+"""
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+# Libraries only the services role (Celery workers) needs. Web code may use
+# them inside functions that run on services servers, but must not import
+# them while starting up.
+SERVICES_ONLY_MODULES = (
+    'duckdb',
+    'pandas',
+    'numpy',
+    'pyarrow',
+    'boto3',
+    'matplotlib',
+    'seaborn',
+    'psutil',
+)
+
+# Web worker cold start: wall time to a ready WSGI handler with the URLconf
+# loaded, and peak RSS of that process
+WEB_STARTUP_TARGETS = {
+    'wall_seconds': 4.0,
+    'peak_rss_mb': 140,
+}
+
+# Runs in the child interpreter; the last stdout line carries the measurements
+_BOOT_SCRIPT = """
+import resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - started
+try:
+    # Peak of this image only; ru_maxrss can carry the forking parent's peak across exec
+    with open('/proc/self/status') as status:
+        peak_kb = next(int(line.split()[1]) for line in status if line.startswith('VmHWM:'))
+except (OSError, StopIteration):
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, peak_kb // 1024)
+"""
+
+ImportEntry = Tuple[str, int, int, int]  # (module, self us, cumulative us, nesting depth)
+
+
+def parse_importtime(output: str) -> List[ImportEntry]:
+    """Parse ``-X importtime`` lines into entries, in the order Python printed them."""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # One space after the separator, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def import_chain(entries: List[ImportEntry], module: str) -> List[str]:
+    """Modules that led to ``module`` being imported, innermost first."""
+    # Children are printed before their parents, at greater depth
+    for index, (name, _, _, depth) in enumerate(entries):
+        if name != module:
+            continue
+        chain = [name]
+        for parent, _, _, parent_depth in entries[index + 1:]:
+            if parent_depth < depth:
+                chain.append(parent)
+                depth = parent_depth
+                if depth == 0:
+                    break
+        return chain
+    return []
+
+
+def profile_web_startup(settings_module: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> dict:
+    """Boot a web worker in a fresh interpreter and measure its start-up."""
+    child_env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': settings_module or os.environ.get('DJANGO_SETTINGS_MODULE', 'depot.settings'),
+        'SERVER_ROLE': 'web',
+        **(env or {}),
+    }
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _BOOT_SCRIPT],
+        env=child_env,
+        cwd=str(settings.BASE_DIR),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Web start-up failed:\n{result.stderr[-4000:]}")
+
+    wall_seconds, peak_rss_mb = result.stdout.strip().splitlines()[-1].split()
+    entries = parse_importtime(result.stderr)
+    imported = {name for name, _, _, _ in entries}
+    return {
+        'wall_seconds': float(wall_seconds),
+        'peak_rss_mb': int(peak_rss_mb),
+        'entries': entries,
+        'services_only': {
+            module: import_chain(entries, module)
+            for module in SERVICES_ONLY_MODULES
+            if module in imported
+        },
+    }
+
+
+def slowest_imports(profile: dict, limit: int = 20) -> List[ImportEntry]:
+    """Top-level imports by cumulative time."""
+    top_level = [entry for entry in profile['entries'] if entry[3] == 0]
+    return sorted(top_level, key=lambda entry: entry[2], reverse=True)[:limit]
+
+
+def check_web_startup(profile: dict, targets: Optional[Dict[str, float]] = None) -> List[str]:
+    """Return a description of every target the profile misses (empty when it meets them all)."""
+    targets = {**WEB_STARTUP_TARGETS, **(targets or {})}
+    problems = [
+        f"{module} imported at web start-up via {' <- '.join(chain)}"
+        for module, chain in profile['services_only'].items()
+    ]
+    for metric, limit in targets.items():
+        if profile[metric] > limit:
+            problems.append(f"{metric} {profile[metric]} exceeds target {limit}")
+    return problems
@@ -1,5 +1,19 @@
+import logging
 import os
+import threading
+import time
+
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from kombu.serialization import dumps
+
+from depot.utils.instrumentation import span
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "depot.settings")
 
@@ -8,3 +22,159 @@ app = Celery("depot")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
+
+logger = logging.getLogger(__name__)
+
+# Per-process message size stats: task name -> {'count', 'last_bytes', 'max_bytes', 'over_threshold'}
+_message_size_stats = {}
+# Sizes not yet written to TaskMessageStats: (task, hour) -> {'count', 'total_bytes', 'max_bytes', 'over_threshold'}
+_pending_message_stats = {}
+_last_message_stats_flush = 0.0
+_message_size_lock = threading.Lock()
+
+
+def get_task_message_stats():
+    """Return a snapshot of published message sizes per task in this process."""
+    with _message_size_lock:
+        return {name: dict(stats) for name, stats in _message_size_stats.items()}
+
+
+def flush_task_message_stats():
+    """
+    Fold this process's buffered message sizes into TaskMessageStats.
+
+    Called periodically after publishes, at worker shutdown and by the
+    metrics endpoint. Buffered sizes are put back if the write fails.
+    """
+    global _last_message_stats_flush
+    from django.db import transaction
+    from django.db.models import F
+    from django.db.models.functions import Greatest
+    from depot.models import TaskMessageStats
+
+    with _message_size_lock:
+        pending = dict(_pending_message_stats)
+        _pending_message_stats.clear()
+        _last_message_stats_flush = time.monotonic()
+    try:
+        with transaction.atomic():
+            for (task, hour), delta in pending.items():
+                TaskMessageStats.objects.get_or_create(task=task, hour=hour)
+                TaskMessageStats.objects.filter(task=task, hour=hour).update(
+                    count=F('count') + delta['count'],
+                    total_bytes=F('total_bytes') + delta['total_bytes'],
+                    max_bytes=Greatest(F('max_bytes'), delta['max_bytes']),
+                    over_threshold=F('over_threshold') + delta['over_threshold'],
+                )
+    except Exception:
+        with _message_size_lock:
+            for key, delta in pending.items():
+                _merge_message_stats(_pending_message_stats, key, delta)
+        raise
+
+
+def _merge_message_stats(pending, key, delta):
+    stats = pending.setdefault(key, {'count': 0, 'total_bytes': 0, 'max_bytes': 0, 'over_threshold': 0})
+    stats['count'] += delta['count']
+    stats['total_bytes'] += delta['total_bytes']
+    stats['max_bytes'] = max(stats['max_bytes'], delta['max_bytes'])
+    stats['over_threshold'] += delta['over_threshold']
+
+
+def _flush_task_message_stats_if_due():
+    from django.conf import settings
+    interval = getattr(settings, 'CELERY_MESSAGE_STATS_FLUSH_SECONDS', 60)
+    with _message_size_lock:
+        due = _pending_message_stats and time.monotonic() - _last_message_stats_flush >= interval
+    if due:
+        try:
+            flush_task_message_stats()
+        except Exception:
+            logger.warning("Could not record task message sizes; will retry on the next flush", exc_info=True)
+
+
+@before_task_publish.connect
+def record_task_message_size(sender=None, body=None, **kwargs):
+    """
+    Record the serialized payload size of every published task.
+
+    Sizes are logged (as a warning above CELERY_MESSAGE_SIZE_WARNING_BYTES),
+    buffered for TaskMessageStats, which /health/metrics/ exports whichever
+    process published the task, and recorded as a ``celery.publish`` span so
+    publishes inside a span collector reach the persisted timeline.
+    """
+    try:
+        _content_type, _encoding, data = dumps(body, serializer=app.conf.task_serializer)
+        size = len(data)
+    except Exception:
+        logger.debug("Could not measure message size for %s", sender, exc_info=True)
+        return
+
+    from django.conf import settings
+    from django.db import transaction
+    from django.utils import timezone
+    threshold = getattr(settings, 'CELERY_MESSAGE_SIZE_WARNING_BYTES', 64 * 1024)
+    over_threshold = 1 if size > threshold else 0
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+    with _message_size_lock:
+        stats = _message_size_stats.setdefault(
+            sender, {'count': 0, 'last_bytes': 0, 'max_bytes': 0, 'over_threshold': 0}
+        )
+        stats['count'] += 1
+        stats['last_bytes'] = size
+        stats['max_bytes'] = max(stats['max_bytes'], size)
+        stats['over_threshold'] += over_threshold
+        _merge_message_stats(_pending_message_stats, (sender, hour), {
+            'count': 1, 'total_bytes': size, 'max_bytes': size, 'over_threshold': over_threshold,
+        })
+
+    with span('celery.publish', task=sender) as publish:
+        publish.add_bytes(size)
+        if size > threshold:
+            publish.set(over_threshold=True)
+    if size > threshold:
+        # %s placeholders: the log sanitizer stringifies arguments
+        logger.warning("Task message for %s is %s bytes (threshold %s)", sender, size, threshold)
+    else:
+        logger.debug("Task message for %s is %s bytes", sender, size)
+    # Publishes inside a transaction are flushed once it commits
+    transaction.on_commit(_flush_task_message_stats_if_due)
+
+
+@task_prerun.connect
+@task_postrun.connect
+def recycle_db_connections(task=None, **kwargs):
+    """Recycle stale persistent DB connections at task boundaries."""
+    if task is not None and task.request.is_eager:
+        # Eager tasks run inside the caller's request/transaction
+        return
+    from depot.utils.db_connections import recycle_stale_connections
+    recycle_stale_connections()
+
+
+@worker_process_init.connect
+def warm_notebook_render_pool(**kwargs):
+    """Start warm R sessions in each worker process when the render pool is enabled."""
+    from depot.services.notebook_render import get_render_pool
+    pool = get_render_pool()
+    if pool is None:
+        return
+    try:
+        pool.warm()
+    except Exception:
+        logger.warning("Could not warm notebook render pool; renders will start sessions on demand", exc_info=True)
+
+
+@worker_process_shutdown.connect
+def stop_notebook_render_pool(**kwargs):
+    from depot.services.notebook_render import shutdown_render_pool
+    shutdown_render_pool()
+
+
+@worker_process_shutdown.connect
+def flush_task_message_stats_on_shutdown(**kwargs):
+    try:
+        flush_task_message_stats()
+    except Exception:
+        logger.warning("Could not record task message sizes at worker shutdown", exc_info=True)
@@ -1,7 +1,6 @@
 from django_components import register
 
 from depot.components.form_page_component import FormPageComponent
-from depot.data.upload_prechecker import Auditor
 from depot.models import DataFileType
 import tempfile
 import os
@@ -96,6 +95,8 @@ class AuditPage(FormPageComponent):
         else:
             data_content = self.data["data_content"]
 
+        from depot.data.upload_prechecker import Auditor
+
         # Get the DataFileType object
         data_file_type_obj = DataFileType.objects.get(name=data_file_type)
         auditor = Auditor(data_file_type_obj, data_content)
@@ -1,3 +1,5 @@
+import uuid
+
 from django_components import Component, register
 
 from depot.components.audit_component import AuditComponent
@@ -14,7 +16,7 @@ class AuditVariableSummaryDataReportComponent(AuditComponent):
     ):
         context = super().get_context_data(**kwargs)
 
-        results = report.get("results", [])
+        results = [self.with_chart_ids(result) for result in report.get("results", [])]
 
         context.update(
             {
@@ -23,3 +25,13 @@ class AuditVariableSummaryDataReportComponent(AuditComponent):
         )
 
         return context
+
+    @staticmethod
+    def with_chart_ids(result):
+        """Give chart spec results element ids for their Plotly div and spec."""
+        rendered = (result.get("report") or {}).get("value_rendered") or {}
+        if rendered.get("type") != "chart_spec":
+            return result
+
+        chart_id = f"chart-{uuid.uuid4().hex}"
+        return {**result, "chart_id": chart_id, "chart_spec_id": f"{chart_id}-spec"}
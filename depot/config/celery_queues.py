@@ -0,0 +1,165 @@
+"""
+Celery queue layout by workload class.
+
+Tasks are routed to one queue per workload class so a multi-GB DuckDB
+conversion cannot starve sub-second variable validations or UI-visible
+status updates. Each worker pool subscribes to a subset of queues and is
+sized with the concurrency/prefetch values below (tuned for the 16GB
+services host).
+
+Worker entrypoints resolve their arguments with:
+
+    python -m depot.config.celery_queues heavy-io cpu-validation
+    # -> -Q heavy-io,cpu-validation -c 4 --prefetch-multiplier 1
+
+Tasks not listed in TASK_ROUTES go to DEFAULT_QUEUE.
+
+This module must stay importable without Django settings configured.
+"""
+import sys
+
+
+DEFAULT_QUEUE = 'celery'
+
+# Queue name -> worker pool sizing
+WORKLOAD_QUEUES = {
+    'heavy-io': {
+        'description': 'DuckDB conversion, hashing and other full-file reads',
+        'concurrency': 2,
+        'prefetch_multiplier': 1,
+    },
+    'cpu-validation': {
+        'description': 'Per-variable validation and patient ID checks',
+        'concurrency': 4,
+        'prefetch_multiplier': 4,
+    },
+    'summaries': {
+        'description': 'Variable, table and submission summaries',
+        'concurrency': 2,
+        'prefetch_multiplier': 4,
+    },
+    'notebooks': {
+        'description': 'Quarto/R notebook compilation',
+        'concurrency': 1,
+        'prefetch_multiplier': 1,
+    },
+    'maintenance': {
+        'description': 'Cleanup, integrity verification and other periodic jobs',
+        'concurrency': 1,
+        'prefetch_multiplier': 1,
+    },
+    'integrity-scrub': {
+        'description': 'Periodic re-hash of stored PHI files, kept apart so cleanup is not queued behind it',
+        'concurrency': 1,
+        'prefetch_multiplier': 1,
+    },
+    DEFAULT_QUEUE: {
+        'description': 'Unrouted and lightweight orchestration tasks',
+        'concurrency': 2,
+        'prefetch_multiplier': 4,
+    },
+}
+
+# Task name (or glob) -> queue
+TASK_ROUTES = {
+    # heavy-io
+    'depot.tasks.duckdb_creation.create_duckdb_task': 'heavy-io',
+    'depot.tasks.file_integrity.calculate_hashes_in_workflow': 'heavy-io',
+    'depot.tasks.file_integrity.calculate_file_hash_task': 'heavy-io',
+    'depot.tasks.patient_extraction.extract_patient_ids_task': 'heavy-io',
+    'depot.tasks.patient_extraction.extract_and_validate_patient_ids': 'heavy-io',
+    'depot.tasks.async_file_processing.*': 'heavy-io',
+    'depot.tasks.storage_tasks.*': 'heavy-io',
+    'depot.tasks.validation.convert_precheck_to_duckdb': 'heavy-io',
+
+    # cpu-validation
+    'depot.tasks.validation_orchestration.*': 'cpu-validation',
+    'depot.tasks.precheck_validation.*': 'cpu-validation',
+    'depot.tasks.patient_id_validation.*': 'cpu-validation',
+    'depot.tasks.patient_extraction.validate_submission_files_task': 'cpu-validation',
+    'depot.tasks.patient_extraction.generate_validation_report': 'cpu-validation',
+
+    # summaries
+    'depot.tasks.summary_generation.*': 'summaries',
+
+    # notebooks (NotebookService compiles run inside these)
+    'depot.tasks.upload_precheck.*': 'notebooks',
+
+    # maintenance
+    'depot.tasks.cleanup.*': 'maintenance',
+    'depot.tasks.cleanup_orphaned_files.*': 'maintenance',
+    'depot.tasks.file_integrity.migrate_pending_hashes': 'maintenance',
+    'depot.tasks.file_integrity.verify_file_integrity': 'maintenance',
+
+    # integrity-scrub
+    'depot.tasks.file_integrity.scrub_phi_integrity': 'integrity-scrub',
+}
+
+# Long-running tasks are acknowledged after completion so a worker crash
+# (e.g. OOM on a large file) re-queues them instead of losing them. They get
+# a hard time limit, and the Redis visibility timeout must stay above it or
+# the broker redelivers a task that is still running.
+LONG_TASK_TIME_LIMIT = 6 * 60 * 60
+VISIBILITY_TIMEOUT_MARGIN = 60 * 60
+ACKS_LATE_TASKS = [
+    'depot.tasks.duckdb_creation.create_duckdb_task',
+    'depot.tasks.file_integrity.calculate_file_hash_task',
+    'depot.tasks.patient_extraction.extract_patient_ids_task',
+    'depot.tasks.async_file_processing.process_uploaded_file_async',
+    'depot.tasks.storage_tasks.process_large_file_async',
+    'depot.tasks.validation.convert_precheck_to_duckdb',
+    'depot.tasks.upload_precheck.process_precheck_run',
+    'depot.tasks.upload_precheck.process_precheck_run_with_duckdb',
+]
+
+
+def celery_task_routes():
+    """Return TASK_ROUTES in the format expected by ``task_routes``."""
+    return {pattern: {'queue': queue} for pattern, queue in TASK_ROUTES.items()}
+
+
+def celery_task_annotations(time_limit=LONG_TASK_TIME_LIMIT):
+    """Return per-task annotations enabling ``acks_late`` and a hard time limit for long tasks."""
+    return {
+        name: {'acks_late': True, 'reject_on_worker_lost': True, 'time_limit': time_limit}
+        for name in ACKS_LATE_TASKS
+    }
+
+
+def celery_broker_transport_options(time_limit=LONG_TASK_TIME_LIMIT):
+    """
+    Return Redis transport options for ``broker_transport_options``.
+
+    Unacknowledged messages are redelivered after ``visibility_timeout``,
+    so it is set above the longest acks_late task's time limit.
+    """
+    return {'visibility_timeout': time_limit + VISIBILITY_TIMEOUT_MARGIN}
+
+
+def worker_args(queues):
+    """
+    Build ``celery worker`` arguments for a pool subscribing to ``queues``.
+
+    Concurrency is the sum of the queues' concurrency and the prefetch
+    multiplier is the smallest, so a pool mixing heavy and light queues
+    never over-reserves heavy tasks.
+
+    Raises:
+        ValueError: If a queue name is unknown
+    """
+    unknown = [q for q in queues if q not in WORKLOAD_QUEUES]
+    if unknown:
+        raise ValueError(f"Unknown Celery queues: {', '.join(unknown)}")
+
+    concurrency = sum(WORKLOAD_QUEUES[q]['concurrency'] for q in queues)
+    prefetch = min(WORKLOAD_QUEUES[q]['prefetch_multiplier'] for q in queues)
+    return ['-Q', ','.join(queues), '-c', str(concurrency), '--prefetch-multiplier', str(prefetch)]
+
+
+if __name__ == '__main__':
+    requested = sys.argv[1:] or list(WORKLOAD_QUEUES)
+    try:
+        print(' '.join(worker_args(requested)))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
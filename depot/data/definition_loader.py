@@ -1,36 +1,193 @@
 """
 Simple JSON-based definition loader for data file types.
+
+Definitions and cohort mapping files are cached process-wide by
+``DefinitionRegistry``. Each cached entry is keyed on the file's mtime, so
+edits on disk are picked up on the next lookup without restarting workers.
+Cached objects are shared between callers and must be treated as read-only.
 """
+import hashlib
 import json
+import os
+import threading
 from pathlib import Path
 
 
+DEFINITIONS_DIR = Path(__file__).parent / 'definitions'
+MAPPINGS_DIR = Path(__file__).parent / 'mappings'
+
+
+def parse_validator(validator_def):
+    """
+    Normalize a validator entry from a definition into ``(name, params)``.
+
+    Validators are either a bare string (``"no_duplicates"``) or a dict
+    (``{"name": "range", "params": [1900, 2025]}``).
+    """
+    if isinstance(validator_def, str):
+        return validator_def, {}
+    return validator_def.get('name'), validator_def.get('params', {})
+
+
+def parse_summarizer(summarizer_def):
+    """Normalize a summarizer entry into its name."""
+    if isinstance(summarizer_def, str):
+        return summarizer_def
+    return summarizer_def.get('name')
+
+
 class JSONDefinition:
     """Wrapper class for JSON definitions to match the expected interface."""
-    
-    def __init__(self, definition_path):
+
+    def __init__(self, definition_path, definition=None, version=None):
         self.definition_path = Path(definition_path)
-        with open(self.definition_path, 'r') as f:
-            self.definition = json.load(f)
-    
+        if definition is None:
+            with open(self.definition_path, 'rb') as f:
+                raw = f.read()
+            definition = json.loads(raw)
+            version = hashlib.sha256(raw).hexdigest()[:16]
+        self.definition = definition
+        self.version = version
+
+        # Pre-index variables so per-variable lookups are O(1)
+        self.variables_by_name = {}
+        self.variables_by_lower_name = {}
+        self.validators_by_name = {}
+        self.summarizers_by_name = {}
+        for var_def in self._variable_list():
+            name = var_def.get('name')
+            if not name:
+                continue
+            self.variables_by_name[name] = var_def
+            self.variables_by_lower_name.setdefault(name.lower(), var_def)
+            self.validators_by_name[name] = [
+                parse_validator(v) for v in var_def.get('validators', [])
+            ]
+            self.summarizers_by_name[name] = [
+                parse_summarizer(s) for s in var_def.get('summarizers', [])
+            ]
+
+    def _variable_list(self):
+        if isinstance(self.definition, dict):
+            return self.definition.get('variables', [])
+        return self.definition
+
     def get_definition(self):
         return self.definition
 
+    def get_variable(self, name, case_sensitive=True):
+        """Return the definition entry for a variable, or None."""
+        if case_sensitive:
+            return self.variables_by_name.get(name)
+        return self.variables_by_lower_name.get(name.lower())
+
+    def get_variable_names(self):
+        """Return variable names in definition order."""
+        return list(self.variables_by_name)
+
+
+class DefinitionRegistry:
+    """
+    Process-wide cache of data definitions and cohort mapping files.
+
+    Files are parsed once per process and re-read only when their mtime
+    changes. Lookups are thread-safe.
+    """
+
+    def __init__(self, definitions_dir=DEFINITIONS_DIR, mappings_dir=MAPPINGS_DIR):
+        self.definitions_dir = Path(definitions_dir)
+        self.mappings_dir = Path(mappings_dir)
+        self._lock = threading.Lock()
+        # (kind, path) -> (mtime_ns, value)
+        self._cache = {}
+
+    def _get_cached(self, kind, path, loader):
+        path = Path(path)
+        mtime = os.stat(path).st_mtime_ns
+        key = (kind, str(path))
+
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+            value = loader(path)
+            self._cache[key] = (mtime, value)
+            return value
+
+    def load_json(self, path):
+        """
+        Load and cache an arbitrary JSON file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            json.JSONDecodeError: If the file cannot be parsed
+        """
+        def loader(p):
+            with open(p, 'r') as f:
+                return json.load(f)
+        return self._get_cached('json', path, loader)
+
+    def definition_path(self, data_file_type):
+        """Return the definition file path for a data file type, or None."""
+        for filename in (f'{data_file_type}_definition.json', f'{data_file_type}.json'):
+            candidate = self.definitions_dir / filename
+            if candidate.exists():
+                return candidate
+        return None
+
+    def get_definition(self, data_file_type):
+        """
+        Return the cached ``JSONDefinition`` for a data file type.
+
+        Raises:
+            ValueError: If no definition file exists for the type
+        """
+        definition_file = self.definition_path(data_file_type)
+        if definition_file is None:
+            raise ValueError(f"Definition file not found for type: {data_file_type}")
+        return self._get_cached('definition', definition_file, JSONDefinition)
+
+    def get_mapping_registry(self):
+        """Return the parsed mappings/registry.json, or None if it does not exist."""
+        registry_path = self.mappings_dir / 'registry.json'
+        if not registry_path.exists():
+            return None
+        return self.load_json(registry_path)
+
+    def get_mapping_path(self, mapping_group, data_file_type):
+        """
+        Return the mapping file for a cohort group and file type.
+
+        Falls back to the group's ``_default.json``. Returns None if neither exists.
+        """
+        group_dir = self.mappings_dir / 'cohort_groups' / mapping_group
+        for filename in (f'{data_file_type}.json', '_default.json'):
+            candidate = group_dir / filename
+            if candidate.exists():
+                return candidate
+        return None
+
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._cache.clear()
+
+
+definition_registry = DefinitionRegistry()
+
 
 def get_definition_for_type(data_file_type):
     """
     Load a JSON definition for a given data file type.
-    
+
     Args:
         data_file_type: Name of the data file type (e.g., 'patient', 'laboratory')
-    
+
     Returns:
-        JSONDefinition instance
+        JSONDefinition instance (shared, cached per process)
     """
-    base_path = Path(__file__).parent / 'definitions'
-    definition_file = base_path / f'{data_file_type}_definition.json'
-    
-    if not definition_file.exists():
-        raise ValueError(f"Definition file not found for type: {data_file_type}")
-    
-    return JSONDefinition(definition_file)
\ No newline at end of file
+    return definition_registry.get_definition(data_file_type)
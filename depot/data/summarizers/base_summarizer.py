@@ -1,16 +1,29 @@
 import io
 import base64
+import importlib.util
 
-# Make matplotlib optional - only needed for chart summarizers
-# Templates now use Plotly for rendering, so matplotlib is less critical
-try:
-    import matplotlib
-    matplotlib.use("Agg")  # Use non-GUI backend
-    import matplotlib.pyplot as plt
-    MATPLOTLIB_AVAILABLE = True
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
-    plt = None
+from depot.utils.sql import quote_identifier  # noqa: F401 (re-exported for summarizers)
+
+# Chart summarizers report compact chart specs (bins, counts, quartiles,
+# categories) computed in DuckDB, which templates draw with Plotly.
+# matplotlib is only needed to export a spec as an image on request (the
+# "image" param), and is imported on first use (see plotting()).
+MATPLOTLIB_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ("matplotlib", "seaborn"))
+
+_plotting = None
+
+
+def plotting():
+    """Return (pyplot, seaborn), importing them and applying the chart theme on first use."""
+    global _plotting
+    if _plotting is None:
+        import matplotlib
+        matplotlib.use("Agg")  # Use non-GUI backend
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        sns.set_theme(style="whitegrid")
+        _plotting = (plt, sns)
+    return _plotting
 
 try:
     from django_sonar.utils import sonar
@@ -55,6 +68,41 @@ class BaseSummarizer:
         """
         raise NotImplementedError("Subclasses must implement the summarize method.")
 
+    def query(self, data, sql):
+        """Run ``sql`` against ``data`` registered in DuckDB as the relation ``data``."""
+        import duckdb
+
+        conn = duckdb.connect()
+        try:
+            conn.register("data", data)
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def chart_report(self, chart, spec, params=None):
+        """
+        Report a chart spec for Plotly, plus a base64 PNG of it when the
+        summarizer params ask for ``{"image": True}``.
+        """
+        report = {
+            "status": "success",
+            "value": spec,
+            "value_rendered": {"type": "chart_spec", "chart": chart, "data": spec},
+        }
+
+        if isinstance(params, dict) and params.get("image"):
+            report["image"] = (
+                {"type": "base64_image", "data": self.render_plot(self.plot(spec))}
+                if MATPLOTLIB_AVAILABLE
+                else None
+            )
+
+        return report
+
+    def plot(self, spec):
+        """Draw a chart spec as a matplotlib figure, for image export."""
+        raise NotImplementedError("Chart summarizers must implement the plot method.")
+
     def render_plot(self, plot):
         if not MATPLOTLIB_AVAILABLE:
             return None
@@ -73,6 +121,7 @@ class BaseSummarizer:
         buffer.close()
 
         # Close the figure to free memory
+        plt, _ = plotting()
         plt.close(fig)
 
         return image_base64
@@ -1,24 +1,10 @@
-from .base_summarizer import BaseSummarizer, MATPLOTLIB_AVAILABLE
-
-if MATPLOTLIB_AVAILABLE:
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    sns.set_theme(style="whitegrid")
-else:
-    plt = None
-    sns = None
+from .base_summarizer import BaseSummarizer, plotting, quote_identifier
 
 
 class Summarizer(BaseSummarizer):
     display_name = "Box Plot"
 
     def summarize(self, variable, type, data, params=None):
-        if not MATPLOTLIB_AVAILABLE:
-            return {
-                "status": "skipped",
-                "message": "matplotlib not available",
-            }
-
         variable_data = data[variable]
 
         # Ensure the variable is numeric
@@ -28,28 +14,74 @@ class Summarizer(BaseSummarizer):
                 "message": f"Variable '{variable}' is not numeric.",
             }
 
-        box_plot = self.gen_boxplot(variable_data)
+        return self.chart_report("box_plot", self.gen_boxplot(variable, data), params)
+
+    def gen_boxplot(self, variable, data):
+        """
+        Quartiles (linear interpolation), whiskers at the furthest values
+        within 1.5 IQR of the box, and the number of values beyond them.
+        """
+        column = f"CAST({quote_identifier(variable)} AS DOUBLE)"
+        row = self.query(
+            data,
+            f"""
+            WITH v AS (
+                SELECT {column} AS x FROM data
+                WHERE {column} IS NOT NULL AND isfinite({column})
+            ),
+            q AS (
+                SELECT
+                    count(*) AS n,
+                    min(x) AS lo,
+                    max(x) AS hi,
+                    quantile_cont(x, 0.25) AS q1,
+                    quantile_cont(x, 0.5) AS median,
+                    quantile_cont(x, 0.75) AS q3
+                FROM v
+            )
+            SELECT
+                n, lo, hi, q1, median, q3,
+                (SELECT min(x) FROM v WHERE x >= q1 - 1.5 * (q3 - q1)),
+                (SELECT max(x) FROM v WHERE x <= q3 + 1.5 * (q3 - q1)),
+                (SELECT count(*) FROM v WHERE x < q1 - 1.5 * (q3 - q1) OR x > q3 + 1.5 * (q3 - q1))
+            FROM q
+            """,
+        )[0]
 
+        count, lo, hi, q1, median, q3, lower_whisker, upper_whisker, outlier_count = row
         return {
-            "status": "success",
-            "value": box_plot,
-            "value_rendered": {
-                "type": "base64_image",
-                "data": self.render_plot(box_plot),
-            },
+            "count": count,
+            "min": lo,
+            "q1": q1,
+            "median": median,
+            "q3": q3,
+            "max": hi,
+            "lower_whisker": lower_whisker,
+            "upper_whisker": upper_whisker,
+            "outlier_count": outlier_count,
         }
 
-    def gen_boxplot(self, variable_data, title=None, xlabel=None, ylabel=None):
+    def plot(self, spec, title=None, xlabel=None, ylabel=None):
+        plt, sns = plotting()
         fig, ax = plt.subplots(figsize=(8, 6))
 
         sns.set_color_codes("pastel")
 
-        sns.boxplot(
-            x=variable_data,
-            ax=ax,
-            color="b",
-            width=0.5,
-        )
+        if spec["count"]:
+            ax.bxp(
+                [{
+                    "whislo": spec["lower_whisker"],
+                    "q1": spec["q1"],
+                    "med": spec["median"],
+                    "q3": spec["q3"],
+                    "whishi": spec["upper_whisker"],
+                    "fliers": [],
+                }],
+                vert=False,
+                widths=0.5,
+                patch_artist=True,
+                boxprops={"facecolor": "b"},
+            )
 
         if title:
             ax.set_title(title, fontsize=16, pad=15)
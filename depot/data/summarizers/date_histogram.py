@@ -1,27 +1,10 @@
-import numpy as np
-import pandas as pd
-
-from .base_summarizer import BaseSummarizer, MATPLOTLIB_AVAILABLE
-
-if MATPLOTLIB_AVAILABLE:
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    sns.set_theme(style="whitegrid")
-else:
-    plt = None
-    sns = None
+from .base_summarizer import BaseSummarizer, plotting, quote_identifier
 
 
 class Summarizer(BaseSummarizer):
     display_name = "Date Histogram"
 
     def summarize(self, variable, type, data, params=None):
-        if not MATPLOTLIB_AVAILABLE:
-            return {
-                "status": "skipped",
-                "message": "matplotlib not available",
-            }
-
         variable_data = data[variable]
 
         if (
@@ -32,59 +15,80 @@ class Summarizer(BaseSummarizer):
                 "message": f"Variable '{variable}' is not numeric or datetime.",
             }
 
-        hist = self.gen_date_histogram(variable_data, title="Histogram")
-
-        return {
-            "status": "success",
-            "value": hist,
-            "value_rendered": {"type": "base64_image", "data": self.render_plot(hist)},
-        }
-
-    def gen_date_histogram(self, date_data, title=None, xlabel=None, ylabel=None):
-        if not isinstance(date_data, pd.Series):
-            date_data = pd.Series(date_data)
-
-        date_data = pd.to_datetime(date_data, format="%Y", errors="coerce")
+        year = (
+            f"year({quote_identifier(variable)})"
+            if variable_data.dtype.kind == "M"
+            else self.numeric_year(variable)
+        )
+        return self.chart_report("date_histogram", self.gen_date_histogram(year, data), params)
+
+    def numeric_year(self, variable):
+        # Whole numbers that are years pandas can represent as dates
+        column = f"CAST({quote_identifier(variable)} AS DOUBLE)"
+        return f"CASE WHEN {column} = floor({column}) AND {column} BETWEEN 1678 AND 2261 THEN CAST({column} AS INTEGER) END"
+
+    def gen_date_histogram(self, year, data):
+        """
+        Counts per year, or per ``step`` years (about ten bins) when the
+        years span more than a decade.
+        """
+        rows = self.query(
+            data,
+            f"""
+            WITH v AS (SELECT {year} AS y FROM data),
+            bounds AS (SELECT min(y) AS lo, max(y) AS hi FROM v)
+            SELECT
+                lo,
+                CASE WHEN hi - lo <= 10 THEN 1 ELSE greatest(1, (hi - lo) // 10) END AS step,
+                lo + (y - lo) // step * step AS start,
+                count(*) AS count
+            FROM v, bounds
+            WHERE y IS NOT NULL
+            GROUP BY ALL
+            ORDER BY start
+            """,
+        )
 
-        date_data = date_data.dropna()
+        if not rows:
+            return {"bins": [], "count": 0, "step": None}
 
-        min_year = date_data.min().year
-        max_year = date_data.max().year
-        year_range = max_year - min_year
+        lo, step = rows[0][0], rows[0][1]
+        counts = {row[2]: row[3] for row in rows}
+        last = rows[-1][2]
 
-        if year_range <= 10:
-            bins = np.arange(min_year, max_year + 2)
-        else:
-            bins = np.arange(min_year, max_year + 2, step=max(1, year_range // 10))
+        return {
+            "bins": [
+                {"start": start, "end": start + step - 1, "count": counts.get(start, 0)}
+                for start in range(lo, last + 1, step)
+            ],
+            "count": sum(counts.values()),
+            "step": step,
+        }
 
+    def plot(self, spec, title="Histogram", xlabel=None, ylabel=None):
+        plt, sns = plotting()
         fig, ax = plt.subplots(figsize=(10, 6))
 
         sns.set_color_codes("pastel")
-        sns.histplot(
-            date_data.dt.year,
-            bins=bins,
-            kde=False,
-            stat="count",  # Ensure y-axis displays counts
+        bins = spec["bins"]
+        ax.bar(
+            [b["start"] for b in bins],
+            [b["count"] for b in bins],
+            width=spec["step"] or 1,
+            align="edge",
             color="b",
-            ax=ax,
         )
 
-        ax.set_xticks(bins)
-        ax.set_xticklabels([str(year) for year in bins], rotation=45)
+        ax.set_xticks([b["start"] for b in bins])
+        ax.set_xticklabels([str(b["start"]) for b in bins], rotation=45)
 
         ax.yaxis.set_major_locator(plt.MaxNLocator(integer=True))
 
         # Set title and labels
         if title:
             ax.set_title(title, fontsize=16, pad=15)
-        if xlabel:
-            ax.set_xlabel(xlabel, fontsize=12, labelpad=10)
-        else:
-            ax.set_xlabel("Year", fontsize=12, labelpad=10)
-        if ylabel:
-            ax.set_ylabel(ylabel, fontsize=12, labelpad=10)
-        else:
-            ax.set_ylabel("Count", fontsize=12, labelpad=10)
+        ax.set_xlabel(xlabel or "Year", fontsize=12, labelpad=10)
+        ax.set_ylabel(ylabel or "Count", fontsize=12, labelpad=10)
 
         sns.despine(left=True, bottom=True)
 
@@ -1,26 +1,11 @@
-import numpy as np
-
-from .base_summarizer import BaseSummarizer, MATPLOTLIB_AVAILABLE
-
-if MATPLOTLIB_AVAILABLE:
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    sns.set_theme(style="whitegrid")
-else:
-    plt = None
-    sns = None
+from .base_summarizer import BaseSummarizer, plotting, quote_identifier
 
 
 class Summarizer(BaseSummarizer):
     display_name = "Histogram"
+    bin_count = 10
 
     def summarize(self, variable, type, data, params=None):
-        if not MATPLOTLIB_AVAILABLE:
-            return {
-                "status": "skipped",
-                "message": "matplotlib not available",
-            }
-
         variable_data = data[variable]
 
         if (
@@ -31,26 +16,69 @@ class Summarizer(BaseSummarizer):
                 "message": f"Variable '{variable}' is not numeric.",
             }
 
-        hist = self.gen_histogram(variable_data, title="Histogram")
+        return self.chart_report("histogram", self.gen_histogram(variable, data), params)
+
+    def gen_histogram(self, variable, data):
+        """
+        Equal-width bins between the minimum and maximum finite values; the
+        last bin includes the maximum.
+        """
+        column = f"CAST({quote_identifier(variable)} AS DOUBLE)"
+        rows = self.query(
+            data,
+            f"""
+            WITH v AS (
+                SELECT {column} AS x FROM data
+                WHERE {column} IS NOT NULL AND isfinite({column})
+            ),
+            bounds AS (SELECT min(x) AS lo, max(x) AS hi FROM v)
+            SELECT
+                lo,
+                hi,
+                CASE WHEN hi = lo THEN 0
+                     ELSE least(CAST(floor((x - lo) / (hi - lo) * {self.bin_count}) AS INTEGER), {self.bin_count - 1})
+                END AS bin,
+                count(*) AS count
+            FROM v, bounds
+            GROUP BY ALL
+            ORDER BY bin
+            """,
+        )
+
+        if not rows:
+            return {"bins": [], "count": 0, "min": None, "max": None}
+
+        lo, hi = rows[0][0], rows[0][1]
+        bin_count = 1 if hi == lo else self.bin_count
+        width = (hi - lo) / bin_count
+        counts = {row[2]: row[3] for row in rows}
 
         return {
-            "status": "success",
-            "value": hist,
-            "value_rendered": {"type": "base64_image", "data": self.render_plot(hist)},
+            "bins": [
+                {
+                    "start": lo + i * width,
+                    "end": hi if i == bin_count - 1 else lo + (i + 1) * width,
+                    "count": counts.get(i, 0),
+                }
+                for i in range(bin_count)
+            ],
+            "count": sum(counts.values()),
+            "min": lo,
+            "max": hi,
         }
 
-    def gen_histogram(self, variable_data, title=None, xlabel=None, ylabel=None):
+    def plot(self, spec, title="Histogram", xlabel=None, ylabel=None):
+        plt, sns = plotting()
         fig, ax = plt.subplots(figsize=(8, 6))
 
         sns.set_color_codes("pastel")
-        sns.histplot(
-            variable_data,
-            kde=False,
-            bins=10,
+        bins = spec["bins"]
+        ax.bar(
+            [b["start"] for b in bins],
+            [b["count"] for b in bins],
+            width=[(b["end"] - b["start"]) or 1 for b in bins],
+            align="edge",
             color="b",
-            stat="count",
-            # edgecolor="black",
-            ax=ax,
         )
 
         if title:
@@ -1,10 +1,22 @@
 import importlib
 
+# Name of the DuckDB column carrying each row's legacy report number (index + 1)
+LEGACY_ROW_COLUMN = "__legacy_row"
 
 
 class Validator:
-    def handle(self, data_table_definition, df):
+    def handle(self, data_table_definition, df, engine="duckdb"):
+        """
+        Validate ``df`` against a definition.
+
+        With ``engine="duckdb"`` each validator runs set-based over a DuckDB
+        view of ``df`` when the frame holds only strings (as read with
+        ``dtype=str``) and the validator has a DuckDB form; otherwise, and
+        with ``engine="pandas"``, it runs row by row. Both produce the same
+        reports.
+        """
         results = {}
+        conn = self.connect_duckdb(df) if engine == "duckdb" and self.duckdb_compatible(df) else None
 
         for definition in data_table_definition.definition:
             var = definition["name"]
@@ -67,12 +79,57 @@ class Validator:
                             if hasattr(validator, "display_name")
                             else validator_name
                         ),
-                        "report": validator.handle(var, df, params),
+                        "report": self.run_validator(validator, var, df, params, conn),
                     }
                 )
 
+        if conn is not None:
+            conn.close()
+
         return results
 
+    def run_validator(self, validator, var, df, params, conn=None):
+        if conn is not None:
+            try:
+                return validator.handle_duckdb(var, conn, "data", params, row_column=LEGACY_ROW_COLUMN)
+            except NotImplementedError:
+                pass
+        return validator.handle(var, df, params)
+
+    def duckdb_compatible(self, df):
+        """
+        Whether DuckDB sees ``df`` the way the row-wise validators do: every
+        value a str or None, and a numeric index for row numbers.
+        """
+        import pandas as pd
+
+        if not pd.api.types.is_integer_dtype(df.index) or LEGACY_ROW_COLUMN in df.columns:
+            return False
+        for column in df.columns:
+            values = df[column]
+            if pd.api.types.infer_dtype(values.dropna(), skipna=False) not in ("string", "empty"):
+                return False
+            if not all(value is None for value in values[values.isna()]):
+                return False
+        return True
+
+    def connect_duckdb(self, df):
+        import duckdb
+
+        from depot.data.validators.base_validator import quote_identifier
+
+        conn = duckdb.connect()
+        conn.register("frame", df.assign(**{LEGACY_ROW_COLUMN: df.index + 1}))
+        # All-None columns would otherwise not be VARCHAR
+        columns = ", ".join(
+            f"CAST({quote_identifier(column)} AS VARCHAR) AS {quote_identifier(column)}" for column in df.columns
+        )
+        conn.execute(
+            f"CREATE VIEW data AS SELECT {columns + ', ' if columns else ''}"
+            f"{quote_identifier(LEGACY_ROW_COLUMN)} FROM frame"
+        )
+        return conn
+
     def get_validator(self, definition, validator_name):
         for validator in definition["validators"]:
             if validator["name"] == validator_name:
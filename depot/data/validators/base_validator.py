@@ -1,5 +1,60 @@
+import functools
+import unicodedata
+
 from django_sonar.utils import sonar
 
+from depot.utils.sql import quote_identifier, sql_literal  # noqa: F401 (re-exported for validators)
+
+
+def sql_is_empty(column):
+    """SQL for Python's ``not value`` on a VARCHAR column (NULL behaves like None)."""
+    return f"({column} IS NULL OR {column} = '')"
+
+
+def sql_is_truthy(column):
+    return f"NOT {sql_is_empty(column)}"
+
+
+@functools.lru_cache(maxsize=None)
+def _numeric_translation():
+    """Non-ASCII characters int()/float() read as digits or spaces, and what they read them as."""
+    source, target = [], []
+    for code in range(0x80, 0x110000):
+        char = chr(code)
+        if char.isdecimal():
+            source.append(char)
+            target.append(str(unicodedata.decimal(char)))
+        elif char.isspace():
+            source.append(char)
+            target.append(" ")
+    return "".join(source), "".join(target)
+
+
+def sql_numeric_text(column):
+    """The column with Unicode digits and whitespace in ASCII, as int()/float() normalise them."""
+    source, target = _numeric_translation()
+    return f"translate({column}, {sql_literal(source)}, {sql_literal(target)})"
+
+
+# Strings Python's int() and float() accept, once in sql_numeric_text form
+_SPACE = r"[ \t\n\r\f\v]*"
+_DIGITS = r"[0-9](_?[0-9])*"
+_EXPONENT = rf"([eE][+-]?{_DIGITS})?"
+INT_PATTERN = rf"{_SPACE}[+-]?{_DIGITS}{_SPACE}"
+FLOAT_PATTERN = (
+    rf"(?i){_SPACE}[+-]?({_DIGITS}(\.({_DIGITS})?)?{_EXPONENT}|\.{_DIGITS}{_EXPONENT}|inf|infinity|nan){_SPACE}"
+)
+
+
+def sql_matches(column, pattern):
+    return f"regexp_full_match({column}, {sql_literal(pattern)})"
+
+
+def sql_number(column, sql_type):
+    """The column parsed the way int()/float() would, after a *_PATTERN check."""
+    stripped = f"replace(regexp_replace({sql_numeric_text(column)}, {sql_literal(f'^{_SPACE}|{_SPACE}$')}, '', 'g'), '_', '')"
+    return f"TRY_CAST({stripped} AS {sql_type})"
+
 
 class BaseValidator:
     display_name = None
@@ -75,6 +130,84 @@ class BaseValidator:
             "render_empty": self.render_empty,
         }
 
+    def handle_duckdb(self, variable_name, conn, relation, params=None, row_column="row_no"):
+        """
+        Set-based equivalent of ``handle`` over a DuckDB relation of VARCHAR columns.
+
+        Returns the same report as ``handle`` run on a DataFrame of the same
+        strings ("" for empty, None for NULL) whose index + 1 is
+        ``row_column``. Only failing and warning rows leave DuckDB.
+        """
+        self.variable_name = variable_name
+
+        if params is None:
+            params = {}
+
+        columns = [c[0] for c in conn.execute(f"SELECT * FROM {relation} LIMIT 0").description]
+        if variable_name not in columns:
+            raise ValueError(f"Variable '{variable_name}' is not present in data.")
+
+        column = quote_identifier(variable_name)
+        rules = self.sql_rules(column, params, columns)
+        if rules is None:
+            raise NotImplementedError(f"{type(self).__module__} has no DuckDB implementation.")
+
+        outcomes = []
+        if rules:
+            status_sql = " ".join(f"WHEN {condition} THEN {sql_literal(status)}" for condition, status, _ in rules)
+            message_sql = " ".join(f"WHEN {condition} THEN {message or 'NULL'}" for condition, _, message in rules)
+            outcomes = conn.execute(
+                f"""
+                SELECT row_index, value, status, message FROM (
+                    SELECT
+                        {quote_identifier(row_column)} AS row_index,
+                        {column} AS value,
+                        CASE {status_sql} ELSE 'success' END AS status,
+                        CASE {message_sql} ELSE NULL END AS message
+                    FROM {relation}
+                )
+                WHERE status <> 'success'
+                ORDER BY row_index
+                """
+            ).fetchall()
+
+        failed_values = []
+        failure_messages = set()
+        warning_messages = set()
+        for row_number, value, status, message in outcomes:
+            if status == "fail":
+                failed_values.append({"row": row_number, "value": value})
+                failure_messages.add(
+                    message
+                    or getattr(self, "default_failure_message", None)
+                    or f"Validation failed for row {row_number}."
+                )
+            else:
+                warning_messages.add(message or f"Warning for row {row_number}.")
+
+        errors = self.format_errors(failed_values) if failed_values else []
+
+        return {
+            "pass": not failed_values,
+            "failure_messages": list(failure_messages),
+            "warnings": list(warning_messages),
+            "errors": errors,
+            "render_empty": self.render_empty,
+        }
+
+    def sql_rules(self, column, params, columns):
+        """
+        Set-based form of ``validate`` for ``handle_duckdb``.
+
+        Returns ``(condition, status, message)`` rules in the order
+        ``validate`` checks them; the first matching condition decides a
+        row, and rows matching none pass. ``column`` is the quoted column,
+        ``message`` a SQL expression (or None for the default message) and
+        ``columns`` the relation's column names. Returns None when the
+        validator has no set-based form.
+        """
+        return None
+
     def validate(self, idx, variable_name, value, row, params):
         """
         Implement specific validate logic in each validator subclass.
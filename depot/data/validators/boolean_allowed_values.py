@@ -1,5 +1,5 @@
 from django_sonar.utils import sonar
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, sql_is_empty, sql_literal
 
 
 class Validator(BaseValidator):
@@ -78,3 +78,12 @@ class Validator(BaseValidator):
         Formats a list of values into a string representation.
         """
         return "[" + ", ".join(f"`{x}`" for x in values) + "]"
+
+    def sql_rules(self, column, params, columns):
+        legal = [sql_literal(x) for x in self.get_all_legal_values(params)]
+        outside = f"{column} NOT IN ({', '.join(legal)})" if legal else "TRUE"
+
+        return [
+            (sql_is_empty(column), "success", None),
+            (outside, "fail", sql_literal(self.get_message(params))),
+        ]
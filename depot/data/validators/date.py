@@ -1,6 +1,10 @@
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, sql_is_empty, sql_literal
 import pandas as pd
 
+# pd.Timestamp.min and max, rounded inward to microseconds
+PANDAS_MIN_TIMESTAMP = "1677-09-21 00:12:43.145225"
+PANDAS_MAX_TIMESTAMP = "2262-04-11 23:47:16.854775"
+
 
 class Validator(BaseValidator):
     display_name = "Is Date"
@@ -73,3 +77,46 @@ class Validator(BaseValidator):
             "status": "fail",
             "message": self.default_failure_message,
         }
+
+    def sql_rules(self, column, params, columns):
+        pd_format = params.get("pd_format")
+        date_format = params.get("date_format", "%Y-%m-%d")
+
+        if date_format == "YYYY-MM-DD":
+            date_format = "%Y-%m-%d"
+
+        format_used = params.get("date_format", params.get("pd_format", None))
+        suffix = (
+            f"' is not a valid date in format '{format_used}'."
+            if format_used
+            else "' is not a valid date."
+        )
+        unparseable = f"'Value ''' || {column} || {sql_literal(suffix)}"
+
+        if not date_format:
+            # strftime(None) raises after any parse
+            return [
+                (sql_is_empty(column), "success", None),
+                ("TRUE", "fail", unparseable),
+            ]
+
+        parsed = f"try_strptime({column}, {sql_literal(pd_format or date_format)})"
+        return [
+            (sql_is_empty(column), "success", None),
+            # DuckDB skips surrounding whitespace that pandas rejects
+            (f"regexp_matches({column}, '^\\s|\\s$')", "fail", unparseable),
+            # pandas reads these as NaT, which has no strftime
+            (f"{column} IN ('NaT', 'nat', 'NAT', 'nan', 'NaN', 'NAN')", "fail", unparseable),
+            # ... and these as the current time, which never formats back to them
+            (f"{column} IN ('now', 'today')", "fail", None),
+            # Words DuckDB parses as special timestamps whatever the format
+            (f"lower({column}) IN ('infinity', '-infinity', 'epoch')", "fail", unparseable),
+            (f"{parsed} IS NULL", "fail", unparseable),
+            # Beyond pandas' nanosecond Timestamp range
+            (
+                f"{parsed} NOT BETWEEN TIMESTAMP '{PANDAS_MIN_TIMESTAMP}' AND TIMESTAMP '{PANDAS_MAX_TIMESTAMP}'",
+                "fail",
+                unparseable,
+            ),
+            (f"strftime({parsed}, {sql_literal(date_format)}) <> {column}", "fail", None),
+        ]
@@ -1,4 +1,4 @@
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, sql_is_empty, sql_literal
 
 
 class Validator(BaseValidator):
@@ -69,3 +69,14 @@ class Validator(BaseValidator):
         if value["value"] != value["description"]:
             return f"`{value['value']}` ({value['description']})"
         return f"`{value['value']}`"
+
+    def sql_rules(self, column, params, columns):
+        value_dictionary = self.get_allowed_values(params)
+        # Only string allowed values can equal a VARCHAR value
+        allowed = [sql_literal(x["value"]) for x in value_dictionary if isinstance(x["value"], str)]
+        outside = f"{column} NOT IN ({', '.join(allowed)})" if allowed else "TRUE"
+
+        return [
+            (sql_is_empty(column), "success", None),
+            (outside, "fail", sql_literal(self.get_message(value_dictionary))),
+        ]
@@ -1,5 +1,5 @@
 from django_sonar.utils import sonar
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, quote_identifier, sql_is_empty, sql_is_truthy, sql_literal
 
 
 class Validator(BaseValidator):
@@ -93,3 +93,31 @@ class Validator(BaseValidator):
             "status": "success",
             "message": None,
         }
+
+    def sql_rules(self, column, params, columns):
+        absent = params.get("absent")
+        present = params.get("present")
+
+        if (not absent and not present) or (absent and present):
+            return [(
+                "TRUE",
+                "fail",
+                sql_literal("Validation configuration error: Exactly one of `absent` or `present` must be provided."),
+            )]
+
+        if absent:
+            if absent not in columns:
+                return [("TRUE", "fail", sql_literal(f"Expected variable `{absent}` to be present in the dataframe."))]
+            return [(
+                f"{sql_is_empty(quote_identifier(absent))} AND {sql_is_truthy(column)}",
+                "fail",
+                sql_literal(f"Value is not allowed when `{absent}` is absent."),
+            )]
+
+        if present not in columns:
+            return [("TRUE", "fail", sql_literal(f"Expected variable `{present}` to be present in the dataframe."))]
+        return [(
+            f"{sql_is_truthy(quote_identifier(present))} AND {sql_is_truthy(column)}",
+            "fail",
+            sql_literal(f"Value is not allowed when `{present}` is present."),
+        )]
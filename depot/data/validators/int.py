@@ -1,4 +1,4 @@
-from .base_validator import BaseValidator
+from .base_validator import INT_PATTERN, BaseValidator, sql_is_empty, sql_literal, sql_matches, sql_numeric_text
 
 
 class Validator(BaseValidator):
@@ -29,3 +29,9 @@ class Validator(BaseValidator):
                 "status": "fail",
                 "message": self.default_failure_message,
             }
+
+    def sql_rules(self, column, params, columns):
+        return [
+            (sql_is_empty(column), "success", None),
+            (f"NOT {sql_matches(sql_numeric_text(column), INT_PATTERN)}", "fail", sql_literal(self.default_failure_message)),
+        ]
@@ -1,4 +1,4 @@
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, sql_is_empty, sql_literal
 
 
 class Validator(BaseValidator):
@@ -39,3 +39,9 @@ class Validator(BaseValidator):
             "status": "success",
             "message": None,
         }
+
+    def sql_rules(self, column, params, columns):
+        return [
+            (sql_is_empty(column), "success", None),
+            (f"count(*) OVER (PARTITION BY {column}) > 1", "fail", sql_literal(self.default_failure_message)),
+        ]
@@ -1,4 +1,12 @@
-from .base_validator import BaseValidator
+from .base_validator import (
+    FLOAT_PATTERN,
+    BaseValidator,
+    sql_is_empty,
+    sql_literal,
+    sql_matches,
+    sql_number,
+    sql_numeric_text,
+)
 
 
 class Validator(BaseValidator):
@@ -58,3 +66,27 @@ class Validator(BaseValidator):
         Constructs a failure message for out-of-range values.
         """
         return f"Value is not within the specified range: {min_val}-{max_val}."
+
+    def sql_rules(self, column, params, columns):
+        if not isinstance(params, (tuple, list)) or len(params) != 2:
+            raise ValueError(
+                "Range validator requires `params` as a tuple of (min, max) values."
+            )
+
+        min_val, max_val = params
+        number = sql_number(column, "DOUBLE")
+        bounds = (
+            f"{number} >= CAST({sql_literal(repr(float(min_val)))} AS DOUBLE) "
+            f"AND {number} <= CAST({sql_literal(repr(float(max_val)))} AS DOUBLE)"
+        )
+
+        return [
+            (sql_is_empty(column), "success", None),
+            (
+                f"NOT {sql_matches(sql_numeric_text(column), FLOAT_PATTERN)}",
+                "fail",
+                f"'Value ''' || {column} || ''' is not a valid number.'",
+            ),
+            # NaN fails the chained comparison in Python
+            (f"isnan({number}) OR NOT ({bounds})", "fail", sql_literal(self.get_message(min_val, max_val))),
+        ]
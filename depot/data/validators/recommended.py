@@ -1,4 +1,4 @@
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, sql_is_empty, sql_literal
 
 
 class Validator(BaseValidator):
@@ -21,3 +21,6 @@ class Validator(BaseValidator):
             "status": "success",
             "message": None,
         }
+
+    def sql_rules(self, column, params, columns):
+        return [(sql_is_empty(column), "warn", sql_literal(params.get("message", self.default_failure_message)))]
@@ -1,4 +1,4 @@
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, quote_identifier, sql_is_empty, sql_literal
 
 
 class Validator(BaseValidator):
@@ -59,3 +59,25 @@ class Validator(BaseValidator):
                 else f"Value is required when `{optional_when}` is absent."
             ),
         }
+
+    def sql_rules(self, column, params, columns):
+        if params is False:
+            return []
+
+        if params is True or "optional_when" not in params:
+            return [(sql_is_empty(column), "fail", sql_literal(self.default_failure_message))]
+
+        optional_when = params.get("optional_when")
+
+        if optional_when not in columns:
+            return [(
+                "TRUE",
+                "fail",
+                sql_literal(f"Optional when variable `{optional_when}` is not present in the dataframe."),
+            )]
+
+        return [(
+            f"{sql_is_empty(quote_identifier(optional_when))} AND {sql_is_empty(column)}",
+            "fail",
+            sql_literal(f"Value is required when `{optional_when}` is absent."),
+        )]
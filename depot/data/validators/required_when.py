@@ -1,4 +1,4 @@
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, quote_identifier, sql_is_empty, sql_is_truthy, sql_literal
 
 
 class Validator(BaseValidator):
@@ -92,3 +92,31 @@ class Validator(BaseValidator):
             "status": "success",
             "message": None,
         }
+
+    def sql_rules(self, column, params, columns):
+        absent = params.get("absent")
+        present = params.get("present")
+
+        if (not absent and not present) or (absent and present):
+            return [(
+                "TRUE",
+                "fail",
+                sql_literal("Validation configuration error: Exactly one of `absent` or `present` must be provided."),
+            )]
+
+        if absent:
+            if absent not in columns:
+                return [("TRUE", "fail", sql_literal(f"Expected variable `{absent}` to be absent in the dataframe."))]
+            return [(
+                f"{sql_is_empty(quote_identifier(absent))} AND {sql_is_empty(column)}",
+                "fail",
+                sql_literal(f"Value is required when `{absent}` is absent."),
+            )]
+
+        if present not in columns:
+            return [("TRUE", "fail", sql_literal(f"Expected variable `{present}` to be present in the dataframe."))]
+        return [(
+            f"{sql_is_truthy(quote_identifier(present))} AND {sql_is_empty(column)}",
+            "fail",
+            sql_literal(f"Value is required when `{present}` is present."),
+        )]
@@ -1,4 +1,4 @@
-from .base_validator import BaseValidator
+from .base_validator import BaseValidator, sql_literal
 
 
 class Validator(BaseValidator):
@@ -22,3 +22,7 @@ class Validator(BaseValidator):
             "status": "fail",
             "message": self.default_failure_message,
         }
+
+    def sql_rules(self, column, params, columns):
+        # Every non-NULL VARCHAR is a str
+        return [(f"{column} IS NULL", "fail", sql_literal(self.default_failure_message))]
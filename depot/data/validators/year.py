@@ -1,5 +1,13 @@
 from datetime import datetime
-from .base_validator import BaseValidator
+from .base_validator import (
+    INT_PATTERN,
+    BaseValidator,
+    sql_is_empty,
+    sql_literal,
+    sql_matches,
+    sql_number,
+    sql_numeric_text,
+)
 
 
 class Validator(BaseValidator):
@@ -48,3 +56,23 @@ class Validator(BaseValidator):
             "status": "fail",
             "message": f"Year must be between {min_year} and {max_year}.",
         }
+
+    def sql_rules(self, column, params, columns):
+        min_year = params.get("min_year", 1000)
+        max_year = params.get("max_year", datetime.now().year + 10)
+        # Digits beyond HUGEINT are NULL, and far outside any year range
+        year = sql_number(column, "HUGEINT")
+
+        return [
+            (sql_is_empty(column), "success", None),
+            (
+                f"NOT {sql_matches(sql_numeric_text(column), INT_PATTERN)}",
+                "fail",
+                f"'Value ''' || {column} || ''' is not a valid numeric year.'",
+            ),
+            (
+                f"{year} IS NULL OR NOT ({year} BETWEEN {int(min_year)} AND {int(max_year)})",
+                "fail",
+                sql_literal(f"Year must be between {min_year} and {max_year}."),
+            ),
+        ]
@@ -0,0 +1,273 @@
+"""
+Vectorized synthetic data generator for load and benchmark testing.
+
+Unlike the per-field Faker factories, columns are generated in NumPy batches
+from the JSON data definitions and streamed to disk chunk by chunk, so
+memory use is bounded by ``chunk_size`` regardless of the row count.
+
+Referential integrity: every table draws ``cohortPatientId`` from the same
+deterministic universe (``patient_id_universe``), and the patient table
+emits that universe exactly once, so ``in_file:patient:cohortPatientId``
+holds across independently generated files.
+
+Usage:
+    generator = BulkDataGenerator('laboratory', patient_count=100_000, seed=1,
+                                  error_rates={'invalid_id': 0.01})
+    stats = generator.write('laboratory.csv', 10_000_000)
+"""
+import io
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from depot.data.definition_loader import definition_registry, parse_validator
+
+logger = logging.getLogger(__name__)
+
+
+# Supported error kinds and what they inject
+ERROR_KINDS = {
+    'invalid_id': 'cohortPatientId not present in the patient table',
+    'out_of_range': 'Values outside allowed values, ranges or date formats',
+    'malformed_row': 'Rows with an extra field',
+}
+
+FORMATS = ('csv', 'tsv', 'parquet')
+
+PATIENT_ID_PREFIX = 'SIM'
+BLANK_RATE = 0.1
+DATE_START = np.datetime64('1990-01-01')
+
+
+def patient_id_universe(patient_count: int, prefix: str = PATIENT_ID_PREFIX) -> np.ndarray:
+    """Return the shared cohortPatientId values for a simulated cohort."""
+    return np.char.add(prefix, np.char.zfill(np.arange(patient_count).astype(str), 9))
+
+
+def _example_values(var_def: Dict) -> List[str]:
+    example = var_def.get('example')
+    if not example:
+        return []
+    return [v.strip().strip("'\"") for v in str(example).split(',') if v.strip()]
+
+
+def _allowed_values(var_def: Dict) -> List[str]:
+    allowed = var_def.get('allowed_values')
+    if isinstance(allowed, dict):
+        return [str(v) for values in allowed.values() for v in values]
+    if isinstance(allowed, list):
+        return [str(v['value']) if isinstance(v, dict) else str(v) for v in allowed]
+    return []
+
+
+def _range_params(var_def: Dict) -> Optional[List]:
+    for validator in var_def.get('validators', []):
+        name, params = parse_validator(validator)
+        if name == 'range' and isinstance(params, list) and len(params) == 2:
+            return params
+    return None
+
+
+class BulkDataGenerator:
+    """
+    Generate a data file type's columns in NumPy batches.
+
+    Args:
+        data_file_type: Definition name (e.g., 'patient', 'laboratory')
+        patient_count: Size of the shared cohortPatientId universe
+        seed: Random seed for reproducible output
+        error_rates: Per-kind injection rate (0-1), see ERROR_KINDS
+        chunk_size: Rows generated and written per batch
+    """
+
+    def __init__(self, data_file_type: str, patient_count: int = 10_000, seed: int = None,
+                 error_rates: Dict[str, float] = None, chunk_size: int = 100_000):
+        self.data_file_type = data_file_type
+        self.patient_count = patient_count
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+
+        self.error_rates = {kind: 0.0 for kind in ERROR_KINDS}
+        for kind, rate in (error_rates or {}).items():
+            if kind not in ERROR_KINDS:
+                raise ValueError(f"Unknown error kind '{kind}'. Expected one of: {', '.join(ERROR_KINDS)}")
+            if not 0 <= rate <= 1:
+                raise ValueError(f"Error rate for '{kind}' must be between 0 and 1")
+            self.error_rates[kind] = rate
+
+        definition = definition_registry.get_definition(data_file_type)
+        self.variables = [definition.get_variable(name) for name in definition.get_variable_names()]
+        self.columns = [var_def['name'] for var_def in self.variables]
+        self.patient_ids = patient_id_universe(patient_count)
+        self._rows_generated = 0
+
+    # -- column generators -------------------------------------------------
+
+    def _ids(self, var_def: Dict, n: int) -> np.ndarray:
+        if var_def['name'] == 'cohortPatientId':
+            if self.data_file_type == 'patient':
+                # Patient table emits the universe in order, wrapping if asked for more rows
+                index = (self._rows_generated + np.arange(n)) % self.patient_count
+                return self.patient_ids[index]
+            return self.patient_ids[self.rng.integers(0, self.patient_count, n)]
+        start = self._rows_generated
+        return np.char.add(f"{var_def['name'][:3].upper()}", np.arange(start, start + n).astype(str))
+
+    def _dates(self, n: int) -> np.ndarray:
+        span = (np.datetime64(date.today()) - DATE_START).astype(int)
+        days = self.rng.integers(0, span, n)
+        return np.datetime_as_string(DATE_START + days.astype('timedelta64[D]'), unit='D')
+
+    def _numbers(self, var_def: Dict, n: int, integer: bool) -> np.ndarray:
+        bounds = _range_params(var_def)
+        if bounds is None:
+            bounds = [1900, date.today().year - 18] if integer else [0, 1000]
+        low, high = bounds
+        if integer:
+            return self.rng.integers(int(low), int(high) + 1, n).astype(str)
+        return np.round(self.rng.uniform(float(low), float(high), n), 2).astype(str)
+
+    def _column(self, var_def: Dict, n: int) -> np.ndarray:
+        var_type = var_def.get('type')
+        if var_type == 'id':
+            values = self._ids(var_def, n)
+        elif var_type == 'date':
+            values = self._dates(n)
+        elif var_type == 'year':
+            values = self._numbers(var_def, n, integer=True)
+        elif var_type == 'numeric':
+            values = self._numbers(var_def, n, integer=False)
+        elif var_type == 'boolean':
+            choices = _allowed_values(var_def) or ['Yes', 'No']
+            values = np.asarray(choices, dtype=object)[self.rng.integers(0, len(choices), n)]
+        else:
+            choices = _allowed_values(var_def) or _example_values(var_def) or [
+                f"{var_def['name']}_{i}" for i in range(1, 21)
+            ]
+            values = np.asarray(choices, dtype=object)[self.rng.integers(0, len(choices), n)]
+
+        values = values.astype(object)
+        if var_def.get('value_optional') and var_type != 'id':
+            values[self.rng.random(n) < BLANK_RATE] = ''
+        return values
+
+    def _inject_column_errors(self, var_def: Dict, values: np.ndarray) -> np.ndarray:
+        n = len(values)
+        if var_def['name'] == 'cohortPatientId' and self.error_rates['invalid_id']:
+            mask = self.rng.random(n) < self.error_rates['invalid_id']
+            values[mask] = np.char.add('UNKNOWN', np.arange(mask.sum()).astype(str))
+
+        rate = self.error_rates['out_of_range']
+        if rate and var_def.get('type') != 'id':
+            mask = self.rng.random(n) < rate
+            if var_def.get('type') in ('year', 'numeric'):
+                bounds = _range_params(var_def) or [0, 0]
+                values[mask] = str(int(float(bounds[0])) - 100)
+            elif var_def.get('type') == 'date':
+                values[mask] = '13/45/2020'
+            elif _allowed_values(var_def):
+                values[mask] = 'INVALID'
+        return values
+
+    # -- public API --------------------------------------------------------
+
+    def generate_chunk(self, n: int) -> pd.DataFrame:
+        """Generate ``n`` rows as a DataFrame of strings."""
+        data = {}
+        for var_def in self.variables:
+            data[var_def['name']] = self._inject_column_errors(var_def, self._column(var_def, n))
+        self._rows_generated += n
+        return pd.DataFrame(data, columns=self.columns)
+
+    def iter_chunks(self, count: int) -> Iterator[pd.DataFrame]:
+        """Yield DataFrames of at most ``chunk_size`` rows until ``count`` rows are produced."""
+        remaining = count
+        while remaining > 0:
+            n = min(self.chunk_size, remaining)
+            yield self.generate_chunk(n)
+            remaining -= n
+
+    def _malformed(self, text: str, delimiter: str) -> str:
+        """Append an extra field to a sample of the rows in a rendered chunk."""
+        rate = self.error_rates['malformed_row']
+        if not rate:
+            return text
+        lines = text.split('\n')
+        rows = len(lines) - 1  # trailing terminator leaves an empty last element
+        for i in np.flatnonzero(self.rng.random(rows) < rate):
+            line = lines[i]
+            if line.endswith('\r'):
+                lines[i] = f"{line[:-1]}{delimiter}EXTRA\r"
+            else:
+                lines[i] = f"{line}{delimiter}EXTRA"
+        return '\n'.join(lines)
+
+    def write(self, output_path: str, count: int, file_format: str = 'csv',
+              bom: bool = False, crlf: bool = False) -> Dict:
+        """
+        Stream ``count`` rows to ``output_path``.
+
+        CSV/TSV are appended chunk by chunk to a single file. Parquet is
+        written as one part file per chunk inside the ``output_path``
+        directory (readable with ``read_parquet('<dir>/*.parquet')``).
+
+        Args:
+            output_path: Destination file (csv/tsv) or directory (parquet)
+            count: Number of rows
+            file_format: 'csv', 'tsv' or 'parquet'
+            bom: Prefix text output with a UTF-8 BOM
+            crlf: Use Windows line endings in text output
+
+        Returns:
+            Dict with rows, chunks, path and format
+        """
+        if file_format not in FORMATS:
+            raise ValueError(f"Unsupported format '{file_format}'. Expected one of: {', '.join(FORMATS)}")
+
+        output_path = Path(output_path)
+        chunks = 0
+
+        if file_format == 'parquet':
+            import duckdb
+
+            output_path.mkdir(parents=True, exist_ok=True)
+            conn = duckdb.connect()
+            try:
+                for chunk in self.iter_chunks(count):
+                    part = output_path / f"part-{chunks:05d}.parquet"
+                    conn.register('chunk', chunk)
+                    conn.execute(f"COPY chunk TO '{part}' (FORMAT PARQUET)")
+                    conn.unregister('chunk')
+                    chunks += 1
+            finally:
+                conn.close()
+        else:
+            delimiter = '\t' if file_format == 'tsv' else ','
+            line_terminator = '\r\n' if crlf else '\n'
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8-sig' if bom else 'utf-8', newline='') as f:
+                for chunk in self.iter_chunks(count):
+                    buffer = io.StringIO()
+                    chunk.to_csv(buffer, sep=delimiter, index=False, header=chunks == 0,
+                                 lineterminator=line_terminator)
+                    text = buffer.getvalue()
+                    if chunks == 0:
+                        # Keep the header row well-formed
+                        header, _, body = text.partition('\n')
+                        text = f"{header}\n{self._malformed(body, delimiter)}"
+                    else:
+                        text = self._malformed(text, delimiter)
+                    f.write(text)
+                    chunks += 1
+
+        logger.info(f"Generated {count} {self.data_file_type} rows in {chunks} chunks: {output_path}")
+        return {
+            'rows': count,
+            'chunks': chunks,
+            'path': str(output_path),
+            'format': file_format,
+        }
@@ -9,7 +9,6 @@ import logging
 from depot.models import DataFileType, Cohort, PrecheckRun, UploadedFile, UploadType, PHIFileTracking
 from depot.storage.temp_files import TemporaryStorage
 from depot.storage.manager import StorageManager
-from depot.tasks.upload_precheck import process_precheck_run
 from depot.validators.file_security import validate_data_file_upload
 
 logger = logging.getLogger(__name__)
@@ -177,6 +176,8 @@ class PrecheckRunSubmissionForm(forms.Form):
         # Dispatch Celery task
         # Patient files don't need special handling in upload precheck context
         # The task will handle DuckDB creation and notebook generation internally
+        from depot.tasks.upload_precheck import process_precheck_run
+
         process_precheck_run.delay(precheck_run.id)
 
         # Return the upload precheck record
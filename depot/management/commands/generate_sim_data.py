@@ -16,6 +16,8 @@ from depot.factories.data.procedure_factory import ProcedureFactory
 from depot.factories.data.discharge_diagnosis_factory import DischargeDiagnosisFactory
 from depot.factories.data.risk_factor_factory import RiskFactorFactory
 from depot.factories.data.census_factory import CensusFactory
+from depot.factories.data.bulk_generator import BulkDataGenerator, ERROR_KINDS, FORMATS
+from depot.data.definition_loader import definition_registry
 
 
 class Command(BaseCommand):
@@ -48,7 +50,6 @@ class Command(BaseCommand):
         parser.add_argument(
             "--table",
             type=str,
-            choices=self.default_factories.keys(),
             required=True,
             help="Specify the table name (e.g., 'laboratory').",
         )
@@ -58,12 +59,60 @@ class Command(BaseCommand):
             default=10,
             help="Number of records to generate (default: 10).",
         )
+        parser.add_argument(
+            "--vectorized",
+            action="store_true",
+            help="Generate columns in NumPy batches from the data definition and stream them to disk "
+                 "(for large load/benchmark fixtures).",
+        )
+        parser.add_argument(
+            "--patients",
+            type=int,
+            default=10_000,
+            help="Vectorized: size of the shared cohortPatientId universe (default: 10000).",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default="csv",
+            help="Vectorized: output format (default: csv). Parquet is written as a directory of parts.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100_000,
+            help="Vectorized: rows per batch (default: 100000).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Vectorized: random seed for reproducible output.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            action="append",
+            default=[],
+            metavar="KIND=RATE",
+            help=f"Vectorized: inject errors, e.g. invalid_id=0.01. Kinds: {', '.join(ERROR_KINDS)}.",
+        )
+        parser.add_argument("--bom", action="store_true", help="Vectorized: prefix text output with a UTF-8 BOM.")
+        parser.add_argument("--crlf", action="store_true", help="Vectorized: use Windows line endings.")
 
     def handle(self, *args, **kwargs):
         cohort_name = kwargs.get("cohort").lower()
         table_name = kwargs.get("table").lower()
         count = kwargs.get("count")
 
+        if kwargs.get("vectorized"):
+            return self.handle_vectorized(cohort_name, table_name, count, kwargs)
+
+        if table_name not in self.default_factories:
+            self.stderr.write(
+                f"Unknown table '{table_name}'. Choose from: {', '.join(self.default_factories)}"
+            )
+            return
+
         factory = self.load_factory(cohort_name, table_name)
         if not factory:
             self.stderr.write(
@@ -85,6 +134,50 @@ class Command(BaseCommand):
             f"Generated {count} records for cohort '{cohort_name}' and table '{table_name}', saved to {save_dir}"
         )
 
+    def handle_vectorized(self, cohort_name, table_name, count, options):
+        if definition_registry.definition_path(table_name) is None:
+            self.stderr.write(f"No data definition found for table '{table_name}'.")
+            return
+
+        error_rates = {}
+        for item in options["error_rate"]:
+            kind, _, rate = item.partition("=")
+            try:
+                error_rates[kind] = float(rate)
+            except ValueError:
+                self.stderr.write(f"Invalid --error-rate '{item}', expected KIND=RATE.")
+                return
+
+        try:
+            generator = BulkDataGenerator(
+                table_name,
+                patient_count=options["patients"],
+                seed=options["seed"],
+                error_rates=error_rates,
+                chunk_size=options["chunk_size"],
+            )
+        except ValueError as e:
+            self.stderr.write(str(e))
+            return
+
+        file_format = options["format"]
+        save_dir = os.path.join(
+            settings.BASE_DIR, "resources", "data", "generated", "cohorts", cohort_name
+        )
+        extension = "parquet" if file_format == "parquet" else file_format
+        stats = generator.write(
+            os.path.join(save_dir, f"{table_name}.{extension}"),
+            count,
+            file_format=file_format,
+            bom=options["bom"],
+            crlf=options["crlf"],
+        )
+
+        self.stdout.write(
+            f"Generated {stats['rows']} records in {stats['chunks']} chunks for cohort '{cohort_name}' "
+            f"and table '{table_name}', saved to {stats['path']}"
+        )
+
     def load_factory(self, cohort, table):
         """
         Attempts to load a cohort-specific factory. Falls back to the default factory.
@@ -0,0 +1,62 @@
+"""
+Management command to measure database connection handshake overhead.
+
+Compares opening a fresh connection per query (CONN_MAX_AGE=0 behaviour)
+against reusing one persistent connection, so the effect of DB_CONN_MAX_AGE
+or a pooler (ProxySQL) can be measured before and after a change.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Measure DB connection handshake overhead (fresh vs persistent connections)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Number of queries to time for each mode (default: 50)',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to measure (default: default)',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        conn = connections[options['database']]
+
+        fresh = []
+        for _ in range(iterations):
+            conn.close()
+            start = time.perf_counter()
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            fresh.append(time.perf_counter() - start)
+
+        persistent = []
+        conn.ensure_connection()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            persistent.append(time.perf_counter() - start)
+
+        fresh_ms = statistics.median(fresh) * 1000
+        persistent_ms = statistics.median(persistent) * 1000
+
+        self.stdout.write(f"Database: {conn.settings_dict.get('HOST') or conn.vendor} "
+                          f"(CONN_MAX_AGE={conn.settings_dict.get('CONN_MAX_AGE')})")
+        self.stdout.write(f"Fresh connection per query:  median {fresh_ms:.2f} ms")
+        self.stdout.write(f"Persistent connection:       median {persistent_ms:.2f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Handshake overhead: {fresh_ms - persistent_ms:.2f} ms per request/task"
+        ))
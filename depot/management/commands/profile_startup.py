@@ -0,0 +1,54 @@
+"""
+Management command to profile web worker cold start.
+
+Boots Django as a web-role worker in a fresh interpreter under
+``python -X importtime``, prints the slowest imports, and fails when a
+services-only dependency (DuckDB, pandas, boto3, matplotlib, ...) is
+imported or the wall time / RSS targets are missed.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from depot.benchmarks.startup import (
+    WEB_STARTUP_TARGETS,
+    check_web_startup,
+    profile_web_startup,
+    slowest_imports,
+)
+
+
+class Command(BaseCommand):
+    help = 'Profile web worker start-up imports, wall time and RSS against targets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Number of slowest top-level imports to list (default: 20)',
+        )
+        parser.add_argument(
+            '--settings-module',
+            help='Settings module for the profiled process (default: DJANGO_SETTINGS_MODULE)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            profile = profile_web_startup(options['settings_module'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+        for name, self_us, cumulative_us, _ in slowest_imports(profile, options['top']):
+            self.stdout.write(f"{cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+
+        self.stdout.write(
+            f"\nWall time {profile['wall_seconds']:.2f}s (target {WEB_STARTUP_TARGETS['wall_seconds']}s), "
+            f"peak RSS {profile['peak_rss_mb']} MB (target {WEB_STARTUP_TARGETS['peak_rss_mb']} MB)"
+        )
+
+        problems = check_web_startup(profile)
+        if problems:
+            for problem in problems:
+                self.stderr.write(self.style.ERROR(problem))
+            raise CommandError(f"Web start-up misses {len(problems)} target(s)")
+        self.stdout.write(self.style.SUCCESS("Web start-up meets all targets"))
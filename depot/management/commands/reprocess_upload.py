@@ -68,7 +68,7 @@ class Command(BaseCommand):
         }
 
         self.stdout.write('Dispatching Celery task...')
-        result = create_duckdb_task.apply_async(args=[task_data], queue='default')
+        result = create_duckdb_task.apply_async(args=[task_data])
 
         self.stdout.write(self.style.SUCCESS(
             f'Task dispatched: {result.id}\n'
@@ -0,0 +1,118 @@
+"""
+Management command to benchmark the ingestion and validation pipeline.
+
+Generates (or reuses) datasets per size profile, runs each benchmark stage
+inside a throwaway test database, appends the metrics to a JSON history
+file and exits non-zero when a stage regresses past its threshold.
+"""
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from depot.benchmarks.harness import BENCHMARK_STAGES, DEFAULT_THRESHOLDS, BenchmarkHistory
+from depot.benchmarks.stages import SIZE_PROFILES, BenchmarkContext, dataset_paths, isolated_storage, run_stages
+
+
+class Command(BaseCommand):
+    help = 'Benchmark pipeline stages on generated datasets and track regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile',
+            action='append',
+            choices=SIZE_PROFILES.keys(),
+            help='Dataset size profile; repeat for several (default: 10mb)',
+        )
+        parser.add_argument(
+            '--stage',
+            action='append',
+            choices=BENCHMARK_STAGES.keys(),
+            help='Only report these stages; repeat for several (default: all)',
+        )
+        parser.add_argument(
+            '--history',
+            default=str(Path(settings.BASE_DIR) / 'resources' / 'benchmarks' / 'history.json'),
+            help='JSON history file (default: resources/benchmarks/history.json)',
+        )
+        parser.add_argument(
+            '--data-dir',
+            default=str(Path(tempfile.gettempdir()) / 'naaccord_benchmarks'),
+            help='Where generated datasets are cached between runs',
+        )
+        parser.add_argument(
+            '--threshold',
+            action='append',
+            default=[],
+            metavar='METRIC=FRACTION',
+            help=f"Allowed relative increase per metric, e.g. wall_seconds=0.1 "
+                 f"(defaults: {', '.join(f'{k}={v}' for k, v in DEFAULT_THRESHOLDS.items())})",
+        )
+        parser.add_argument(
+            '--baseline-runs',
+            type=int,
+            default=5,
+            help='Number of previous runs whose median is the baseline (default: 5)',
+        )
+        parser.add_argument(
+            '--no-record',
+            action='store_true',
+            help='Compare against history without appending this run',
+        )
+
+    def handle(self, *args, **options):
+        thresholds = {}
+        for item in options['threshold']:
+            metric, _, value = item.partition('=')
+            if metric not in DEFAULT_THRESHOLDS:
+                raise CommandError(f"Unknown metric '{metric}'. Expected one of: {', '.join(DEFAULT_THRESHOLDS)}")
+            try:
+                thresholds[metric] = float(value)
+            except ValueError:
+                raise CommandError(f"Invalid --threshold '{item}', expected METRIC=FRACTION")
+
+        history = BenchmarkHistory(options['history'])
+        regressions = []
+
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            for profile in options['profile'] or ['10mb']:
+                dataset = dataset_paths(Path(options['data_dir']), profile, SIZE_PROFILES[profile])
+                with isolated_storage():
+                    ctx = BenchmarkContext(dataset)
+                    try:
+                        results = run_stages(ctx, options['stage'])
+                    finally:
+                        ctx.cleanup()
+
+                run = {'profile': profile, 'stages': results}
+                found = history.check_regressions(run, thresholds, options['baseline_runs'])
+                if not options['no_record']:
+                    history.record(profile, results, extra={
+                        'dataset_bytes': dataset['laboratory'].stat().st_size,
+                    })
+
+                self._report(profile, results, found)
+                regressions.extend(found)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark regression(s) detected")
+        self.stdout.write(self.style.SUCCESS('No benchmark regressions'))
+
+    def _report(self, profile, results, regressions):
+        self.stdout.write(f"\nProfile {profile}")
+        self.stdout.write(f"  {'stage':<36} {'wall s':>9} {'peak RSS MB':>12} {'read MB':>9} {'written MB':>11} {'queries':>8}")
+        for stage, m in results.items():
+            self.stdout.write(
+                f"  {stage:<36} {m['wall_seconds']:>9.3f} {m['peak_rss_bytes'] / 2**20:>12.1f} "
+                f"{m['bytes_read'] / 2**20:>9.1f} {m['bytes_written'] / 2**20:>11.1f} {m['db_queries']:>8}"
+            )
+        for r in regressions:
+            self.stdout.write(self.style.ERROR(
+                f"  REGRESSION {r['stage']}.{r['metric']}: {r['value']} vs baseline {r['baseline']} "
+                f"(+{r['change']:.0%})"
+            ))
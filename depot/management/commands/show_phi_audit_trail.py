@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from depot.models import PHIFileTracking, DataTableFile
+from depot.models import PHIFileTracking, PHIFileTrackingArchive, DataTableFile, User
 from datetime import datetime, timedelta
 import re
 
@@ -53,8 +53,9 @@ class Command(BaseCommand):
         self.stdout.write("PHI File Audit Trail")
         self.stdout.write("=" * 100)
         
-        # Build query
+        # Build query; records aged out of the live table are counted from the archive
         query = PHIFileTracking.objects.all()
+        archived = PHIFileTrackingArchive.objects.all()
         
         # Filter by DataTableFile if specified
         if data_file_id:
@@ -71,6 +72,9 @@ class Command(BaseCommand):
                     query = query.filter(
                         file_path__in=[data_file.raw_file_path, data_file.duckdb_file_path]
                     )
+                    archived = archived.filter(
+                        file_path__in=[data_file.raw_file_path, data_file.duckdb_file_path]
+                    )
             except DataTableFile.DoesNotExist:
                 self.stdout.write(self.style.ERROR(f"DataTableFile {data_file_id} not found"))
                 return
@@ -81,29 +85,41 @@ class Command(BaseCommand):
                 # Convert wildcard to regex
                 pattern = file_pattern.replace('*', '.*')
                 query = query.filter(file_path__regex=pattern)
+                archived = archived.filter(file_path__regex=pattern)
             else:
                 query = query.filter(file_path__icontains=file_pattern)
+                archived = archived.filter(file_path__icontains=file_pattern)
         
         # Filter by cohort
         if cohort_id:
             query = query.filter(cohort_id=cohort_id)
+            archived = archived.filter(cohort_id=cohort_id)
         
         # Filter by user
         if username:
             query = query.filter(user__username__icontains=username)
+            archived = archived.filter(
+                record__user_id__in=list(User.objects.filter(username__icontains=username).values_list('id', flat=True))
+            )
         
         # Filter by time period
         if days:
             cutoff = timezone.now() - timedelta(days=days)
             query = query.filter(created_at__gte=cutoff)
+            archived = archived.filter(created_at__gte=cutoff)
         
         # Filter by action
         if action:
             query = query.filter(action=action)
+            archived = archived.filter(action=action)
         
         # Order by creation time
         query = query.order_by('-created_at')
         
+        archived_total = archived.count()
+        if archived_total:
+            self.stdout.write(f"{archived_total} matching operations are archived (PHIFileTrackingArchive)")
+
         # Display results
         total = query.count()
         if total == 0:
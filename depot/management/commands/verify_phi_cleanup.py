@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
-from depot.models import PHIFileTracking
+from depot.models import PHIFileState, PHIFileTracking
 from depot.storage.phi_manager import PHIStorageManager
 import logging
 
@@ -79,8 +79,9 @@ class Command(BaseCommand):
         self.stdout.write("=" * 70)
         
         total_tracked = PHIFileTracking.objects.count()
-        nas_files = PHIFileTracking.objects.filter(
-            action__in=['nas_raw_created', 'nas_duckdb_created']
+        nas_files = PHIFileState.objects.filter(
+            last_action__in=['nas_raw_created', 'nas_duckdb_created'],
+            is_present=True
         ).count()
         workspace_created = PHIFileTracking.objects.filter(
             action='work_copy_created'
@@ -93,7 +94,7 @@ class Command(BaseCommand):
         self.stdout.write(f"Files on NAS: {nas_files}")
         self.stdout.write(f"Workspace files created: {workspace_created}")
         self.stdout.write(f"Workspace files deleted: {workspace_deleted}")
-        self.stdout.write(f"Workspace files pending cleanup: {workspace_created - workspace_deleted}")
+        self.stdout.write(f"Workspace files pending cleanup: {uncleaned.count()}")
         
         # Check for files without proper cleanup tracking
         missing_cleanup = PHIFileTracking.objects.filter(
@@ -1,9 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db.models import Count, Q
-from depot.models import PHIFileTracking, DataTableFile, CohortSubmission
+from depot.models import PHIFileTracking, PHIFileVerification, DataTableFile, CohortSubmission
+from depot.services.phi_integrity import PHIIntegrityScrubber
 from depot.storage.manager import StorageManager
-from pathlib import Path
-import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,6 +27,21 @@ class Command(BaseCommand):
             action='store_true',
             help='Verify file hashes (slower but more thorough)',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Files verified in parallel (default: PHI_INTEGRITY_WORKERS)',
+        )
+        parser.add_argument(
+            '--max-mb-per-second',
+            type=int,
+            help='Combined read budget for hashing (default: PHI_INTEGRITY_MAX_MB_PER_SECOND, 0 = unthrottled)',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Start a new scan instead of resuming an unfinished one',
+        )
 
     def handle(self, *args, **options):
         cohort_id = options.get('cohort')
@@ -40,54 +54,52 @@ class Command(BaseCommand):
         
         storage = StorageManager.get_submission_storage()
         
-        # Build query filters
-        tracking_filter = Q()
+        # Tracking records are scoped by cohort
+        scan_cohort_id = cohort_id
         if cohort_id:
-            tracking_filter &= Q(cohort_id=cohort_id)
             self.stdout.write(f"Filtering by cohort ID: {cohort_id}")
         if submission_id:
             submission = CohortSubmission.objects.get(id=submission_id)
-            tracking_filter &= Q(cohort_id=submission.cohort_id)
+            scan_cohort_id = submission.cohort_id
             self.stdout.write(f"Filtering by submission ID: {submission_id}")
         
         # Check NAS files
         self.stdout.write("\nChecking NAS files...")
-        nas_records = PHIFileTracking.objects.filter(
-            tracking_filter,
-            action__in=['nas_raw_created', 'nas_duckdb_created']
+        max_mb_per_second = options.get('max_mb_per_second')
+        scrubber = PHIIntegrityScrubber(
+            storage=storage,
+            workers=options.get('workers'),
+            max_bytes_per_second=max_mb_per_second * 1024 * 1024 if max_mb_per_second is not None else None,
         )
-        
-        missing_files = []
-        corrupt_files = []
-        valid_files = 0
-        
-        for record in nas_records:
-            try:
-                # Check if file exists
-                if not storage.exists(record.file_path):
-                    missing_files.append(record)
-                    continue
-                
-                # Optionally check hash
-                if check_hashes and record.file_hash:
-                    content = storage.get_file(record.file_path)
-                    if isinstance(content, str):
-                        content = content.encode()
-                    calculated_hash = hashlib.sha256(content).hexdigest()
-                    if calculated_hash != record.file_hash:
-                        corrupt_files.append((record, calculated_hash))
-                        continue
-                
-                valid_files += 1
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Error checking {record.file_path}: {e}")
-                )
+        scan = scrubber.scan(
+            cohort_id=scan_cohort_id,
+            check_hashes=check_hashes,
+            restart=options.get('restart'),
+        )
+        if scan.status == 'failed':
+            self.stdout.write(self.style.ERROR(f"Scan {scan.pk} stopped: {scan.error_message} (rerun to resume)"))
+
+        results = PHIFileVerification.objects.filter(scan=scan).select_related('tracking')
+        missing_files = [v.tracking for v in results.filter(status='missing')]
+        corrupt_files = [(v.tracking, v.calculated_hash) for v in results.filter(status='corrupt')]
+        valid_files = results.filter(status='valid').count()
+
+        for verification in results.filter(status='error')[:10]:
+            self.stdout.write(
+                self.style.ERROR(f"Error checking {verification.tracking.file_path}: {verification.error_message}")
+            )
         
         # Report NAS file status
         self.stdout.write(f"\nNAS File Status:")
         self.stdout.write(f"  Valid files: {valid_files}")
+        if check_hashes:
+            self.stdout.write(
+                f"  Unchanged since last verified: {scan.files_skipped}"
+            )
+            self.stdout.write(
+                f"  Hashed {scan.bytes_hashed / (1024 * 1024):.1f} MB in {scan.hash_seconds:.1f}s "
+                f"({scan.throughput_mb_per_second:.1f} MB/s)"
+            )
         if missing_files:
             self.stdout.write(self.style.ERROR(f"  Missing files: {len(missing_files)}"))
             for record in missing_files[:10]:  # Show first 10
@@ -19,7 +19,7 @@ class SignedInMiddleware:
             re.compile(r"^/saml2/"),  # Allow SAML authentication flow
             re.compile(r"^/simplesaml/"),  # Allow SimpleSAMLphp mock IDP (staging)
             re.compile(r"^/internal/"),  # Allow internal API endpoints for services communication
-            re.compile(r"^/health/$"),  # Allow public health check for container monitoring
+            re.compile(r"^/health/(metrics/)?$"),  # Public health check; pipeline metrics check the internal API key themselves
         ]
 
     def __call__(self, request):
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.9 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0026_add_debug_submission_to_datatablefile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datatablefile",
+            name="workflow_timings",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Per-stage workflow timings and critical-path time for the latest upload workflow",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.9 on 2026-10-18 21:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0027_add_workflow_timings_to_datatablefile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datatablefile",
+            name="pipeline_spans",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Span timeline (copy, mapping, DuckDB load, hashing, ID extraction) from depot/utils/instrumentation.py",
+            ),
+        ),
+        migrations.AddField(
+            model_name="validationrun",
+            name="pipeline_spans",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.9 on 2026-10-18 21:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0028_add_pipeline_spans"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notebook",
+            name="render_cache_hit",
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="NotebookRenderCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cache_key", models.CharField(max_length=64, unique=True)),
+                ("storage_path", models.CharField(max_length=1024)),
+                ("file_size", models.BigIntegerField(default=0)),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "last_used_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                (
+                    "cohort",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="depot.cohort",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-last_used_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.9 on 2026-10-18 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0029_add_notebook_render_cache"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datatablefilepatientids",
+            name="content_hash",
+            field=models.CharField(
+                blank=True,
+                help_text="SHA256 of the raw file the patient IDs were extracted from, when known",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="datatablefilepatientids",
+            name="extraction_warnings",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Warnings raised while extracting (duplicates, missing IDs)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="datatablefilepatientids",
+            name="source_path",
+            field=models.CharField(
+                blank=True,
+                help_text="Raw file path the patient IDs were extracted from",
+                max_length=500,
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.9 on 2026-10-18 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0030_add_patient_id_extraction_source"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datatablefilepatientids",
+            name="validated_revision",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Revision of the submission patient IDs last validated against",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="submissionpatientids",
+            name="added_ids",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Patient IDs added in the latest revision",
+            ),
+        ),
+        migrations.AddField(
+            model_name="submissionpatientids",
+            name="removed_ids",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Patient IDs removed in the latest revision",
+            ),
+        ),
+        migrations.AddField(
+            model_name="submissionpatientids",
+            name="revision",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Incremented whenever the set of patient IDs changes",
+            ),
+        ),
+    ]
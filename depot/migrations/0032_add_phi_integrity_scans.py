@@ -0,0 +1,132 @@
+# Generated by Django 5.0.9 on 2026-10-18 22:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0031_add_patient_id_revisions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PHIIntegrityScan",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        db_index=True,
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("check_hashes", models.BooleanField(default=True)),
+                ("last_tracking_id", models.BigIntegerField(default=0)),
+                ("files_checked", models.PositiveIntegerField(default=0)),
+                (
+                    "files_skipped",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Unchanged since last verified, not rehashed",
+                    ),
+                ),
+                ("files_missing", models.PositiveIntegerField(default=0)),
+                ("files_corrupt", models.PositiveIntegerField(default=0)),
+                ("files_failed", models.PositiveIntegerField(default=0)),
+                ("bytes_hashed", models.BigIntegerField(default=0)),
+                (
+                    "hash_seconds",
+                    models.FloatField(
+                        default=0, help_text="Wall-clock time spent verifying"
+                    ),
+                ),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                ("error_message", models.TextField(blank=True)),
+                (
+                    "cohort",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="depot.cohort",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-started_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="PHIFileVerification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("valid", "Valid"),
+                            ("missing", "Missing"),
+                            ("corrupt", "Hash mismatch"),
+                            ("error", "Error"),
+                        ],
+                        db_index=True,
+                        max_length=20,
+                    ),
+                ),
+                ("file_size", models.BigIntegerField(blank=True, null=True)),
+                ("file_mtime", models.FloatField(blank=True, null=True)),
+                ("calculated_hash", models.CharField(blank=True, max_length=64)),
+                ("error_message", models.TextField(blank=True)),
+                (
+                    "verified_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "tracking",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="verification",
+                        to="depot.phifiletracking",
+                    ),
+                ),
+                (
+                    "scan",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="depot.phiintegrityscan",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-verified_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.0.9 on 2026-10-18 22:19
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+CREATED_ACTIONS = [
+    'nas_raw_created', 'nas_duckdb_created', 'nas_report_created', 'nas_processed_created',
+    'work_copy_created', 'file_uploaded_via_stream', 'file_uploaded_chunked', 'precheck_upload_staged',
+]
+DELETED_ACTIONS = [
+    'nas_raw_deleted', 'nas_duckdb_deleted', 'nas_report_deleted', 'work_copy_deleted', 'file_deleted_via_api',
+]
+
+
+def backfill_file_states(apps, schema_editor):
+    """Build each tracked path's current state from its latest creation or deletion record."""
+    PHIFileTracking = apps.get_model('depot', 'PHIFileTracking')
+    PHIFileState = apps.get_model('depot', 'PHIFileState')
+
+    latest = {}
+    records = PHIFileTracking.objects.filter(
+        action__in=CREATED_ACTIONS + DELETED_ACTIONS,
+        error_message=''
+    ).order_by('id').values_list('id', 'file_path', 'cohort_id', 'action', 'cleaned_up')
+    for record_id, file_path, cohort_id, action, cleaned_up in records.iterator():
+        latest[file_path] = PHIFileState(
+            file_path=file_path,
+            cohort_id=cohort_id,
+            last_action=action,
+            last_tracking_id=record_id,
+            is_present=action in CREATED_ACTIONS and not cleaned_up,
+        )
+
+    PHIFileState.objects.bulk_create(latest.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0032_add_phi_integrity_scans"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PHIFileTrackingArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("original_id", models.BigIntegerField(unique=True)),
+                (
+                    "cohort_id",
+                    models.IntegerField(blank=True, db_index=True, null=True),
+                ),
+                ("action", models.CharField(max_length=50)),
+                ("file_path", models.CharField(db_index=True, max_length=500)),
+                ("created_at", models.DateTimeField(db_index=True)),
+                (
+                    "record",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="All fields of the original record",
+                    ),
+                ),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Archived PHI File Tracking Record",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="PHIFileState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file_path", models.CharField(max_length=500, unique=True)),
+                ("last_action", models.CharField(max_length=50)),
+                (
+                    "last_tracking_id",
+                    models.BigIntegerField(
+                        help_text="PHIFileTracking record that set this state"
+                    ),
+                ),
+                ("is_present", models.BooleanField(default=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "cohort",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="depot.cohort",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "PHI File State",
+                "indexes": [
+                    models.Index(
+                        fields=["last_action", "is_present"],
+                        name="depot_phifi_last_ac_c08ace_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_file_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-18 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0034_add_notification_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="validationvariable",
+            name="pipeline_spans",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
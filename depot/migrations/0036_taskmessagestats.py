@@ -0,0 +1,50 @@
+# Generated by Django 5.0.9 on 2026-10-18 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("depot", "0035_validationvariable_pipeline_spans"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskMessageStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=200)),
+                (
+                    "hour",
+                    models.DateTimeField(
+                        help_text="Start of the hour the messages were published in"
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("total_bytes", models.BigIntegerField(default=0)),
+                ("max_bytes", models.BigIntegerField(default=0)),
+                (
+                    "over_threshold",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Messages above CELERY_MESSAGE_SIZE_WARNING_BYTES",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["hour"], name="depot_taskm_hour_29c69c_idx")
+                ],
+                "unique_together": {("task", "hour")},
+            },
+        ),
+    ]
@@ -13,13 +13,17 @@ from .uploadedfile import UploadedFile
 # TemporaryFile removed - replaced by PHIFileTracking
 from .precheck_run import PrecheckRun
 from .precheck_validation import PrecheckValidation
-from .notebook import Notebook
+from .notebook import Notebook, NotebookRenderCache
 from .cohortsubmission import CohortSubmission
 from .cohortsubmissiondatatable import CohortSubmissionDataTable
 from .datatablefile import DataTableFile
 from .fileattachment import FileAttachment
 from .submissionactivity import SubmissionActivity
+from .phifilestate import PHIFileState, PHIFileTrackingArchive
 from .phifiletracking import PHIFileTracking
+from .phiintegrity import PHIIntegrityScan, PHIFileVerification
+from .notificationoutbox import NotificationOutbox
+from .taskmessagestats import TaskMessageStats
 from .submissionpatientids import SubmissionPatientIDs
 from .notebookaccess import NotebookAccess
 from .datatablereview import DataTableReview
@@ -38,6 +42,7 @@ __all__ = [
     'PrecheckRun',
     'PrecheckValidation',
     'Notebook',
+    'NotebookRenderCache',
     'Revision',
     'CohortSubmission',
     'CohortSubmissionDataTable',
@@ -47,6 +52,12 @@ __all__ = [
     'ProtocolYear',
     'SubmissionActivity',
     'PHIFileTracking',
+    'PHIFileState',
+    'PHIFileTrackingArchive',
+    'PHIIntegrityScan',
+    'PHIFileVerification',
+    'NotificationOutbox',
+    'TaskMessageStats',
     'SubmissionPatientIDs',
     'NotebookAccess',
     'DataTableReview',
@@ -129,6 +129,18 @@ class DataTableFile(BaseModel):
         help_text="When file cleanup was verified"
     )
 
+    # Upload workflow instrumentation (see depot/tasks/upload_workflow.py)
+    workflow_timings = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Per-stage workflow timings and critical-path time for the latest upload workflow"
+    )
+    pipeline_spans = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Span timeline (copy, mapping, DuckDB load, hashing, ID extraction) from depot/utils/instrumentation.py"
+    )
+
     class Meta:
         ordering = ['created_at']
         indexes = [
@@ -3,10 +3,17 @@ Model to store extracted patient IDs for each data table file.
 This allows us to track which patient IDs are in each file and validate them
 against the main patient file.
 """
+import re
+
 from django.db import models
 from depot.models import BaseModel
 
 
+def _is_sha256(value):
+    """File hashes are placeholders until the integrity task has run."""
+    return bool(value) and re.fullmatch(r'[0-9a-f]{64}', value) is not None
+
+
 class DataTableFilePatientIDs(BaseModel):
     """Store extracted patient IDs for each uploaded file."""
 
@@ -54,12 +61,37 @@ class DataTableFilePatientIDs(BaseModel):
         help_text="Error message if extraction failed"
     )
 
+    extraction_warnings = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Warnings raised while extracting (duplicates, missing IDs)"
+    )
+
+    # What the IDs were extracted from, so later stages can reuse them
+    source_path = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text="Raw file path the patient IDs were extracted from"
+    )
+
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="SHA256 of the raw file the patient IDs were extracted from, when known"
+    )
+
     # Validation metadata
     validated = models.BooleanField(
         default=False,
         help_text="Whether this file has been validated against main patient file"
     )
 
+    validated_revision = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Revision of the submission patient IDs last validated against"
+    )
+
     validation_date = models.DateTimeField(
         null=True,
         blank=True,
@@ -117,31 +149,70 @@ class DataTableFilePatientIDs(BaseModel):
     def __str__(self):
         return f"Patient IDs for {self.data_file} ({self.patient_count} IDs)"
 
+    @classmethod
+    def current_for(cls, data_file):
+        """
+        The extraction recorded for the data file's current content, or None
+        if the file needs scanning.
+        """
+        record = cls.objects.filter(data_file=data_file).order_by('-id').first()
+        if record and record.is_current_for(data_file):
+            return record
+        return None
+
+    @classmethod
+    def record_extraction(cls, data_file, patient_ids, warnings=None, content_hash=''):
+        """
+        Store the patient IDs extracted from the data file's current raw file.
+
+        Args:
+            data_file: DataTableFile the IDs were extracted from
+            patient_ids: Patient IDs found in the file
+            warnings: Extraction warnings to keep with the IDs
+            content_hash: SHA256 of the raw file, if already calculated
+        """
+        record, created = cls.objects.get_or_create(
+            data_file=data_file,
+            defaults={
+                'patient_ids': [],
+                'patient_count': 0,
+                'invalid_count': 0,
+                'validation_status': 'pending',
+                'progress': 0
+            }
+        )
+
+        if patient_ids:
+            record.source_path = data_file.raw_file_path
+            record.content_hash = content_hash or (data_file.file_hash if _is_sha256(data_file.file_hash) else '')
+            record.extraction_warnings = list(warnings or [])
+            record.extract_and_store_ids(patient_ids)
+
+        return record
+
+    def is_current_for(self, data_file):
+        """
+        Whether these IDs came from the data file's current raw file.
+
+        Requires a complete extraction from the same path; once both content
+        hashes are known they must also match.
+        """
+        if not self.source_path or self.extraction_error or not self.patient_count:
+            return False
+        if self.source_path != data_file.raw_file_path:
+            return False
+        if self.content_hash and _is_sha256(data_file.file_hash):
+            return self.content_hash == data_file.file_hash
+        return True
+
     def extract_and_store_ids(self, patient_ids_list):
         """Extract and store patient IDs from a list."""
         import logging
-        from django.db import connection, transaction
+        from django.db import transaction
 
         logger = logging.getLogger(__name__)
         logger.info(f"About to store {len(patient_ids_list)} patient IDs")
 
-        # Ensure connection is fresh before save - be more aggressive
-        try:
-            if connection.connection is not None:
-                if not connection.is_usable():
-                    logger.info("Connection not usable, closing and reconnecting")
-                    connection.close()
-                    connection.ensure_connection()
-                else:
-                    logger.info("Connection is usable")
-            else:
-                logger.info("No existing connection, will create new one")
-                connection.ensure_connection()
-        except Exception as e:
-            logger.warning(f"Connection check failed: {e}, forcing new connection")
-            connection.close()
-            connection.ensure_connection()
-
         # Remove duplicates and store
         unique_ids = list(set(patient_ids_list))
         logger.info(f"Processing {len(unique_ids)} unique patient IDs")
@@ -151,6 +222,7 @@ class DataTableFilePatientIDs(BaseModel):
             logger.warning(f"Extremely large dataset ({len(unique_ids)} IDs) - storing count only, not full list")
             # For massive datasets, just store the count and a sample
             self.patient_ids = unique_ids[:1000]  # Store first 1000 as sample
+            self.validated_revision = None
             self.patient_count = len(unique_ids)
             self.extraction_error = f"Dataset too large ({len(unique_ids)} IDs) - stored sample of 1000 IDs"
 
@@ -160,6 +232,7 @@ class DataTableFilePatientIDs(BaseModel):
         else:
             # For normal datasets, save the full list
             self.patient_ids = unique_ids
+            self.validated_revision = None
             self.patient_count = len(unique_ids)
             self.extraction_error = ""
 
@@ -169,28 +242,65 @@ class DataTableFilePatientIDs(BaseModel):
 
         return unique_ids
 
-    def validate_against_main(self, main_patient_ids):
+    def validate_against_main(self, main_patient_ids, revision=None):
         """
         Validate this file's patient IDs against the main patient file.
 
         Args:
             main_patient_ids: Set or list of valid patient IDs from main file
+            revision: Revision of the submission patient IDs being validated against
         """
         from django.utils import timezone
-        from django.db import connection
 
-        # Ensure connection is fresh before save
-        if connection.connection is not None and not connection.is_usable():
-            connection.close()
-
-        main_ids_set = set(main_patient_ids)
+        main_ids_set = main_patient_ids if isinstance(main_patient_ids, (set, frozenset)) else set(main_patient_ids)
         file_ids_set = set(self.patient_ids)
 
         # Find valid and invalid IDs
         self.valid_ids = list(file_ids_set & main_ids_set)  # Intersection
         self.invalid_ids = list(file_ids_set - main_ids_set)  # Difference
+        self.invalid_count = len(self.invalid_ids)
 
         self.validated = True
+        self.validated_revision = revision
+        self.validation_date = timezone.now()
+        self.validation_error = ""
+        self.save()
+
+        return {
+            'total': len(self.patient_ids),
+            'valid': len(self.valid_ids),
+            'invalid': len(self.invalid_ids),
+            'invalid_ids': self.invalid_ids[:10]  # Return first 10 invalid IDs for display
+        }
+
+    def apply_patient_delta(self, added_ids, removed_ids, revision):
+        """
+        Update a previous validation for a change to the main patient IDs.
+
+        Only IDs in the delta can change status: added IDs this file uses
+        become valid, removed ones become invalid.
+
+        Args:
+            added_ids: Patient IDs added to the main patient file
+            removed_ids: Patient IDs removed from the main patient file
+            revision: Revision of the submission patient IDs after the change
+        """
+        from django.utils import timezone
+
+        invalid_set = set(self.invalid_ids)
+        newly_valid = {pid for pid in added_ids if pid in invalid_set}
+
+        newly_invalid = set()
+        if removed_ids:
+            file_ids_set = set(self.patient_ids)
+            newly_invalid = {pid for pid in removed_ids if pid in file_ids_set}
+
+        if newly_valid or newly_invalid:
+            self.valid_ids = [pid for pid in self.valid_ids if pid not in newly_invalid] + list(newly_valid)
+            self.invalid_ids = [pid for pid in self.invalid_ids if pid not in newly_valid] + list(newly_invalid)
+        self.invalid_count = len(self.invalid_ids)
+
+        self.validated_revision = revision
         self.validation_date = timezone.now()
         self.validation_error = ""
         self.save()
@@ -200,4 +310,4 @@ class DataTableFilePatientIDs(BaseModel):
             'valid': len(self.valid_ids),
             'invalid': len(self.invalid_ids),
             'invalid_ids': self.invalid_ids[:10]  # Return first 10 invalid IDs for display
-        }
\ No newline at end of file
+        }
@@ -24,6 +24,8 @@ class Notebook(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     compiled_at = models.DateTimeField(null=True, blank=True)
     error = models.TextField(null=True, blank=True)
+    # True when the compiled HTML came from NotebookRenderCache, False when rendered
+    render_cache_hit = models.BooleanField(null=True, blank=True)
 
     # Generic relation to either Audit or Upload
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
@@ -80,4 +82,35 @@ class Notebook(models.Model):
         return CohortMembership.objects.filter(
             user=user,
             cohort=self.cohort
-        ).exists() 
\ No newline at end of file
+        ).exists() 
+
+class NotebookRenderCache(models.Model):
+    """
+    A compiled notebook stored for reuse by later renders with identical inputs.
+
+    The key covers the data file, definition version and template version
+    (see depot/services/notebook_render.py). Cached HTML can embed
+    PHI-derived aggregates, so its creation and eviction are logged in
+    PHIFileTracking like any other report.
+    """
+
+    cache_key = models.CharField(max_length=64, unique=True)
+    storage_path = models.CharField(max_length=1024)  # Relative path in 'reports' storage
+    file_size = models.BigIntegerField(default=0)
+    cohort = models.ForeignKey('Cohort', on_delete=models.CASCADE, null=True, blank=True)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+
+    def __str__(self):
+        return f"Render cache {self.cache_key[:12]} ({self.hit_count} hits)"
+
+    def record_hit(self):
+        """Count a reuse of this entry and refresh its LRU position."""
+        self.hit_count = models.F('hit_count') + 1
+        self.last_used_at = timezone.now()
+        self.save(update_fields=['hit_count', 'last_used_at'])
+        self.refresh_from_db(fields=['hit_count'])
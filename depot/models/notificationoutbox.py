@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+
+class NotificationOutbox(models.Model):
+    """
+    Email waiting to be delivered, one row per recipient.
+
+    NotificationService writes rows inside the caller's transaction, so a
+    notification is only sent if the change it describes commits, and SMTP
+    latency never blocks a request or workflow task. The
+    deliver_notifications task sends due rows and reschedules failures with
+    exponential backoff. Pending rows for the same recipient and
+    ``coalesce_key`` are sent as a single digest.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    notification_type = models.CharField(max_length=50, db_index=True)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+    coalesce_key = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text="Pending rows with the same recipient and key are sent as one digest"
+    )
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type} to {self.recipient} ({self.status})"
+
+    @classmethod
+    def due(cls):
+        """Rows ready to send, including claims abandoned by a lost worker."""
+        return cls.objects.filter(status__in=['pending', 'sending'], next_attempt_at__lte=timezone.now())
+
+    @staticmethod
+    def retry_delay(attempts, base_seconds, max_seconds):
+        """Exponential backoff after the given number of failed attempts."""
+        return timedelta(seconds=min(base_seconds * 2 ** (attempts - 1), max_seconds))
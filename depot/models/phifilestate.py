@@ -0,0 +1,158 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router, transaction
+
+
+class PHIFileState(models.Model):
+    """
+    Current lifecycle state of each tracked PHI file path.
+
+    PHIFileTracking is an append-only audit log, so "is this file still
+    there?" otherwise means scanning every operation ever recorded for the
+    path. This table keeps one row per path, updated as creation and
+    deletion operations are logged, so cleanup and verification queries
+    only touch files that currently exist.
+    """
+
+    file_path = models.CharField(max_length=500, unique=True)
+    cohort = models.ForeignKey('Cohort', on_delete=models.SET_NULL, null=True, blank=True)
+    last_action = models.CharField(max_length=50)
+    last_tracking_id = models.BigIntegerField(help_text="PHIFileTracking record that set this state")
+    is_present = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_action', 'is_present']),
+        ]
+        verbose_name = 'PHI File State'
+
+    def __str__(self):
+        return f"{self.file_path}: {self.last_action}"
+
+    @classmethod
+    def record_operations(cls, records):
+        """
+        Apply saved PHIFileTracking records, in id order, to the state table.
+
+        Operations that neither create nor delete a file, and failed
+        operations, leave the state unchanged. Rows are upserted in one
+        query where the backend supports it: ON CONFLICT (file_path) on
+        PostgreSQL and SQLite, ON DUPLICATE KEY UPDATE on MySQL, which
+        cannot name the conflict target.
+        """
+        from depot.models import PHIFileTracking
+
+        latest = {}
+        for record in records:
+            if record.pk is None or record.error_message:
+                continue
+            if record.action in PHIFileTracking.CREATED_ACTIONS:
+                is_present = True
+            elif record.action in PHIFileTracking.DELETED_ACTIONS:
+                is_present = False
+            else:
+                continue
+            latest[record.file_path] = cls(
+                file_path=record.file_path,
+                cohort_id=record.cohort_id,
+                last_action=record.action,
+                last_tracking_id=record.pk,
+                is_present=is_present,
+            )
+
+        if not latest:
+            return
+
+        update_fields = ['cohort', 'last_action', 'last_tracking_id', 'is_present', 'updated_at']
+        features = connections[router.db_for_write(cls)].features
+        if features.supports_update_conflicts_with_target:
+            cls.objects.bulk_create(
+                latest.values(), update_conflicts=True, unique_fields=['file_path'], update_fields=update_fields,
+            )
+        elif features.supports_update_conflicts:
+            # file_path is the only unique key a new row can collide on
+            cls.objects.bulk_create(latest.values(), update_conflicts=True, update_fields=update_fields)
+        else:
+            with transaction.atomic(using=router.db_for_write(cls)):
+                for state in latest.values():
+                    cls.objects.update_or_create(file_path=state.file_path, defaults={
+                        'cohort_id': state.cohort_id,
+                        'last_action': state.last_action,
+                        'last_tracking_id': state.last_tracking_id,
+                        'is_present': state.is_present,
+                    })
+
+
+class PHIFileTrackingArchive(models.Model):
+    """
+    Cold storage for PHIFileTracking records aged out of the live table.
+
+    Each row keeps the original record in full, so the audit trail survives
+    archiving while the live table stays small.
+    """
+
+    original_id = models.BigIntegerField(unique=True)
+    cohort_id = models.IntegerField(null=True, blank=True, db_index=True)
+    action = models.CharField(max_length=50)
+    file_path = models.CharField(max_length=500, db_index=True)
+    created_at = models.DateTimeField(db_index=True)
+    record = models.JSONField(encoder=DjangoJSONEncoder, help_text="All fields of the original record")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Archived PHI File Tracking Record'
+
+    def __str__(self):
+        return f"{self.action} - {self.file_path} (archived)"
+
+    @classmethod
+    def archive_before(cls, cutoff, batch_size=1000):
+        """
+        Move PHIFileTracking records created before ``cutoff`` into the archive.
+
+        Records that live queries still need stay in place: NAS creation
+        records (verified by the integrity scrubber), records still awaiting
+        cleanup, and the record behind each file's current state.
+
+        Returns:
+            int: Number of records archived
+        """
+        from depot.models import PHIFileTracking
+
+        candidates = PHIFileTracking.all_objects.filter(
+            created_at__lt=cutoff
+        ).exclude(
+            action__in=PHIFileTracking.NAS_CREATED_ACTIONS
+        ).exclude(
+            models.Q(cleaned_up=False) & (
+                models.Q(cleanup_required=True)
+                | models.Q(expected_cleanup_by__isnull=False)
+                | models.Q(action='work_copy_created')
+            )
+        ).exclude(
+            id__in=PHIFileState.objects.values('last_tracking_id')
+        ).order_by('id')
+
+        fields = [field.attname for field in PHIFileTracking._meta.concrete_fields]
+        archived = 0
+        while True:
+            with transaction.atomic():
+                batch = list(candidates.values(*fields)[:batch_size])
+                if not batch:
+                    break
+                cls.objects.bulk_create([
+                    cls(
+                        original_id=row['id'],
+                        cohort_id=row['cohort_id'],
+                        action=row['action'],
+                        file_path=row['file_path'],
+                        created_at=row['created_at'],
+                        record=row,
+                    )
+                    for row in batch
+                ], ignore_conflicts=True)
+                PHIFileTracking.all_objects.filter(id__in=[row['id'] for row in batch]).delete()
+            archived += len(batch)
+
+        return archived
@@ -1,8 +1,14 @@
+from contextlib import contextmanager
 from django.db import models
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from depot.models.basemodel import BaseModel
+from depot.models.phifilestate import PHIFileState
 import socket
+import threading
+
+# Records logged inside PHIFileTracking.batched(), per thread
+_pending = threading.local()
 
 
 class PHIFileTracking(BaseModel):
@@ -61,6 +67,15 @@ class PHIFileTracking(BaseModel):
         ('submission_attachment', 'Submission attachment'),
         ('unknown', 'Unknown file type'),
     ]
+
+    # Operations that change whether a file exists (see PHIFileState)
+    NAS_CREATED_ACTIONS = ['nas_raw_created', 'nas_duckdb_created', 'nas_report_created', 'nas_processed_created']
+    CREATED_ACTIONS = NAS_CREATED_ACTIONS + [
+        'work_copy_created', 'file_uploaded_via_stream', 'file_uploaded_chunked', 'precheck_upload_staged',
+    ]
+    DELETED_ACTIONS = [
+        'nas_raw_deleted', 'nas_duckdb_deleted', 'nas_report_deleted', 'work_copy_deleted', 'file_deleted_via_api',
+    ]
     
     # Core tracking fields
     cohort = models.ForeignKey(
@@ -225,16 +240,24 @@ class PHIFileTracking(BaseModel):
         # Auto-populate hostname if not set
         if not self.server_hostname:
             self.server_hostname = socket.gethostname()
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if adding:
+            PHIFileState.record_operations([self])
     
     @classmethod
     def log_operation(cls, cohort, user, action, file_path,
                       file_type='raw_csv', file_size=None, file_hash='',
-                      content_object=None, error_message='', metadata=None):
+                      content_object=None, error_message='', metadata=None,
+                      **fields):
         """
         Convenience method to log a file operation.
+
+        Extra keyword arguments set other fields on the record. Inside
+        batched() the record is returned unsaved and written when the
+        batch ends.
         """
-        return cls.objects.create(
+        record = cls(
             cohort=cohort,
             user=user,
             action=action,
@@ -245,7 +268,59 @@ class PHIFileTracking(BaseModel):
             content_object=content_object,
             error_message=error_message,
             metadata=metadata,
+            **fields,
         )
+        pending = getattr(_pending, 'records', None)
+        if pending is None:
+            record.save()
+        else:
+            pending.append(record)
+        return record
+
+    @classmethod
+    @contextmanager
+    def batched(cls):
+        """
+        Buffer log_operation() calls and insert them in one query when the
+        block exits, including on error. Use around a task or conversion
+        that logs many operations; nested blocks join the outermost one.
+        Also usable as a decorator.
+        """
+        if getattr(_pending, 'records', None) is not None:
+            yield
+            return
+
+        _pending.records = []
+        try:
+            yield
+        finally:
+            records, _pending.records = _pending.records, None
+            cls._write_batch(records)
+
+    @classmethod
+    def flush_batch(cls):
+        """Write the records buffered so far in the current batch."""
+        records = getattr(_pending, 'records', None)
+        if records:
+            _pending.records = []
+            cls._write_batch(records)
+
+    @classmethod
+    def _write_batch(cls, records):
+        if not records:
+            return
+        hostname = socket.gethostname()
+        for record in records:
+            record.server_hostname = record.server_hostname or hostname
+        cls.objects.bulk_create(records)
+        if any(record.pk is None for record in records):
+            # Backends that don't return ids from bulk inserts
+            saved = cls.objects.filter(
+                file_path__in={record.file_path for record in records}
+            ).order_by('id')
+            PHIFileState.record_operations(saved)
+        else:
+            PHIFileState.record_operations(records)
     
     @classmethod
     def get_uncleaned_workspace_files(cls):
@@ -254,11 +329,11 @@ class PHIFileTracking(BaseModel):
         """
         return cls.objects.filter(
             action='work_copy_created',
-            cleaned_up=False
-        ).exclude(
-            file_path__in=cls.objects.filter(
-                action='work_copy_deleted'
-            ).values_list('file_path', flat=True)
+            cleaned_up=False,
+            id__in=PHIFileState.objects.filter(
+                last_action='work_copy_created',
+                is_present=True
+            ).values('last_tracking_id')
         )
     
     def mark_cleaned_up(self, user=None):
@@ -270,6 +345,10 @@ class PHIFileTracking(BaseModel):
         self.cleanup_verified_at = timezone.now()
         self.cleanup_verified_by = user
         self.save()
+        PHIFileState.objects.filter(
+            file_path=self.file_path,
+            last_tracking_id=self.pk
+        ).update(is_present=False)
     
     @property
     def is_cleanup_overdue(self):
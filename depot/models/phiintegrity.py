@@ -0,0 +1,103 @@
+from django.db import models
+from django.utils import timezone
+
+
+class PHIIntegrityScan(models.Model):
+    """
+    One run of the PHI integrity scrubber (see depot/services/phi_integrity.py).
+
+    Records are verified in PHIFileTracking id order and the last verified
+    id is checkpointed, so an interrupted scan resumes where it stopped.
+    """
+
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running', db_index=True)
+    cohort = models.ForeignKey('Cohort', on_delete=models.CASCADE, null=True, blank=True)
+    check_hashes = models.BooleanField(default=True)
+
+    # Checkpoint: highest PHIFileTracking id verified so far
+    last_tracking_id = models.BigIntegerField(default=0)
+
+    files_checked = models.PositiveIntegerField(default=0)
+    files_skipped = models.PositiveIntegerField(default=0, help_text="Unchanged since last verified, not rehashed")
+    files_missing = models.PositiveIntegerField(default=0)
+    files_corrupt = models.PositiveIntegerField(default=0)
+    files_failed = models.PositiveIntegerField(default=0)
+    bytes_hashed = models.BigIntegerField(default=0)
+    hash_seconds = models.FloatField(default=0, help_text="Wall-clock time spent verifying")
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"PHI integrity scan {self.pk} ({self.status}, {self.files_checked} files)"
+
+    @property
+    def throughput_mb_per_second(self):
+        if not self.hash_seconds:
+            return 0.0
+        return self.bytes_hashed / (1024 * 1024) / self.hash_seconds
+
+    def summary(self):
+        return {
+            'scan_id': self.pk,
+            'status': self.status,
+            'files_checked': self.files_checked,
+            'files_skipped': self.files_skipped,
+            'files_missing': self.files_missing,
+            'files_corrupt': self.files_corrupt,
+            'files_failed': self.files_failed,
+            'bytes_hashed': self.bytes_hashed,
+            'seconds': round(self.hash_seconds, 2),
+            'throughput_mb_per_second': round(self.throughput_mb_per_second, 2),
+        }
+
+    def finish(self, status='completed', error_message=''):
+        self.status = status
+        self.error_message = error_message
+        self.completed_at = timezone.now()
+        self.save()
+
+
+class PHIFileVerification(models.Model):
+    """
+    Latest integrity verification result for a tracked PHI file.
+
+    The size and modification time seen when the file was last hashed let
+    later scans skip files that have not changed.
+    """
+
+    STATUS_CHOICES = [
+        ('valid', 'Valid'),
+        ('missing', 'Missing'),
+        ('corrupt', 'Hash mismatch'),
+        ('error', 'Error'),
+    ]
+
+    tracking = models.OneToOneField(
+        'PHIFileTracking',
+        on_delete=models.CASCADE,
+        related_name='verification'
+    )
+    scan = models.ForeignKey(PHIIntegrityScan, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, db_index=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    file_mtime = models.FloatField(null=True, blank=True)
+    calculated_hash = models.CharField(max_length=64, blank=True)
+    error_message = models.TextField(blank=True)
+    verified_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-verified_at']
+
+    def __str__(self):
+        return f"{self.tracking.file_path}: {self.status}"
@@ -54,6 +54,22 @@ class SubmissionPatientIDs(BaseModel):
         help_text="Number of duplicate IDs that were removed"
     )
     
+    # Changes to the ID set, so files can be revalidated against the delta
+    revision = models.PositiveIntegerField(
+        default=0,
+        help_text="Incremented whenever the set of patient IDs changes"
+    )
+    added_ids = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Patient IDs added in the latest revision"
+    )
+    removed_ids = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Patient IDs removed in the latest revision"
+    )
+    
     # Source file reference
     source_file = models.ForeignKey(
         'DataTableFile',
@@ -130,6 +146,14 @@ class SubmissionPatientIDs(BaseModel):
         )
         
         if not created:
+            # Record what changed so files only need revalidating for the delta
+            previous_ids = set(record.patient_ids)
+            new_ids = set(unique_ids)
+            if new_ids != previous_ids:
+                record.revision += 1
+                record.added_ids = list(new_ids - previous_ids)
+                record.removed_ids = list(previous_ids - new_ids)
+
             # Update existing record
             record.patient_ids = unique_ids
             record.patient_count = len(unique_ids)
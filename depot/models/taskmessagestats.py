@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class TaskMessageStats(models.Model):
+    """
+    Published Celery message sizes for one task over one hour.
+
+    Tasks are published from web requests and from workers, not from the
+    process serving /health/metrics/, so each process buffers its sizes and
+    folds them into these rows (see depot/celery.py). The metrics endpoint
+    sums the hours inside its window.
+    """
+
+    task = models.CharField(max_length=200)
+    hour = models.DateTimeField(help_text="Start of the hour the messages were published in")
+    count = models.PositiveIntegerField(default=0)
+    total_bytes = models.BigIntegerField(default=0)
+    max_bytes = models.BigIntegerField(default=0)
+    over_threshold = models.PositiveIntegerField(
+        default=0,
+        help_text="Messages above CELERY_MESSAGE_SIZE_WARNING_BYTES"
+    )
+
+    class Meta:
+        unique_together = [('task', 'hour')]
+        indexes = [models.Index(fields=['hour'])]
+
+    def __str__(self):
+        return f"{self.task} @ {self.hour:%Y-%m-%d %H:00} ({self.count} messages)"
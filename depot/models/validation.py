@@ -131,6 +131,10 @@ class ValidationRun(BaseModel):
     variables_with_warnings = models.IntegerField(default=0)
     variables_with_errors = models.IntegerField(default=0)
 
+    # Run-level span timeline (data table summary) from depot/utils/instrumentation.py;
+    # per-variable spans are kept on ValidationVariable
+    pipeline_spans = models.JSONField(default=list, blank=True)
+
     class Meta:
         db_table = 'depot_validation_runs'
         ordering = ['-created_at']
@@ -278,6 +282,14 @@ class ValidationRun(BaseModel):
             hours = duration / 3600
             return f"{hours:.1f}h"
 
+    def cleanup_affected_rows(self):
+        """Delete this run's affected-rows artifacts (see depot/services/affected_rows.py)."""
+        from depot.services.affected_rows import delete_affected_rows
+        try:
+            delete_affected_rows(self.id)
+        except Exception as exc:
+            logger.warning("Failed to delete affected rows for validation run %s: %s", self.id, exc)
+
     def _cleanup_duckdb_file(self):
         """
         Delete the temporary DuckDB file after validation completes.
@@ -291,7 +303,9 @@ class ValidationRun(BaseModel):
 
         Delete:
         - duckdb_path (temporary, no longer needed after validation)
+        - affected-rows artifacts under the run's workspace prefix
         """
+        self.cleanup_affected_rows()
         if not self.duckdb_path:
             return
 
@@ -335,6 +349,7 @@ class ValidationRun(BaseModel):
             scratch = ScratchManager()
             prefix = f"{scratch.precheck_runs_prefix}{precheck_run.id}/"
             scratch.storage.delete_prefix(prefix)
+            self.cleanup_affected_rows()
 
             user = precheck_run.uploaded_by or precheck_run.created_by
 
@@ -409,6 +424,10 @@ class ValidationVariable(BaseModel):
         help_text="Variable-specific statistics (e.g., duplicate_count, out_of_range_count)"
     )
 
+    # Span timeline of this variable's validation and summary tasks, kept per
+    # variable so parallel tasks never contend for the run's row lock
+    pipeline_spans = models.JSONField(default=list, blank=True)
+
     class Meta:
         db_table = 'depot_validation_variables'
         ordering = ['validation_run', 'column_name']
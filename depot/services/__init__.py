@@ -1,20 +1,26 @@
 # Services for depot application
-# Import specific functions to avoid circular imports
+# Services are loaded on first attribute access: several pull in DuckDB and
+# pandas, which web workers should not import just because a submodule such
+# as depot.services.notebook is used.
 
-from .data_mapping import DataMappingService
-from .duckdb_conversion import DuckDBConversionService
-from .data_statistics import DataFileStatisticsService
-from .definition_processing import DefinitionProcessingService
-from .variable_summary_service import VariableSummaryService
-from .data_table_summary_service import DataTableSummaryService
-from .submission_summary_service import SubmissionSummaryService
+import importlib
 
-__all__ = (
-    'DataMappingService',
-    'DuckDBConversionService',
-    'DataFileStatisticsService',
-    'DefinitionProcessingService',
-    'VariableSummaryService',
-    'DataTableSummaryService',
-    'SubmissionSummaryService',
-)
+_SERVICES = {
+    'DataMappingService': '.data_mapping',
+    'DuckDBConversionService': '.duckdb_conversion',
+    'DataFileStatisticsService': '.data_statistics',
+    'DefinitionProcessingService': '.definition_processing',
+    'VariableSummaryService': '.variable_summary_service',
+    'DataTableSummaryService': '.data_table_summary_service',
+    'SubmissionSummaryService': '.submission_summary_service',
+}
+
+__all__ = tuple(_SERVICES)
+
+
+def __getattr__(name):
+    if name not in _SERVICES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SERVICES[name], __name__), name)
+    globals()[name] = value
+    return value
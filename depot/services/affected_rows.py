@@ -0,0 +1,152 @@
+"""
+Affected Rows Artifacts
+
+Row-level drilldown for failed validation checks.
+
+Architecture:
+- Validators describe the rows a failed check affects as a DuckDB query
+- DuckDB copies those rows straight to one Parquet file per validated
+  variable, keyed by (check_type, file_id, source_row); no row lists are
+  built in Python
+- The file lives in workspace storage under its validation run, so it
+  outlives the run's DuckDB database; it is deleted when the run is reset,
+  deleted or has its workspace cleaned up (see ValidationRun)
+- ValidationCheck keeps only the count and a small sample; the UI and CSV
+  export page through the artifact on demand (see validation_check_rows
+  and download_validation_check_rows)
+
+Artifacts hold row positions only, never column values.
+
+Usage:
+    path = artifact_path(validation_run.id, variable.id)
+    counts = write_affected_rows(conn, validator.affected_row_queries, path)
+    rows = read_affected_rows(path, 'no_duplicates', offset=0, limit=100)
+"""
+
+import logging
+import os
+import tempfile
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import duckdb
+
+from depot.storage.manager import StorageManager
+from depot.utils.sql import sql_literal
+
+logger = logging.getLogger(__name__)
+
+# Affected rows kept on ValidationCheck for display
+AFFECTED_ROW_SAMPLE = 20
+
+# Largest page the validation status page reads from an artifact
+AFFECTED_ROW_PAGE_SIZE = 100
+
+COLUMNS = ('check_type', 'file_id', 'source_row', 'duckdb_row')
+
+
+def artifact_path(validation_run_id, variable_id) -> str:
+    """Workspace storage key of a variable's affected-rows artifact."""
+    return f"validation_runs/{validation_run_id}/affected_rows/{variable_id}.parquet"
+
+
+def write_affected_rows(conn, queries: Dict[str, Tuple[str, list]], path: str) -> Dict[str, int]:
+    """
+    Copy the rows selected by each check's query into a Parquet artifact.
+
+    Args:
+        conn: Open DuckDB connection the queries run against
+        queries: Mapping of check type to (query, params); each query
+            selects file_id, source_row and duckdb_row
+        path: Workspace storage key to save the artifact under
+
+    Returns:
+        Number of rows written per check type
+    """
+    union = []
+    params = []
+    for check_type, (query, query_params) in queries.items():
+        union.append(
+            f"SELECT CAST(? AS VARCHAR) AS check_type, CAST(file_id AS BIGINT) AS file_id, "
+            f"CAST(source_row AS BIGINT) AS source_row, CAST(duckdb_row AS BIGINT) AS duckdb_row "
+            f"FROM ({query})"
+        )
+        params += [check_type] + list(query_params)
+
+    with tempfile.TemporaryDirectory(prefix='affected-rows-') as temp_dir:
+        local_path = os.path.join(temp_dir, 'rows.parquet')
+        conn.execute(
+            f"COPY ({' UNION ALL '.join(union)} ORDER BY check_type, file_id, source_row) "
+            f"TO '{local_path}' (FORMAT PARQUET, COMPRESSION ZSTD)",
+            params
+        )
+        counts = dict(duckdb.connect().execute(
+            "SELECT check_type, COUNT(*) FROM read_parquet(?) GROUP BY check_type", [local_path]
+        ).fetchall())
+
+        with open(local_path, 'rb') as artifact:
+            StorageManager.get_workspace_storage().save(path, artifact, 'application/vnd.apache.parquet')
+
+    logger.info(f"Wrote {sum(counts.values())} affected rows to {path}")
+    return counts
+
+
+def delete_affected_rows(validation_run_id) -> None:
+    """Remove every affected-rows artifact of a validation run."""
+    StorageManager.get_workspace_storage().delete_prefix(f"validation_runs/{validation_run_id}/affected_rows/")
+
+
+@contextmanager
+def _open_artifact(path: str):
+    """
+    In-memory DuckDB connection with the artifact as the ``affected`` view.
+
+    On local storage the Parquet file is read in place, so a page only
+    reads the row groups it needs. Remote storage has no local path; the
+    artifact is streamed to a temporary file first.
+    """
+    storage = StorageManager.get_workspace_storage()
+    with ExitStack() as stack:
+        local_path = storage.get_absolute_path(path)
+        if not os.path.isfile(local_path):
+            local = stack.enter_context(tempfile.NamedTemporaryFile(suffix='.parquet'))
+            try:
+                for chunk in storage.stream_file(path):
+                    local.write(chunk)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Affected rows artifact not found: {path}") from None
+            local.flush()
+            local_path = local.name
+
+        conn = stack.enter_context(duckdb.connect())
+        conn.execute(f"CREATE VIEW affected AS SELECT * FROM read_parquet({sql_literal(local_path)})")
+        yield conn
+
+
+def _rows_query(check_type: str, offset: int = 0, limit: Optional[int] = None):
+    query = (
+        f"SELECT {', '.join(COLUMNS[1:])} FROM affected WHERE check_type = ? "
+        f"ORDER BY file_id, source_row"
+    )
+    if limit is not None:
+        query += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+    return query, [check_type]
+
+
+def read_affected_rows(path: str, check_type: str, offset: int = 0,
+                       limit: int = AFFECTED_ROW_PAGE_SIZE) -> List[Dict]:
+    """One page of a check's affected rows, ordered by file and row."""
+    with _open_artifact(path) as conn:
+        rows = conn.execute(*_rows_query(check_type, offset, limit)).fetchall()
+    return [dict(zip(COLUMNS[1:], row)) for row in rows]
+
+
+def iter_affected_rows(path: str, check_type: str, batch_size: int = 10000) -> Iterator[Tuple]:
+    """Yield all of a check's affected rows as (file_id, source_row, duckdb_row) tuples."""
+    with _open_artifact(path) as conn:
+        cursor = conn.execute(*_rows_query(check_type))
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
@@ -9,22 +9,61 @@ Architecture:
 - Each group has per-file-type mapping definitions
 - Supports column renames, value remaps, defaults, and pass-through
 
+Mappings are compiled into a DuckDB ``SELECT ... AS`` projection over
+``read_csv``: renames and casing normalization only touch the header, value
+remaps run as vectorized CASE expressions.
+
 Usage:
     service = DataMappingService(cohort_name="UNC", data_file_type="patient")
     result = service.process_file(raw_csv_path, output_csv_path)
     # Returns changes_summary dict for DataProcessingLog
+
+    # Or load straight into DuckDB without writing a processed CSV
+    changes = service.load_into_duckdb(conn, [raw_csv_path])
 """
 
+import io
 import json
 import logging
 import csv
+import re
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from django.conf import settings
 
+from depot.data.definition_loader import definition_registry
+from depot.services.file_cleaner import FileCleanerService
+from depot.utils.instrumentation import span
+from depot.utils.sql import quote_identifier, sql_literal
+
 logger = logging.getLogger(__name__)
 
 
+def _unique_name(name: str, taken: List[str]) -> str:
+    suffix = 1
+    while f"{name}_{suffix}" in taken:
+        suffix += 1
+    return f"{name}_{suffix}"
+
+
+def _dedupe_names(names: List[str]) -> List[str]:
+    """Suffix repeated column names (``id``, ``id_1``) so DuckDB accepts them."""
+    result = []
+    for name in names:
+        result.append(_unique_name(name, result) if name in result else name)
+    return result
+
+
+def _case_expression(expr: str, remap: Dict) -> str:
+    """Vectorized value remap; values without a mapping pass through unchanged."""
+    whens = ' '.join(
+        f"WHEN {sql_literal(str(source))} THEN {sql_literal(str(target))}"
+        for source, target in remap.items()
+    )
+    return f"CASE {expr} {whens} ELSE {expr} END"
+
+
 class MappingNotFoundException(Exception):
     """Raised when a required mapping file is not found."""
     pass
@@ -35,6 +74,36 @@ class MappingValidationException(Exception):
     pass
 
 
+class MalformedFileError(MappingValidationException):
+    """
+    Raised when an uploaded file has a row DuckDB cannot parse.
+
+    Rows are never skipped, so the message names the line for the uploader to
+    fix; it is stored as the file's conversion error on the upload page.
+    """
+
+    def __init__(self, line: int, detail: str, file_number: int = 1, file_count: int = 1):
+        self.line = line
+        self.detail = detail
+        self.file_number = file_number
+        location = f"File {file_number} of {file_count}, line {line}" if file_count > 1 else f"Line {line}"
+        super().__init__(
+            f"{location}: {detail}. Every row needs one value per column (quote values "
+            f"containing the delimiter); fix the file and upload it again."
+        )
+
+
+_CSV_ERROR = re.compile(r'CSV Error on Line: (\d+)\s*\n\s*(.+)')
+
+
+def _malformed_file_error(error, file_number: int = 1, file_count: int = 1) -> Optional[MalformedFileError]:
+    """MalformedFileError for a DuckDB CSV parsing error, or None for any other error."""
+    match = _CSV_ERROR.search(str(error))
+    if not match:
+        return None
+    return MalformedFileError(int(match.group(1)), match.group(2).strip().rstrip('.'), file_number, file_count)
+
+
 class DataMappingService:
     """
     Service for transforming cohort data to standard schema.
@@ -53,7 +122,7 @@ class DataMappingService:
         """
         self.cohort_name = cohort_name
         self.data_file_type = data_file_type
-        self.mappings_dir = Path(settings.BASE_DIR) / "depot" / "data" / "mappings"
+        self.mappings_dir = definition_registry.mappings_dir
 
         # Load registry and determine mapping group
         self.mapping_group = self._load_mapping_group()
@@ -74,24 +143,20 @@ class DataMappingService:
         Returns:
             Mapping group name (e.g., "cnics") or "passthrough"
         """
-        registry_path = self.mappings_dir / "registry.json"
-
-        if not registry_path.exists():
-            logger.warning(f"Registry not found at {registry_path}, using passthrough")
-            return 'passthrough'
-
         try:
-            with open(registry_path, 'r') as f:
-                registry = json.load(f)
-
-            mapping_group = registry.get('cohort_to_group', {}).get(self.cohort_name, 'passthrough')
-            logger.info(f"Cohort '{self.cohort_name}' mapped to group '{mapping_group}'")
-            return mapping_group
-
+            registry = definition_registry.get_mapping_registry()
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse registry.json: {e}")
             return 'passthrough'
 
+        if registry is None:
+            logger.warning(f"Registry not found in {self.mappings_dir}, using passthrough")
+            return 'passthrough'
+
+        mapping_group = registry.get('cohort_to_group', {}).get(self.cohort_name, 'passthrough')
+        logger.info(f"Cohort '{self.cohort_name}' mapped to group '{mapping_group}'")
+        return mapping_group
+
     def _load_mapping_definition(self) -> Dict:
         """
         Load mapping definition JSON for cohort group and file type.
@@ -104,49 +169,17 @@ class DataMappingService:
         Raises:
             MappingValidationException: If definition file exists but is malformed
         """
-        # Try specific file type mapping first
-        mapping_path = (
-            self.mappings_dir /
-            "cohort_groups" /
-            self.mapping_group /
-            f"{self.data_file_type}.json"
-        )
+        mapping_path = definition_registry.get_mapping_path(self.mapping_group, self.data_file_type)
 
-        if not mapping_path.exists():
-            # Try default mapping for this cohort group
-            default_path = (
-                self.mappings_dir /
-                "cohort_groups" /
-                self.mapping_group /
-                "_default.json"
+        if mapping_path is None:
+            logger.info(
+                f"No mapping definition for {self.cohort_name}/{self.data_file_type} "
+                f"in group '{self.mapping_group}', will use passthrough mode"
             )
-
-            if default_path.exists():
-                try:
-                    with open(default_path, 'r') as f:
-                        definition = json.load(f)
-
-                    logger.info(
-                        f"Using default mapping for {self.cohort_name}/{self.data_file_type} "
-                        f"(loaded from {default_path})"
-                    )
-                    return definition
-
-                except json.JSONDecodeError as e:
-                    raise MappingValidationException(
-                        f"Failed to parse default mapping definition {default_path}: {e}"
-                    )
-            else:
-                logger.info(
-                    f"No mapping definition for {self.cohort_name}/{self.data_file_type} "
-                    f"(expected at {mapping_path} or {default_path}), will use passthrough mode"
-                )
-                return None
+            return None
 
         try:
-            with open(mapping_path, 'r') as f:
-                definition = json.load(f)
-
+            definition = definition_registry.load_json(mapping_path)
             logger.info(f"Loaded mapping definition from {mapping_path}")
             return definition
 
@@ -159,17 +192,22 @@ class DataMappingService:
         """Check if this cohort uses passthrough (no transformation)."""
         return self.mapping_group == 'passthrough'
 
-    def process_file(self, input_path: str, output_path: str) -> Dict:
+    def process_file(self, input_path: str, output_path: str, tracking: Dict = None) -> Dict:
         """
         Process CSV file through mapping transformation.
 
-        Uses simple text operations (no pandas) for efficiency.
-        Column renaming: simple text replacement on header row
-        Value remapping: row-by-row processing if needed
+        Passthrough: header casing normalized, rows streamed as-is.
+        Transform: the mapping is compiled into a DuckDB projection
+        (see ``compile_projection``) and DuckDB writes the output.
+
+        Prefer ``load_into_duckdb`` when the goal is a DuckDB table; it skips
+        the processed CSV entirely.
 
         Args:
             input_path: Path to raw CSV file
             output_path: Path to write processed CSV
+            tracking: PHIFileTracking.log_operation arguments (cohort, user,
+                content_object) for a cleaned copy made in transform mode
 
         Returns:
             changes_summary dict containing:
@@ -181,26 +219,9 @@ class DataMappingService:
                 - errors: List of error messages
                 - summary: Human-readable summary
         """
-        # Clean file first (remove BOM, fix line endings)
-        from depot.services.file_cleaner import FileCleanerService
-        import tempfile
-
-        # Create temporary cleaned file
-        cleaned_fd, cleaned_path = tempfile.mkstemp(suffix='.csv', prefix='cleaned_')
-        import os
-        os.close(cleaned_fd)
-
-        try:
-            cleaning_result = FileCleanerService.clean_file(input_path, cleaned_path)
-            if cleaning_result['had_bom'] or cleaning_result['had_crlf']:
-                logger.info(f"Cleaned file: BOM={cleaning_result['had_bom']}, CRLF={cleaning_result['had_crlf']}")
-
-            # Use cleaned file for processing
-            processing_input = cleaned_path
-        except Exception as e:
-            logger.warning(f"File cleaning failed, using original: {e}")
-            processing_input = input_path
-            cleaning_result = None
+        # Clean (BOM, line endings) on the fly while reading the header/passthrough rows
+        cleaner = FileCleanerService.open_cleaned(input_path)
+        cleaned_input = io.TextIOWrapper(io.BufferedReader(cleaner), encoding='utf-8', newline='')
 
         # Initialize changes summary
         changes_summary = {
@@ -211,33 +232,19 @@ class DataMappingService:
             'warnings': [],
             'errors': [],
             'summary': {},
-            'file_cleaning': cleaning_result
+            'file_cleaning': None
         }
 
-        # Load data definition for normalization (needed for both passthrough and transform modes)
-        from depot.data.definition_loader import get_definition_for_type
-        try:
-            definition = get_definition_for_type(self.data_file_type)
-            definition_list = definition.get_definition()
-
-            # Build case-insensitive map: lowercase -> correct casing
-            definition_columns = {}
-            for var_def in definition_list:
-                col_name = var_def.get('name')
-                definition_columns[col_name.lower()] = col_name
-        except Exception as e:
-            logger.warning(f"Could not load data definition for normalization: {e}")
-            definition_columns = {}
-
         # If passthrough, normalize column names but don't apply mappings
         # OPTIMIZED: Stream line-by-line to handle large files (e.g., 1.9GB)
         if self.is_passthrough():
+            definition_columns = self._definition_columns()
             try:
                 row_count = 0
                 normalized_count = 0
                 header = None
 
-                with open(processing_input, 'r', encoding='utf-8') as infile, \
+                with cleaned_input as infile, \
                      open(output_path, 'w', encoding='utf-8', newline='') as outfile:
 
                     # Read and process header line only
@@ -268,6 +275,7 @@ class DataMappingService:
                         outfile.write(line)
                         row_count += 1
 
+                changes_summary['file_cleaning'] = self._cleaning_result(cleaner)
                 logger.info(f"Passthrough mode - normalized {normalized_count} columns, streamed {row_count} rows")
                 changes_summary['summary'] = {
                     'mode': 'passthrough',
@@ -281,83 +289,344 @@ class DataMappingService:
                 changes_summary['errors'].append(f"Failed to copy file: {e}")
                 return changes_summary
 
-        # Build column rename map (case-insensitive matching)
-        column_rename_map = {}  # lowercase source -> target
-        column_mappings = self.mapping_definition.get('column_mappings', [])
+        # Transform mode: compile the mapping into a DuckDB projection and let
+        # DuckDB rewrite the rows (vectorized) instead of a Python row loop
+        try:
+            header = next(csv.reader([cleaned_input.readline().rstrip('\r\n')]), None)
+            if not header:
+                changes_summary['errors'].append("File is empty")
+                return changes_summary
 
-        for mapping in column_mappings:
-            source_col = mapping['source_column']
-            target_col = mapping['target_column']
-            column_rename_map[source_col.lower()] = target_col
+            import duckdb
+            with FileCleanerService.cleaned_path(input_path, tracking) as (clean_path, cleaning):
+                select_sql, projection_summary = self.build_select(clean_path, header=header)
+                changes_summary.update(projection_summary)
 
-        # Process CSV file
+                conn = duckdb.connect()
+                try:
+                    row_count = conn.execute(
+                        f"COPY ({select_sql}) TO {sql_literal(str(output_path))} (HEADER, DELIMITER ',')"
+                    ).fetchone()[0]
+                finally:
+                    conn.close()
+
+            changes_summary['file_cleaning'] = self._cleaning_summary([cleaning])
+            changes_summary['summary']['rows_processed'] = row_count
+            logger.info(
+                f"Processed {row_count} rows, renamed {changes_summary['summary']['columns_renamed']} columns, "
+                f"normalized {changes_summary['summary']['columns_normalized']} column casings"
+            )
+
+        except Exception as e:
+            malformed = _malformed_file_error(e)
+            changes_summary['errors'].append(str(malformed) if malformed else f"Failed to process file: {e}")
+            logger.error(f"File processing failed: {e}", exc_info=True)
+        finally:
+            cleaned_input.close()
+
+        return changes_summary
+
+    def _definition_columns(self) -> Dict[str, str]:
+        """Case-insensitive map of data definition columns: lowercase -> correct casing."""
         try:
-            with open(processing_input, 'r', newline='', encoding='utf-8') as infile, \
-                 open(output_path, 'w', newline='', encoding='utf-8') as outfile:
+            definition = definition_registry.get_definition(self.data_file_type)
+            return {name.lower(): name for name in definition.get_variable_names()}
+        except Exception as e:
+            logger.warning(f"Could not load data definition for normalization: {e}")
+            return {}
 
-                reader = csv.reader(infile)
-                writer = csv.writer(outfile)
+    def read_header(self, input_path: str, delimiter: str = ',') -> List[str]:
+        """
+        Read only the header row of a CSV/TSV file (BOM and line endings cleaned).
 
-                # Process header row - case-insensitive matching + normalization
-                header = next(reader)
-                original_header = header.copy()
-                renamed_count = 0
-                normalized_count = 0
+        Returns:
+            List of column names, empty if the file is empty
+        """
+        cleaner = FileCleanerService.open_cleaned(input_path, chunk_size=64 * 1024)
+        with io.TextIOWrapper(io.BufferedReader(cleaner), encoding='utf-8', newline='') as f:
+            header_line = f.readline().rstrip('\r\n')
+        if not header_line:
+            return []
+        return next(csv.reader([header_line], delimiter=delimiter))
+
+    def compile_projection(self, header: List[str]) -> Tuple[List[str], Dict]:
+        """
+        Compile the mapping into DuckDB select expressions for a file header.
 
-                for i, col_name in enumerate(header):
-                    col_lower = col_name.lower()
-                    original_name = col_name
-
-                    # First check if it needs renaming (e.g., sitePatientId -> cohortPatientId)
-                    if col_lower in column_rename_map:
-                        header[i] = column_rename_map[col_lower]
-                        renamed_count += 1
-                        changes_summary['renamed_columns'].append({
-                            'source': original_name,
-                            'target': header[i]
-                        })
-                        logger.debug(f"Renamed column: {original_name} → {header[i]}")
-
-                    # Then normalize casing to match data definition
-                    elif col_lower in definition_columns:
-                        correct_name = definition_columns[col_lower]
-                        if col_name != correct_name:
-                            header[i] = correct_name
-                            normalized_count += 1
-                            logger.debug(f"Normalized column casing: {col_name} → {correct_name}")
-
-                writer.writerow(header)
-
-                # Copy all data rows as-is (for now - value remapping can be added later)
-                row_count = 0
-                for row in reader:
-                    writer.writerow(row)
-                    row_count += 1
+        Applies, per column: rename (case-insensitive source match), casing
+        normalization to the data definition, and value remaps as a CASE
+        expression. Columns listed in ``defaults`` but missing from the header
+        are added as constants. Only the header is inspected, so the cost is
+        independent of the number of rows.
 
-                logger.info(f"Processed {row_count} rows, renamed {renamed_count} columns, normalized {normalized_count} column casings")
+        Mapping keys used:
+            column_mappings: [{"source_column": ..., "target_column": ...}]
+            value_remaps: {target_column: {source_value: target_value}}
+            defaults.values: {target_column: value}
 
-                changes_summary['summary'] = {
-                    'mode': 'transform',
-                    'rows_processed': row_count,
-                    'columns_renamed': renamed_count,
-                    'columns_normalized': normalized_count,
-                    'columns_original': len(original_header),
-                    'columns_after': len(header)
-                }
+        Args:
+            header: Column names as they appear in the file
 
-        except Exception as e:
-            changes_summary['errors'].append(f"Failed to process file: {e}")
-            logger.error(f"File processing failed: {e}", exc_info=True)
-        finally:
-            # Clean up temporary cleaned file
-            if processing_input != input_path:
-                try:
-                    Path(cleaned_path).unlink(missing_ok=True)
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup temporary file {cleaned_path}: {e}")
+        Returns:
+            Tuple of (select expressions, changes_summary fields)
+        """
+        definition_columns = self._definition_columns()
+        mapping = self.mapping_definition or {}
+
+        column_rename_map = {
+            m['source_column'].lower(): m['target_column']
+            for m in mapping.get('column_mappings', [])
+        }
+        value_remaps = mapping.get('value_remaps') or {}
+        defaults = (mapping.get('defaults') or {}).get('values') or {}
 
+        changes = {
+            'renamed_columns': [],
+            'value_remaps': {},
+            'defaults_applied': {},
+            'unmapped_columns': [],
+            'warnings': [],
+        }
+        expressions = []
+        output_names = []
+        renamed_count = 0
+        normalized_count = 0
+
+        for col_name, source_name in zip(header, _dedupe_names(header)):
+            col_lower = col_name.lower()
+            target = col_name
+
+            # First check if it needs renaming (e.g., sitePatientId -> cohortPatientId)
+            if col_lower in column_rename_map:
+                target = column_rename_map[col_lower]
+                renamed_count += 1
+                changes['renamed_columns'].append({'source': col_name, 'target': target})
+            # Then normalize casing to match data definition
+            elif col_lower in definition_columns:
+                target = definition_columns[col_lower]
+                if target != col_name:
+                    normalized_count += 1
+            else:
+                changes['unmapped_columns'].append(col_name)
+
+            if target in output_names:
+                deduped = _unique_name(target, output_names)
+                changes['warnings'].append(
+                    f"Column '{col_name}' maps to duplicate column '{target}', kept as '{deduped}'"
+                )
+                target = deduped
+
+            expr = quote_identifier(source_name)
+            remap = value_remaps.get(target)
+            if remap:
+                expr = _case_expression(expr, remap)
+                changes['value_remaps'][target] = len(remap)
+
+            expressions.append(f"{expr} AS {quote_identifier(target)}")
+            output_names.append(target)
+
+        for target, value in defaults.items():
+            if target not in output_names:
+                expressions.append(f"{sql_literal(str(value))} AS {quote_identifier(target)}")
+                output_names.append(target)
+                changes['defaults_applied'][target] = value
+
+        changes['summary'] = {
+            'mode': 'passthrough' if self.is_passthrough() else 'transform',
+            'columns_renamed': renamed_count,
+            'columns_normalized': normalized_count,
+            'columns_original': len(header),
+            'columns_after': len(output_names),
+        }
+        return expressions, changes
+
+    def build_select(self, input_path: str, delimiter: str = ',', header: List[str] = None,
+                     parallel: bool = None) -> Tuple[str, Dict]:
+        """
+        Build a ``SELECT ... FROM read_csv(...)`` applying the mapping to a file.
+
+        ``input_path`` must be readable by DuckDB as is (see
+        ``FileCleanerService.cleaned_path``): DuckDB misreads rows when lone
+        CRs are mixed with other line endings. The dialect is fixed rather than sniffed and every column
+        is read as VARCHAR under its header name, so rows with the wrong
+        number of fields raise instead of being skipped (``load_into_duckdb``
+        reports them as ``MalformedFileError``).
+
+        Returns:
+            Tuple of (SQL string, changes_summary fields from compile_projection)
+
+        Raises:
+            MappingValidationException: If the file has no header row
+        """
+        if header is None:
+            header = self.read_header(input_path, delimiter)
+        if not header:
+            raise MappingValidationException(f"File is empty: {input_path}")
+
+        if parallel is None:
+            parallel = settings.DUCKDB_PARALLEL_CSV
+
+        expressions, changes = self.compile_projection(header)
+        columns = ', '.join(f"{sql_literal(n)}: 'VARCHAR'" for n in _dedupe_names(header))
+        select_sql = (
+            f"SELECT {', '.join(expressions)} FROM read_csv("
+            f"{sql_literal(str(input_path))}, "
+            f"delim={sql_literal(delimiter)}, "
+            f"quote='\"', "
+            f"escape='\"', "
+            f"header=true, "
+            f"auto_detect=false, "
+            f"columns={{{columns}}}, "
+            f"parallel={'true' if parallel else 'false'}, "
+            f"ignore_errors=false)"
+        )
+        return select_sql, changes
+
+    def load_into_duckdb(self, conn, input_paths: List[str], table_name: str = 'data',
+                         delimiter: str = ',', tracking: Dict = None) -> Dict:
+        """
+        Create a DuckDB table directly from raw file(s) with the mapping applied.
+
+        Multiple files are combined with ``UNION ALL BY NAME``, so files whose
+        columns are ordered differently still line up. Files are read in
+        place unless they have a BOM or lone CRs; those are cleaned into a
+        temporary sibling that is removed once the table is built. No processed CSV is
+        written; use ``export_processed_csv`` when one must be archived. The
+        table's column statistics are stored alongside it (see
+        ``depot.services.data_statistics.write_column_stats``).
+
+        Args:
+            conn: Open DuckDB connection
+            input_paths: Raw CSV/TSV paths
+            table_name: Table to create
+            delimiter: Field delimiter
+            tracking: PHIFileTracking.log_operation arguments (cohort, user,
+                content_object) for cleaned copies
+
+        Returns:
+            changes_summary dict (same shape as ``process_file``)
+        """
+        changes_summary = {
+            'renamed_columns': [],
+            'value_remaps': {},
+            'defaults_applied': {},
+            'unmapped_columns': [],
+            'warnings': [],
+            'errors': [],
+            'summary': {},
+            'file_cleaning': None
+        }
+
+        selects = []
+        cleaning = []
+        # Cleaned copies, if any, are removed as soon as the table is built
+        with ExitStack() as cleaned_files:
+            for input_path in input_paths:
+                with span('file.clean') as clean_span:
+                    clean_span.add_bytes(Path(input_path).stat().st_size)
+                    clean_path, result = cleaned_files.enter_context(
+                        FileCleanerService.cleaned_path(input_path, tracking)
+                    )
+                cleaning.append(result)
+                with span('mapping.compile'):
+                    select_sql, changes = self.build_select(clean_path, delimiter)
+                selects.append(select_sql)
+
+                # Aggregate per-file changes (first file's header stats, deduplicated renames)
+                for rename in changes['renamed_columns']:
+                    if rename not in changes_summary['renamed_columns']:
+                        changes_summary['renamed_columns'].append(rename)
+                for col in changes['unmapped_columns']:
+                    if col not in changes_summary['unmapped_columns']:
+                        changes_summary['unmapped_columns'].append(col)
+                changes_summary['value_remaps'].update(changes['value_remaps'])
+                changes_summary['defaults_applied'].update(changes['defaults_applied'])
+                changes_summary['warnings'].extend(changes['warnings'])
+                if not changes_summary['summary']:
+                    changes_summary['summary'] = changes['summary']
+                else:
+                    changes_summary['summary']['columns_normalized'] += changes['summary']['columns_normalized']
+
+            if not selects:
+                raise MappingValidationException("No input files to load")
+
+            import duckdb
+            with span('duckdb.load', files=len(input_paths)) as load_span:
+                load_span.add_bytes(sum(result['bytes_after'] for result in cleaning))
+                try:
+                    conn.execute(
+                        f"CREATE TABLE {quote_identifier(table_name)} AS " + ' UNION ALL BY NAME '.join(selects)
+                    )
+                except duckdb.Error as e:
+                    malformed = self._locate_malformed_row(conn, selects, e)
+                    if malformed is None:
+                        raise
+                    raise malformed from e
+                row_count = conn.execute(f"SELECT COUNT(*) FROM {quote_identifier(table_name)}").fetchone()[0]
+                load_span.set(rows=row_count)
+
+        from depot.services.data_statistics import write_column_stats
+        with span('duckdb.column_stats'):
+            write_column_stats(conn, table_name)
+
+        changes_summary['summary']['rows_processed'] = row_count
+        changes_summary['summary']['files_combined'] = len(input_paths)
+        changes_summary['file_cleaning'] = self._cleaning_summary(cleaning)
+        logger.info(f"Loaded {row_count} rows from {len(input_paths)} file(s) into DuckDB table '{table_name}'")
         return changes_summary
 
+    @staticmethod
+    def _locate_malformed_row(conn, selects: List[str], error) -> Optional[MalformedFileError]:
+        """
+        MalformedFileError for a CSV parsing error raised while loading ``selects``.
+
+        DuckDB does not name the file that failed inside a UNION, so each file
+        is scanned on its own until one fails.
+        """
+        import duckdb
+        if _malformed_file_error(error) is None or len(selects) == 1:
+            return _malformed_file_error(error)
+        for number, select_sql in enumerate(selects, start=1):
+            try:
+                conn.execute(f"SELECT COUNT(*) FROM ({select_sql})").fetchone()
+            except duckdb.Error as file_error:
+                return _malformed_file_error(file_error, number, len(selects)) or _malformed_file_error(error)
+        return _malformed_file_error(error)
+
+    @staticmethod
+    def export_processed_csv(conn, output_path: str, table_name: str = 'data', delimiter: str = ',') -> int:
+        """
+        Write a loaded table out as the processed CSV (for archival).
+
+        Returns:
+            Number of rows written
+        """
+        return conn.execute(
+            f"COPY {quote_identifier(table_name)} TO {sql_literal(str(output_path))} "
+            f"(HEADER, DELIMITER {sql_literal(delimiter)})"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _cleaning_summary(results: List[Dict]) -> Dict:
+        """Combine per-file cleaning results into one, in the shape of ``clean_file``'s."""
+        combined = {
+            'had_bom': any(result['had_bom'] for result in results),
+            'had_crlf': any(result['had_crlf'] for result in results),
+        }
+        for key in ('lines_processed', 'bytes_before', 'bytes_after'):
+            combined[key] = sum(result[key] for result in results)
+        if combined['had_bom'] or combined['had_crlf']:
+            logger.info(f"Cleaned file(s): BOM={combined['had_bom']}, CRLF={combined['had_crlf']}")
+        return combined
+
+    @staticmethod
+    def _cleaning_result(cleaner) -> Dict:
+        """Return cleaning statistics once the cleaned stream has been consumed."""
+        result = cleaner.result()
+        if result['had_bom'] or result['had_crlf']:
+            logger.info(f"Cleaned file: BOM={result['had_bom']}, CRLF={result['had_crlf']}")
+        return result
+
     def get_mapping_info(self) -> Dict:
         """
         Get information about current mapping configuration.
@@ -12,20 +12,226 @@ Usage:
     service = DataFileStatisticsService(duckdb_connection)
     stats = service.compute_column_statistics("cohortPatientId")
     # Returns: {total_rows, null_count, empty_count, distinct_count, ...}
+
+Column statistics sidecar:
+    Conversion calls ``write_column_stats`` once after loading the ``data``
+    table. It stores every column's counts, typed min/max, value lengths,
+    distinct count and (for low-cardinality columns) most frequent values
+    in a ``column_stats`` table inside the same .duckdb file, computed in
+    at most two scans regardless of column count. Validators, this service
+    and the R notebooks read ``read_column_stats`` instead of rescanning
+    the data.
 """
 
 import logging
-from typing import Dict, Optional
+import uuid
+from typing import Dict, List, Optional
 import duckdb
 
+from depot.utils.sql import quote_identifier, sql_literal
+
 logger = logging.getLogger(__name__)
 
+STATS_TABLE = 'column_stats'
+
+# Most frequent values kept per column
+TOP_K = 10
+
+# Columns with more (estimated) distinct values get no exact distinct count
+# or top values, so the grouped scan never holds an ID column's values
+TOP_VALUES_MAX_DISTINCT = 1000
+
 
 class StatisticsComputationException(Exception):
     """Raised when statistics computation fails."""
     pass
 
 
+def compute_column_stats(conn, table_name: str = 'data', top_k: int = TOP_K) -> List[Dict]:
+    """
+    Statistics for every column of a table in one aggregate scan, plus a
+    grouped scan over the low-cardinality columns only.
+
+    The aggregate scan takes counts, lengths and an approximate distinct
+    count (approx_count_distinct, the HyperLogLog sketch SUMMARIZE uses),
+    so memory stays flat however many distinct values a column has.
+    Columns estimated at TOP_VALUES_MAX_DISTINCT distinct values or fewer
+    are then grouped for exact distinct counts and top values
+    (``distinct_exact``); others keep the estimate and no top values.
+
+    Min and max are only kept for typed columns: on VARCHAR they would be
+    lexicographic ('9' > '10'). Empty strings count as empty, not as values.
+
+    Returns:
+        List of per-column dicts in column order
+    """
+    columns = conn.execute(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_name = ? ORDER BY ordinal_position",
+        [table_name]
+    ).fetchall()
+    if not columns:
+        return []
+
+    table = quote_identifier(table_name)
+    aggregates = ['COUNT(*)']
+    for column_name, column_type in columns:
+        col = quote_identifier(column_name)
+        text = f"CAST({col} AS VARCHAR)"
+        typed = column_type != 'VARCHAR'
+        aggregates += [
+            f"COUNT({col})",
+            f"COUNT(*) FILTER (WHERE {text} = '')",
+            f"CAST(MIN({col}) AS VARCHAR)" if typed else "NULL",
+            f"CAST(MAX({col}) AS VARCHAR)" if typed else "NULL",
+            f"MIN(LENGTH({text})) FILTER (WHERE {text} <> '')",
+            f"MAX(LENGTH({text})) FILTER (WHERE {text} <> '')",
+            f"AVG(LENGTH({text})) FILTER (WHERE {text} <> '')",
+            f"approx_count_distinct({text}) FILTER (WHERE {text} <> '')",
+        ]
+    totals = conn.execute(f"SELECT {', '.join(aggregates)} FROM {table}").fetchone()
+    row_count = totals[0]
+    per_column = [totals[1 + index * 8:9 + index * 8] for index in range(len(columns))]
+
+    grouped = [
+        name for (name, _), values in zip(columns, per_column)
+        if values[-1] <= TOP_VALUES_MAX_DISTINCT
+    ]
+    frequencies = {}
+    if grouped:
+        as_text = ', '.join(f"CAST({quote_identifier(name)} AS VARCHAR) AS {quote_identifier(name)}" for name in grouped)
+        frequencies = {
+            name: (distinct_count, top_values)
+            for name, distinct_count, top_values in conn.execute(f"""
+                WITH freq AS (
+                    SELECT name, value, COUNT(*) AS n
+                    FROM (UNPIVOT (SELECT {as_text} FROM {table}) ON COLUMNS(*) INTO NAME name VALUE value)
+                    WHERE value <> ''
+                    GROUP BY name, value
+                ),
+                ranked AS (
+                    SELECT *,
+                           ROW_NUMBER() OVER (PARTITION BY name ORDER BY n DESC, value) AS rank,
+                           COUNT(*) OVER (PARTITION BY name) AS distinct_count
+                    FROM freq
+                )
+                SELECT name, ANY_VALUE(distinct_count), LIST({{'value': value, 'count': n}} ORDER BY rank)
+                FROM ranked
+                WHERE rank <= {int(top_k)}
+                GROUP BY name
+            """).fetchall()
+        }
+
+    stats = []
+    for index, ((column_name, column_type), values) in enumerate(zip(columns, per_column)):
+        non_null, empty, min_value, max_value, min_length, max_length, avg_length, approx_distinct = values
+        exact = column_name in grouped
+        distinct_count, top_values = frequencies.get(column_name, (0, [])) if exact else (approx_distinct, [])
+        stats.append({
+            'column_name': column_name,
+            'ordinal': index + 1,
+            'column_type': column_type,
+            'row_count': row_count,
+            'null_count': row_count - non_null,
+            'empty_count': empty,
+            'distinct_count': distinct_count,
+            'distinct_exact': exact,
+            'min_value': min_value,
+            'max_value': max_value,
+            'min_length': min_length,
+            'max_length': max_length,
+            'avg_length': avg_length,
+            'top_values': top_values,
+        })
+    return stats
+
+
+def _load_marker(conn, table_name: str) -> Optional[str]:
+    row = conn.execute(
+        "SELECT comment FROM duckdb_tables() WHERE table_name = ? AND NOT temporary", [table_name]
+    ).fetchone()
+    return row[0] if row else None
+
+
+def write_column_stats(conn, table_name: str = 'data', top_k: int = TOP_K) -> List[Dict]:
+    """
+    Compute a table's column statistics and store them in the
+    ``column_stats`` sidecar table of the same database.
+
+    The table is marked with a comment naming this load; recreating the
+    table drops the comment, so ``read_column_stats`` can tell the
+    statistics belong to an earlier load.
+
+    Returns:
+        The statistics written
+    """
+    stats = compute_column_stats(conn, table_name, top_k)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+            table_name VARCHAR,
+            column_name VARCHAR,
+            ordinal INTEGER,
+            column_type VARCHAR,
+            row_count BIGINT,
+            null_count BIGINT,
+            empty_count BIGINT,
+            distinct_count BIGINT,
+            distinct_exact BOOLEAN,
+            min_value VARCHAR,
+            max_value VARCHAR,
+            min_length INTEGER,
+            max_length INTEGER,
+            avg_length DOUBLE,
+            top_values STRUCT(value VARCHAR, count BIGINT)[],
+            load_marker VARCHAR
+        )
+    """)
+    marker = f"column_stats:{uuid.uuid4().hex}"
+    conn.execute(f"COMMENT ON TABLE {quote_identifier(table_name)} IS {sql_literal(marker)}")
+    conn.execute(f"DELETE FROM {STATS_TABLE} WHERE table_name = ?", [table_name])
+    if stats:
+        conn.executemany(
+            f"INSERT INTO {STATS_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [[table_name] + list(column.values()) + [marker] for column in stats]
+        )
+    logger.debug(f"Wrote column statistics for {len(stats)} columns of '{table_name}'")
+    return stats
+
+
+def read_column_stats(conn, table_name: str = 'data', columns: Optional[List[str]] = None) -> Optional[Dict[str, Dict]]:
+    """
+    Column statistics from the sidecar table, keyed by column name.
+
+    Returns None when the database has no sidecar (converted before it
+    existed), or when the statistics are stale: the table was recreated
+    since they were written (its load marker comment is gone or differs)
+    or its row count changed.
+    """
+    sidecar_columns = [row[0] for row in conn.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = ?", [STATS_TABLE]
+    ).fetchall()]
+    if 'load_marker' not in sidecar_columns:
+        return None
+
+    query = f"SELECT * EXCLUDE (table_name, load_marker), load_marker FROM {STATS_TABLE} WHERE table_name = ?"
+    params = [table_name]
+    if columns is not None:
+        query += f" AND column_name IN ({', '.join('?' for _ in columns)})"
+        params += list(columns)
+    cursor = conn.execute(query + " ORDER BY ordinal", params)
+    names = [description[0] for description in cursor.description]
+    rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+    if not rows:
+        return None
+
+    marker = _load_marker(conn, table_name)
+    row_count = conn.execute(f"SELECT COUNT(*) FROM {quote_identifier(table_name)}").fetchone()[0]
+    if any(row.pop('load_marker') != marker or row['row_count'] != row_count for row in rows):
+        logger.warning(f"Column statistics for '{table_name}' are stale; ignoring them")
+        return None
+    return {row['column_name']: row for row in rows}
+
+
 class DataFileStatisticsService:
     """
     Service for computing column-level statistics from DuckDB data.
@@ -148,35 +354,25 @@ class DataFileStatisticsService:
             StatisticsComputationException: If computation fails
         """
         try:
-            # Get all column names
-            columns_result = self.conn.execute(
-                f"""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name = '{self.table_name}'
-                ORDER BY ordinal_position
-                """
-            ).fetchall()
-
-            column_names = [row[0] for row in columns_result]
+            # Prefer the sidecar written at conversion; otherwise compute in one pass
+            columns = read_column_stats(self.conn, self.table_name)
+            if columns is None:
+                columns = {
+                    column['column_name']: column
+                    for column in compute_column_stats(self.conn, self.table_name)
+                }
 
-            # Compute statistics for each column
             all_stats = {}
-            for col_name in column_names:
-                try:
-                    all_stats[col_name] = self.compute_column_statistics(col_name)
-                except Exception as e:
-                    logger.warning(f"Skipping statistics for {col_name}: {e}")
-                    all_stats[col_name] = {
-                        'error': str(e),
-                        'total_rows': 0,
-                        'null_count': 0,
-                        'empty_count': 0,
-                        'distinct_count': 0,
-                        'sample_values': [],
-                        'valid_count': 0,
-                        'invalid_count': 0
-                    }
+            for col_name, column in columns.items():
+                all_stats[col_name] = {
+                    'total_rows': column['row_count'],
+                    'null_count': column['null_count'],
+                    'empty_count': column['empty_count'],
+                    'distinct_count': column['distinct_count'],
+                    'sample_values': [top['value'] for top in column['top_values']],
+                    'valid_count': column['row_count'] - column['null_count'] - column['empty_count'],
+                    'invalid_count': 0  # Updated by validators
+                }
 
             logger.info(f"Computed statistics for {len(all_stats)} columns")
             return all_stats
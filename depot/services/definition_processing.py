@@ -21,6 +21,8 @@ from pathlib import Path
 from typing import Dict, List, Optional
 from django.conf import settings
 
+from depot.data.definition_loader import definition_registry
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,7 +52,7 @@ class DefinitionProcessingService:
             data_file_type_name: Name of data file type (e.g., "patient", "visit")
         """
         self.data_file_type_name = data_file_type_name
-        self.definitions_dir = Path(settings.BASE_DIR) / "depot" / "data" / "definitions"
+        self.definitions_dir = definition_registry.definitions_dir
         self.definition: Optional[Dict] = None
 
     def load_definition(self) -> Dict:
@@ -64,21 +66,16 @@ class DefinitionProcessingService:
             DefinitionNotFoundException: If definition file not found
             DefinitionParseException: If definition cannot be parsed
         """
-        # Try standard naming first (patient.json)
-        definition_path = self.definitions_dir / f"{self.data_file_type_name}.json"
-
-        # Fall back to _definition.json naming (patient_definition.json)
-        if not definition_path.exists():
-            definition_path = self.definitions_dir / f"{self.data_file_type_name}_definition.json"
+        definition_path = definition_registry.definition_path(self.data_file_type_name)
 
-        if not definition_path.exists():
+        if definition_path is None:
             raise DefinitionNotFoundException(
-                f"Definition file not found: {definition_path}"
+                f"Definition file not found for {self.data_file_type_name} in {self.definitions_dir}"
             )
 
         try:
-            with open(definition_path, 'r') as f:
-                loaded_data = json.load(f)
+            # Shared process-wide cache; never mutate loaded_data
+            loaded_data = definition_registry.load_json(definition_path)
 
             # Handle both formats: array of variables or dict with 'variables' key
             if isinstance(loaded_data, list):
@@ -11,6 +11,7 @@ from typing import List, Optional
 from django.utils import timezone
 
 from depot.models import DataTableFile, PHIFileTracking
+from depot.services.data_statistics import write_column_stats
 from depot.storage.manager import StorageManager
 
 logger = logging.getLogger(__name__)
@@ -93,6 +94,8 @@ class DuckDBCombinerService:
             row_count = conn.execute("SELECT COUNT(*) FROM data").fetchone()[0]
             logger.info(f"Combined DuckDB contains {row_count} total rows from {len(files_with_duckdb)} files")
 
+            write_column_stats(conn)
+
             conn.close()
 
             # Log PHI tracking
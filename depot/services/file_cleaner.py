@@ -3,14 +3,126 @@ File Cleaner Service
 
 Handles cleaning of uploaded CSV files to remove Windows line endings,
 BOM markers, and other encoding issues that can break DuckDB parsing.
+
+Files are processed in fixed-size buffers, so memory use is constant
+regardless of file size. ``open_cleaned`` exposes the cleaned content as a
+stream, letting Python readers consume it directly without materializing an
+intermediate cleaned file; ``cleaned_path`` gives readers that need a path
+(e.g. DuckDB's read_csv) the file itself, or a short-lived cleaned sibling
+when the file has a BOM or lone CRs.
 """
 
+import io
 import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 
+class _CleaningState:
+    """Incremental BOM/line-ending normalizer with running statistics."""
+
+    def __init__(self, bom: bytes):
+        self.bom = bom
+        self.had_bom = False
+        self.had_crlf = False
+        self.lines_processed = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self._head = b''
+        self._started = False
+        self._pending_cr = False
+
+    def feed(self, chunk: bytes, final: bool = False) -> bytes:
+        """Clean the next chunk; ``final`` flushes any held-back bytes."""
+        self.bytes_before += len(chunk)
+
+        if not self._started:
+            # Hold back bytes until the BOM check can be made
+            self._head += chunk
+            if len(self._head) < len(self.bom) and not final:
+                return b''
+            chunk = self._head
+            self._head = b''
+            self._started = True
+            if chunk.startswith(self.bom):
+                chunk = chunk[len(self.bom):]
+                self.had_bom = True
+
+        if self._pending_cr:
+            chunk = b'\r' + chunk
+            self._pending_cr = False
+
+        # A CR at the buffer edge may be the first half of a CRLF pair
+        if not final and chunk.endswith(b'\r'):
+            chunk = chunk[:-1]
+            self._pending_cr = True
+
+        if b'\r\n' in chunk:
+            self.had_crlf = True
+            chunk = chunk.replace(b'\r\n', b'\n')
+        if b'\r' in chunk:
+            chunk = chunk.replace(b'\r', b'\n')
+
+        self.lines_processed += chunk.count(b'\n')
+        self.bytes_after += len(chunk)
+        return chunk
+
+    def result(self) -> dict:
+        return {
+            'had_bom': self.had_bom,
+            'had_crlf': self.had_crlf,
+            'lines_processed': self.lines_processed,
+            'bytes_before': self.bytes_before,
+            'bytes_after': self.bytes_after,
+        }
+
+
+class CleaningReader(io.RawIOBase):
+    """
+    Binary stream that yields the cleaned content of an underlying file.
+
+    Wrap in ``io.TextIOWrapper`` to read cleaned text. Cleaning statistics
+    are available from ``result()`` once the stream has been consumed.
+    """
+
+    def __init__(self, raw, chunk_size: int, bom: bytes):
+        self._raw = raw
+        self._chunk_size = chunk_size
+        self._state = _CleaningState(bom)
+        self._buffer = b''
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and not self._eof:
+            chunk = self._raw.read(self._chunk_size)
+            if not chunk:
+                self._eof = True
+                self._buffer = self._state.feed(b'', final=True)
+            else:
+                self._buffer = self._state.feed(chunk)
+
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+        super().close()
+
+    def result(self) -> dict:
+        return self._state.result()
+
+
 class FileCleanerService:
     """
     Service for cleaning uploaded CSV files before processing.
@@ -25,14 +137,32 @@ class FileCleanerService:
     # UTF-8 BOM bytes
     UTF8_BOM = b'\xef\xbb\xbf'
 
+    # Read buffer size for streaming cleaning
+    CHUNK_SIZE = 1024 * 1024
+
     @classmethod
-    def clean_file(cls, input_path: str, output_path: str = None) -> dict:
+    def open_cleaned(cls, input_path: str, chunk_size: int = None) -> CleaningReader:
+        """
+        Open a file as a stream of cleaned bytes.
+
+        Args:
+            input_path: Path to input file
+            chunk_size: Read buffer size (defaults to CHUNK_SIZE)
+
+        Returns:
+            CleaningReader; call ``result()`` after reading for statistics
+        """
+        return CleaningReader(open(input_path, 'rb'), chunk_size or cls.CHUNK_SIZE, cls.UTF8_BOM)
+
+    @classmethod
+    def clean_file(cls, input_path: str, output_path: str = None, chunk_size: int = None) -> dict:
         """
         Clean a CSV file by removing BOM and converting line endings.
 
         Args:
             input_path: Path to input file
             output_path: Path to output file (if None, modifies in place)
+            chunk_size: Read buffer size (defaults to CHUNK_SIZE)
 
         Returns:
             dict with cleaning results:
@@ -43,80 +173,152 @@ class FileCleanerService:
                 - bytes_after: int
         """
         input_path = Path(input_path)
+        in_place = output_path is None or Path(output_path) == input_path
 
-        if output_path is None:
-            output_path = input_path
+        if in_place:
+            fd, write_path = tempfile.mkstemp(dir=input_path.parent, prefix='.cleaning_', suffix=input_path.suffix)
+            os.close(fd)
+            write_path = Path(write_path)
         else:
-            output_path = Path(output_path)
-
-        # Read raw bytes
-        with open(input_path, 'rb') as f:
-            raw_content = f.read()
-
-        original_size = len(raw_content)
-        had_bom = False
-        had_crlf = False
-
-        # Remove BOM if present
-        if raw_content.startswith(cls.UTF8_BOM):
-            logger.info(f"Removing UTF-8 BOM from {input_path}")
-            raw_content = raw_content[len(cls.UTF8_BOM):]
-            had_bom = True
-
-        # Convert CRLF to LF
-        if b'\r\n' in raw_content:
-            logger.info(f"Converting CRLF to LF in {input_path}")
-            raw_content = raw_content.replace(b'\r\n', b'\n')
-            had_crlf = True
-
-        # Remove any remaining CR characters
-        if b'\r' in raw_content:
-            logger.info(f"Removing remaining CR characters from {input_path}")
-            raw_content = raw_content.replace(b'\r', b'\n')
-
-        # Count lines
-        lines_processed = raw_content.count(b'\n')
-
-        # Write cleaned content
-        with open(output_path, 'wb') as f:
-            f.write(raw_content)
-
-        result = {
-            'had_bom': had_bom,
-            'had_crlf': had_crlf,
-            'lines_processed': lines_processed,
-            'bytes_before': original_size,
-            'bytes_after': len(raw_content)
-        }
+            write_path = Path(output_path)
+
+        try:
+            with cls.open_cleaned(input_path, chunk_size) as reader, open(write_path, 'wb') as out:
+                while True:
+                    data = reader.read(chunk_size or cls.CHUNK_SIZE)
+                    if not data:
+                        break
+                    out.write(data)
+                result = reader.result()
 
-        if had_bom or had_crlf:
-            logger.info(f"File cleaned: {input_path} -> {output_path} (BOM: {had_bom}, CRLF: {had_crlf})")
+            if in_place:
+                # mkstemp creates 0600; keep the original file's permissions
+                shutil.copymode(input_path, write_path)
+                os.replace(write_path, input_path)
+        except Exception:
+            if in_place:
+                write_path.unlink(missing_ok=True)
+            raise
+
+        if result['had_bom'] or result['had_crlf']:
+            logger.info(
+                f"File cleaned: {input_path} -> {input_path if in_place else write_path} "
+                f"(BOM: {result['had_bom']}, CRLF: {result['had_crlf']})"
+            )
 
         return result
 
     @classmethod
-    def needs_cleaning(cls, file_path: str) -> dict:
+    @contextmanager
+    def cleaned_path(cls, input_path: str, tracking: dict = None, chunk_size: int = None):
         """
-        Check if a file needs cleaning without modifying it.
+        Path a CSV reader such as DuckDB's read_csv can read the file from.
+
+        DuckDB handles a UTF-8 BOM and consistent CRLF or CR line endings,
+        but misreads rows when lone CRs are mixed with other line endings.
+        Files with neither a BOM nor a lone CR are read in place; others
+        are cleaned into a temporary sibling that is removed afterwards, so
+        it stays inside whatever workspace (and cleanup) the input belongs to.
+
+        Args:
+            input_path: Path to the raw file
+            tracking: PHIFileTracking.log_operation arguments (cohort, user,
+                content_object) to log the copy's creation and deletion with
+            chunk_size: Read buffer size (defaults to CHUNK_SIZE)
+
+        Yields:
+            Tuple of (path to read, cleaning results as from clean_file)
+        """
+        input_path = Path(input_path)
+        check = cls.needs_cleaning(input_path, chunk_size)
+        if not check['needs_cleaning']:
+            size = input_path.stat().st_size
+            yield str(input_path), {
+                'had_bom': False,
+                'had_crlf': check['has_crlf'],
+                'lines_processed': check['lines'],
+                'bytes_before': size,
+                'bytes_after': size,
+            }
+            return
+
+        fd, clean_path = tempfile.mkstemp(dir=input_path.parent, prefix='.cleaning_', suffix=input_path.suffix)
+        os.close(fd)
+        try:
+            result = cls.clean_file(input_path, clean_path, chunk_size)
+            if tracking:
+                cls._track_copy(tracking, 'work_copy_created', clean_path, file_size=result['bytes_after'])
+            yield clean_path, result
+        finally:
+            Path(clean_path).unlink(missing_ok=True)
+            if tracking:
+                cls._track_copy(tracking, 'work_copy_deleted', clean_path)
+
+    @staticmethod
+    def _track_copy(tracking: dict, action: str, path: str, **fields):
+        """Log a cleaned copy's creation or deletion like other workspace files."""
+        from depot.models import PHIFileTracking
+
+        PHIFileTracking.log_operation(
+            action=action, file_path=str(path), file_type='temp_working', **tracking, **fields
+        )
+        if action == 'work_copy_deleted':
+            # Inside PHIFileTracking.batched() the creation record may still be buffered
+            PHIFileTracking.flush_batch()
+            creation_record = PHIFileTracking.objects.filter(
+                file_path=str(path), action='work_copy_created', cleaned_up=False
+            ).order_by('-id').first()
+            if creation_record:
+                creation_record.mark_cleaned_up(tracking.get('user'))
+
+    @classmethod
+    def needs_cleaning(cls, file_path: str, chunk_size: int = None) -> dict:
+        """
+        Check whether a file must be cleaned before DuckDB reads it.
+
+        The whole file is scanned (without writing anything) because a lone
+        CR can appear anywhere; the scan stops at the first one.
 
         Args:
             file_path: Path to check
+            chunk_size: Read buffer size (defaults to CHUNK_SIZE)
 
         Returns:
             dict with:
                 - has_bom: bool
                 - has_crlf: bool
-                - needs_cleaning: bool
+                - has_lone_cr: bool
+                - needs_cleaning: bool (BOM or lone CR)
+                - lines: int, line count when the whole file was scanned, else None
         """
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        has_bom = has_crlf = has_lone_cr = False
+        lines = 0
         with open(file_path, 'rb') as f:
-            # Read first 1MB to check
-            sample = f.read(1024 * 1024)
-
-        has_bom = sample.startswith(cls.UTF8_BOM)
-        has_crlf = b'\r\n' in sample or b'\r' in sample
+            head = f.read(max(chunk_size, len(cls.UTF8_BOM)))
+            has_bom = head.startswith(cls.UTF8_BOM)
+            carry = b''
+            chunk = head
+            while True:
+                data = carry + chunk
+                # A CR at the buffer edge may be the first half of a CRLF pair
+                carry = b'\r' if chunk and data.endswith(b'\r') else b''
+                if carry:
+                    data = data[:-1]
+                crlf = data.count(b'\r\n')
+                has_crlf = has_crlf or crlf > 0
+                if data.count(b'\r') > crlf:
+                    has_lone_cr = True
+                    break
+                lines += data.count(b'\n')
+                if not chunk:
+                    break
+                chunk = f.read(chunk_size)
 
         return {
             'has_bom': has_bom,
             'has_crlf': has_crlf,
-            'needs_cleaning': has_bom or has_crlf
+            'has_lone_cr': has_lone_cr,
+            'needs_cleaning': has_bom or has_lone_cr,
+            'lines': None if has_lone_cr else lines,
         }
@@ -306,7 +306,7 @@ class FileUploadService:
         logger.info("STARTING FAST PATH PATIENT ID EXTRACTION (In-Memory DuckDB)")
         logger.info("="*80)
 
-        from depot.services.duckdb_utils import InMemoryDuckDBExtractor
+        from depot.services.duckdb_utils import InMemoryDuckDBExtractor, PatientIDScanTimeout
         from depot.models import SubmissionPatientIDs
 
         file_type_name = data_table.data_file_type.name
@@ -326,9 +326,9 @@ class FileUploadService:
                 has_bom=file_metadata.get('has_bom', False)
             )
 
-            logger.info("Attempting in-memory DuckDB conversion...")
+            logger.info("Scanning patient ID column with DuckDB...")
 
-            # Extract patient IDs using SQL DISTINCT (BLAZING FAST!)
+            # Extract patient IDs using SQL DISTINCT over the ID column only
             # Get list of possible patient ID column names to try
             # This handles both pre-mapped files (already have cohortPatientId) and
             # unmapped files (have cohort-specific column like sitePatientId)
@@ -339,7 +339,7 @@ class FileUploadService:
 
             extracted_patient_ids = extractor.extract_patient_ids_flexible(patient_id_columns)
 
-            logger.info(f"FAST PATH SUCCESS: Extracted {len(extracted_patient_ids)} unique patient IDs in <2 seconds!")
+            logger.info(f"FAST PATH SUCCESS: Extracted {len(extracted_patient_ids)} unique patient IDs")
 
             # For patient files: save extracted IDs to database
             if is_patient_file:
@@ -352,6 +352,23 @@ class FileUploadService:
                 )
                 logger.info(f"✓ Saved {len(extracted_patient_ids)} patient IDs to submission {submission.id}")
 
+        except PatientIDScanTimeout as e:
+            logger.error(f"FAST PATH FAILED - {e}")
+
+            return {
+                'success': False,
+                'error': (
+                    "This file took too long to check for patient IDs. "
+                    "Please run it through precheck validation, which processes large files in the background."
+                ),
+                'suggest_precheck': True,
+                'cohort_id': submission.cohort.id,
+                'data_file_type_id': data_table.data_file_type.id,
+                'cohort_submission_id': submission.id,
+                'validation_errors': ['Patient ID scan timed out'],
+                'validation_warnings': [],
+                'metadata': {}
+            }
         except ValueError as e:
             # DuckDB conversion failed - file is malformed
             error_msg = str(e)
@@ -581,6 +598,16 @@ class FileUploadService:
             )
             logger.info(f"Created new file {data_file.id} with version {version} (pending async processing)")
 
+        # Record the IDs scanned above as this file's extraction so the
+        # processing workflow does not scan for them again
+        if self._patient_ids_survive_mapping(submission.cohort, data_table.data_file_type):
+            from depot.models import DataTableFilePatientIDs
+            DataTableFilePatientIDs.record_extraction(
+                data_file,
+                list(extracted_patient_ids),
+                content_hash=upload_metadata.get('file_hash', '')
+            )
+
         # For patient tables only: ensure only this file is current
         if data_table.data_file_type.name == 'patient':
             self._ensure_single_current_file(data_table, data_file)
@@ -825,6 +852,25 @@ class FileUploadService:
 
         return data_file
 
+    def _patient_ids_survive_mapping(self, cohort, data_file_type):
+        """
+        Whether patient IDs read from the raw upload match those in the
+        mapped DuckDB file, i.e. the cohort's mapping does not remap their values.
+        """
+        try:
+            from depot.services.data_mapping import DataMappingService
+
+            mapping_definition = DataMappingService(
+                cohort_name=cohort.name,
+                data_file_type=data_file_type.name
+            ).mapping_definition
+        except Exception as e:
+            logger.warning(f'Could not load column mapping: {e}', exc_info=True)
+            return False
+
+        value_remaps = (mapping_definition or {}).get('value_remaps') or {}
+        return 'cohortPatientId' not in value_remaps
+
     def _get_patient_id_column_names(self, cohort, data_file_type):
         """
         Determine possible patient ID column names for this cohort.
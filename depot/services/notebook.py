@@ -2,11 +2,23 @@ import subprocess
 import os
 from pathlib import Path
 from django.conf import settings
-from depot.models import Notebook, PrecheckRun, PHIFileTracking
+from depot.models import Notebook, NotebookRenderCache, PrecheckRun, PHIFileTracking
 from depot.storage.manager import StorageManager
 import tempfile
 import shutil
+from depot.data.definition_loader import get_definition_for_type
 from depot.data.notebook_templates import notebook_templates
+from depot.services.notebook_render import (
+    evict_render_cache,
+    file_sha256,
+    get_render_pool,
+    link_staged_template,
+    render_cache_enabled,
+    render_cache_key,
+    render_cache_path,
+    stage_template,
+    template_version,
+)
 import logging
 import time
 
@@ -26,7 +38,12 @@ class NotebookService:
         try:
             logger.info(f"Starting compilation for notebook {self.notebook.id}")
             self.notebook.mark_compiling()
-            
+
+            cache_key = self._render_cache_key()
+            if cache_key and self._store_from_cache(cache_key):
+                logger.info(f"Served notebook {self.notebook.id} from render cache {cache_key[:12]}")
+                return True
+
             logger.info("Setting up temp directory")
             self._setup_temp_dir()
             
@@ -44,7 +61,7 @@ class NotebookService:
                 return False
             
             logger.info("Storing compiled notebook")
-            self._store_compiled()
+            self._store_compiled(cache_key)
             
             logger.info(f"Successfully compiled notebook {self.notebook.id}")
             return True
@@ -78,98 +95,19 @@ class NotebookService:
         logger.info(f"Created .here marker file: {here_file}")
 
     def _copy_template(self):
-        """Copy the notebook template to the temp directory."""
+        """Populate the temp directory from the pre-staged template tree."""
         template_path = self.notebook.get_template_path()
         logger.info(f"Template path: {template_path}")
 
-        if not template_path.exists():
-            raise FileNotFoundError(f"Template not found: {template_path}")
-
-        # Create depot/notebooks directory structure for here::here() compatibility
-        depot_dir = self.temp_dir / 'depot'
-        depot_notebooks_dir = depot_dir / 'notebooks'
-        depot_notebooks_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Created depot/notebooks directory: {depot_notebooks_dir}")
-
-        # Copy scaffold_r.R to depot/ (for here::here("depot", "scaffold_r.R"))
-        # scaffold_r.R is at depot/scaffold_r.R, and settings.BASE_DIR is /app/
-        scaffold_r_source = Path(settings.BASE_DIR) / 'depot' / 'scaffold_r.R'
-        if scaffold_r_source.exists():
-            scaffold_r_target = depot_dir / 'scaffold_r.R'
-            logger.info(f"Copying scaffold_r.R to: {scaffold_r_target}")
-            shutil.copy2(scaffold_r_source, scaffold_r_target)
-        else:
-            logger.warning(f"scaffold_r.R not found at: {scaffold_r_source}")
-
-        # Copy depot/R directory (for load_depot_r() function)
-        # depot/R is at depot/R, and settings.BASE_DIR is /app/
-        r_source_dir = Path(settings.BASE_DIR) / 'depot' / 'R'
-        if r_source_dir.exists():
-            r_target_dir = depot_dir / 'R'
-            logger.info(f"Copying depot/R directory to: {r_target_dir}")
-            shutil.copytree(r_source_dir, r_target_dir, dirs_exist_ok=True)
-        else:
-            logger.warning(f"depot/R directory not found at: {r_source_dir}")
-
-        # Copy depot/data/definitions directory (for data definitions)
-        definitions_source_dir = Path(settings.BASE_DIR) / 'depot' / 'data' / 'definitions'
-        if definitions_source_dir.exists():
-            definitions_target_dir = depot_dir / 'data' / 'definitions'
-            logger.info(f"Copying depot/data/definitions directory to: {definitions_target_dir}")
-            shutil.copytree(definitions_source_dir, definitions_target_dir, dirs_exist_ok=True)
-        else:
-            logger.warning(f"depot/data/definitions directory not found at: {definitions_source_dir}")
-
-        # Create partials directory
-        partials_dir = depot_notebooks_dir / 'partials'
-        partials_dir.mkdir(exist_ok=True)
-        logger.info(f"Created partials directory: {partials_dir}")
-
-        # Copy the main template to depot/notebooks/
-        target_path = depot_notebooks_dir / 'notebook.qmd'
-        logger.info(f"Copying template to: {target_path}")
-        shutil.copy2(template_path, target_path)
-
-        # Copy entire partials directory
-        partials_source_dir = template_path.parent / 'partials'
-        if partials_source_dir.exists():
-            logger.info(f"Copying partials directory from: {partials_source_dir}")
-            shutil.copytree(partials_source_dir, partials_dir, dirs_exist_ok=True)
-        else:
-            logger.warning(f"Partials directory not found: {partials_source_dir}")
-
-        # Copy CSS files to depot/notebooks/
-        for css_file in ['styles.css', 'cosmo-bootstrap.min.css']:
-            css_source = template_path.parent / css_file
-            if css_source.exists():
-                css_target = depot_notebooks_dir / css_file
-                logger.info(f"Copying CSS file: {css_file}")
-                shutil.copy2(css_source, css_target)
-            else:
-                logger.warning(f"CSS file not found: {css_source}")
-
-        # Copy setup.R to depot/notebooks/ (same directory as notebook.qmd)
-        setup_r_source = template_path.parent.parent / 'setup.R'
-        if setup_r_source.exists():
-            setup_r_target = depot_notebooks_dir / 'setup.R'
-            logger.info(f"Copying setup.R to: {setup_r_target}")
-            shutil.copy2(setup_r_source, setup_r_target)
-        else:
-            logger.error(f"setup.R not found at: {setup_r_source}")
-
-        # Copy notebooks/functions directory (for init_audit_data and other functions)
-        functions_source_dir = template_path.parent.parent / 'functions'
-        if functions_source_dir.exists():
-            functions_target_dir = depot_notebooks_dir / 'functions'
-            logger.info(f"Copying notebooks/functions directory to: {functions_target_dir}")
-            shutil.copytree(functions_source_dir, functions_target_dir, dirs_exist_ok=True)
-        else:
-            logger.warning(f"notebooks/functions directory not found at: {functions_source_dir}")
+        # scaffold_r.R, depot/R, definitions, the template, partials, CSS,
+        # setup.R and notebook functions are staged once per template version
+        # and hard-linked here (see depot/services/notebook_render.py)
+        staged = stage_template(template_path)
+        link_staged_template(staged, self.temp_dir)
+        logger.info(f"Linked staged template {staged.name} into {self.temp_dir}")
 
-    def _run_quarto(self):
-        """Run Quarto to compile the notebook."""
-        # Get notebook and data paths
-        notebook_path = self.notebook.get_template_path()
+    def _data_inputs(self):
+        """Return (DuckDB data file path, definition file name) for the notebook's PrecheckRun."""
         if self.notebook.content_object and isinstance(self.notebook.content_object, PrecheckRun):
             precheck_run = self.notebook.content_object
             logger.info(f"PrecheckRun status: {precheck_run.status}")
@@ -183,22 +121,23 @@ class NotebookService:
                     if 'temp_file' in precheck_run.result['result']:
                         data_file_path = Path(precheck_run.result['result']['temp_file'])
                         logger.info(f"Using DuckDB path: {data_file_path}")
+                        return data_file_path, definition_file
                     else:
                         error_msg = "temp_file not found in precheck_run.result['result']"
-                        logger.error(error_msg)
-                        raise ValueError(error_msg)
                 else:
                     error_msg = "precheck_run.result['result'] not found or not a dict"
-                    logger.error(error_msg)
-                    raise ValueError(error_msg)
             else:
                 error_msg = "precheck_run.result not found or not a dict"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
         else:
             error_msg = "Notebook content_object is not an PrecheckRun instance"
-            logger.error(error_msg)
-            raise ValueError(error_msg)
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    def _run_quarto(self):
+        """Run Quarto to compile the notebook."""
+        # Get notebook and data paths
+        notebook_path = self.notebook.get_template_path()
+        data_file_path, definition_file = self._data_inputs()
 
         # Native execution - no container
         logger.info("Using native Quarto execution")
@@ -225,7 +164,7 @@ class NotebookService:
         logger.info(f"Running Quarto on original notebook: {notebook_path}")
         logger.info(f"Output directory: {self.temp_dir}")
         logger.info(f"Working directory: {working_dir}")
-        result = subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=str(working_dir))
+        result = self._render(cmd, env, working_dir)
 
         # Always log stdout/stderr for debugging
         if result.stdout:
@@ -279,7 +218,97 @@ class NotebookService:
         self._quarto_completed = True
 
 
-    def _store_compiled(self):
+    def _render(self, cmd, env, working_dir):
+        """Run Quarto, through a warm R session when the render pool is enabled."""
+        pool = get_render_pool()
+        if pool is not None:
+            try:
+                with pool.session() as pool_env:
+                    result = subprocess.run(
+                        cmd, env={**env, **pool_env}, capture_output=True, text=True, cwd=str(working_dir)
+                    )
+                if result.returncode == 0:
+                    return result
+                logger.warning(f"Pooled Quarto render failed, retrying cold. stderr: {result.stderr}")
+            except Exception as e:
+                logger.warning(f"Render pool unavailable, rendering cold: {e}")
+        return subprocess.run(cmd, env=env, capture_output=True, text=True, cwd=str(working_dir))
+
+    def _render_cache_key(self):
+        """
+        Cache key for this render, or None when caching is off or an input is unavailable.
+
+        Covers the DuckDB file the notebook reads, the definition version and
+        the template tree version (see depot/services/notebook_render.py).
+        """
+        if not render_cache_enabled():
+            return None
+        try:
+            data_file_path, _ = self._data_inputs()
+            data_file_type = self.notebook.data_file_type.name
+            return render_cache_key(
+                data_hash=file_sha256(data_file_path),
+                definition_version=get_definition_for_type(data_file_type).version,
+                template_hash=template_version(self.notebook.get_template_path()),
+                data_file_type=data_file_type,
+                cohort_id=self.notebook.content_object.cohort_id,
+            )
+        except Exception as e:
+            logger.warning(f"Render cache key unavailable for notebook {self.notebook.id}, rendering: {e}")
+            return None
+
+    def _store_from_cache(self, cache_key):
+        """Store a previously compiled report for this key, if there is one. Returns True on a hit."""
+        entry = NotebookRenderCache.objects.filter(cache_key=cache_key).first()
+        html_content = self.storage.get_file(entry.storage_path) if entry else None
+        if html_content is None:
+            if entry:
+                logger.warning(f"Cached notebook missing from storage, dropping entry: {entry.storage_path}")
+                entry.delete()
+            logger.info(f"Render cache miss for notebook {self.notebook.id}")
+            self.notebook.render_cache_hit = False
+            return False
+
+        if isinstance(html_content, bytes):
+            html_content = html_content.decode('utf-8')
+        entry.record_hit()
+        self.notebook.render_cache_hit = True
+        self._store_html(html_content)
+        return True
+
+    def _add_to_render_cache(self, cache_key, html_content):
+        """Keep a copy of a fresh render for later renders with the same inputs."""
+        try:
+            cache_path = render_cache_path(cache_key)
+            self.storage.save(cache_path, html_content, content_type='text/html')
+            file_size = len(html_content.encode('utf-8'))
+            cohort = self.notebook.content_object.cohort
+
+            PHIFileTracking.log_operation(
+                cohort=cohort,
+                user=None,
+                action='nas_report_created',
+                file_path=self.storage.get_absolute_path(cache_path),
+                file_type='report_html',
+                file_size=file_size,
+                content_object=self.notebook,
+                metadata={
+                    'notebook_id': self.notebook.id,
+                    'data_file_type': self.notebook.data_file_type.name,
+                    'relative_path': cache_path,
+                    'cache_key': cache_key,
+                },
+            )
+            NotebookRenderCache.objects.update_or_create(
+                cache_key=cache_key,
+                defaults={'storage_path': cache_path, 'file_size': file_size, 'cohort': cohort},
+            )
+            evict_render_cache(self.storage)
+        except Exception as e:
+            # The report itself is already stored; a missing cache entry only costs a render
+            logger.error(f"Failed to cache compiled notebook: {e}", exc_info=True)
+
+    def _store_compiled(self, cache_key=None):
         """Store the compiled notebook in the storage backend."""
         # Try both possible output filenames
         possible_paths = [
@@ -305,6 +334,17 @@ class NotebookService:
         if not compiled_path:
             raise FileNotFoundError(f"Compiled notebook not found in {self.temp_dir} after {max_retries} attempts")
 
+        logger.info(f"Source file size: {compiled_path.stat().st_size} bytes")
+        with open(compiled_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+
+        url = self._store_html(html_content)
+        if cache_key:
+            self._add_to_render_cache(cache_key, html_content)
+        return url
+
+    def _store_html(self, html_content):
+        """Save report HTML under the notebook's storage path, track it and mark the notebook completed."""
         # Generate storage path under notebooks namespace
         if self.notebook.content_object and isinstance(self.notebook.content_object, PrecheckRun):
             precheck_run = self.notebook.content_object
@@ -317,13 +357,8 @@ class NotebookService:
             storage_path = f"notebooks/{self.notebook.id}/report.html"
         
         logger.info(f"Storing compiled notebook at: {storage_path}")
-        logger.info(f"Source file size: {compiled_path.stat().st_size} bytes")
-        
-        # Read the file content and pass it directly
+
         try:
-            with open(compiled_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
             # Save to storage
             url = self.storage.save(
                 storage_path, 
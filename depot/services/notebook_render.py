@@ -0,0 +1,454 @@
+"""
+Notebook render infrastructure: pre-staged template trees and a warm R pool.
+
+Every Quarto render needs the same project tree (scaffold_r.R, depot/R,
+data definitions, the template, partials, CSS, setup.R and notebook
+functions). ``stage_template`` builds that tree once per template version
+and renders hard-link it into their working directory instead of copying.
+
+``RenderPool`` keeps R sessions that have already loaded the heavy packages
+(knitr, rmarkdown, DuckDB, plotly, NAATools, ...). Quarto is pointed at a
+stand-in ``Rscript`` (depot/notebooks/render_pool/Rscript) through
+``QUARTO_R``; the stand-in forwards each R invocation over a private Unix
+socket to a pooled session, which runs it in a forked copy of itself. Quarto
+itself still resolves includes and runs pandoc, so output is identical to a
+cold render; only R start-up and package loading are skipped.
+
+Compiled output is cached in the reports storage, keyed by
+``render_cache_key`` (data file hash, definition version and template
+version); ``evict_render_cache`` keeps the cache within its size and age
+budget. Cached HTML may embed PHI-derived aggregates, so every stored and
+evicted copy is recorded in PHIFileTracking.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RENDER_POOL_DIR = Path(__file__).resolve().parent.parent / 'notebooks' / 'render_pool'
+WORKER_SCRIPT = RENDER_POOL_DIR / 'render_worker.R'
+
+# Lines from a worker starting with this prefix are protocol replies; anything
+# else on its stdout is stray output from R or native code and is only logged.
+REPLY_PREFIX = '@@NAACCORD@@'
+
+# Staged template trees not used for this long are removed when a new one is built
+STAGED_TEMPLATE_MAX_AGE_SECONDS = 3600
+
+# Bump when the render command or output handling changes, so older cached
+# reports are no longer reused
+RENDER_CACHE_FORMAT = 1
+RENDER_CACHE_PREFIX = 'notebooks/cache'
+
+
+class RenderWorkerError(Exception):
+    """A pooled R session died or replied with something unreadable."""
+
+
+def template_sources(template_path):
+    """
+    Files and directories a notebook render needs, as (target, source) pairs.
+
+    Targets are relative to the render's working directory, laid out so
+    ``here::here()`` resolves paths the same way as in the repository.
+    """
+    template_path = Path(template_path)
+    depot_dir = Path(settings.BASE_DIR) / 'depot'
+    notebooks_dir = template_path.parent
+    return [
+        ('depot/scaffold_r.R', depot_dir / 'scaffold_r.R'),
+        ('depot/R', depot_dir / 'R'),
+        ('depot/data/definitions', depot_dir / 'data' / 'definitions'),
+        ('depot/notebooks/notebook.qmd', template_path),
+        ('depot/notebooks/partials', notebooks_dir / 'partials'),
+        ('depot/notebooks/styles.css', notebooks_dir / 'styles.css'),
+        ('depot/notebooks/cosmo-bootstrap.min.css', notebooks_dir / 'cosmo-bootstrap.min.css'),
+        ('depot/notebooks/setup.R', notebooks_dir.parent / 'setup.R'),
+        ('depot/notebooks/functions', notebooks_dir.parent / 'functions'),
+    ]
+
+
+def _iter_source_files(template_path):
+    """Yield (target relative path, source file) for every existing source file, in a stable order."""
+    for target, source in template_sources(template_path):
+        if source.is_dir():
+            for path in sorted(p for p in source.rglob('*') if p.is_file()):
+                yield f"{target}/{path.relative_to(source).as_posix()}", path
+        elif source.is_file():
+            yield target, source
+        else:
+            logger.warning(f"Notebook template source not found: {source}")
+
+
+def template_version(template_path) -> str:
+    """Content hash of everything a render of this template reads besides the data."""
+    digest = hashlib.sha256()
+    for target, path in _iter_source_files(template_path):
+        digest.update(target.encode())
+        digest.update(b'\0')
+        digest.update(path.read_bytes())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def stage_template(template_path, staging_root=None) -> Path:
+    """
+    Return a ready-to-link template tree for ``template_path``, building it if needed.
+
+    Trees are keyed by ``template_version`` so edits to the template, R code
+    or definitions produce a fresh tree. Building happens in a scratch
+    directory that is renamed into place, so concurrent renders never see a
+    half-built tree.
+    """
+    template_path = Path(template_path)
+    if not template_path.exists():
+        raise FileNotFoundError(f"Template not found: {template_path}")
+
+    staging_root = Path(staging_root or settings.QUARTO_CONFIG['template_staging_dir'])
+    staged = staging_root / template_version(template_path)[:16]
+    if staged.is_dir():
+        os.utime(staged)
+        return staged
+
+    staging_root.mkdir(parents=True, exist_ok=True)
+    scratch = Path(tempfile.mkdtemp(prefix='.staging_', dir=staging_root))
+    try:
+        (scratch / 'depot' / 'notebooks' / 'partials').mkdir(parents=True)
+        for target, path in _iter_source_files(template_path):
+            destination = scratch / target
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, destination)
+        try:
+            scratch.rename(staged)
+            logger.info(f"Staged notebook template {template_path.name} at {staged}")
+        except OSError:
+            # Another process staged the same version first
+            shutil.rmtree(scratch, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise
+
+    _prune_staged_templates(staging_root, keep=staged)
+    return staged
+
+
+def _prune_staged_templates(staging_root, keep):
+    cutoff = time.time() - STAGED_TEMPLATE_MAX_AGE_SECONDS
+    for path in staging_root.iterdir():
+        if path != keep and path.is_dir() and path.stat().st_mtime < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+    return destination
+
+
+def link_staged_template(staged, working_dir):
+    """Populate a render working directory from a staged tree using hard links."""
+    shutil.copytree(staged, working_dir, copy_function=_link_or_copy, dirs_exist_ok=True)
+
+
+def file_sha256(path, chunk_size=1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_cache_key(data_hash, definition_version, template_hash, data_file_type, cohort_id=None) -> str:
+    """
+    Cache key for a compiled notebook.
+
+    Two renders with the same key read the same data through the same
+    definition and template tree, so they produce the same report. The
+    cohort is part of the key so cached reports never cross cohorts.
+    """
+    parts = [RENDER_CACHE_FORMAT, data_hash, definition_version, template_hash, data_file_type, cohort_id]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def render_cache_path(cache_key) -> str:
+    return f"{RENDER_CACHE_PREFIX}/{cache_key}.html"
+
+
+def render_cache_enabled() -> bool:
+    return settings.QUARTO_CONFIG.get('render_cache_max_bytes', 0) > 0
+
+
+def evict_render_cache(storage, max_bytes=None, max_age_days=None) -> int:
+    """
+    Remove cached reports older than the age budget, then least recently
+    used ones until the cache fits the size budget.
+
+    Returns the number of entries evicted.
+    """
+    from depot.models import NotebookRenderCache, PHIFileTracking
+
+    if max_bytes is None:
+        max_bytes = settings.QUARTO_CONFIG.get('render_cache_max_bytes', 0)
+    if max_age_days is None:
+        max_age_days = settings.QUARTO_CONFIG.get('render_cache_max_age_days', 30)
+
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    entries = list(NotebookRenderCache.objects.order_by('-last_used_at'))
+    evict, total, full = [], 0, False
+    for entry in entries:
+        full = full or total + entry.file_size > max_bytes
+        if full or entry.last_used_at < cutoff:
+            evict.append(entry)
+        else:
+            total += entry.file_size
+
+    for entry in evict:
+        try:
+            absolute_path = storage.get_absolute_path(entry.storage_path)
+            storage.delete(entry.storage_path)
+            PHIFileTracking.log_operation(
+                cohort=entry.cohort,
+                user=None,
+                action='nas_report_deleted',
+                file_path=absolute_path,
+                file_type='report_html',
+                file_size=entry.file_size,
+                metadata={
+                    'cache_key': entry.cache_key,
+                    'relative_path': entry.storage_path,
+                    'hit_count': entry.hit_count,
+                    'reason': 'render_cache_eviction',
+                },
+            )
+            entry.delete()
+        except Exception as e:
+            logger.error(f"Failed to evict cached notebook {entry.storage_path}: {e}", exc_info=True)
+
+    if evict:
+        logger.info(f"Evicted {len(evict)} cached notebook(s); {total} bytes remain cached")
+    return len(evict)
+
+
+class RenderWorker:
+    """One warm R session, driven over its stdin/stdout pipes."""
+
+    def __init__(self, rscript):
+        self.renders = 0
+        self.process = subprocess.Popen(
+            [rscript, str(WORKER_SCRIPT)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        ready = self._read_reply()
+        if not ready.get('ready'):
+            self.close()
+            raise RenderWorkerError(f"R render worker did not start: {ready}")
+        logger.info(f"Started R render worker (pid {self.process.pid})")
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def call(self, request: dict) -> dict:
+        """Run one R invocation in a fork of this session."""
+        try:
+            self.process.stdin.write(json.dumps(request) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise RenderWorkerError(f"R render worker is gone: {e}")
+        return self._read_reply()
+
+    def _read_reply(self) -> dict:
+        for line in self.process.stdout:
+            if line.startswith(REPLY_PREFIX):
+                try:
+                    return json.loads(line[len(REPLY_PREFIX):])
+                except json.JSONDecodeError as e:
+                    raise RenderWorkerError(f"Unreadable reply from R render worker: {e}")
+            logger.debug(f"R render worker: {line.rstrip()}")
+        raise RenderWorkerError(f"R render worker exited with status {self.process.wait()}")
+
+    def close(self):
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class _SocketRelay:
+    """
+    Private Unix socket that forwards stand-in Rscript calls to one worker.
+
+    The socket lives in a fresh 0700 directory, so only this user can reach
+    it; it is removed when the render finishes.
+    """
+
+    def __init__(self, worker):
+        self.worker = worker
+        self.directory = tempfile.mkdtemp(prefix='naaccord_render_')
+        self.path = os.path.join(self.directory, 'worker.sock')
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        self.server.listen()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return  # closed
+            with conn, conn.makefile('rw', encoding='utf-8') as stream:
+                try:
+                    request = json.loads(stream.readline())
+                    reply = self.worker.call(request)
+                except Exception as e:
+                    reply = {'status': 1, 'stdout': '', 'stderr': f"Render pool error: {e}\n"}
+                stream.write(json.dumps(reply) + '\n')
+                stream.flush()
+
+    def close(self):
+        try:
+            # Wakes the accept() in the serving thread; close() alone does not
+            self.server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server.close()
+        self.thread.join(timeout=5)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class RenderPool:
+    """
+    Pool of warm R sessions for Quarto renders.
+
+    Sessions are started lazily (or up front with ``warm``) up to ``size``
+    and replaced after ``recycle_after`` renders so memory growth and any
+    leaked global state stay bounded.
+    """
+
+    def __init__(self, size, recycle_after=50, rscript=None):
+        self.size = size
+        self.recycle_after = recycle_after
+        self.rscript = rscript or shutil.which('Rscript') or 'Rscript'
+        self._idle = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """Start sessions until the pool is full."""
+        while True:
+            with self._lock:
+                if self._started >= self.size:
+                    return
+                self._started += 1
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self):
+        try:
+            return RenderWorker(self.rscript)
+        except Exception:
+            with self._lock:
+                self._started -= 1
+            raise
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_start = self._started < self.size
+            if can_start:
+                self._started += 1
+        if can_start:
+            return self._start_worker()
+        return self._idle.get()
+
+    def _checkin(self, worker):
+        worker.renders += 1
+        if worker.alive() and worker.renders < self.recycle_after:
+            self._idle.put(worker)
+            return
+        logger.info(f"Recycling R render worker (pid {worker.process.pid}) after {worker.renders} renders")
+        worker.close()
+        with self._lock:
+            self._started -= 1
+
+    @contextmanager
+    def session(self):
+        """
+        Check out a warm session for one render.
+
+        Yields environment variables that route Quarto's R calls to it.
+        """
+        worker = self._checkout()
+        relay = _SocketRelay(worker)
+        try:
+            yield {
+                'QUARTO_R': str(RENDER_POOL_DIR),
+                'NAACCORD_RENDER_SOCKET': relay.path,
+                'NAACCORD_REAL_RSCRIPT': self.rscript,
+            }
+        finally:
+            relay.close()
+            self._checkin(worker)
+
+    def shutdown(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.close()
+            with self._lock:
+                self._started -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """The process-wide render pool, or None when pooling is disabled."""
+    global _pool
+    size = settings.QUARTO_CONFIG.get('render_pool_size', 0)
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool(size, settings.QUARTO_CONFIG.get('render_recycle_after', 50))
+        return _pool
+
+
+def shutdown_render_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -3,11 +3,17 @@ Notification Service
 
 Centralized service for handling email and in-app notifications.
 Provides consistent notification management across the application.
+
+Emails are not sent inline: they are queued in NotificationOutbox within
+the caller's transaction and delivered by the deliver_notifications task.
 """
 import logging
+from datetime import timedelta
 from typing import List, Dict, Any, Optional
-from django.core.mail import send_mail, send_mass_mail
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -15,6 +21,9 @@ from django.contrib.auth import get_user_model
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# How long a worker may hold claimed outbox rows before another worker retries them
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
 
 class NotificationService:
     """Service for managing notifications."""
@@ -53,7 +62,8 @@ class NotificationService:
             template=template,
             context=context,
             recipients=[user.email],
-            notification_type=notification_type
+            notification_type=notification_type,
+            coalesce_key=f"{notification_type}:{submission.pk}"
         )
     
     @staticmethod
@@ -136,13 +146,14 @@ class NotificationService:
             template='emails/validation_warning.html',
             context=context,
             recipients=list(set(recipients)),  # Remove duplicates
-            notification_type=NotificationService.VALIDATION_WARNING
+            notification_type=NotificationService.VALIDATION_WARNING,
+            coalesce_key=f"{NotificationService.VALIDATION_WARNING}:{submission.pk}"
         )
     
     @staticmethod
     def send_batch_notifications(notifications: List[Dict[str, Any]]):
         """
-        Send multiple notifications in batch.
+        Queue multiple notifications in one transaction.
         
         Args:
             notifications: List of dicts with keys:
@@ -151,38 +162,88 @@ class NotificationService:
                 - context: Template context
                 - recipients: List of email addresses
         """
-        messages = []
-        
-        for notification in notifications:
-            try:
-                html_content = render_to_string(
-                    notification['template'],
-                    notification['context']
+        with transaction.atomic():
+            queued = [
+                NotificationService._send_email(
+                    subject=notification['subject'],
+                    template=notification['template'],
+                    context=notification['context'],
+                    recipients=notification['recipients'],
+                    notification_type=notification.get('notification_type')
                 )
-                
-                # Create plain text version
-                text_content = NotificationService._html_to_text(html_content)
-                
-                messages.append((
-                    notification['subject'],
-                    text_content,
-                    settings.DEFAULT_FROM_EMAIL,
-                    notification['recipients']
-                ))
-                
-            except Exception as e:
-                logger.error(f"Failed to prepare batch notification: {e}")
+                for notification in notifications
+            ]
         
-        if messages:
-            try:
-                send_mass_mail(messages, fail_silently=False)
-                logger.info(f"Sent {len(messages)} batch notifications")
-                return True
-            except Exception as e:
-                logger.error(f"Failed to send batch notifications: {e}")
-                return False
-        
-        return True
+        logger.info(f"Queued {sum(queued)} of {len(notifications)} batch notifications")
+        return all(queued)
+
+    @staticmethod
+    def deliver_outbox(batch_size=None):
+        """
+        Send due outbox rows over a single SMTP connection.
+
+        Rows for the same recipient and coalesce key become one digest.
+        Failures are retried with exponential backoff until
+        NOTIFICATION_MAX_ATTEMPTS, then marked failed.
+
+        Returns:
+            dict: Counts of emails sent and rows sent, retrying or failed
+        """
+        from depot.models import NotificationOutbox
+
+        batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        with transaction.atomic():
+            rows = list(NotificationOutbox.due().select_for_update(skip_locked=True)[:batch_size])
+            # Pull in the rest of each burst even if its coalescing window is still open
+            keys = {(row.recipient, row.coalesce_key) for row in rows if row.coalesce_key}
+            if keys:
+                rows += [
+                    row for row in NotificationOutbox.objects.select_for_update(skip_locked=True).filter(
+                        status='pending',
+                        recipient__in={recipient for recipient, _ in keys},
+                        coalesce_key__in={key for _, key in keys},
+                    ).exclude(pk__in=[row.pk for row in rows])
+                    if (row.recipient, row.coalesce_key) in keys
+                ]
+            NotificationOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+                status='sending',
+                next_attempt_at=timezone.now() + CLAIM_TIMEOUT
+            )
+
+        groups = {}
+        for row in rows:
+            key = (row.recipient, row.coalesce_key) if row.coalesce_key else row.pk
+            groups.setdefault(key, []).append(row)
+
+        result = {'emails': 0, 'sent': 0, 'retrying': 0, 'failed': 0}
+        pending = list(groups.values())
+        try:
+            with get_connection(fail_silently=False) as connection:
+                while pending:
+                    group = pending[0]
+                    try:
+                        connection.send_messages([NotificationService._build_message(group, connection)])
+                    except Exception as e:
+                        logger.warning(f"Failed to send notification to {len(group)} outbox rows: {e}")
+                        NotificationService._reschedule(group, e, result)
+                    else:
+                        NotificationOutbox.objects.filter(pk__in=[row.pk for row in group]).update(
+                            status='sent', sent_at=timezone.now(), last_error=''
+                        )
+                        NotificationService._log_notification(
+                            group[0].notification_type, group[0].subject, [group[0].recipient]
+                        )
+                        result['emails'] += 1
+                        result['sent'] += len(group)
+                    pending.pop(0)
+        except Exception as e:
+            logger.error(f"Email connection failed, rescheduling {len(pending)} notifications: {e}")
+            for group in pending:
+                NotificationService._reschedule(group, e, result)
+
+        if rows:
+            logger.info(f"Notification outbox delivery: {result}")
+        return result
     
     @staticmethod
     def create_in_app_notification(user, notification_type, title, message, data=None):
@@ -231,8 +292,15 @@ class NotificationService:
     # Private helper methods
     
     @staticmethod
-    def _send_email(subject, template, context, recipients, notification_type=None):
-        """Internal method to send email."""
+    def _send_email(subject, template, context, recipients, notification_type=None, coalesce_key=''):
+        """
+        Internal method to queue an email in the outbox, one row per recipient.
+
+        Rows with a coalesce key wait NOTIFICATION_COALESCE_SECONDS so a
+        burst to the same recipient goes out as one digest.
+        """
+        from depot.models import NotificationOutbox
+
         if not recipients:
             logger.warning(f"No recipients for notification: {subject}")
             return False
@@ -244,31 +312,85 @@ class NotificationService:
             # Create plain text version
             text_content = NotificationService._html_to_text(html_content)
             
-            # Send email
-            send_mail(
-                subject=subject,
-                message=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipients,
-                html_message=html_content,
-                fail_silently=False
-            )
-            
-            logger.info(
-                f"Sent {notification_type or 'email'} notification to {len(recipients)} recipients"
-            )
+            send_at = timezone.now()
+            if coalesce_key:
+                send_at += timedelta(seconds=settings.NOTIFICATION_COALESCE_SECONDS)
             
-            # Log notification in database if configured
-            if notification_type:
-                NotificationService._log_notification(
-                    notification_type, subject, recipients
+            NotificationOutbox.objects.bulk_create([
+                NotificationOutbox(
+                    notification_type=notification_type or 'email',
+                    recipient=recipient,
+                    subject=subject,
+                    text_body=text_content,
+                    html_body=html_content,
+                    coalesce_key=coalesce_key,
+                    next_attempt_at=send_at,
                 )
+                for recipient in recipients
+            ])
+            transaction.on_commit(NotificationService._schedule_delivery)
             
+            logger.info(
+                f"Queued {notification_type or 'email'} notification to {len(recipients)} recipients"
+            )
             return True
             
         except Exception as e:
-            logger.error(f"Failed to send email notification: {e}", exc_info=True)
+            logger.error(f"Failed to queue email notification: {e}", exc_info=True)
             return False
+
+    @staticmethod
+    def _schedule_delivery():
+        """Start a delivery run after the coalescing window, once per window per process."""
+        delay = settings.NOTIFICATION_COALESCE_SECONDS
+        if not cache.add('notification_outbox_delivery_scheduled', True, timeout=delay or 1):
+            return
+        try:
+            from depot.tasks.notifications import deliver_notifications
+            deliver_notifications.apply_async(countdown=delay)
+        except Exception as e:
+            # The periodic delivery run picks the rows up
+            logger.warning(f"Could not schedule notification delivery: {e}")
+
+    @staticmethod
+    def _build_message(rows, connection):
+        """One email for a recipient's outbox rows, as a digest when there are several."""
+        first = rows[0]
+        subject, text_body, html_body = first.subject, first.text_body, first.html_body
+        if len(rows) > 1:
+            subject = f"{first.subject} (+{len(rows) - 1} more)"
+            text_body = '\n\n----------\n\n'.join(row.text_body for row in rows)
+            html_body = '<hr>'.join(row.html_body for row in rows) if all(row.html_body for row in rows) else ''
+
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body=text_body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[first.recipient],
+            connection=connection,
+        )
+        if html_body:
+            message.attach_alternative(html_body, 'text/html')
+        return message
+
+    @staticmethod
+    def _reschedule(rows, error, result):
+        """Back off failed rows, giving up after NOTIFICATION_MAX_ATTEMPTS."""
+        from depot.models import NotificationOutbox
+
+        for row in rows:
+            row.attempts += 1
+            row.last_error = str(error)
+            if row.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                row.status = 'failed'
+                result['failed'] += 1
+            else:
+                row.status = 'pending'
+                row.next_attempt_at = timezone.now() + NotificationOutbox.retry_delay(
+                    row.attempts, settings.NOTIFICATION_RETRY_BASE_SECONDS, settings.NOTIFICATION_RETRY_MAX_SECONDS
+                )
+                result['retrying'] += 1
+        NotificationOutbox.objects.bulk_update(rows, ['attempts', 'last_error', 'status', 'next_attempt_at'])
     
     @staticmethod
     def _html_to_text(html_content):
@@ -1,13 +1,13 @@
 import csv
 import logging
-import duckdb
 from pathlib import Path
 from typing import List, Tuple, Optional
 from django.utils import timezone
 
-from depot.models import SubmissionPatientIDs, PHIFileTracking, DataTableFile
+from depot.models import SubmissionPatientIDs, PHIFileTracking, DataTableFile, DataTableFilePatientIDs
 from depot.storage.phi_manager import PHIStorageManager
 from depot.storage.manager import StorageManager
+from depot.utils.db_connections import recycle_stale_connections
 
 logger = logging.getLogger(__name__)
 
@@ -27,35 +27,49 @@ class PatientIDExtractor:
         """
         Extract patient IDs from any data file (patient or non-patient).
         Returns a list of patient IDs found in the file.
+
+        IDs already recorded for the file's current content are returned
+        without rescanning it.
+        """
+        existing = DataTableFilePatientIDs.current_for(data_file)
+        if existing:
+            return list(existing.patient_ids)
+
+        patient_ids, _ = self.extract_ids_with_warnings(data_file)
+        return patient_ids
+
+    def extract_ids_with_warnings(self, data_file: DataTableFile) -> Tuple[List[str], List[str]]:
+        """
+        Scan a data file for its patient IDs.
+        Returns: (patient_ids, warnings), empty on failure
         """
         try:
             # Use DuckDB if available, otherwise use raw file
             if data_file.duckdb_file_path:
-                patient_ids, _ = self._extract_from_duckdb(
+                return self._extract_from_duckdb(
                     data_file.duckdb_file_path,
                     data_file.data_table.submission.cohort,
                     None  # No user needed for simple extraction
                 )
             elif data_file.raw_file_path:
-                patient_ids, _ = self._extract_from_raw(
+                return self._extract_from_raw(
                     data_file.raw_file_path,
                     data_file.data_table.submission.cohort,
                     None  # No user needed for simple extraction
                 )
             else:
                 logger.warning(f"No file path available for DataTableFile {data_file.id}")
-                return []
-
-            return patient_ids
+                return [], []
 
         except Exception as e:
             logger.error(f"Failed to extract patient IDs from file {data_file.id}: {e}")
-            return []
+            return [], []
 
     def extract_from_data_table_file(self, data_file: DataTableFile, user) -> Optional[SubmissionPatientIDs]:
         """
         Extract patient IDs from a DataTableFile record.
-        Uses DuckDB file if available, otherwise falls back to raw file.
+        Reuses the file's recorded extraction when it is current; otherwise
+        uses DuckDB file if available, falling back to raw file.
         """
         submission = data_file.data_table.submission
 
@@ -65,6 +79,9 @@ class PatientIDExtractor:
             relative_path = data_file.duckdb_file_path or data_file.raw_file_path
             absolute_path = storage.get_absolute_path(relative_path)
 
+            # Reuse the file's own extraction when it matches the current content
+            existing = DataTableFilePatientIDs.current_for(data_file)
+
             # Log extraction start
             PHIFileTracking.log_operation(
                 cohort=submission.cohort,
@@ -73,11 +90,13 @@ class PatientIDExtractor:
                 file_path=absolute_path,
                 file_type='duckdb' if data_file.duckdb_file_path else 'raw_csv',
                 content_object=data_file,
-                metadata={'relative_path': relative_path}
+                metadata={'relative_path': relative_path, 'reused_extraction': existing is not None}
             )
             
             # Extract IDs based on available file type
-            if data_file.duckdb_file_path:
+            if existing:
+                patient_ids, warnings = list(existing.patient_ids), list(existing.extraction_warnings)
+            elif data_file.duckdb_file_path:
                 patient_ids, warnings = self._extract_from_duckdb(
                     data_file.duckdb_file_path, 
                     submission.cohort, 
@@ -91,6 +110,9 @@ class PatientIDExtractor:
                 )
             else:
                 raise ValueError("No file path available for extraction")
+
+            if not existing:
+                DataTableFilePatientIDs.record_extraction(data_file, patient_ids, warnings)
             
             # Create or update the patient IDs record
             record = SubmissionPatientIDs.create_or_update_for_submission(
@@ -169,6 +191,7 @@ class PatientIDExtractor:
             logger.info(f"Successfully copied DuckDB to workspace: {workspace_path}")
 
             # Connect to DuckDB
+            import duckdb
             conn = duckdb.connect(workspace_path, read_only=True)
             logger.info(f"Successfully connected to DuckDB at: {workspace_path}")
             
@@ -232,10 +255,8 @@ class PatientIDExtractor:
             finally:
                 conn.close()
 
-            # Ensure Django connection is fresh after DuckDB operations
-            from django.db import connection as django_connection
-            if django_connection.connection is not None and not django_connection.is_usable():
-                django_connection.close()
+            # Replace the Django connection if it went stale during the DuckDB scan
+            recycle_stale_connections()
 
             logger.info(f"Successfully extracted {len(patient_ids)} patient IDs from DuckDB")
             return patient_ids, warnings
@@ -309,10 +330,8 @@ class PatientIDExtractor:
             # Sort for consistency
             patient_ids.sort()
 
-            # Ensure Django connection is fresh after file operations
-            from django.db import connection as django_connection
-            if django_connection.connection is not None and not django_connection.is_usable():
-                django_connection.close()
+            # Replace the Django connection if it went stale during file operations
+            recycle_stale_connections()
 
             return patient_ids, warnings
             
@@ -0,0 +1,254 @@
+"""
+Patient Validation Export
+
+CSV of every patient file ID and whether each uploaded file contains it.
+
+Architecture:
+- The stored ID arrays (SubmissionPatientIDs and DataTableFilePatientIDs)
+  are read as JSON text, one record at a time, and unnested by DuckDB; no
+  Python sets are built
+- One sorted join produces the whole CSV, which DuckDB writes gzipped to a
+  scratch database directory so large tables spill to disk
+- The gzipped CSV is kept in reports storage, keyed by ``export_version``
+  (the ID records and file names it was built from), so repeat downloads
+  stream the stored artifact; older versions for the table are removed
+  when a new one is built
+
+Exports hold patient IDs, so every stored and removed artifact is recorded
+in PHIFileTracking.
+
+Usage:
+    path = ensure_export(data_table, data_file=None, user=request.user)
+    chunks = stream_export(path, compressed=False)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zlib
+from typing import Dict, Iterator, List, Tuple
+
+import duckdb
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from depot.storage.manager import StorageManager
+from depot.utils.sql import quote_identifier
+
+logger = logging.getLogger(__name__)
+
+# Bump when the CSV layout changes, so older exports are no longer reused
+EXPORT_FORMAT = 1
+EXPORT_PREFIX = 'exports/patient_validation'
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+
+def _storage():
+    return StorageManager.get_storage('reports')
+
+
+def _file_name(record) -> str:
+    return record['data_file__name'] or record['data_file__original_filename'] or f"File {record['data_file']}"
+
+
+def _patient_file_source(submission) -> Dict:
+    """Which row holds the submission's patient file IDs, without loading them."""
+    from depot.models import CohortSubmission, SubmissionPatientIDs
+
+    record = SubmissionPatientIDs.objects.filter(submission=submission).values('id', 'revision', 'updated_at').first()
+    if record:
+        return dict(record, model=SubmissionPatientIDs)
+    record = CohortSubmission.objects.filter(pk=submission.pk).values('id', 'updated_at').get()
+    return dict(record, model=CohortSubmission, revision=None)
+
+
+def _file_records(data_table, data_file=None) -> List[Dict]:
+    """ID records the export covers, in the order their columns appear, without loading the IDs."""
+    from depot.models import DataTableFilePatientIDs
+
+    fields = ('id', 'updated_at', 'data_file', 'data_file__name', 'data_file__original_filename')
+    if data_file is not None:
+        record = DataTableFilePatientIDs.objects.filter(data_file=data_file).values(*fields).first()
+        return [record] if record else []
+    return list(DataTableFilePatientIDs.objects.filter(
+        data_file__data_table=data_table, data_file__is_current=True
+    ).values(*fields))
+
+
+def _ids_json(model, pk) -> str:
+    """A row's patient_ids as the stored JSON text, without decoding it in Python."""
+    text = model.objects.filter(pk=pk).annotate(
+        ids_json=Cast('patient_ids', TextField())
+    ).values_list('ids_json', flat=True).first()
+    return text or '[]'
+
+
+def export_version(data_table, data_file=None) -> Tuple[str, Dict, List[Dict]]:
+    """
+    Version key of a table's export, with the records it is built from.
+
+    Two exports with the same key read the same patient file IDs and the
+    same per-file ID records under the same names, so they are identical.
+    """
+    source = _patient_file_source(data_table.submission)
+    records = _file_records(data_table, data_file)
+    parts = [
+        EXPORT_FORMAT,
+        data_table.id,
+        data_file.id if data_file is not None else 'all',
+        source['model'].__name__, source['id'], source['revision'], source['updated_at'].isoformat(),
+        [[record['id'], record['updated_at'].isoformat(), _file_name(record)] for record in records],
+    ]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest(), source, records
+
+
+def export_prefix(data_table, data_file=None) -> str:
+    """Reports storage prefix holding one export scope (the whole table or one file)."""
+    scope = f"file_{data_file.id}" if data_file is not None else 'all'
+    return f"{EXPORT_PREFIX}/{data_table.id}/{scope}/"
+
+
+def export_path(data_table, version: str, data_file=None) -> str:
+    return f"{export_prefix(data_table, data_file)}{version}.csv.gz"
+
+
+def _export_query(file_names: List[str], single_file: bool) -> str:
+    if single_file:
+        return f"""
+            SELECT p.patient_id, 1 AS in_patient_file,
+                   CASE WHEN f.patient_id IS NULL THEN 0 ELSE 1 END AS matching,
+                   CASE WHEN f.patient_id IS NULL THEN 1 ELSE 0 END AS out_of_bounds
+            FROM patient_ids p
+            LEFT JOIN file_ids f ON f.patient_id = p.patient_id
+            ORDER BY p.patient_id
+        """
+
+    file_columns = ''.join(
+        f", MAX(CASE WHEN f.file_index = {index} THEN 1 ELSE 0 END) AS {quote_identifier(f'in_{name}')}"
+        for index, name in enumerate(file_names)
+    )
+    return f"""
+        SELECT p.patient_id, 1 AS in_patient_file,
+               CASE WHEN COUNT(f.file_index) > 0 THEN 1 ELSE 0 END AS matching,
+               CASE WHEN COUNT(f.file_index) > 0 THEN 0 ELSE 1 END AS out_of_bounds,
+               STRING_AGG(n.name, '; ' ORDER BY f.file_index) AS files_containing_id
+               {file_columns}
+        FROM patient_ids p
+        LEFT JOIN file_ids f ON f.patient_id = p.patient_id
+        LEFT JOIN file_names n ON n.file_index = f.file_index
+        GROUP BY p.patient_id
+        ORDER BY p.patient_id
+    """
+
+
+def build_export(source: Dict, records: List[Dict], local_path: str, single_file: bool) -> None:
+    """Write the gzipped CSV for the given patient file IDs and file records to ``local_path``."""
+    from depot.models import DataTableFilePatientIDs
+
+    with tempfile.TemporaryDirectory(prefix='patient-validation-') as temp_dir:
+        conn = duckdb.connect(os.path.join(temp_dir, 'export.duckdb'))
+        try:
+            conn.execute(
+                "CREATE TABLE patient_ids AS "
+                "SELECT DISTINCT unnest(from_json(?, '[\"VARCHAR\"]')) AS patient_id",
+                [_ids_json(source['model'], source['id'])]
+            )
+            conn.execute("CREATE TABLE file_ids (file_index INTEGER, patient_id VARCHAR)")
+            conn.execute("CREATE TABLE file_names (file_index INTEGER, name VARCHAR)")
+            file_names = []
+            for index, record in enumerate(records):
+                file_names.append(_file_name(record))
+                conn.execute("INSERT INTO file_names VALUES (?, ?)", [index, file_names[-1]])
+                conn.execute(
+                    "INSERT INTO file_ids "
+                    "SELECT DISTINCT ?, unnest(from_json(?, '[\"VARCHAR\"]'))",
+                    [index, _ids_json(DataTableFilePatientIDs, record['id'])]
+                )
+
+            conn.execute(
+                f"COPY ({_export_query(file_names, single_file)}) TO '{local_path}' "
+                f"(FORMAT CSV, HEADER, NEW_LINE '\r\n', COMPRESSION GZIP)"
+            )
+        finally:
+            conn.close()
+
+
+def ensure_export(data_table, data_file=None, user=None) -> str:
+    """
+    Reports storage path of the table's current export, building it if needed.
+
+    With ``data_file`` the export covers that file only; otherwise it covers
+    every current file in the table, with a column per file.
+    """
+    from depot.models import PHIFileTracking
+
+    version, source, records = export_version(data_table, data_file)
+    path = export_path(data_table, version, data_file)
+    storage = _storage()
+    if storage.exists(path):
+        return path
+
+    cohort = data_table.submission.cohort
+    with tempfile.TemporaryDirectory(prefix='patient-validation-') as temp_dir:
+        local_path = os.path.join(temp_dir, 'export.csv.gz')
+        build_export(source, records, local_path, single_file=data_file is not None)
+        file_size = os.path.getsize(local_path)
+        with open(local_path, 'rb') as export:
+            storage.save(path, export, 'application/gzip')
+
+    PHIFileTracking.log_operation(
+        cohort=cohort,
+        user=user,
+        action='nas_report_created',
+        file_path=storage.get_absolute_path(path),
+        file_type='patient_data',
+        file_size=file_size,
+        content_object=data_table,
+        metadata={'relative_path': path, 'export': 'patient_validation', 'version': version},
+    )
+    logger.info(f"Built patient validation export {path} ({file_size} bytes)")
+
+    for stale in storage.list_with_prefix(export_prefix(data_table, data_file)):
+        # Skip storage sidecars (.meta); they go with their export
+        if stale == path or not stale.endswith('.csv.gz'):
+            continue
+        storage.delete(stale)
+        PHIFileTracking.log_operation(
+            cohort=cohort,
+            user=user,
+            action='nas_report_deleted',
+            file_path=storage.get_absolute_path(stale),
+            file_type='patient_data',
+            content_object=data_table,
+            metadata={'relative_path': stale, 'export': 'patient_validation', 'reason': 'superseded'},
+        )
+    return path
+
+
+def stream_export(path: str, compressed: bool = False, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield a stored export in large chunks.
+
+    With ``compressed`` the gzip bytes are passed through unchanged;
+    otherwise they are inflated chunk by chunk as CSV.
+    """
+    chunks = _storage().stream_file(path, chunk_size=chunk_size)
+    if compressed:
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        while chunk:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+            chunk = decompressor.unused_data
+            if decompressor.eof:
+                # Next gzip member, if any
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    tail = decompressor.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,238 @@
+"""
+PHI integrity scrubber: verifies tracked NAS files against their recorded
+SHA256 hashes.
+
+Files are hashed as streams by a bounded thread pool sharing an I/O
+budget, so multi-GB files are never held in memory and a scan cannot
+saturate the NAS. A file whose size and modification time match its last
+successful verification is not rehashed. Progress is checkpointed on a
+``PHIIntegrityScan`` after every batch so an interrupted scan resumes where
+it stopped, and each file's latest result is kept in ``PHIFileVerification``.
+"""
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from depot.models import PHIFileTracking, PHIFileVerification, PHIIntegrityScan
+from depot.storage.manager import StorageManager
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# Tracking records per checkpoint
+BATCH_SIZE = 50
+
+VERIFIED_ACTIONS = ['nas_raw_created', 'nas_duckdb_created']
+
+
+class IOThrottle:
+    """
+    Paces reads from several threads to a shared bytes-per-second budget.
+
+    Each read reserves the next slot of the budget and sleeps until it
+    starts; a rate of 0 or None disables throttling.
+    """
+
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = bytes_per_second
+        self._lock = threading.Lock()
+        self._available_at = time.monotonic()
+
+    def consume(self, byte_count):
+        if not self.bytes_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._available_at)
+            self._available_at = start + byte_count / self.bytes_per_second
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def hash_file(storage, path, chunk_size=CHUNK_SIZE, throttle=None):
+    """
+    SHA256 of a stored file, read as a stream.
+
+    Returns:
+        tuple: (hex digest, bytes read)
+    """
+    hasher = hashlib.sha256()
+    byte_count = 0
+    for chunk in storage.stream_file(path, chunk_size):
+        if throttle:
+            throttle.consume(len(chunk))
+        hasher.update(chunk)
+        byte_count += len(chunk)
+    return hasher.hexdigest(), byte_count
+
+
+@dataclass
+class FileCheck:
+    """Outcome of verifying one tracked file."""
+
+    tracking_id: int
+    status: str
+    file_size: Optional[int] = None
+    file_mtime: Optional[float] = None
+    calculated_hash: str = ''
+    bytes_hashed: int = 0
+    skipped: bool = False
+    error_message: str = ''
+
+
+class PHIIntegrityScrubber:
+    """
+    Verifies PHIFileTracking NAS records in parallel.
+
+    Worker threads only touch storage; all database writes happen on the
+    calling thread between batches.
+    """
+
+    def __init__(self, storage=None, workers=None, max_bytes_per_second=None,
+                 chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE):
+        self.storage = storage or StorageManager.get_submission_storage()
+        self.workers = workers or getattr(settings, 'PHI_INTEGRITY_WORKERS', 4)
+        if max_bytes_per_second is None:
+            max_bytes_per_second = getattr(settings, 'PHI_INTEGRITY_MAX_MB_PER_SECOND', 0) * 1024 * 1024
+        self.throttle = IOThrottle(max_bytes_per_second)
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+
+    def scan(self, cohort_id=None, check_hashes=True, restart=False):
+        """
+        Verify every tracked NAS file, resuming an unfinished scan with the
+        same scope unless ``restart`` is set.
+
+        Returns:
+            PHIIntegrityScan: The completed (or failed) scan
+        """
+        scan = None
+        if not restart:
+            scan = PHIIntegrityScan.objects.filter(
+                cohort_id=cohort_id, check_hashes=check_hashes
+            ).exclude(status='completed').first()
+        if scan:
+            logger.info(f"Resuming PHI integrity scan {scan.pk} after tracking record {scan.last_tracking_id}")
+        else:
+            scan = PHIIntegrityScan.objects.create(cohort_id=cohort_id, check_hashes=check_hashes)
+
+        records = PHIFileTracking.objects.filter(action__in=VERIFIED_ACTIONS).order_by('id')
+        if cohort_id:
+            records = records.filter(cohort_id=cohort_id)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='phi-scrub') as executor:
+                while True:
+                    batch = list(records.filter(id__gt=scan.last_tracking_id)[:self.batch_size])
+                    if not batch:
+                        break
+
+                    previous = {
+                        v.tracking_id: v
+                        for v in PHIFileVerification.objects.filter(tracking__in=batch)
+                    }
+                    started = time.monotonic()
+                    checks = list(executor.map(
+                        lambda record: self.check(record, previous.get(record.id), check_hashes),
+                        batch
+                    ))
+                    self._record_batch(scan, batch[-1].id, checks, time.monotonic() - started)
+
+        except Exception as e:
+            logger.error(f"PHI integrity scan {scan.pk} failed: {e}", exc_info=True)
+            scan.finish('failed', str(e))
+            return scan
+
+        scan.finish()
+        logger.info(
+            f"PHI integrity scan {scan.pk}: {scan.files_checked} files "
+            f"({scan.files_skipped} unchanged, {scan.files_missing} missing, "
+            f"{scan.files_corrupt} corrupt, {scan.files_failed} errors), "
+            f"{scan.bytes_hashed / (1024 * 1024):.1f} MB at {scan.throughput_mb_per_second:.1f} MB/s"
+        )
+        return scan
+
+    def check(self, record, previous=None, check_hashes=True):
+        """
+        Verify one tracked file. Safe to call from worker threads.
+
+        Args:
+            record: PHIFileTracking record
+            previous: The file's last PHIFileVerification, if any
+            check_hashes: Hash the file rather than only checking it exists
+        """
+        try:
+            if not self.storage.exists(record.file_path):
+                return FileCheck(record.id, 'missing')
+
+            metadata = self.storage.get_metadata(record.file_path) or {}
+            size, mtime = metadata.get('size'), metadata.get('mtime')
+            unchanged = (
+                previous is not None
+                and previous.status == 'valid'
+                and size is not None
+                and (previous.file_size, previous.file_mtime) == (size, mtime)
+            )
+
+            if not check_hashes or not record.file_hash:
+                return FileCheck(
+                    record.id, 'valid', size, mtime,
+                    calculated_hash=previous.calculated_hash if unchanged else ''
+                )
+
+            if unchanged and previous.calculated_hash == record.file_hash:
+                return FileCheck(record.id, 'valid', size, mtime, previous.calculated_hash, skipped=True)
+
+            calculated_hash, byte_count = hash_file(
+                self.storage, record.file_path, self.chunk_size, self.throttle
+            )
+            status = 'valid' if calculated_hash == record.file_hash else 'corrupt'
+            return FileCheck(record.id, status, size, mtime, calculated_hash, byte_count)
+
+        except FileNotFoundError:
+            return FileCheck(record.id, 'missing')
+        except Exception as e:
+            logger.error(f"Error verifying {record.file_path}: {e}")
+            return FileCheck(record.id, 'error', error_message=str(e))
+
+    def _record_batch(self, scan, last_tracking_id, checks, seconds):
+        """Store a batch's results and advance the scan checkpoint."""
+        with transaction.atomic():
+            for check in checks:
+                PHIFileVerification.objects.update_or_create(
+                    tracking_id=check.tracking_id,
+                    defaults={
+                        'scan': scan,
+                        'status': check.status,
+                        'file_size': check.file_size,
+                        'file_mtime': check.file_mtime,
+                        'calculated_hash': check.calculated_hash,
+                        'error_message': check.error_message,
+                        'verified_at': timezone.now(),
+                    }
+                )
+
+                scan.files_checked += 1
+                scan.bytes_hashed += check.bytes_hashed
+                if check.skipped:
+                    scan.files_skipped += 1
+                if check.status == 'missing':
+                    scan.files_missing += 1
+                elif check.status == 'corrupt':
+                    scan.files_corrupt += 1
+                elif check.status == 'error':
+                    scan.files_failed += 1
+
+            scan.last_tracking_id = last_tracking_id
+            scan.hash_seconds += seconds
+            scan.save()
@@ -466,8 +466,9 @@ class PrecheckValidationService:
             patient_id_columns = self._get_patient_id_column_names()
             logger.info(f'Will try patient ID columns in order: {", ".join(patient_id_columns)}')
 
-            # Extract patient IDs using fast DuckDB extraction with flexible column matching
-            extracted_patient_ids = extractor.extract_patient_ids_flexible(patient_id_columns)
+            # Extract patient IDs using fast DuckDB extraction with flexible column matching;
+            # this runs in a Celery worker, so it has no request time budget
+            extracted_patient_ids = extractor.scan_patient_ids(patient_id_columns, time_budget=0)
             logger.info(f'Extracted {len(extracted_patient_ids)} patient IDs from file')
 
             # Compare against submission's patient IDs
@@ -662,7 +663,7 @@ class PrecheckValidationService:
                 try:
                     logger.info(f'Validating {variable.column_name}...')
                     # Call directly instead of .delay()
-                    execute_variable_validation(variable.id, definition_list)
+                    execute_variable_validation(variable.id, definition_obj.version)
                 except Exception as e:
                     logger.error(f'Failed to validate variable {variable.id}: {e}')
 
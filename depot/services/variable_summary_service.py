@@ -4,18 +4,23 @@ Variable summary generation service.
 This service bridges the validation system with the existing summarizer
 framework by loading data from DuckDB, executing summarizers, and storing
 the results in the new VariableSummary model.
+
+DuckDB and pandas are imported when a summary is generated, so dispatching
+summary tasks from a web process does not load them.
 """
+from __future__ import annotations
+
 import logging
 from contextlib import contextmanager
-from typing import Dict, List, Optional
-
-import duckdb
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 from depot.data.definition_loader import get_definition_for_type
 from depot.data.summarizer import Summarizer as SummarizerOrchestrator
 from depot.models import VariableSummary
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 
@@ -81,6 +86,8 @@ class VariableSummaryService:
                 summary.save(update_fields=self._base_update_fields())
                 return summary
 
+            import pandas as pd
+
             df = pd.DataFrame({column_name: series})
 
             summarizer_payload = self._run_summarizers(variable_definition, df)
@@ -192,6 +199,8 @@ class VariableSummaryService:
 
     def _load_series_from_duckdb(self, validation_variable, column_name: str) -> Optional[pd.Series]:
         """Fetch the column data from DuckDB as a pandas Series."""
+        import duckdb
+
         run = validation_variable.validation_run
         duckdb_path = run.duckdb_path
 
@@ -252,15 +261,13 @@ class VariableSummaryService:
             logger.warning("Definition not found for data file type %s", data_file_type.name)
             return None
 
-        for variable_def in definition.get_definition():
-            if variable_def.get('name') == column_name:
-                return variable_def
-
-        return None
+        return definition.get_variable(column_name)
 
     @contextmanager
     def _duckdb_connection(self, duckdb_path: str):
         """Context manager wrapper for DuckDB connections."""
+        import duckdb
+
         conn = duckdb.connect(duckdb_path, read_only=True)
         try:
             yield conn
@@ -40,12 +40,53 @@ APP_CONFIG = load_app_config()
 # Quarto settings
 QUARTO_CONFIG = {
     'binary_path': env('QUARTO_BINARY_PATH', default='/usr/local/bin/quarto'),
+    # Warm R sessions per worker process for notebook renders; 0 renders cold
+    # (see depot/services/notebook_render.py)
+    'render_pool_size': env.int('NOTEBOOK_RENDER_POOL_SIZE', default=0),
+    'render_recycle_after': env.int('NOTEBOOK_RENDER_RECYCLE_AFTER', default=50),
+    'template_staging_dir': env(
+        'NOTEBOOK_TEMPLATE_STAGING_DIR',
+        default=os.path.join(os.environ.get('TMPDIR', '/tmp'), 'naaccord_notebook_templates'),
+    ),
+    # Compiled notebooks reused across renders with identical data, definition
+    # and template; size budget in bytes (0 disables the cache) and age budget
+    'render_cache_max_bytes': env.int('NOTEBOOK_RENDER_CACHE_MAX_BYTES', default=0),
+    'render_cache_max_age_days': env.int('NOTEBOOK_RENDER_CACHE_MAX_AGE_DAYS', default=30),
 }
 
 # DuckDB settings
 # Parallel CSV reading causes hangs even on Linux - disable by default
 naaccord_env = env('NAACCORD_ENVIRONMENT', default='development')
 DUCKDB_PARALLEL_CSV = env.bool('DUCKDB_PARALLEL_CSV', default=False)
+# Patient ID scans run inside the upload request; cap their DuckDB memory and
+# wall time so large uploads cannot tie up a web worker
+PATIENT_ID_SCAN_MEMORY_LIMIT = env('PATIENT_ID_SCAN_MEMORY_LIMIT', default='256MB')
+PATIENT_ID_SCAN_TIME_BUDGET = env.int('PATIENT_ID_SCAN_TIME_BUDGET', default=120)
+# Write the mapped (processed) CSV to NAS for analyst use alongside the DuckDB file.
+# DuckDB tables are built from the raw file either way.
+ARCHIVE_PROCESSED_FILES = env.bool('ARCHIVE_PROCESSED_FILES', default=True)
+
+# Window of persisted pipeline spans exported by /health/metrics/ (see depot/utils/instrumentation.py)
+PIPELINE_METRICS_WINDOW_HOURS = env.int('PIPELINE_METRICS_WINDOW_HOURS', default=24)
+PIPELINE_METRICS_CACHE_SECONDS = env.int('PIPELINE_METRICS_CACHE_SECONDS', default=60)
+
+# PHI integrity scrubber (see depot/services/phi_integrity.py): hashing threads
+# and their combined NAS read budget (0 = unthrottled)
+PHI_INTEGRITY_WORKERS = env.int('PHI_INTEGRITY_WORKERS', default=4)
+PHI_INTEGRITY_MAX_MB_PER_SECOND = env.int('PHI_INTEGRITY_MAX_MB_PER_SECOND', default=200)
+
+# PHIFileTracking records older than this move to PHIFileTrackingArchive
+# (see depot/models/phifilestate.py)
+PHI_TRACKING_HOT_DAYS = env.int('PHI_TRACKING_HOT_DAYS', default=90)
+
+# Email notification outbox (see depot/services/notification_service.py):
+# digest window for bursts to one recipient, rows per delivery run, and
+# retry backoff for failed sends
+NOTIFICATION_COALESCE_SECONDS = env.int('NOTIFICATION_COALESCE_SECONDS', default=60)
+NOTIFICATION_BATCH_SIZE = env.int('NOTIFICATION_BATCH_SIZE', default=100)
+NOTIFICATION_MAX_ATTEMPTS = env.int('NOTIFICATION_MAX_ATTEMPTS', default=6)
+NOTIFICATION_RETRY_BASE_SECONDS = env.int('NOTIFICATION_RETRY_BASE_SECONDS', default=60)
+NOTIFICATION_RETRY_MAX_SECONDS = env.int('NOTIFICATION_RETRY_MAX_SECONDS', default=3600)
 
 # Storage settings
 # Determine server role from environment
@@ -208,6 +249,55 @@ AUTH_USER_MODEL = "depot.User"
 # Celery
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default="redis://127.0.0.1:6379/0")
 CELERY_RESULT_BACKEND = "django-db"
+# Route tasks to one queue per workload class (see depot/config/celery_queues.py)
+from depot.config.celery_queues import (
+    DEFAULT_QUEUE, LONG_TASK_TIME_LIMIT, celery_broker_transport_options, celery_task_annotations, celery_task_routes,
+)
+CELERY_TASK_DEFAULT_QUEUE = DEFAULT_QUEUE
+CELERY_TASK_ROUTES = celery_task_routes()
+# Hard time limit (seconds) for acks_late tasks; the Redis visibility timeout is derived from it
+CELERY_LONG_TASK_TIME_LIMIT = env.int('CELERY_LONG_TASK_TIME_LIMIT', default=LONG_TASK_TIME_LIMIT)
+CELERY_TASK_ANNOTATIONS = celery_task_annotations(CELERY_LONG_TASK_TIME_LIMIT)
+CELERY_BROKER_TRANSPORT_OPTIONS = celery_broker_transport_options(CELERY_LONG_TASK_TIME_LIMIT)
+# Imported by workers at start-up to register tasks; depot.tasks itself loads
+# task modules lazily so web processes only import what they dispatch
+CELERY_IMPORTS = tuple(f'depot.tasks.{module}' for module in (
+    'async_file_processing',
+    'cleanup',
+    'cleanup_orphaned_files',
+    'duckdb_creation',
+    'file_integrity',
+    'notifications',
+    'patient_extraction',
+    'patient_id_validation',
+    'precheck_validation',
+    'storage_tasks',
+    'summary_generation',
+    'upload_precheck',
+    'upload_workflow',
+    'validation',
+    'validation_orchestration',
+))
+# Periodic tasks; django_celery_beat's DatabaseScheduler syncs these into the database
+from celery.schedules import crontab
+CELERY_BEAT_SCHEDULE = {
+    'scrub-phi-integrity': {
+        'task': 'depot.tasks.file_integrity.scrub_phi_integrity',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'archive-phi-tracking': {
+        'task': 'depot.tasks.cleanup.archive_phi_tracking',
+        'schedule': crontab(hour=3, minute=0, day_of_week='sunday'),
+    },
+    'deliver-notifications': {
+        'task': 'depot.tasks.notifications.deliver_notifications',
+        'schedule': crontab(),
+    },
+}
+# Published task payloads larger than this are logged as warnings and counted in /health/metrics/ (see depot/celery.py)
+CELERY_MESSAGE_SIZE_WARNING_BYTES = env.int('CELERY_MESSAGE_SIZE_WARNING_BYTES', default=64 * 1024)
+# How often each process writes its buffered message sizes to TaskMessageStats
+CELERY_MESSAGE_STATS_FLUSH_SECONDS = env.int('CELERY_MESSAGE_STATS_FLUSH_SECONDS', default=60)
 
 # Debug logging for broker configuration
 import logging
@@ -366,7 +456,11 @@ DATABASES = {
             "isolation_level": "READ COMMITTED",
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
         },
-        "CONN_MAX_AGE": 0,  # Close connections after each request to prevent connection exhaustion
+        # Persistent connections, recycled after DB_CONN_MAX_AGE seconds (0 = close after each
+        # request/task). Web requests recycle via Django; Celery tasks via depot/celery.py.
+        # Keep below the server's wait_timeout (and the pooler's idle timeout when DB_HOST
+        # points at ProxySQL, see deploy/configs/proxysql).
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=60),
         "CONN_HEALTH_CHECKS": True,  # Check connection health before use to prevent "Server has gone away" errors
     }
 }
@@ -1,12 +1,14 @@
 """
 Django signals for NA-ACCORD depot application.
-Handles patient file deletion cascade, validation triggers, and login activity logging.
+Handles patient file deletion cascade, validation triggers, validation run
+artifact cleanup, and login activity logging.
 """
 import logging
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.signals import user_logged_in
 from django.dispatch import receiver
-from depot.models import DataTableFile, SubmissionPatientIDs, DataTableFilePatientIDs
+from depot.models import DataTableFile, SubmissionPatientIDs, DataTableFilePatientIDs, ValidationRun
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +62,28 @@ def log_user_login(sender, request, user, **kwargs):
         logger.error(f"Failed to log login activity: {e}")
 
 
+@receiver(post_delete, sender=ValidationRun)
+def handle_validation_run_deletion(sender, instance, **kwargs):
+    """
+    Delete a validation run's affected-rows artifacts once its deletion commits.
+
+    Soft-deleted runs keep them so the run can be restored; this fires for
+    force_delete and cascades.
+    """
+    from depot.services.affected_rows import delete_affected_rows
+
+    # The instance's pk is cleared once the delete finishes
+    validation_run_id = instance.pk
+
+    def delete_artifacts():
+        try:
+            delete_affected_rows(validation_run_id)
+        except Exception as e:
+            logger.warning(f"Failed to delete affected rows for deleted validation run {validation_run_id}: {e}")
+
+    transaction.on_commit(delete_artifacts)
+
+
 @receiver(post_delete, sender=DataTableFile)
 def handle_patient_file_deletion(sender, instance, **kwargs):
     """
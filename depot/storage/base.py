@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
 from django.core.files.storage import Storage
 from django.conf import settings
-import boto3
-from botocore.config import Config
+# boto3 and botocore.config are imported when an S3 client is created; only
+# the (cheap) exception classes are needed at module level
 from botocore.exceptions import ClientError, NoCredentialsError
 from pathlib import Path
 import os
@@ -38,6 +38,9 @@ class BaseStorage(ABC):
 
     def _get_client(self):
         """Get the S3 client for the storage backend."""
+        import boto3
+        from botocore.config import Config
+
         try:
             client = boto3.client(
                 's3',
@@ -204,6 +207,21 @@ class BaseStorage(ABC):
             logger.error(f"Unexpected error getting file {path}: {e}")
             return None
     
+    def stream_file(self, path, chunk_size=1024 * 1024):
+        """Yield the file content in chunks without loading it whole.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        clean_path = path.lstrip('/')
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=clean_path)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                raise FileNotFoundError(f"File not found: {path}")
+            raise
+        yield from response['Body'].iter_chunks(chunk_size)
+
     def get_path_for_submission_file(self, cohort_id, cohort_name, protocol_year, file_type, filename):
         """Generate the storage path for a submission file.
         
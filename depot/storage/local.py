@@ -267,7 +267,7 @@ class LocalFileSystemStorage(BaseStorage):
                 expected_cleanup_by = date_parser.isoparse(metadata['expected_cleanup_by'])
 
             # Create PHI tracking record
-            tracking_record = PHIFileTracking.log_operation(
+            PHIFileTracking.log_operation(
                 cohort=cohort,
                 user=user,
                 action=action,
@@ -279,14 +279,11 @@ class LocalFileSystemStorage(BaseStorage):
                     'relative_path': metadata.get('relative_path', ''),
                     'original_filename': metadata.get('original_filename', ''),
                     'file_hash': metadata.get('file_hash', '')
-                }
+                },
+                cleanup_required=True,
+                expected_cleanup_by=expected_cleanup_by,
             )
 
-            # Set additional fields not in log_operation signature
-            tracking_record.cleanup_required = True
-            tracking_record.expected_cleanup_by = expected_cleanup_by
-            tracking_record.save(update_fields=['cleanup_required', 'expected_cleanup_by'])
-
             logger.debug(f"Created PHI tracking for {absolute_path}")
 
         except Exception as e:
@@ -326,6 +323,24 @@ class LocalFileSystemStorage(BaseStorage):
         with open(full_path, 'rb') as f:
             return f.read()
     
+    def stream_file(self, path, chunk_size=1024 * 1024):
+        """
+        Yield file content in chunks without loading it whole.
+
+        Args:
+            path: Relative path to the file
+            chunk_size: Bytes per chunk
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If path attempts to escape storage root
+        """
+        full_path = self._validate_path(path)
+
+        with open(full_path, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
     def delete(self, path):
         """
         Delete a file from local filesystem.
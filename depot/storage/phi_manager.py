@@ -3,21 +3,30 @@ import shutil
 import tempfile
 import hashlib
 import time
-import csv
 from pathlib import Path
 from typing import Optional, Tuple
 from django.conf import settings
 from django.utils import timezone
-import duckdb
 import logging
 
 from depot.models import PHIFileTracking
 from depot.storage.manager import StorageManager
-from depot.services.data_mapping import DataMappingService
+from depot.services.data_mapping import DataMappingService, MalformedFileError
+from depot.utils.instrumentation import span
 
 logger = logging.getLogger(__name__)
 
 
+def _sha256_file(path) -> str:
+    """Hash a file in 64KB chunks."""
+    file_hash = hashlib.sha256()
+    with span('phi.hash') as s, open(path, 'rb') as f:
+        while chunk := f.read(65536):
+            file_hash.update(chunk)
+            s.add_bytes(len(chunk))
+    return file_hash.hexdigest()
+
+
 class PHIStorageManager:
     """
     Handles all PHI file operations with complete tracking and cleanup.
@@ -99,11 +108,16 @@ class PHIStorageManager:
             )
             raise
 
+    @PHIFileTracking.batched()
     def convert_multiple_files_to_duckdb(self, files_with_raw, submission, file_type, user) -> Optional[Tuple[str, str, dict]]:
         """
         Convert multiple raw CSV/TSV files to a single DuckDB format after applying cohort mapping.
         Used for multi-file tables (non-patient) where all files should be combined.
 
+        The cohort mapping is applied as a DuckDB projection while loading, and
+        files are combined by column name. The combined processed CSV is only
+        written when settings.ARCHIVE_PROCESSED_FILES is enabled.
+
         Args:
             files_with_raw: List of (file_id, raw_nas_path) tuples
             submission: CohortSubmission instance
@@ -111,7 +125,7 @@ class PHIStorageManager:
             user: User performing the operation
 
         Returns:
-            Tuple[str, str, dict]: (DuckDB NAS path, processed file NAS path, processing metadata) or None on failure.
+            Tuple[str, str, dict]: (DuckDB NAS path, processed file NAS path or '', processing metadata) or None on failure.
         """
         workspace_raws = []
         workspace_db = None
@@ -126,156 +140,23 @@ class PHIStorageManager:
         }
 
         try:
-            # Copy all raw files from NAS to workspace and process each through mapping
-            processed_files = []
+            # Copy all raw files from NAS to workspace
             for idx, (upload_id, raw_nas_path) in enumerate(files_with_raw):
-                logger.info(f"Processing file {idx + 1}/{len(files_with_raw)} (Upload ID {upload_id}): {raw_nas_path}")
-
-                # Copy raw file to workspace
+                logger.info(f"Copying file {idx + 1}/{len(files_with_raw)} (Upload ID {upload_id}): {raw_nas_path}")
                 workspace_raw = self.copy_to_workspace(raw_nas_path, submission.cohort, user)
                 workspace_raws.append(workspace_raw)
                 tracking_records.append(workspace_raw)
 
-                # Apply cohort-specific mapping to this file
-                temp_processed = self.temp_workspace / f"processed_{submission.id}_{file_type}_{idx}_{int(time.time() * 1000)}.csv"
-                tracking_records.append(str(temp_processed))
-
-                try:
-                    mapping_service = DataMappingService(
-                        cohort_name=submission.cohort.name,
-                        data_file_type=file_type
-                    )
-                    if idx == 0:
-                        processing_metadata['mapping'] = mapping_service.get_mapping_info()
-
-                    changes_summary = mapping_service.process_file(workspace_raw, str(temp_processed))
-
-                    rows_processed = changes_summary.get('summary', {}).get('rows_processed', 0)
-                    processing_metadata['row_count_in'] += rows_processed
-                    logger.info(f"File {idx + 1} processed: {rows_processed} rows")
-
-                    # Store changes summary from first file, aggregate for subsequent files
-                    if idx == 0:
-                        # First file: store full changes summary
-                        processing_metadata['summary'] = changes_summary
-                    else:
-                        # Subsequent files: aggregate renamed columns (avoid duplicates)
-                        existing_renames = {(r['source'], r['target']) for r in processing_metadata['summary'].get('renamed_columns', [])}
-                        for rename in changes_summary.get('renamed_columns', []):
-                            rename_tuple = (rename['source'], rename['target'])
-                            if rename_tuple not in existing_renames:
-                                processing_metadata['summary']['renamed_columns'].append(rename)
-                                existing_renames.add(rename_tuple)
-
-                        # Update summary statistics
-                        if 'summary' in changes_summary and 'summary' in processing_metadata['summary']:
-                            # Aggregate columns_normalized count
-                            processing_metadata['summary']['summary']['columns_normalized'] = \
-                                processing_metadata['summary']['summary'].get('columns_normalized', 0) + \
-                                changes_summary['summary'].get('columns_normalized', 0)
-
-                    if changes_summary.get('errors'):
-                        raise ValueError(
-                            f"Data mapping failed for file {idx + 1}: {changes_summary['errors']}"
-                        )
-
-                    processed_files.append(temp_processed)
-                    # Note: We no longer save individual processed files
-                    # Only the combined processed file is saved
-
-                except Exception as mapping_error:
-                    logger.error(f"Data mapping failed for file {idx + 1}: {mapping_error}", exc_info=True)
-                    # Cleanup any created files
-                    for pf in processed_files:
-                        if pf.exists():
-                            pf.unlink(missing_ok=True)
-                    raise
-
-            # Combine all processed files into one CSV
-            logger.info(f"Combining {len(processed_files)} processed files into one")
-            combined_processed = self.temp_workspace / f"combined_processed_{submission.id}_{file_type}_{int(time.time() * 1000)}.csv"
-            tracking_records.append(str(combined_processed))
-
-            if len(processed_files) == 1:
-                # Single file - just rename it (instant, no CSV parsing!)
-                import shutil
-                shutil.move(str(processed_files[0]), str(combined_processed))
-                logger.info(f"Combined file created (single file rename): {combined_processed}")
-            else:
-                # Multiple files - need to actually combine them
-                # Read header from first file and write to combined file
-                with open(processed_files[0], 'r', newline='', encoding='utf-8') as first_file:
-                    reader = csv.reader(first_file)
-                    header = next(reader)
-
-                    with open(combined_processed, 'w', newline='', encoding='utf-8') as combined:
-                        writer = csv.writer(combined)
-                        writer.writerow(header)
-
-                        # Write data rows from first file
-                        for row in reader:
-                            writer.writerow(row)
-
-                        # Append data rows from remaining files (skip headers)
-                        for processed_file in processed_files[1:]:
-                            with open(processed_file, 'r', newline='', encoding='utf-8') as pf:
-                                pf_reader = csv.reader(pf)
-                                next(pf_reader)  # Skip header
-                                for row in pf_reader:
-                                    writer.writerow(row)
-
-                logger.info(f"Combined file created (merged {len(processed_files)} files): {combined_processed}")
-
-            # Store processed file on NAS (simple naming - always overwrites)
-            cohort_name = submission.cohort.name.replace(' ', '_').replace('/', '-')
-            processed_nas_path = f"{submission.cohort.id}_{cohort_name}/{submission.protocol_year.year}/{file_type}/processed/{file_type}_processed.csv"
-
-            # Calculate file hash for integrity tracking
-            import hashlib
-            processed_hash = hashlib.sha256()
-            with open(combined_processed, 'rb') as f:
-                while chunk := f.read(65536):
-                    processed_hash.update(chunk)
-            processed_file_hash = processed_hash.hexdigest()
-            logger.info(f"Calculated combined processed file hash: {processed_file_hash[:16]}...")
-
-            # Prepare metadata with hash
-            processed_metadata = {
-                'relative_path': processed_nas_path,
-                'file_hash': processed_file_hash,
-                'cohort_id': submission.cohort.id,
-                'user_id': user.id,
-                'file_type': file_type,
-                'files_combined': len(files_with_raw)
-            }
-
-            with open(combined_processed, 'rb') as f:
-                processed_saved_path = self.storage.save(processed_nas_path, f, metadata=processed_metadata)
-
-            # Get absolute path for PHI tracking
-            processed_absolute_path = self.storage.get_absolute_path(processed_saved_path)
-
-            # Log processed file storage with hash
-            PHIFileTracking.log_operation(
-                cohort=submission.cohort,
-                user=user,
-                action='nas_processed_created',
-                file_path=processed_absolute_path,
-                file_type='processed_csv',
-                file_size=combined_processed.stat().st_size,
-                file_hash=processed_file_hash,
-                content_object=submission,
-                metadata={'relative_path': processed_saved_path, 'file_hash': processed_file_hash, 'files_combined': len(files_with_raw)}
+            mapping_service = DataMappingService(
+                cohort_name=submission.cohort.name,
+                data_file_type=file_type
             )
-
-            logger.info(f"Stored combined processed file on NAS: {processed_saved_path}")
+            processing_metadata['mapping'] = mapping_service.get_mapping_info()
 
             # Create temporary DuckDB file
             workspace_db = self.temp_workspace / f"temp_{submission.id}_{file_type}_combined.duckdb"
             logger.info(f"Starting DuckDB creation: {workspace_db}")
 
-            # Log DuckDB creation start
-            logger.info(f"Logging DuckDB creation start to PHIFileTracking")
             PHIFileTracking.log_operation(
                 cohort=submission.cohort,
                 user=user,
@@ -284,71 +165,55 @@ class PHIStorageManager:
                 file_type='duckdb',
                 content_object=submission
             )
-            logger.info("PHIFileTracking log operation completed successfully")
-
-            # Convert combined CSV to DuckDB
-            # Delete existing DuckDB file AND WAL files if they exist to avoid locks
-            logger.info(f"Checking for existing DuckDB file: {workspace_db}")
-            if workspace_db.exists():
-                workspace_db.unlink()
-                logger.info(f"Deleted existing workspace DuckDB: {workspace_db}")
-
-            # Also delete WAL files that can cause locks
-            logger.info("Checking for WAL files")
-            wal_file = Path(str(workspace_db) + '.wal')
-            if wal_file.exists():
-                wal_file.unlink()
-                logger.info(f"Deleted WAL file: {wal_file}")
-
-            wal_shm_file = Path(str(workspace_db) + '.wal-shm')
-            if wal_shm_file.exists():
-                wal_shm_file.unlink()
-                logger.info(f"Deleted WAL-SHM file: {wal_shm_file}")
-
-            logger.info(f"Opening DuckDB connection to {workspace_db}")
+            # Write now so workspace cleanup sees the DuckDB file as tracked
+            PHIFileTracking.flush_batch()
+
+            self._remove_stale_duckdb(workspace_db)
+
+            combined_processed = None
+            import duckdb
             conn = duckdb.connect(str(workspace_db))
-            logger.info("DuckDB connection opened successfully")
             try:
                 # Detect delimiter (use first raw file to determine)
                 delimiter = '\t' if files_with_raw[0][1].endswith('.tsv') else ','
 
-                # Create table from combined CSV - force all columns to be varchar to avoid type issues
-                logger.info(f"Starting CREATE TABLE from {combined_processed} with delimiter '{delimiter}'")
-
-                # Use environment-based parallel setting (Linux production: true, macOS dev: false)
-                parallel_mode = "true" if settings.DUCKDB_PARALLEL_CSV else "false"
-                logger.info(f"Using parallel={parallel_mode} for CSV reading")
-                conn.execute(f"""
-                    CREATE TABLE data AS
-                    SELECT * FROM read_csv_auto(
-                        '{combined_processed}',
-                        delim='{delimiter}',
-                        header=true,
-                        all_varchar=true,
-                        sample_size=100000,
-                        parallel={parallel_mode},
-                        ignore_errors=true
-                    )
-                """)
-                logger.info("CREATE TABLE completed successfully")
+                # Apply mapping and combine all files in one pass
+                changes_summary = mapping_service.load_into_duckdb(
+                    conn, workspace_raws, delimiter=delimiter,
+                    tracking={'cohort': submission.cohort, 'user': user, 'content_object': submission},
+                )
+                processing_metadata['summary'] = changes_summary
+                if changes_summary.get('errors'):
+                    raise ValueError(f"Data mapping failed: {changes_summary['errors']}")
 
-                # Get row count for verification
-                row_count = conn.execute("SELECT COUNT(*) FROM data").fetchone()[0]
+                row_count = changes_summary['summary']['rows_processed']
                 logger.info(f"Converted {row_count} rows to DuckDB from {len(files_with_raw)} combined files")
+                processing_metadata['row_count_in'] = row_count
                 processing_metadata['row_count_out'] = row_count
 
+                if settings.ARCHIVE_PROCESSED_FILES:
+                    combined_processed = self.temp_workspace / f"combined_processed_{submission.id}_{file_type}_{int(time.time() * 1000)}.csv"
+                    tracking_records.append(str(combined_processed))
+                    with span('phi.export_processed'):
+                        mapping_service.export_processed_csv(conn, str(combined_processed))
             finally:
                 conn.close()
 
+            cohort_name = submission.cohort.name.replace(' ', '_').replace('/', '-')
+            processed_saved_path = ''
+            if combined_processed is not None:
+                # Store processed file on NAS (simple naming - always overwrites)
+                processed_nas_path = f"{submission.cohort.id}_{cohort_name}/{submission.protocol_year.year}/{file_type}/processed/{file_type}_processed.csv"
+                processed_saved_path = self._store_processed_file(
+                    combined_processed, processed_nas_path, submission, file_type, user,
+                    extra_metadata={'files_combined': len(files_with_raw)}
+                )
+
             # Store DuckDB on NAS (simple naming - always overwrites)
             duckdb_nas_path = f"{submission.cohort.id}_{cohort_name}/{submission.protocol_year.year}/{file_type}/duckdb/{file_type}_combined.duckdb"
 
             # Calculate file hash for integrity tracking
-            duckdb_hash = hashlib.sha256()
-            with open(workspace_db, 'rb') as f:
-                while chunk := f.read(65536):
-                    duckdb_hash.update(chunk)
-            duckdb_file_hash = duckdb_hash.hexdigest()
+            duckdb_file_hash = _sha256_file(workspace_db)
             logger.info(f"Calculated combined DuckDB file hash: {duckdb_file_hash[:16]}...")
 
             # Prepare metadata with hash
@@ -361,7 +226,8 @@ class PHIStorageManager:
                 'files_combined': len(files_with_raw)
             }
 
-            with open(workspace_db, 'rb') as f:
+            with span('phi.store_nas') as s, open(workspace_db, 'rb') as f:
+                s.add_bytes(workspace_db.stat().st_size)
                 saved_path = self.storage.save(duckdb_nas_path, f, metadata=duckdb_metadata)
 
             # Get absolute path for PHI tracking
@@ -430,21 +296,78 @@ class PHIStorageManager:
                     except Exception as cleanup_error:
                         logger.warning(f"Failed to cleanup workspace file {temp_path}: {cleanup_error}")
 
+    def _remove_stale_duckdb(self, workspace_db):
+        """Delete an existing workspace DuckDB file and its WAL files to avoid locks."""
+        for path in (workspace_db, Path(str(workspace_db) + '.wal'), Path(str(workspace_db) + '.wal-shm')):
+            if path.exists():
+                path.unlink()
+                logger.info(f"Deleted stale workspace file: {path}")
+
+    def _store_processed_file(self, processed_workspace, processed_nas_path, submission, file_type, user, extra_metadata=None) -> str:
+        """
+        Store a processed CSV on NAS for analyst use, with hash and PHI tracking.
+
+        Returns:
+            Saved NAS path
+        """
+        extra_metadata = extra_metadata or {}
+
+        # Calculate file hash for integrity tracking
+        processed_file_hash = _sha256_file(processed_workspace)
+        logger.info(f"Calculated processed file hash: {processed_file_hash[:16]}...")
+
+        processed_metadata = {
+            'relative_path': processed_nas_path,
+            'file_hash': processed_file_hash,
+            'cohort_id': submission.cohort.id,
+            'user_id': user.id,
+            'file_type': file_type,
+            **extra_metadata
+        }
+
+        with span('phi.store_nas') as s, open(processed_workspace, 'rb') as f:
+            s.add_bytes(Path(processed_workspace).stat().st_size)
+            processed_saved_path = self.storage.save(processed_nas_path, f, metadata=processed_metadata)
+
+        # Get absolute path for PHI tracking
+        processed_absolute_path = self.storage.get_absolute_path(processed_saved_path)
+
+        PHIFileTracking.log_operation(
+            cohort=submission.cohort,
+            user=user,
+            action='nas_processed_created',
+            file_path=processed_absolute_path,
+            file_type='processed_csv' if processed_nas_path.endswith('.csv') else 'processed_tsv',
+            file_size=Path(processed_workspace).stat().st_size,
+            file_hash=processed_file_hash,
+            content_object=submission,
+            metadata={'relative_path': processed_saved_path, 'file_hash': processed_file_hash, **extra_metadata}
+        )
+
+        logger.info(f"Stored processed file on NAS: {processed_saved_path}")
+        return processed_saved_path
+
+    @PHIFileTracking.batched()
     def convert_to_duckdb(self, raw_nas_path, submission, file_type, user, upload_id=None) -> Optional[Tuple[str, str, dict]]:
         """
         Convert single raw CSV/TSV to DuckDB format after applying cohort mapping.
         For single-file tables (patient tables) or single file in multi-file tables.
 
+        The cohort mapping is applied as a DuckDB projection while loading the
+        raw file. The processed CSV is only written when
+        settings.ARCHIVE_PROCESSED_FILES is enabled.
+
         Args:
             upload_id: UploadedFile ID for naming (if None, uses submission.id for backwards compat)
 
         Returns:
-            Tuple[str, str, dict]: (DuckDB NAS path, processed file NAS path, processing metadata) or None on failure.
+            Tuple[str, str, dict]: (DuckDB NAS path, processed file NAS path or '', processing metadata) or None on failure.
         """
         workspace_raw = None
         workspace_db = None
+        processed_workspace = None
         tracking_records = []
-        
+
         processing_metadata = {
             'mapping': None,
             'summary': {},
@@ -457,87 +380,16 @@ class PHIStorageManager:
             workspace_raw = self.copy_to_workspace(raw_nas_path, submission.cohort, user)
             tracking_records.append(workspace_raw)
 
-            # Prepare processed workspace path
-            processed_workspace = self.temp_workspace / f"processed_{submission.id}_{file_type}_{int(time.time() * 1000)}.csv"
-            tracking_records.append(str(processed_workspace))
-
-            # Apply cohort-specific mapping before DuckDB conversion
-            try:
-                mapping_service = DataMappingService(
-                    cohort_name=submission.cohort.name,
-                    data_file_type=file_type
-                )
-                processing_metadata['mapping'] = mapping_service.get_mapping_info()
-                changes_summary = mapping_service.process_file(workspace_raw, str(processed_workspace))
-                processing_metadata['summary'] = changes_summary
-                rows_processed = changes_summary.get('summary', {}).get('rows_processed')
-                if rows_processed is not None:
-                    processing_metadata['row_count_in'] = rows_processed
-
-                if changes_summary.get('errors'):
-                    raise ValueError(
-                        f"Data mapping failed for {submission.cohort.name} {file_type}: {changes_summary['errors']}"
-                    )
-
-                mapping_source_path = processed_workspace
-            except Exception as mapping_error:
-                logger.error("Data mapping failed for %s/%s: %s", submission.cohort.name, file_type, mapping_error, exc_info=True)
-                # Cleanup processed temp file if it was created
-                if processed_workspace.exists():
-                    processed_workspace.unlink(missing_ok=True)
-                raise
-
-            # Store processed file on NAS for analyst use
-            cohort_name = submission.cohort.name.replace(' ', '_').replace('/', '-')
-            # Use upload_id prefix for chronological sorting (e.g., "2_diagnosis.csv")
-            file_identifier = f"{upload_id}_{file_type}" if upload_id else f"{file_type}_{submission.id}"
-            processed_nas_path = f"{submission.cohort.id}_{cohort_name}/{submission.protocol_year.year}/{file_type}/processed/{file_identifier}.csv"
-
-            # Calculate file hash for integrity tracking
-            import hashlib
-            processed_hash = hashlib.sha256()
-            with open(processed_workspace, 'rb') as f:
-                while chunk := f.read(65536):
-                    processed_hash.update(chunk)
-            processed_file_hash = processed_hash.hexdigest()
-            logger.info(f"Calculated processed file hash: {processed_file_hash[:16]}...")
-
-            # Prepare metadata with hash
-            processed_metadata = {
-                'relative_path': processed_nas_path,
-                'file_hash': processed_file_hash,
-                'cohort_id': submission.cohort.id,
-                'user_id': user.id,
-                'file_type': file_type
-            }
-
-            with open(processed_workspace, 'rb') as f:
-                processed_saved_path = self.storage.save(processed_nas_path, f, metadata=processed_metadata)
-
-            # Get absolute path for PHI tracking
-            processed_absolute_path = self.storage.get_absolute_path(processed_saved_path)
-
-            # Log processed file storage with hash
-            PHIFileTracking.log_operation(
-                cohort=submission.cohort,
-                user=user,
-                action='nas_processed_created',
-                file_path=processed_absolute_path,
-                file_type='processed_csv' if processed_nas_path.endswith('.csv') else 'processed_tsv',
-                file_size=processed_workspace.stat().st_size,
-                file_hash=processed_file_hash,
-                content_object=submission,
-                metadata={'relative_path': processed_saved_path, 'file_hash': processed_file_hash}
+            mapping_service = DataMappingService(
+                cohort_name=submission.cohort.name,
+                data_file_type=file_type
             )
-
-            logger.info(f"Stored processed file on NAS: {processed_saved_path}")
+            processing_metadata['mapping'] = mapping_service.get_mapping_info()
 
             # Create temporary DuckDB file
             workspace_db = self.temp_workspace / f"temp_{submission.id}_{file_type}.duckdb"
             logger.info(f"Starting DuckDB creation: {workspace_db}")
 
-            # Log DuckDB creation start
-            logger.info(f"Logging DuckDB creation start to PHIFileTracking")
             PHIFileTracking.log_operation(
                 cohort=submission.cohort,
                 user=user,
@@ -546,82 +398,62 @@ class PHIStorageManager:
                 file_type='duckdb',
                 content_object=submission
             )
-            logger.info("PHIFileTracking log operation completed successfully")
-
-            # Delete existing DuckDB file AND WAL files if they exist to avoid locks
-            logger.info(f"Checking for existing DuckDB file: {workspace_db}")
-            if workspace_db.exists():
-                workspace_db.unlink()
-                logger.info(f"Deleted existing workspace DuckDB: {workspace_db}")
-
-            # Also delete WAL files that can cause locks
-            logger.info("Checking for WAL files")
-            wal_file = Path(str(workspace_db) + '.wal')
-            if wal_file.exists():
-                wal_file.unlink()
-                logger.info(f"Deleted WAL file: {wal_file}")
-
-            wal_shm_file = Path(str(workspace_db) + '.wal-shm')
-            if wal_shm_file.exists():
-                wal_shm_file.unlink()
-                logger.info(f"Deleted WAL-SHM file: {wal_shm_file}")
-
-            # Convert to DuckDB
-            logger.info(f"Opening DuckDB connection to {workspace_db}")
+            # Write now so workspace cleanup sees the DuckDB file as tracked
+            PHIFileTracking.flush_batch()
+
+            self._remove_stale_duckdb(workspace_db)
+
+            import duckdb
             conn = duckdb.connect(str(workspace_db))
-            logger.info("DuckDB connection opened successfully")
             try:
                 # Detect delimiter
                 delimiter = '\t' if raw_nas_path.endswith('.tsv') else ','
 
-                # Create table from CSV/TSV - force all columns to be varchar to avoid type issues
-                logger.info(f"Starting CREATE TABLE from {mapping_source_path} with delimiter '{delimiter}'")
-
-                # Use environment-based parallel setting (Linux production: true, macOS dev: false)
-                parallel_mode = "true" if settings.DUCKDB_PARALLEL_CSV else "false"
-                logger.info(f"Using parallel={parallel_mode} for CSV reading")
-                conn.execute(f"""
-                    CREATE TABLE data AS
-                    SELECT * FROM read_csv_auto(
-                        '{mapping_source_path}',
-                        delim='{delimiter}',
-                        header=true,
-                        all_varchar=true,
-                        sample_size=100000,
-                        parallel={parallel_mode},
-                        ignore_errors=true
+                # Apply cohort-specific mapping while loading (no intermediate processed file)
+                try:
+                    changes_summary = mapping_service.load_into_duckdb(
+                        conn, [workspace_raw], delimiter=delimiter,
+                        tracking={'cohort': submission.cohort, 'user': user, 'content_object': submission},
+                    )
+                except Exception as mapping_error:
+                    logger.error("Data mapping failed for %s/%s: %s", submission.cohort.name, file_type, mapping_error, exc_info=True)
+                    raise
+                processing_metadata['summary'] = changes_summary
+                if changes_summary.get('errors'):
+                    raise ValueError(
+                        f"Data mapping failed for {submission.cohort.name} {file_type}: {changes_summary['errors']}"
                     )
-                """)
-                logger.info("CREATE TABLE completed successfully")
 
-                # Get row count for verification
-                row_count = conn.execute("SELECT COUNT(*) FROM data").fetchone()[0]
+                row_count = changes_summary['summary']['rows_processed']
                 logger.info(f"Converted {row_count} rows to DuckDB")
+                processing_metadata['row_count_in'] = row_count
                 processing_metadata['row_count_out'] = row_count
 
+                if settings.ARCHIVE_PROCESSED_FILES:
+                    processed_workspace = self.temp_workspace / f"processed_{submission.id}_{file_type}_{int(time.time() * 1000)}.csv"
+                    tracking_records.append(str(processed_workspace))
+                    with span('phi.export_processed'):
+                        mapping_service.export_processed_csv(conn, str(processed_workspace))
             finally:
                 conn.close()
 
-            # Now that DuckDB is created successfully, clean up the processed workspace file
-            if processed_workspace.exists():
-                try:
-                    processed_workspace.unlink()
-                    logger.info(f"Cleaned up processed workspace file after DuckDB creation: {processed_workspace}")
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup processed workspace file: {e}")
-
-            # Store DuckDB on NAS
             cohort_name = submission.cohort.name.replace(' ', '_').replace('/', '-')
-            # Use upload_id prefix for chronological sorting (e.g., "2_diagnosis.duckdb")
+            # Use upload_id prefix for chronological sorting (e.g., "2_diagnosis.csv")
             file_identifier = f"{upload_id}_{file_type}" if upload_id else f"{file_type}_{submission.id}"
+
+            processed_saved_path = ''
+            if processed_workspace is not None:
+                processed_nas_path = f"{submission.cohort.id}_{cohort_name}/{submission.protocol_year.year}/{file_type}/processed/{file_identifier}.csv"
+                processed_saved_path = self._store_processed_file(
+                    processed_workspace, processed_nas_path, submission, file_type, user
+                )
+                processed_workspace.unlink(missing_ok=True)
+
+            # Store DuckDB on NAS
             duckdb_nas_path = f"{submission.cohort.id}_{cohort_name}/{submission.protocol_year.year}/{file_type}/duckdb/{file_identifier}.duckdb"
 
             # Calculate file hash for integrity tracking
-            duckdb_hash = hashlib.sha256()
-            with open(workspace_db, 'rb') as f:
-                while chunk := f.read(65536):
-                    duckdb_hash.update(chunk)
-            duckdb_file_hash = duckdb_hash.hexdigest()
+            duckdb_file_hash = _sha256_file(workspace_db)
             logger.info(f"Calculated DuckDB file hash: {duckdb_file_hash[:16]}...")
 
             # Prepare metadata with hash
@@ -633,7 +465,8 @@ class PHIStorageManager:
                 'file_type': file_type
             }
 
-            with open(workspace_db, 'rb') as f:
+            with span('phi.store_nas') as s, open(workspace_db, 'rb') as f:
+                s.add_bytes(workspace_db.stat().st_size)
                 saved_path = self.storage.save(duckdb_nas_path, f, metadata=duckdb_metadata)
 
             # Get absolute path for PHI tracking
@@ -663,8 +496,6 @@ class PHIStorageManager:
             )
 
             logger.info(f"Stored DuckDB on NAS: {saved_path}")
-            if processing_metadata['row_count_in'] is None:
-                processing_metadata['row_count_in'] = processing_metadata['row_count_out']
             return saved_path, processed_saved_path, processing_metadata
             
         except Exception as e:
@@ -678,22 +509,22 @@ class PHIStorageManager:
                 error_message=str(e),
                 content_object=submission
             )
+            if isinstance(e, MalformedFileError):
+                # The uploader has to fix the file; let the task report why
+                raise
             return None
             
         finally:
             # Always cleanup workspace files
             if workspace_raw and Path(workspace_raw).exists():
                 self.cleanup_workspace_file(workspace_raw, submission.cohort, user)
-            # Processed workspace file is cleaned up after successful DuckDB creation (line 542-547)
-            # Only clean it here if DuckDB conversion failed
-            if 'processed_workspace' in locals() and processed_workspace.exists():
-                # Check if we're in the error path (DuckDB not created)
-                if not workspace_db or not workspace_db.exists():
-                    try:
-                        processed_workspace.unlink()
-                        logger.info(f"Cleaned up processed workspace file after error: {processed_workspace}")
-                    except Exception as e:
-                        logger.warning(f"Failed to cleanup processed workspace file: {e}")
+            # Processed workspace file is removed once stored; only left behind on error
+            if processed_workspace is not None and processed_workspace.exists():
+                try:
+                    processed_workspace.unlink()
+                    logger.info(f"Cleaned up processed workspace file after error: {processed_workspace}")
+                except Exception as e:
+                    logger.warning(f"Failed to cleanup processed workspace file: {e}")
             if workspace_db and workspace_db.exists():
                 self.cleanup_workspace_file(str(workspace_db), submission.cohort, user)
     
@@ -713,22 +544,24 @@ class PHIStorageManager:
             filename = Path(nas_path).name
             workspace_path = purpose_dir / f"{timezone.now().timestamp()}_{filename}"
             
-            # Get file from NAS
-            file_content = self.storage.get_file(nas_path)
-            
-            # Check if content was retrieved
-            if file_content is None:
-                raise ValueError(f"Failed to retrieve file from NAS: {nas_path}")
-            
-            # Write to workspace
-            if isinstance(file_content, bytes):
-                with open(workspace_path, 'wb') as f:
-                    f.write(file_content)
-            else:
-                # Ensure it's a string
-                file_content_str = str(file_content) if file_content is not None else ""
-                with open(workspace_path, 'w') as f:
-                    f.write(file_content_str)
+            with span('phi.copy_to_workspace', purpose=purpose) as s:
+                # Get file from NAS
+                file_content = self.storage.get_file(nas_path)
+
+                # Check if content was retrieved
+                if file_content is None:
+                    raise ValueError(f"Failed to retrieve file from NAS: {nas_path}")
+
+                # Write to workspace
+                if isinstance(file_content, bytes):
+                    with open(workspace_path, 'wb') as f:
+                        f.write(file_content)
+                else:
+                    # Ensure it's a string
+                    file_content_str = str(file_content) if file_content is not None else ""
+                    with open(workspace_path, 'w') as f:
+                        f.write(file_content_str)
+                s.add_bytes(workspace_path.stat().st_size)
             
             # Calculate expected cleanup time
             expected_cleanup = timezone.now() + timedelta(hours=retention_hours)
@@ -779,11 +612,14 @@ class PHIStorageManager:
                     file_type='temp_working'
                 )
                 
-                # Mark the creation record as cleaned up
+                # Mark the creation record as cleaned up. Inside
+                # PHIFileTracking.batched() it may still be buffered.
+                PHIFileTracking.flush_batch()
                 creation_record = PHIFileTracking.objects.filter(
                     file_path=workspace_path,
-                    action='work_copy_created'
-                ).first()
+                    action='work_copy_created',
+                    cleaned_up=False,
+                ).order_by('-id').first()
                 if creation_record:
                     creation_record.mark_cleaned_up(user)
                 
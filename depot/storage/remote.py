@@ -475,6 +475,34 @@ class RemoteStorageDriver(BaseStorage):
             logger.error(f"Failed to get file from services server: {e}")
             return None
     
+    def stream_file(self, path, chunk_size=None):
+        """
+        Yield file content from the services server in chunks.
+
+        Args:
+            path: Storage path of the file
+            chunk_size: Bytes per chunk (defaults to CHUNK_SIZE)
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            requests.RequestException: If the download fails
+        """
+        url = urljoin(self.service_url, '/internal/storage/download')
+
+        with self.session.get(
+            url,
+            params={'path': self._normalize_path(path), 'disk': self.remote_disk_name},
+            stream=True,
+            timeout=300
+        ) as response:
+            if response.status_code == 404:
+                raise FileNotFoundError(f"File not found: {path}")
+            response.raise_for_status()
+
+            for chunk in response.iter_content(chunk_size=chunk_size or self.CHUNK_SIZE):
+                if chunk:
+                    yield chunk
+
     def delete(self, path):
         """
         Delete file on services server.
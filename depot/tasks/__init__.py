@@ -1,18 +1,31 @@
-from .upload_precheck import process_precheck_run, process_precheck_run_with_duckdb
-from .precheck_validation import run_precheck_validation
-from .patient_extraction import extract_patient_ids_task, validate_submission_files_task
-from .patient_id_validation import validate_patient_ids_in_workflow
-from .duckdb_creation import create_duckdb_task
-from .cleanup import cleanup_workflow_files_task
-from .async_file_processing import process_uploaded_file_async
-from .file_integrity import calculate_file_hash_task, migrate_pending_hashes, verify_file_integrity
-from .validation_orchestration import start_validation_for_data_file
-from .validation import convert_precheck_to_duckdb
-from .summary_generation import (
-    generate_variable_summary_task,
-    generate_data_table_summary_task,
-    generate_submission_summary_task,
-)
+# Task modules are imported on first attribute access so web processes that
+# only dispatch one task do not load DuckDB, pandas and the rest of the
+# pipeline. Celery workers import every module listed here at start-up
+# through CELERY_IMPORTS (see depot/settings.py), which registers the tasks.
+import importlib
+
+TASK_MODULES = {
+    'process_precheck_run': 'upload_precheck',
+    'process_precheck_run_with_duckdb': 'upload_precheck',
+    'run_precheck_validation': 'precheck_validation',
+    'extract_patient_ids_task': 'patient_extraction',
+    'validate_submission_files_task': 'patient_extraction',
+    'validate_patient_ids_in_workflow': 'patient_id_validation',
+    'create_duckdb_task': 'duckdb_creation',
+    'cleanup_workflow_files_task': 'cleanup',
+    'process_uploaded_file_async': 'async_file_processing',
+    'calculate_file_hash_task': 'file_integrity',
+    'migrate_pending_hashes': 'file_integrity',
+    'verify_file_integrity': 'file_integrity',
+    'start_validation_for_data_file': 'validation_orchestration',
+    'merge_workflow_results': 'upload_workflow',
+    'convert_precheck_to_duckdb': 'validation',
+    'generate_variable_summary_task': 'summary_generation',
+    'generate_data_table_summary_task': 'summary_generation',
+    'generate_submission_summary_task': 'summary_generation',
+    'deliver_notifications': 'notifications',
+}
+
 # Legacy validation - temporarily disabled during new system development
 # from .validation import convert_to_duckdb_and_validate
 # from .validation_orchestration import (
@@ -36,10 +49,12 @@ __all__ = [
     'migrate_pending_hashes',
     'verify_file_integrity',
     'start_validation_for_data_file',
+    'merge_workflow_results',
     'convert_precheck_to_duckdb',
     'generate_variable_summary_task',
     'generate_data_table_summary_task',
     'generate_submission_summary_task',
+    'deliver_notifications',
     # Legacy validation exports - temporarily disabled
     # 'convert_to_duckdb_and_validate',
     # 'start_validation_run',
@@ -47,3 +62,11 @@ __all__ = [
     # 'process_dependent_jobs',
     # 'finalize_validation_run',
 ]
+
+
+def __getattr__(name):
+    if name not in TASK_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{TASK_MODULES[name]}"), name)
+    globals()[name] = value
+    return value
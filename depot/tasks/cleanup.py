@@ -89,3 +89,27 @@ def cleanup_workflow_files_task(self, task_data):
             'task_data': task_data,
             'error': str(e)
         }
+
+
+@shared_task
+def archive_phi_tracking(days=None):
+    """
+    Move PHIFileTracking records older than PHI_TRACKING_HOT_DAYS into
+    PHIFileTrackingArchive, keeping the live audit table small.
+
+    Returns:
+        dict: Number of records archived and the cutoff used
+    """
+    from datetime import timedelta
+
+    from django.conf import settings
+    from django.utils import timezone
+
+    from depot.models import PHIFileTrackingArchive
+
+    days = days or settings.PHI_TRACKING_HOT_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    archived = PHIFileTrackingArchive.archive_before(cutoff)
+
+    logger.info(f"Archived {archived} PHI tracking records created before {cutoff:%Y-%m-%d}")
+    return {'archived': archived, 'cutoff': cutoff.isoformat()}
@@ -4,7 +4,9 @@ Celery tasks for DuckDB file creation.
 import logging
 from celery import shared_task
 from depot.models import DataTableFile
+from depot.services.data_mapping import MalformedFileError
 from depot.storage.phi_manager import PHIStorageManager
+from depot.utils.instrumentation import collect_spans, persist_spans, span
 
 logger = logging.getLogger(__name__)
 
@@ -61,38 +63,42 @@ def create_duckdb_task(self, task_data):
         # Patient tables are single-file only, all others support multiple files
         is_patient_table = file_type == 'patient'
 
-        if is_patient_table:
-            # Single file processing for patient tables
-            logger.info(f"DUCKDB_TASK: Processing single patient file")
-            upload_id = data_file.uploaded_file.id if data_file.uploaded_file else data_file.id
-            conversion_result = phi_manager.convert_to_duckdb(
-                raw_nas_path=data_file.raw_file_path,
-                submission=submission,
-                file_type=file_type,
-                user=user,
-                upload_id=upload_id
-            )
-        else:
-            # Multi-file processing: get ALL current files for this table
-            current_files = DataTableFile.objects.filter(
-                data_table=data_table,
-                is_current=True
-            ).order_by('id')
-
-            files_with_raw = [(f.uploaded_file.id if f.uploaded_file else f.id, f.raw_file_path) for f in current_files if f.raw_file_path]
-
-            logger.info(f"DUCKDB_TASK: Processing {len(files_with_raw)} files for multi-file table {file_type}")
-            for idx, (upload_id, path) in enumerate(files_with_raw):
-                logger.info(f"  File {idx + 1} (Upload ID {upload_id}): {path}")
-
-            # For multi-file tables, ALWAYS use multi-file method (creates only combined files)
-            # This ensures we never create individual DuckDB files for multi-file tables
-            conversion_result = phi_manager.convert_multiple_files_to_duckdb(
-                files_with_raw=files_with_raw,
-                submission=submission,
-                file_type=file_type,
-                user=user
-            )
+        try:
+            with collect_spans() as spans, span('duckdb.create', file_type=file_type):
+                if is_patient_table:
+                    # Single file processing for patient tables
+                    logger.info(f"DUCKDB_TASK: Processing single patient file")
+                    upload_id = data_file.uploaded_file.id if data_file.uploaded_file else data_file.id
+                    conversion_result = phi_manager.convert_to_duckdb(
+                        raw_nas_path=data_file.raw_file_path,
+                        submission=submission,
+                        file_type=file_type,
+                        user=user,
+                        upload_id=upload_id
+                    )
+                else:
+                    # Multi-file processing: get ALL current files for this table
+                    current_files = DataTableFile.objects.filter(
+                        data_table=data_table,
+                        is_current=True
+                    ).order_by('id')
+
+                    files_with_raw = [(f.uploaded_file.id if f.uploaded_file else f.id, f.raw_file_path) for f in current_files if f.raw_file_path]
+
+                    logger.info(f"DUCKDB_TASK: Processing {len(files_with_raw)} files for multi-file table {file_type}")
+                    for idx, (upload_id, path) in enumerate(files_with_raw):
+                        logger.info(f"  File {idx + 1} (Upload ID {upload_id}): {path}")
+
+                    # For multi-file tables, ALWAYS use multi-file method (creates only combined files)
+                    # This ensures we never create individual DuckDB files for multi-file tables
+                    conversion_result = phi_manager.convert_multiple_files_to_duckdb(
+                        files_with_raw=files_with_raw,
+                        submission=submission,
+                        file_type=file_type,
+                        user=user
+                    )
+        finally:
+            persist_spans(DataTableFile, data_file.id, spans)
 
         if not conversion_result:
             raise ValueError("DuckDB conversion failed")
@@ -153,8 +159,8 @@ def create_duckdb_task(self, task_data):
     except Exception as e:
         logger.error(f"DUCKDB_TASK: Failed to create DuckDB for DataTableFile {data_file_id}: {e}")
 
-        # Check if we've exhausted retries
-        if self.request.retries >= self.max_retries:
+        # A malformed upload fails the same way on every attempt, so don't retry it
+        if isinstance(e, MalformedFileError) or self.request.retries >= self.max_retries:
             # Final failure - update database status
             try:
                 data_file = DataTableFile.objects.get(id=data_file_id)
@@ -165,7 +171,7 @@ def create_duckdb_task(self, task_data):
                 data_table = data_file.data_table
                 data_table.update_status('failed')
 
-                logger.error(f"DUCKDB_TASK: Max retries exhausted for file {data_file_id}, marked as failed")
+                logger.error(f"DUCKDB_TASK: Conversion failed for file {data_file_id}, marked as failed")
             except Exception as update_error:
                 logger.error(f"DUCKDB_TASK: Failed to update status after max retries: {update_error}")
 
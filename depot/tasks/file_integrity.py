@@ -12,6 +12,7 @@ from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
 
 from depot.storage.manager import StorageManager
+from depot.utils.instrumentation import collect_spans, persist_spans, span
 
 logger = logging.getLogger(__name__)
 
@@ -44,14 +45,16 @@ def calculate_hashes_in_workflow(task_data):
                 uploaded_file_id = data_file.uploaded_file_id
 
                 # Calculate both hashes synchronously within this task
-                logger.info(f"Calculating hash for DataTableFile {data_file_id}")
-                result1 = calculate_file_hash_task.apply(args=('DataTableFile', data_file_id))
-                logger.info(f"Calculated hash for DataTableFile ID {data_file_id}: {result1.result.get('file_hash', 'N/A')[:16]}...")
+                with collect_spans() as spans:
+                    logger.info(f"Calculating hash for DataTableFile {data_file_id}")
+                    result1 = calculate_file_hash_task.apply(args=('DataTableFile', data_file_id))
+                    logger.info(f"Calculated hash for DataTableFile ID {data_file_id}: {result1.result.get('file_hash', 'N/A')[:16]}...")
 
-                if uploaded_file_id:
-                    logger.info(f"Calculating hash for UploadedFile {uploaded_file_id}")
-                    result2 = calculate_file_hash_task.apply(args=('UploadedFile', uploaded_file_id))
-                    logger.info(f"Updated hash for UploadedFile ID {uploaded_file_id}")
+                    if uploaded_file_id:
+                        logger.info(f"Calculating hash for UploadedFile {uploaded_file_id}")
+                        result2 = calculate_file_hash_task.apply(args=('UploadedFile', uploaded_file_id))
+                        logger.info(f"Updated hash for UploadedFile ID {uploaded_file_id}")
+                persist_spans(DataTableFile, data_file_id, spans)
 
             except Exception as e:
                 logger.error(f"HASH_TASK: Error in hash calculation wrapper: {e}")
@@ -209,20 +212,11 @@ def _calculate_sha256_hash(storage_path: str) -> str:
     sha256_hash = hashlib.sha256()
 
     try:
-        # For different storage drivers, handle file reading appropriately
-        if hasattr(storage, 'open'):
-            # Local storage - use file handle
-            with storage.open(storage_file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b''):
-                    sha256_hash.update(chunk)
-        elif hasattr(storage, 'get_file'):
-            # Remote storage - get full content
-            file_content = storage.get_file(storage_file_path)
-            if isinstance(file_content, str):
-                file_content = file_content.encode('utf-8')
-            sha256_hash.update(file_content)
-        else:
-            raise Exception(f"Unsupported storage driver for hash calculation: {type(storage)}")
+        with span('integrity.hash') as hash_span:
+            # Stream the file so large files are never held in memory
+            for chunk in storage.stream_file(storage_file_path):
+                sha256_hash.update(chunk)
+                hash_span.add_bytes(len(chunk))
 
         return sha256_hash.hexdigest()
 
@@ -348,4 +342,28 @@ def verify_file_integrity(model_type: str, file_id: int) -> dict:
             'error': str(e),
             'file_id': file_id,
             'model_type': model_type
-        }
\ No newline at end of file
+        }
+
+
+@shared_task
+def scrub_phi_integrity(cohort_id: int = None, check_hashes: bool = True, restart: bool = False) -> dict:
+    """
+    Periodic PHI integrity scrub of tracked NAS files.
+
+    Resumes the previous scan if it did not finish. See
+    depot/services/phi_integrity.py.
+
+    Returns:
+        dict: Scan summary including throughput
+    """
+    from depot.services.phi_integrity import PHIIntegrityScrubber
+
+    scan = PHIIntegrityScrubber().scan(cohort_id=cohort_id, check_hashes=check_hashes, restart=restart)
+    summary = scan.summary()
+
+    if scan.files_missing or scan.files_corrupt:
+        logger.warning(f"PHI integrity scrub found problems: {summary}")
+    else:
+        logger.info(f"PHI integrity scrub complete: {summary}")
+
+    return summary
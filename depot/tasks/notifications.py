@@ -0,0 +1,23 @@
+"""
+Celery tasks for delivering queued email notifications.
+"""
+import logging
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def deliver_notifications(batch_size: int = None) -> dict:
+    """
+    Send due NotificationOutbox rows over one SMTP connection.
+
+    Queued by NotificationService after each commit that adds rows, and
+    run periodically to pick up retries.
+
+    Returns:
+        dict: Emails sent and outbox rows sent, retrying or failed
+    """
+    from depot.services.notification_service import NotificationService
+
+    return NotificationService.deliver_outbox(batch_size)
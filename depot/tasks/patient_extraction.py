@@ -3,23 +3,15 @@ Celery tasks for patient ID extraction and validation.
 """
 import logging
 from celery import shared_task
-from django.db import transaction, connection
+from django.db import transaction
 from depot.models import DataTableFile, CohortSubmission
 from depot.services.patient_id_extractor import PatientIDExtractor
+from depot.utils.db_connections import recycle_stale_connections
+from depot.utils.instrumentation import collect_spans, persist_spans, span
 
 logger = logging.getLogger(__name__)
 
 
-def ensure_db_connection():
-    """Ensure database connection is active, reconnect if needed."""
-    if connection.connection is not None:
-        if connection.is_usable():
-            return
-        connection.close()
-    # Force a new connection
-    connection.ensure_connection()
-
-
 @shared_task(bind=True, max_retries=3)
 def extract_patient_ids_task(self, task_data):
     """
@@ -30,9 +22,6 @@ def extract_patient_ids_task(self, task_data):
 
     """
     try:
-        # Ensure fresh database connection at start of task
-        ensure_db_connection()
-
         from depot.models import User
 
         # Extract data from bundle
@@ -55,37 +44,34 @@ def extract_patient_ids_task(self, task_data):
         # Always extract patient IDs for every file
         from depot.models import DataTableFilePatientIDs
 
-        # Extract patient IDs from the file (regardless of type)
-        extracted_ids = extractor.extract_ids_from_data_file(data_file)
+        # Extract patient IDs from the file (regardless of type), unless the
+        # upload already recorded them for this content
+        with collect_spans() as spans, span('patient_ids.extract') as extract_span:
+            file_patient_ids = DataTableFilePatientIDs.current_for(data_file)
+            if file_patient_ids:
+                extracted_ids = file_patient_ids.patient_ids
+                logger.info(f"Reusing {len(extracted_ids)} patient IDs already extracted from file {data_file_id}")
+            else:
+                extracted_ids, warnings = extractor.extract_ids_with_warnings(data_file)
+            extract_span.set(ids=len(extracted_ids) if extracted_ids else 0, reused=file_patient_ids is not None)
 
-        # Store the extracted IDs in our new model with fresh connection
-        # Ensure connection is fresh after potentially long DuckDB operations
-        ensure_db_connection()
-        with transaction.atomic():
-            # Double-check connection health before database operations
-            if not connection.is_usable():
-                connection.close()
-                connection.ensure_connection()
-
-            file_patient_ids, created = DataTableFilePatientIDs.objects.get_or_create(
-                data_file=data_file,
-                defaults={
-                    'patient_ids': [],
-                    'patient_count': 0,
-                    'invalid_count': 0,
-                    'validation_status': 'pending',
-                    'progress': 0
-                }
-            )
+        if file_patient_ids is None:
+            # Store the extracted IDs; the connection may have gone stale
+            # during a long DuckDB scan
+            recycle_stale_connections()
+            with transaction.atomic():
+                file_patient_ids = DataTableFilePatientIDs.record_extraction(data_file, extracted_ids, warnings)
 
             if extracted_ids:
-                file_patient_ids.extract_and_store_ids(extracted_ids)
                 logger.info(f"Stored {len(extracted_ids)} patient IDs for {data_file.data_table.data_file_type.name} file {data_file_id}")
 
+        persist_spans(DataTableFile, data_file.id, spans)
+
         patient_record = None
 
         if is_patient_file:
-            # For patient files: Also create/update the submission-level patient record
+            # For patient files: Also create/update the submission-level patient
+            # record from the file's extraction
             patient_record = extractor.extract_from_data_table_file(data_file, user)
 
             if patient_record:
@@ -107,7 +93,7 @@ def extract_patient_ids_task(self, task_data):
 
             if patient_record and file_patient_ids.patient_ids:
                 # Validate this file's patient IDs against the submission's patient IDs
-                validation_result = file_patient_ids.validate_against_main(patient_record.patient_ids)
+                validation_result = file_patient_ids.validate_against_main(patient_record.patient_ids, patient_record.revision)
                 logger.info(f"Validation result for {data_file.data_table.data_file_type.name}: {validation_result}")
             elif not patient_record:
                 logger.warning(f"No patient record found for submission {submission.id} - cannot validate")
@@ -131,11 +117,8 @@ def extract_patient_ids_task(self, task_data):
         raise
     except Exception as e:
         logger.error(f"Failed to extract patient IDs from file {data_file_id}: {e}")
-        # Ensure fresh connection before retry
-        try:
-            ensure_db_connection()
-        except:
-            pass  # If connection fails, let the retry handle it
+        # Drop a broken connection so the retry starts fresh
+        recycle_stale_connections()
         # Retry with exponential backoff
         raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
 
@@ -144,48 +127,75 @@ def extract_patient_ids_task(self, task_data):
 def validate_submission_files_task(self, submission_id, user_id):
     """
     Validate all files in a submission against extracted patient IDs.
-    
+
+    Files validated against the previous revision of the patient IDs are
+    only updated for the IDs added or removed since; others get a full
+    validation.
+
     Args:
         submission_id: ID of the CohortSubmission
         user_id: ID of the user who triggered validation
     """
     try:
-        # Ensure fresh database connection at start of task
-        ensure_db_connection()
-
-        from depot.models import User, DataTableFile
+        from depot.models import DataTableFilePatientIDs, SubmissionPatientIDs
 
         submission = CohortSubmission.objects.get(id=submission_id)
-        user = User.objects.get(id=user_id)
-        
-        # Get all non-patient files in the submission
-        data_files = DataTableFile.objects.filter(
-            data_table__submission=submission,
-            is_current=True
+
+        patient_record = SubmissionPatientIDs.objects.filter(submission=submission).first()
+        if not patient_record:
+            logger.warning(f"No patient record found for submission {submission_id} - cannot validate")
+            return {
+                'success': False,
+                'submission_id': submission_id,
+                'files_validated': 0
+            }
+
+        # Extracted IDs for all current non-patient files in the submission
+        file_records = DataTableFilePatientIDs.objects.filter(
+            data_file__data_table__submission=submission,
+            data_file__is_current=True
         ).exclude(
-            data_table__data_file_type__name__iexact='patient'
-        )
-        
-        extractor = PatientIDExtractor()
-        
-        for data_file in data_files:
+            data_file__data_table__data_file_type__name__iexact='patient'
+        ).select_related('data_file')
+
+        revision = patient_record.revision
+        main_ids = None
+        counts = {'unchanged': 0, 'delta': 0, 'full': 0}
+
+        for file_record in file_records:
             try:
-                # Validate each file against patient IDs
-                # This would need to be implemented to actually check the file's patient IDs
-                logger.info(f"Validating file {data_file.id} against patient IDs")
-                
-                # For now, just log that we would validate
-                # In production, this would extract IDs from the file and validate
-                
+                if file_record.validated and file_record.validated_revision == revision:
+                    counts['unchanged'] += 1
+                elif file_record.validated and file_record.validated_revision == revision - 1:
+                    file_record.apply_patient_delta(
+                        patient_record.added_ids,
+                        patient_record.removed_ids,
+                        revision
+                    )
+                    counts['delta'] += 1
+                else:
+                    if main_ids is None:
+                        main_ids = patient_record.get_patient_ids_set()
+                    file_record.validate_against_main(main_ids, revision)
+                    counts['full'] += 1
+
             except Exception as e:
-                logger.error(f"Failed to validate file {data_file.id}: {e}")
-                
+                logger.error(f"Failed to validate file {file_record.data_file_id}: {e}")
+
+        logger.info(
+            f"Revalidated submission {submission_id} against patient IDs revision {revision}: "
+            f"{counts['delta']} by delta ({len(patient_record.added_ids)} added, "
+            f"{len(patient_record.removed_ids)} removed), {counts['full']} in full, "
+            f"{counts['unchanged']} unchanged"
+        )
+
         return {
             'success': True,
             'submission_id': submission_id,
-            'files_validated': data_files.count()
+            'files_validated': counts['delta'] + counts['full'],
+            **counts
         }
-        
+
     except CohortSubmission.DoesNotExist:
         logger.error(f"CohortSubmission {submission_id} not found")
         raise
@@ -208,8 +218,6 @@ def extract_and_validate_patient_ids(self, task_data):
     # Extract data from bundle
     data_file_id = task_data['data_file_id']
     try:
-        ensure_db_connection()
-
         from depot.models import DataTableFilePatientIDs, SubmissionPatientIDs
 
         data_file = DataTableFile.objects.get(id=data_file_id)
@@ -258,7 +266,7 @@ def extract_and_validate_patient_ids(self, task_data):
             return result
 
         # Store extracted IDs
-        ensure_db_connection()
+        recycle_stale_connections()
         with transaction.atomic():
             file_patient_ids.extract_and_store_ids(extracted_ids)
 
@@ -289,7 +297,7 @@ def extract_and_validate_patient_ids(self, task_data):
             return result
 
         # Validate against master list
-        validation_result = file_patient_ids.validate_against_main(patient_record.patient_ids)
+        validation_result = file_patient_ids.validate_against_main(patient_record.patient_ids, patient_record.revision)
 
         # Update final status
         if validation_result['invalid'] > 0:
@@ -345,8 +353,6 @@ def generate_validation_report(self, data_file_id, validation_result):
         validation_result: Dict with validation results
     """
     try:
-        ensure_db_connection()
-
         from depot.models import DataTableFilePatientIDs
         import csv
         import tempfile
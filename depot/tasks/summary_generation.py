@@ -18,6 +18,7 @@ from depot.models import (
 from depot.services.variable_summary_service import VariableSummaryService
 from depot.services.data_table_summary_service import DataTableSummaryService
 from depot.services.submission_summary_service import SubmissionSummaryService
+from depot.utils.instrumentation import collect_spans, persist_spans, span
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +33,9 @@ def generate_variable_summary_task(self, validation_variable_id: int) -> int:
         return validation_variable_id
 
     service = VariableSummaryService()
-    service.generate_summary(variable)
+    with collect_spans() as spans, span('summary.variable', column=variable.column_name):
+        service.generate_summary(variable)
+    persist_spans(ValidationVariable, variable.id, spans)
     return validation_variable_id
 
 
@@ -56,7 +59,9 @@ def generate_data_table_summary_task(self, validation_run_id: int) -> int:
         raise self.retry(countdown=5)
 
     service = DataTableSummaryService()
-    summary = service.generate_summary(run)
+    with collect_spans() as spans, span('summary.data_table'):
+        summary = service.generate_summary(run)
+    persist_spans(ValidationRun, run.id, spans)
 
     # TODO: DuckDB cleanup disabled for now
     # Need to review protocol to understand all cross-file dependencies
@@ -0,0 +1,203 @@
+"""
+Upload workflow DAG for submission data files.
+
+Stages declare their dependencies explicitly and are grouped into levels:
+every stage in a level depends only on stages in earlier levels, so stages
+sharing a level run as a Celery group on separate workers. Levels are joined
+with chords whose callback merges the branch results back into a single
+task_data dict for the next level.
+
+    raw_hash ─────────────────────────────────────────┐
+    duckdb ──> patient_ids ──> validation ────────────┴──> cleanup
+
+Per-stage timings are recorded on DataTableFile.workflow_timings via Celery
+task signals, together with the critical-path time for the upload.
+"""
+import logging
+import threading
+import time
+
+from celery import chain, chord, group, shared_task
+from celery.signals import task_postrun, task_prerun
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# Stage name -> task import path and the stages it depends on.
+# Order matters only for readability; levels are derived from depends_on.
+UPLOAD_WORKFLOW_STAGES = {
+    'raw_hash': {
+        'task': 'depot.tasks.file_integrity.calculate_hashes_in_workflow',
+        'depends_on': [],
+    },
+    'duckdb': {
+        'task': 'depot.tasks.duckdb_creation.create_duckdb_task',
+        'depends_on': [],
+    },
+    'patient_ids': {
+        'task': 'depot.tasks.patient_extraction.extract_patient_ids_task',
+        'depends_on': ['duckdb'],
+    },
+    'validation': {
+        'task': 'depot.tasks.validation_orchestration.start_validation_for_data_file',
+        'depends_on': ['patient_ids'],
+    },
+    'cleanup': {
+        'task': 'depot.tasks.cleanup.cleanup_workflow_files_task',
+        'depends_on': ['raw_hash', 'validation'],
+    },
+}
+
+_TASK_TO_STAGE = {spec['task']: name for name, spec in UPLOAD_WORKFLOW_STAGES.items()}
+
+
+def workflow_levels(stages=UPLOAD_WORKFLOW_STAGES):
+    """
+    Group stages into dependency levels (Kahn's algorithm).
+
+    Returns:
+        list[list[str]]: Stage names per level, in execution order
+
+    Raises:
+        ValueError: On unknown dependencies or cycles
+    """
+    remaining = {name: set(spec['depends_on']) for name, spec in stages.items()}
+    for name, deps in remaining.items():
+        unknown = deps - stages.keys()
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {sorted(unknown)}")
+
+    levels = []
+    done = set()
+    while remaining:
+        ready = [name for name, deps in remaining.items() if deps <= done]
+        if not ready:
+            raise ValueError(f"Workflow has a dependency cycle among: {sorted(remaining)}")
+        levels.append(ready)
+        done.update(ready)
+        for name in ready:
+            del remaining[name]
+    return levels
+
+
+def critical_path_seconds(stage_timings, stages=UPLOAD_WORKFLOW_STAGES):
+    """Longest dependency path through the recorded stage durations."""
+    finish = {}
+    for level in workflow_levels(stages):
+        for name in level:
+            start = max((finish.get(dep, 0.0) for dep in stages[name]['depends_on']), default=0.0)
+            duration = stage_timings.get(name, {}).get('duration_seconds', 0.0)
+            finish[name] = start + duration
+    return round(max(finish.values(), default=0.0), 3)
+
+
+@shared_task
+def merge_workflow_results(results):
+    """
+    Chord callback that merges parallel branch results into one task_data.
+
+    Later branches win on key conflicts; ``workflow_should_stop`` is set if
+    any branch requested it.
+    """
+    merged = {}
+    should_stop = False
+    for result in results:
+        if isinstance(result, dict):
+            should_stop = should_stop or bool(result.get('workflow_should_stop'))
+            merged.update(result)
+    if should_stop:
+        merged['workflow_should_stop'] = True
+    return merged
+
+
+def _stage_signature(name, task_data=None):
+    task = import_string(UPLOAD_WORKFLOW_STAGES[name]['task'])
+    return task.si(task_data) if task_data is not None else task.s()
+
+
+def build_upload_workflow(task_data, stages=UPLOAD_WORKFLOW_STAGES):
+    """
+    Build the Celery canvas for a data file upload.
+
+    Args:
+        task_data: Initial data bundle passed to every first-level stage
+
+    Returns:
+        Celery signature ready for ``apply_async``
+    """
+    steps = []
+    for index, level in enumerate(workflow_levels(stages)):
+        initial = task_data if index == 0 else None
+        signatures = [_stage_signature(name, initial) for name in level]
+        if len(signatures) == 1:
+            steps.append(signatures[0])
+        else:
+            steps.append(chord(group(signatures), merge_workflow_results.s()))
+    return chain(*steps)
+
+
+# task_id -> (stage, monotonic start, wall-clock start)
+_stage_starts = {}
+_stage_starts_lock = threading.Lock()
+
+
+def _workflow_data_file_id(args):
+    if args and isinstance(args[0], dict):
+        return args[0].get('data_file_id')
+    return None
+
+
+@task_prerun.connect
+def _record_stage_start(task_id=None, task=None, args=None, **kwargs):
+    stage = _TASK_TO_STAGE.get(getattr(task, 'name', None))
+    if stage is None or _workflow_data_file_id(args) is None:
+        return
+    with _stage_starts_lock:
+        _stage_starts[task_id] = (stage, time.monotonic(), timezone.now())
+
+
+@task_postrun.connect
+def _record_stage_finish(task_id=None, task=None, args=None, state=None, **kwargs):
+    with _stage_starts_lock:
+        started = _stage_starts.pop(task_id, None)
+    if started is None:
+        return
+
+    stage, started_monotonic, started_at = started
+    data_file_id = _workflow_data_file_id(args)
+    try:
+        record_stage_timing(
+            data_file_id,
+            stage,
+            started_at=started_at,
+            duration_seconds=time.monotonic() - started_monotonic,
+            state=state,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to record workflow timing for {stage} on DataTableFile {data_file_id}: {e}")
+
+
+def record_stage_timing(data_file_id, stage, started_at, duration_seconds, state=None):
+    """Store one stage's timing on DataTableFile.workflow_timings."""
+    from depot.models import DataTableFile
+
+    with transaction.atomic():
+        data_file = DataTableFile.objects.select_for_update().filter(id=data_file_id).first()
+        if data_file is None:
+            return
+
+        timings = data_file.workflow_timings or {}
+        stage_timings = timings.get('stages', {})
+        stage_timings[stage] = {
+            'started_at': started_at.isoformat(),
+            'finished_at': timezone.now().isoformat(),
+            'duration_seconds': round(duration_seconds, 3),
+            'state': state,
+        }
+        timings['stages'] = stage_timings
+        timings['critical_path_seconds'] = critical_path_seconds(stage_timings)
+        data_file.workflow_timings = timings
+        data_file.save(update_fields=['workflow_timings'])
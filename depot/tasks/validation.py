@@ -16,6 +16,7 @@ from django.utils import timezone
 
 from depot.models import PHIFileTracking, PrecheckRun, ValidationRun
 from depot.services.data_mapping import DataMappingService
+from depot.services.data_statistics import write_column_stats
 from depot.storage.scratch_manager import ScratchManager
 from depot.tasks.validation_orchestration import start_validation_run
 
@@ -134,7 +135,10 @@ def convert_precheck_to_duckdb(self, precheck_run_id, validation_run_id=None):
         processed_file_path = tempfile.mktemp(suffix=".csv")
 
         logger.info(f"Stage 1: Applying data processing for cohort: {cohort_name}")
-        processing_results = processing_service.process_file(raw_file_path, processed_file_path)
+        processing_results = processing_service.process_file(
+            raw_file_path, processed_file_path,
+            tracking={'cohort': precheck_run.cohort, 'user': user, 'content_object': precheck_run},
+        )
 
         if processing_results.get('errors'):
             error_msg = f"Data processing failed: {processing_results['errors']}"
@@ -173,6 +177,9 @@ def convert_precheck_to_duckdb(self, precheck_run_id, validation_run_id=None):
         row_count = conn.execute("SELECT COUNT(*) FROM data").fetchone()[0]
         logger.info(f"Stage 2 complete: Loaded {row_count} rows into DuckDB")
 
+        # Column statistics sidecar read by the validators
+        write_column_stats(conn)
+
         conn.close()
 
         # Log DuckDB workspace artefact
@@ -21,6 +21,7 @@ from depot.models import ValidationRun, ValidationVariable, ValidationCheck, Dat
 from depot.services.submission_validation_service import SubmissionValidationService
 from depot.data.definition_loader import get_definition_for_type
 from depot.tasks.summary_generation import generate_variable_summary_task
+from depot.utils.instrumentation import collect_spans, persist_spans, span
 
 logger = logging.getLogger(__name__)
 
@@ -199,12 +200,16 @@ def start_validation_run(validation_run_id):
 
         logger.info(f"Created {len(variables)} validation variables for run {validation_run_id}")
 
-        # Execute validation for each variable
-        for variable in variables:
-            try:
-                execute_variable_validation.delay(variable.id, definition_list)
-            except Exception as e:
-                logger.error(f"Failed to queue validation for variable {variable.id}: {e}")
+        # Execute validation for each variable. Only IDs and the definition
+        # version travel in the message; workers resolve the definition locally.
+        # Published message sizes are kept on the run's timeline.
+        with collect_spans() as spans:
+            for variable in variables:
+                try:
+                    execute_variable_validation.delay(variable.id, definition.version)
+                except Exception as e:
+                    logger.error(f"Failed to queue validation for variable {variable.id}: {e}")
+        persist_spans(ValidationRun, validation_run.id, spans)
 
         _refresh_submission_summary_for_run(validation_run)
 
@@ -280,6 +285,8 @@ def _reset_validation_run(
         validation_run=validation_run
     ).force_delete()
 
+    validation_run.cleanup_affected_rows()
+
     updates = {
         'status': 'pending',
         'started_at': None,
@@ -289,6 +296,7 @@ def _reset_validation_run(
         'completed_variables': 0,
         'variables_with_warnings': 0,
         'variables_with_errors': 0,
+        'pipeline_spans': [],
     }
 
     if duckdb_path is not None:
@@ -471,9 +479,8 @@ def revalidate_single_variable(variable_id):
     _refresh_submission_summary_for_run(run)
 
     definition = get_definition_for_type(run.data_file_type.name)
-    definition_list = definition.get_definition()
 
-    execute_variable_validation.delay(variable.id, definition_list)
+    execute_variable_validation.delay(variable.id, definition.version)
 
     return {
         'status': 'queued',
@@ -482,32 +489,56 @@ def revalidate_single_variable(variable_id):
     }
 
 
+def _resolve_variable_definition(variable, definition_version):
+    """
+    Look up a variable's definition entry in the worker-side registry.
+
+    ``definition_version`` is the version key of the definition the task was
+    enqueued against. Older messages may still carry the full definition list
+    instead, which is searched directly.
+    """
+    if isinstance(definition_version, list):
+        for var_def in definition_version:
+            if var_def.get('name') == variable.column_name:
+                return var_def
+        return None
+
+    definition = get_definition_for_type(variable.validation_run.data_file_type.name)
+    if definition_version and definition.version != definition_version:
+        logger.warning(
+            "Definition for %s changed since variable %s was queued (queued=%s, current=%s)",
+            variable.validation_run.data_file_type.name,
+            variable.id,
+            definition_version,
+            definition.version,
+        )
+    return definition.get_variable(variable.column_name)
+
+
 @shared_task
-def execute_variable_validation(validation_variable_id, definition_list):
+def execute_variable_validation(validation_variable_id, definition_version=None):
     """
     Execute validation for a single variable.
 
     Args:
         validation_variable_id: ID of ValidationVariable to validate
-        definition_list: Full definition list (to find this variable's definition)
+        definition_version: Version key of the definition the run was created from
 
     Returns:
         dict: Validation results
     """
+    from depot.services.affected_rows import AFFECTED_ROW_SAMPLE, artifact_path, write_affected_rows
     from depot.validators.variable_validator import VariableValidator
 
     try:
-        variable = ValidationVariable.objects.select_related('validation_run').get(id=validation_variable_id)
+        variable = ValidationVariable.objects.select_related(
+            'validation_run__data_file_type'
+        ).get(id=validation_variable_id)
         variable.mark_started()
 
         logger.info(f"Validating variable {variable.column_name} (id={variable.id})")
 
-        # Find this variable's definition
-        variable_def = None
-        for var_def in definition_list:
-            if var_def.get('name') == variable.column_name:
-                variable_def = var_def
-                break
+        variable_def = _resolve_variable_definition(variable, definition_version)
 
         if not variable_def:
             error_msg = f"Definition not found for variable '{variable.column_name}'"
@@ -547,8 +578,18 @@ def execute_variable_validation(validation_variable_id, definition_list):
             data_file=data_file
         )
 
-        with validator:
+        affected_rows_artifact = None
+        with collect_spans() as spans, validator:
             results = validator.validate()
+            if validator.affected_row_queries:
+                affected_rows_artifact = artifact_path(variable.validation_run_id, variable.id)
+                try:
+                    with span('validation.affected_rows'):
+                        write_affected_rows(validator.conn, validator.affected_row_queries, affected_rows_artifact)
+                except Exception as exc:
+                    logger.warning("Failed to write affected rows for variable %s: %s", variable.id, exc)
+                    affected_rows_artifact = None
+        persist_spans(ValidationVariable, variable.id, spans)
 
         # Update variable with results
         variable.total_rows = results['total_rows']
@@ -578,16 +619,19 @@ def execute_variable_validation(validation_variable_id, definition_list):
             meta_data = check.get('details', {})
 
             if affected_rows:
+                # Only a sample is kept in the database; the full list is in the artifact
+                affected_rows = affected_rows[:AFFECTED_ROW_SAMPLE]
+
                 # Create display string: "file_5:row_123, file_5:row_456, file_7:row_12, ..."
-                row_numbers_list = [
+                row_numbers_str = ", ".join(
                     f"file_{row['file_id']}:row_{row['source_row']}"
-                    for row in affected_rows[:100]  # Limit to first 100 for display
-                ]
-                row_numbers_str = ", ".join(row_numbers_list)
+                    for row in affected_rows
+                )
 
-                # Store full affected_rows data in meta for detailed analysis
                 meta_data['affected_rows'] = affected_rows
                 meta_data['has_file_tracking'] = True
+                if affected_rows_artifact and check['check_type'] in validator.affected_row_queries:
+                    meta_data['affected_rows_artifact'] = affected_rows_artifact
 
             ValidationCheck.objects.create(
                 validation_variable=variable,
@@ -643,6 +687,7 @@ def run_validation_for_precheck(self, precheck_validation_id):
     import tempfile
     import duckdb
     import os
+    from depot.services.data_statistics import write_column_stats
     from depot.models import PrecheckValidation
     from depot.storage.manager import StorageManager
     
@@ -721,6 +766,7 @@ def run_validation_for_precheck(self, precheck_validation_id):
                 CREATE TABLE data AS
                 SELECT * FROM read_csv_auto(?, header=true, ignore_errors=false)
             """, [csv_for_duckdb])
+            write_column_stats(conn)
             conn.close()
 
             validation_run.duckdb_path = temp_db_path
@@ -743,7 +789,7 @@ def run_validation_for_precheck(self, precheck_validation_id):
             
             # Execute validation for each variable
             for variable in variables:
-                execute_variable_validation.delay(variable.id, definition_list)
+                execute_variable_validation.delay(variable.id, definition_obj.version)
             
             # Store reference to validation run
             validation.validation_run = validation_run
@@ -0,0 +1,106 @@
+"""
+Notifications are queued in the outbox and delivered in batches, with
+bursts to one recipient coalesced and failures retried with backoff.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from depot.models import Cohort, CohortSubmission, NotificationOutbox, ProtocolYear
+from depot.services.notification_service import NotificationService
+from depot.tasks.notifications import deliver_notifications
+
+User = get_user_model()
+
+
+def render(template, context):
+    return f"<p>{context.get('file_type')}: {context.get('warning_count', 0)} warnings</p>"
+
+
+@override_settings(NOTIFICATION_COALESCE_SECONDS=60, NOTIFICATION_MAX_ATTEMPTS=2)
+@patch('depot.services.notification_service.render_to_string', render)
+class NotificationOutboxTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='manager', email='manager@example.com', password='pw')
+        cohort = Cohort.objects.create(name='Outbox Cohort', status='active', type='clinical')
+        protocol_year = ProtocolYear.objects.create(name='2024', year=2024, is_active=True)
+        self.submission = CohortSubmission.objects.create(
+            cohort=cohort, protocol_year=protocol_year, status='in_progress', started_by=self.user
+        )
+
+    def warn(self, file_type='laboratory'):
+        return NotificationService.send_validation_warning(self.submission, file_type, ['w1', 'w2'], user=self.user)
+
+    def release(self):
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+
+    def test_notifications_are_queued_with_the_transaction(self):
+        self.assertTrue(self.warn())
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(NotificationOutbox.objects.get().recipient, 'manager@example.com')
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.warn()
+            raise RuntimeError('sign-off failed')
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+    def test_delivery_is_scheduled_once_per_window(self):
+        cache.delete('notification_outbox_delivery_scheduled')
+        with patch.object(deliver_notifications, 'apply_async') as schedule, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.warn()
+            self.warn()
+
+        schedule.assert_called_once_with(countdown=60)
+
+    def test_burst_is_delivered_as_one_digest(self):
+        for _ in range(40):
+            self.warn()
+        NotificationService.send_upload_notification(self.user, self.submission, 'patient')
+
+        self.assertEqual(deliver_notifications.apply().result['sent'], 0)
+
+        NotificationOutbox.objects.filter(pk=NotificationOutbox.objects.first().pk).update(
+            next_attempt_at=timezone.now()
+        )
+        result = deliver_notifications.apply().result
+
+        self.assertEqual((result['emails'], result['sent']), (1, 40))
+        digest = mail.outbox[0]
+        self.assertEqual(digest.subject, 'Validation Warnings - laboratory (+39 more)')
+        self.assertEqual(digest.body.count('laboratory: 2 warnings'), 40)
+        self.assertEqual(NotificationOutbox.objects.filter(status='pending').count(), 1)
+
+    def test_failed_sends_back_off_then_give_up(self):
+        self.warn()
+        self.release()
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('smtp down')):
+            result = NotificationService.deliver_outbox()
+            row = NotificationOutbox.objects.get()
+            self.assertEqual((result['retrying'], row.status, row.attempts), (1, 'pending', 1))
+            self.assertGreater(row.next_attempt_at, timezone.now() + timedelta(seconds=30))
+
+            self.release()
+            result = NotificationService.deliver_outbox()
+        row.refresh_from_db()
+        self.assertEqual((result['failed'], row.status, row.last_error), (1, 'failed', 'smtp down'))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_unreachable_server_reschedules_the_batch(self):
+        self.warn('laboratory')
+        self.warn('medication')
+        self.release()
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('refused')):
+            result = NotificationService.deliver_outbox()
+
+        self.assertEqual(result['retrying'], 2)
+        self.assertFalse(NotificationOutbox.due().exists())
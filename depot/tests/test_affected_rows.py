@@ -0,0 +1,190 @@
+"""
+Rows affected by failed checks are written to a Parquet artifact per
+variable; ValidationCheck keeps the count and a sample, and the CSV export
+pages through the artifact.
+"""
+import csv
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import duckdb
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from django.urls import reverse
+
+from depot.audit.observers import set_current_user
+from depot.models import (
+    Cohort, CohortMembership, CohortSubmission, CohortSubmissionDataTable, DataFileType, DataTableFile,
+    ProtocolYear, User, ValidationCheck, ValidationRun, ValidationVariable,
+)
+from depot.services.affected_rows import (
+    AFFECTED_ROW_SAMPLE, artifact_path, delete_affected_rows, iter_affected_rows, read_affected_rows,
+    write_affected_rows,
+)
+from depot.storage.local import LocalFileSystemStorage
+from depot.tasks.validation_orchestration import _reset_validation_run, execute_variable_validation
+from depot.validators.variable_validator import VariableValidator
+
+
+class AffectedRowsArtifactTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        storage_config = {'disks': {'workspace': {'driver': 'local', 'type': 'local', 'root': self.temp_dir.name}}}
+        with self.settings(STORAGE_CONFIG=storage_config):
+            self.storage = LocalFileSystemStorage('workspace')
+        patcher = mock.patch('depot.services.affected_rows.StorageManager.get_workspace_storage',
+                             return_value=self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # 30 duplicated IDs across two files plus ages outside [0, 120]
+        self.db_path = str(Path(self.temp_dir.name) / 'combined.duckdb')
+        conn = duckdb.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE data AS
+            SELECT 'P' || (i % 30) AS cohortPatientId,
+                   CASE WHEN i % 10 = 0 THEN 150 ELSE 40 END AS age,
+                   CASE WHEN i < 30 THEN 1 ELSE 2 END AS __source_file_id,
+                   CASE WHEN i < 30 THEN i + 1 ELSE i - 29 END AS __source_row_number,
+                   i + 1 AS row_no
+            FROM range(60) t(i)
+        """)
+        conn.close()
+
+    def validate(self, name, validators):
+        validator = VariableValidator(self.db_path, {'name': name, 'type': 'int', 'validators': validators}, None)
+        with validator:
+            results = validator.validate()
+            queries = dict(validator.affected_row_queries)
+            if queries:
+                write_affected_rows(validator.conn, queries, 'validation_runs/1/affected_rows/1.parquet')
+        return results['checks'][0], queries
+
+    def test_checks_keep_a_sample_and_an_exact_count(self):
+        check, queries = self.validate('cohortPatientId', ['no_duplicates'])
+
+        self.assertEqual(len(check['affected_rows']), AFFECTED_ROW_SAMPLE)
+        self.assertEqual(check['affected_row_count'], 60)
+        self.assertEqual(list(queries), ['no_duplicates'])
+
+        check, _ = self.validate('age', [{'name': 'range', 'params': [0, 120]}])
+        self.assertEqual((len(check['affected_rows']), check['affected_row_count']), (6, 6))
+        self.assertEqual(check['affected_rows'][0]['value'], 150)
+
+    def test_artifact_pages_through_every_row(self):
+        self.validate('cohortPatientId', ['no_duplicates'])
+        path = 'validation_runs/1/affected_rows/1.parquet'
+
+        # Local artifacts are read in place, never loaded or copied
+        with mock.patch.object(self.storage, 'get_file', side_effect=AssertionError('loaded')), \
+                mock.patch.object(self.storage, 'stream_file', side_effect=AssertionError('copied')):
+            page = read_affected_rows(path, 'no_duplicates', offset=29, limit=2)
+        self.assertEqual(page, [
+            {'file_id': 1, 'source_row': 30, 'duckdb_row': 30},
+            {'file_id': 2, 'source_row': 1, 'duckdb_row': 31},
+        ])
+
+        # Remote storage has no local path; the artifact is streamed to a temporary file
+        with mock.patch.object(self.storage, 'get_absolute_path', return_value=f'remote://workspace/{path}'):
+            self.assertEqual(read_affected_rows(path, 'no_duplicates', offset=29, limit=2), page)
+        self.assertEqual(len(list(iter_affected_rows(path, 'no_duplicates', batch_size=7))), 60)
+        self.assertEqual(read_affected_rows(path, 'range'), [])
+
+        delete_affected_rows(1)
+        with self.assertRaises(FileNotFoundError):
+            read_affected_rows(path, 'no_duplicates')
+
+    def test_task_stores_sample_and_export_streams_artifact(self):
+        user = User.objects.create_user(username='manager', password='pw')
+        cohort = Cohort.objects.create(name='Drilldown Cohort')
+        CohortMembership.objects.create(user=user, cohort=cohort)
+        submission = CohortSubmission.objects.create(
+            cohort=cohort, protocol_year=ProtocolYear.objects.create(year=2024),
+            status='in_progress', started_by=user
+        )
+        file_type = DataFileType.objects.create(name='patient')
+        data_table = CohortSubmissionDataTable.objects.create(submission=submission, data_file_type=file_type)
+        data_file = DataTableFile.objects.create(data_table=data_table, version=1, uploaded_by=user)
+        run = ValidationRun.objects.create(
+            content_type=ContentType.objects.get_for_model(data_file), object_id=data_file.id,
+            data_file_type=file_type, duckdb_path=self.db_path,
+        )
+        variable = ValidationVariable.objects.create(
+            validation_run=run, column_name='cohortPatientId', column_type='id'
+        )
+        definition = [{'name': 'cohortPatientId', 'type': 'id', 'validators': ['no_duplicates']}]
+
+        with mock.patch('depot.tasks.validation_orchestration.generate_variable_summary_task'):
+            execute_variable_validation(variable.id, definition)
+
+        check = ValidationCheck.objects.get(validation_variable=variable)
+        self.assertEqual(check.affected_row_count, 60)
+        self.assertEqual(len(check.meta['affected_rows']), AFFECTED_ROW_SAMPLE)
+        self.assertEqual(len(check.row_numbers.split(', ')), AFFECTED_ROW_SAMPLE)
+        self.assertEqual(check.meta['affected_rows_artifact'], artifact_path(run.id, variable.id))
+
+        self.client.force_login(user)
+        response = self.client.get(reverse(
+            'download_validation_check_rows', args=[submission.id, 'patient', run.id, check.id]
+        ))
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['file_id', 'source_row', 'duckdb_row'])
+        self.assertEqual(len(rows), 61)
+
+        # The status page pages through the artifact past the stored sample
+        rows_url = reverse('validation_check_rows', args=[submission.id, 'patient', run.id, check.id])
+        page = self.client.get(rows_url, {'offset': 29, 'limit': 2}).json()
+        self.assertEqual(page['rows'], [
+            {'file_id': 1, 'source_row': 30, 'duckdb_row': 30},
+            {'file_id': 2, 'source_row': 1, 'duckdb_row': 31},
+        ])
+        self.assertEqual((page['total'], page['has_next']), (60, True))
+        page = self.client.get(rows_url, {'offset': 50, 'limit': 1000}).json()
+        self.assertEqual((len(page['rows']), page['limit'], page['has_next']), (10, 100, False))
+        self.assertEqual(self.client.get(rows_url, {'offset': 'x'}).status_code, 400)
+
+        status_page = self.client.get(reverse('submission_validation_status', args=[submission.id, 'patient', run.id]))
+        self.assertContains(status_page, f"affectedRowsPager('{rows_url}')")
+
+        outsider = User.objects.create_user(username='outsider', password='pw')
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(rows_url).status_code, 403)
+        self.client.force_login(user)
+
+        self.storage.delete(artifact_path(run.id, variable.id))
+        self.assertEqual(self.client.get(rows_url).status_code, 404)
+        _reset_validation_run(run)
+        self.assertFalse(ValidationCheck.objects.filter(validation_variable__validation_run=run).exists())
+
+    def _run_with_artifact(self):
+        file_type = DataFileType.objects.create(name='patient')
+        run = ValidationRun.objects.create(
+            content_type=ContentType.objects.get_for_model(file_type), object_id=file_type.id,
+            data_file_type=file_type,
+        )
+        path = artifact_path(run.id, 1)
+        self.storage.save(path, io.BytesIO(b'rows'), 'application/vnd.apache.parquet')
+        return run, path
+
+    def test_artifacts_deleted_with_the_run(self):
+        # Deletions are audited against the current user
+        set_current_user(User.objects.create_user(username='deleter', password='pw'))
+        self.addCleanup(set_current_user, None)
+        run, path = self._run_with_artifact()
+
+        # Soft-deleted runs can be restored, so their artifacts stay
+        ValidationRun.objects.filter(pk=run.pk).delete()
+        self.assertTrue(self.storage.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run.force_delete()
+        self.assertFalse(self.storage.exists(path))
+
+    def test_artifacts_deleted_with_the_runs_workspace(self):
+        run, path = self._run_with_artifact()
+        run._cleanup_duckdb_file()
+        self.assertFalse(self.storage.exists(path))
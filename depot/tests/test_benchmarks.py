@@ -0,0 +1,82 @@
+"""
+Tests for the pipeline benchmark harness.
+"""
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, TestCase
+
+from depot.benchmarks.harness import BenchmarkHistory, measure
+from depot.benchmarks.stages import BenchmarkContext, dataset_paths, isolated_storage, run_stages
+from depot.storage.manager import StorageManager
+
+
+class MeasureTest(SimpleTestCase):
+
+    def test_records_all_metrics(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with measure() as metrics:
+                (Path(temp_dir) / 'out.bin').write_bytes(b'x' * 4096)
+
+        self.assertEqual(
+            set(metrics),
+            {'wall_seconds', 'peak_rss_bytes', 'bytes_read', 'bytes_written', 'db_queries'},
+        )
+        self.assertGreater(metrics['peak_rss_bytes'], 0)
+        self.assertGreaterEqual(metrics['bytes_written'], 4096)
+
+
+class BenchmarkHistoryTest(SimpleTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.history = BenchmarkHistory(Path(self.temp_dir.name) / 'history.json')
+        for wall in (1.0, 1.1, 0.9):
+            self.history.record('10mb', {'process_file': {'wall_seconds': wall, 'db_queries': 2}})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_history_round_trips(self):
+        reloaded = BenchmarkHistory(self.history.path)
+        self.assertEqual(len(reloaded.runs), 3)
+        self.assertEqual(reloaded.baseline('10mb', 'process_file', 'wall_seconds'), 1.0)
+
+    def test_regressions_respect_thresholds(self):
+        run = {'profile': '10mb', 'stages': {'process_file': {'wall_seconds': 1.5, 'db_queries': 3}}}
+
+        regressions = self.history.check_regressions(run)
+        self.assertEqual({(r['stage'], r['metric']) for r in regressions},
+                         {('process_file', 'wall_seconds'), ('process_file', 'db_queries')})
+
+        relaxed = self.history.check_regressions(run, {'wall_seconds': 1.0, 'db_queries': 1.0})
+        self.assertEqual(relaxed, [])
+
+    def test_other_profiles_have_no_baseline(self):
+        run = {'profile': '2gb', 'stages': {'process_file': {'wall_seconds': 100.0}}}
+        self.assertEqual(self.history.check_regressions(run), [])
+
+
+class BenchmarkStagesSmokeTest(TestCase):
+    """Run every stage once on a tiny dataset."""
+
+    def test_all_stages_run(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            dataset = dataset_paths(Path(data_dir), 'tiny', 100 * 1024)
+            with isolated_storage() as storage_root:
+                ctx = BenchmarkContext(dataset, workspace=Path(data_dir) / 'workspace')
+                try:
+                    results = run_stages(ctx)
+                finally:
+                    ctx.cleanup()
+                self.assertTrue(ctx.storage.get_absolute_path('x').startswith(str(storage_root)))
+
+        self.assertFalse(storage_root.exists())
+        self.assertNotEqual(StorageManager.get_storage('uploads').get_absolute_path('x'),
+                            ctx.storage.get_absolute_path('x'))
+
+        for stage in ('process_file', 'convert_to_duckdb', 'convert_multiple_files_to_duckdb',
+                      'extract_patient_ids_task', 'validate_id', 'validate_date',
+                      'generate_summary', 'combine_files'):
+            self.assertIn(stage, results)
+        self.assertGreater(results['generate_summary']['db_queries'], 0)
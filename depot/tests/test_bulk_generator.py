@@ -0,0 +1,78 @@
+"""
+Tests for the vectorized synthetic data generator.
+"""
+import tempfile
+from pathlib import Path
+
+import duckdb
+from django.test import SimpleTestCase
+
+from depot.factories.data.bulk_generator import BulkDataGenerator, patient_id_universe
+
+
+class BulkDataGeneratorTest(SimpleTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_columns_follow_definition(self):
+        chunk = BulkDataGenerator('patient', patient_count=50, seed=1).generate_chunk(50)
+
+        self.assertEqual(chunk.columns[0], 'cohortPatientId')
+        self.assertEqual(len(chunk), 50)
+        self.assertEqual(chunk['cohortPatientId'].nunique(), 50)
+        self.assertTrue(set(chunk['birthSex']) <= {'Female', 'Male', 'Intersexed'})
+        self.assertTrue(chunk['birthYear'].astype(int).between(1900, 2025).all())
+
+    def test_tables_share_patient_universe(self):
+        BulkDataGenerator('patient', patient_count=20, seed=1).write(self.dir / 'patient.csv', 20)
+        BulkDataGenerator('laboratory', patient_count=20, seed=2, chunk_size=7).write(self.dir / 'lab.tsv', 100, file_format='tsv')
+
+        conn = duckdb.connect()
+        try:
+            orphans = conn.execute(f"""
+                SELECT COUNT(*) FROM read_csv('{self.dir / 'lab.tsv'}', delim='\t', header=true, all_varchar=true)
+                WHERE cohortPatientId NOT IN (
+                    SELECT cohortPatientId FROM read_csv('{self.dir / 'patient.csv'}', header=true, all_varchar=true)
+                )
+            """).fetchone()[0]
+        finally:
+            conn.close()
+
+        self.assertEqual(orphans, 0)
+        self.assertEqual(list(patient_id_universe(2)), ['SIM000000000', 'SIM000000001'])
+
+    def test_error_injection_and_line_endings(self):
+        generator = BulkDataGenerator(
+            'laboratory', patient_count=10, seed=3,
+            error_rates={'invalid_id': 1.0, 'malformed_row': 1.0},
+        )
+        stats = generator.write(self.dir / 'lab.csv', 5, bom=True, crlf=True)
+
+        raw = (self.dir / 'lab.csv').read_bytes()
+        self.assertEqual(stats['rows'], 5)
+        self.assertTrue(raw.startswith(b'\xef\xbb\xbf'))
+        lines = raw.split(b'\r\n')
+        self.assertNotIn(b'EXTRA', lines[0])
+        self.assertTrue(all(line.startswith(b'UNKNOWN') and line.endswith(b',EXTRA') for line in lines[1:6]))
+
+    def test_parquet_written_per_chunk(self):
+        stats = BulkDataGenerator('diagnosis', patient_count=10, seed=4, chunk_size=40).write(
+            self.dir / 'diagnosis.parquet', 100, file_format='parquet'
+        )
+
+        self.assertEqual(stats['chunks'], 3)
+        conn = duckdb.connect()
+        try:
+            count = conn.execute(f"SELECT COUNT(*) FROM read_parquet('{self.dir / 'diagnosis.parquet'}/*.parquet')").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(count, 100)
+
+    def test_unknown_error_kind_rejected(self):
+        with self.assertRaises(ValueError):
+            BulkDataGenerator('patient', error_rates={'bogus': 0.1})
@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+
+from depot.celery import app
+from depot.config.celery_queues import ACKS_LATE_TASKS, DEFAULT_QUEUE, worker_args
+
+
+class CeleryRoutingTests(SimpleTestCase):
+    databases = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Register tasks the way a worker does (CELERY_IMPORTS)
+        app.loader.import_default_modules()
+
+    def _queue_for(self, task_name):
+        route = app.amqp.router.route({}, task_name)
+        return route['queue'].name
+
+    def test_tasks_route_by_workload_class(self):
+        expected = {
+            'depot.tasks.duckdb_creation.create_duckdb_task': 'heavy-io',
+            'depot.tasks.validation_orchestration.execute_variable_validation': 'cpu-validation',
+            'depot.tasks.summary_generation.generate_variable_summary_task': 'summaries',
+            'depot.tasks.upload_precheck.process_precheck_run': 'notebooks',
+            'depot.tasks.cleanup.cleanup_workflow_files_task': 'maintenance',
+            'depot.tasks.file_integrity.scrub_phi_integrity': 'integrity-scrub',
+        }
+        for task_name, queue in expected.items():
+            with self.subTest(task=task_name):
+                self.assertEqual(self._queue_for(task_name), queue)
+
+    def test_unrouted_task_uses_default_queue(self):
+        self.assertEqual(self._queue_for('depot.tasks.upload_workflow.merge_workflow_results'), DEFAULT_QUEUE)
+
+    def test_long_tasks_ack_late(self):
+        task = app.tasks['depot.tasks.duckdb_creation.create_duckdb_task']
+        self.assertIn(task.name, ACKS_LATE_TASKS)
+        self.assertTrue(task.acks_late)
+
+    def test_visibility_timeout_outlasts_ack_late_time_limits(self):
+        visibility_timeout = app.conf.broker_transport_options['visibility_timeout']
+        for name in ACKS_LATE_TASKS:
+            with self.subTest(task=name):
+                time_limit = app.tasks[name].time_limit
+                self.assertIsNotNone(time_limit)
+                self.assertGreater(visibility_timeout, time_limit)
+
+    def test_worker_args_for_subset(self):
+        self.assertEqual(
+            worker_args(['heavy-io', 'summaries']),
+            ['-Q', 'heavy-io,summaries', '-c', '4', '--prefetch-multiplier', '1'],
+        )
+        with self.assertRaises(ValueError):
+            worker_args(['unknown'])
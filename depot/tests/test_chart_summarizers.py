@@ -0,0 +1,107 @@
+"""
+Chart summarizers report compact chart specs computed in DuckDB, and only
+render images when asked to.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from depot.components.upload_precheck.variable_summary.data.report import report as report_module
+from depot.components.upload_precheck.variable_summary.data.report.report import (
+    AuditVariableSummaryDataReportComponent,
+)
+from depot.data.summarizers import bar_chart, base_summarizer, box_plot, date_histogram, histogram
+from depot.data.validators import base_validator
+from depot.utils.sql import quote_identifier
+
+
+class ChartSummarizerSpecTest(SimpleTestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "x": [1, 2, 2, 3, 4, 5, 6, 7, 8, 100, np.nan],
+            "category": ["b", "b", "a", "", None] + [f"v{i}" for i in range(12)][:6],
+            "year": [1990, 1991, 1995, 2001, 2020, 2025, 1850, np.nan, 1999.5, 2000, 2000],
+        })
+
+    def test_histogram_bins_cover_every_finite_value(self):
+        report = histogram.Summarizer().handle("x", "int", self.df)
+        spec = report["value"]
+
+        self.assertEqual(report["value_rendered"], {"type": "chart_spec", "chart": "histogram", "data": spec})
+        self.assertEqual(len(spec["bins"]), 10)
+        self.assertEqual([b["count"] for b in spec["bins"]], [9, 0, 0, 0, 0, 0, 0, 0, 0, 1])
+        self.assertEqual((spec["min"], spec["max"], spec["count"]), (1.0, 100.0, 10))
+        self.assertEqual(spec["bins"][-1]["end"], 100.0)
+        self.assertNotIn("image", report)
+
+    def test_histogram_of_a_constant_has_one_bin(self):
+        spec = histogram.Summarizer().handle("x", "int", pd.DataFrame({"x": [3.0, 3.0]}))["value"]
+
+        self.assertEqual(spec["bins"], [{"start": 3.0, "end": 3.0, "count": 2}])
+
+    def test_box_plot_quartiles_match_numpy(self):
+        spec = box_plot.Summarizer().handle("x", "int", self.df)["value"]
+        values = self.df["x"].dropna()
+
+        self.assertEqual([spec["q1"], spec["median"], spec["q3"]], list(np.percentile(values, [25, 50, 75])))
+        self.assertEqual((spec["lower_whisker"], spec["upper_whisker"], spec["outlier_count"]), (1.0, 8.0, 1))
+
+    def test_bar_chart_keeps_top_values_and_aggregates_the_rest(self):
+        df = pd.DataFrame({"category": ["a"] * 5 + ["b"] * 3 + [f"v{i:02d}" for i in range(12)] + ["", None]})
+        spec = bar_chart.Summarizer().handle("category", "enum", df)["value"]
+
+        self.assertEqual(spec["categories"][:2], [{"value": "a", "count": 5}, {"value": "b", "count": 3}])
+        self.assertEqual(len(spec["categories"]), 10)
+        self.assertEqual(spec["other"]["label"], "Other (4 values)")
+        self.assertEqual((spec["other"]["count"], spec["total"]), (4, 20))
+
+    def test_date_histogram_bins_whole_years(self):
+        spec = date_histogram.Summarizer().handle("year", "year", self.df)["value"]
+
+        self.assertEqual(spec["step"], 17)
+        self.assertEqual(spec["bins"][0], {"start": 1850, "end": 1866, "count": 1})
+        self.assertEqual(spec["count"], 9)  # NaN and 1999.5 are not years
+
+        dates = pd.DataFrame({"d": pd.to_datetime(["2020-01-05", "2021-06-01", "2021-07-01"])})
+        spec = date_histogram.Summarizer().handle("d", "date", dates)["value"]
+        self.assertEqual([(b["start"], b["count"]) for b in spec["bins"]], [(2020, 1), (2021, 2)])
+
+    def test_specs_are_json_serializable(self):
+        for summarizer, variable in [
+            (histogram, "x"), (box_plot, "x"), (bar_chart, "category"), (date_histogram, "year"),
+        ]:
+            with self.subTest(summarizer=summarizer.__name__):
+                json.dumps(summarizer.Summarizer().handle(variable, "int", self.df)["value_rendered"])
+
+    def test_image_export_is_opt_in(self):
+        if not base_summarizer.MATPLOTLIB_AVAILABLE:
+            self.skipTest("matplotlib not installed")
+
+        report = histogram.Summarizer().handle("x", "int", self.df, {"image": True})
+
+        self.assertEqual(report["image"]["type"], "base64_image")
+        self.assertTrue(report["image"]["data"])
+        self.assertEqual(report["value_rendered"]["type"], "chart_spec")
+
+    def test_report_component_gives_charts_element_ids(self):
+        chart = {"name": "histogram", "report": histogram.Summarizer().handle("x", "int", self.df)}
+        plain = {"name": "count", "report": {"status": "success", "value": 10}}
+
+        with_ids = AuditVariableSummaryDataReportComponent.with_chart_ids(chart)
+        self.assertTrue(with_ids["chart_id"].startswith("chart-"))
+        self.assertEqual(with_ids["chart_spec_id"], f"{with_ids['chart_id']}-spec")
+        self.assertIs(AuditVariableSummaryDataReportComponent.with_chart_ids(plain), plain)
+
+    def test_report_component_loads_plotly_itself(self):
+        # The audit page does not load Plotly; the component must not depend on it
+        with open(Path(report_module.__file__).with_name("report.html")) as f:
+            self.assertIn("https://cdn.plot.ly/plotly-", f.read())
+
+    def test_summarizers_and_validators_share_identifier_quoting(self):
+        self.assertIs(base_summarizer.quote_identifier, quote_identifier)
+        self.assertIs(base_validator.quote_identifier, quote_identifier)
+        self.assertEqual(quote_identifier('a"b'), '"a""b"')
@@ -0,0 +1,140 @@
+"""
+Column statistics are computed once at conversion and stored in a sidecar
+table that validators and the statistics service read instead of
+rescanning the data.
+"""
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import duckdb
+from django.test import SimpleTestCase
+
+from depot.services.data_statistics import (
+    DataFileStatisticsService,
+    compute_column_stats,
+    read_column_stats,
+    write_column_stats,
+)
+from depot.validators.variable_validator import VariableValidator
+
+
+class ColumnStatsSidecarTest(SimpleTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = str(Path(self.temp_dir.name) / 'data.duckdb')
+        conn = duckdb.connect(self.db_path)
+        conn.execute('CREATE TABLE data ("cohortPatientId" VARCHAR, age INTEGER, "value" VARCHAR)')
+        conn.executemany('INSERT INTO data VALUES (?, ?, ?)', [
+            ['P001', 30, 'a'],
+            ['P002', 41, 'a'],
+            ['P002', None, ''],
+            ['', 25, None],
+            [None, 30, 'b'],
+        ])
+        conn.close()
+
+    def connect(self):
+        conn = duckdb.connect(self.db_path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_stats_cover_every_column_in_one_pass(self):
+        stats = {column['column_name']: column for column in compute_column_stats(self.connect(), top_k=2)}
+
+        patient = stats['cohortPatientId']
+        self.assertEqual(
+            (patient['row_count'], patient['null_count'], patient['empty_count'], patient['distinct_count']),
+            (5, 1, 1, 2)
+        )
+        self.assertEqual(patient['top_values'], [{'value': 'P002', 'count': 2}, {'value': 'P001', 'count': 1}])
+        self.assertEqual((patient['min_length'], patient['max_length']), (4, 4))
+        self.assertTrue(patient['distinct_exact'])
+        # VARCHAR extremes would be lexicographic, so only typed columns keep them
+        self.assertEqual((patient['min_value'], patient['max_value']), (None, None))
+
+        age = stats['age']
+        self.assertEqual((age['column_type'], age['min_value'], age['max_value']), ('INTEGER', '25', '41'))
+        self.assertEqual(age['top_values'][0], {'value': '30', 'count': 2})
+        self.assertEqual(stats['value']['distinct_count'], 2)
+
+    def test_sidecar_round_trip_and_staleness(self):
+        conn = self.connect()
+        self.assertIsNone(read_column_stats(conn))
+
+        write_column_stats(conn)
+        write_column_stats(conn)
+        stats = read_column_stats(conn, columns=['age'])
+        self.assertEqual(list(stats), ['age'])
+        self.assertEqual(stats['age']['null_count'], 1)
+        self.assertEqual(len(read_column_stats(conn)), 3)
+
+        conn.execute("INSERT INTO data VALUES ('P003', 50, 'c')")
+        self.assertIsNone(read_column_stats(conn))
+
+    def test_sidecar_is_stale_once_the_table_is_reloaded(self):
+        conn = self.connect()
+        write_column_stats(conn)
+        self.assertIsNotNone(read_column_stats(conn))
+
+        # Same row count, different content
+        conn.execute("CREATE OR REPLACE TABLE data AS SELECT upper(\"cohortPatientId\") AS \"cohortPatientId\", "
+                     "age + 1 AS age, \"value\" FROM data")
+        self.assertIsNone(read_column_stats(conn))
+
+        write_column_stats(conn)
+        self.assertEqual(read_column_stats(conn)['age']['min_value'], '26')
+
+    def test_sidecar_without_load_marker_is_ignored(self):
+        conn = self.connect()
+        conn.execute("CREATE TABLE column_stats AS SELECT 'data' AS table_name, 'age' AS column_name, 5 AS row_count")
+        self.assertIsNone(read_column_stats(conn))
+
+    def test_high_cardinality_columns_get_an_estimate_only(self):
+        conn = self.connect()
+        with mock.patch('depot.services.data_statistics.TOP_VALUES_MAX_DISTINCT', 1):
+            write_column_stats(conn)
+        conn.close()
+
+        variable_def = {'name': 'cohortPatientId', 'type': 'id', 'validators': []}
+        with VariableValidator(self.db_path, variable_def, None) as validator:
+            column = validator._sidecar_stats()
+            with mock.patch.object(validator, 'conn', wraps=validator.conn) as conn:
+                summary = validator._generate_id_summary(validator._get_basic_stats())
+            queries = [call.args[0] for call in conn.execute.call_args_list]
+
+        self.assertEqual((column['distinct_count'], column['distinct_exact'], column['top_values']), (2, False, []))
+        # Duplicates are counted exactly, not from the estimate
+        self.assertTrue(any('COUNT(DISTINCT' in query for query in queries))
+        self.assertEqual((summary['unique_count'], summary['duplicate_count']), (3, 1))
+
+    def test_statistics_service_reads_the_sidecar(self):
+        conn = self.connect()
+        computed = DataFileStatisticsService(conn).compute_all_columns_statistics()
+        write_column_stats(conn)
+
+        with mock.patch('depot.services.data_statistics.compute_column_stats',
+                        side_effect=AssertionError('rescanned')):
+            stored = DataFileStatisticsService(conn).compute_all_columns_statistics()
+
+        self.assertEqual(stored, computed)
+        self.assertEqual(stored['cohortPatientId']['valid_count'], 3)
+        self.assertEqual(stored['cohortPatientId']['sample_values'], ['P002', 'P001'])
+
+    def test_validator_uses_the_sidecar(self):
+        conn = duckdb.connect(self.db_path)
+        write_column_stats(conn)
+        conn.close()
+        variable_def = {'name': 'cohortPatientId', 'type': 'id', 'validators': []}
+
+        with VariableValidator(self.db_path, variable_def, None) as validator:
+            with mock.patch.object(validator, 'conn', wraps=validator.conn) as conn:
+                stats = validator._get_basic_stats()
+                summary = validator._generate_id_summary(stats)
+            queries = [call.args[0] for call in conn.execute.call_args_list]
+
+        self.assertEqual(stats, {'total_rows': 5, 'null_count': 1, 'empty_count': 1})
+        self.assertEqual((summary['unique_count'], summary['duplicate_count']), (3, 1))
+        self.assertFalse(any('COUNT(DISTINCT' in query for query in queries))
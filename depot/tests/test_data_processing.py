@@ -5,15 +5,18 @@ Tests the DataMappingService which handles:
 - Column renaming (e.g., sitePatientId -> cohortPatientId)
 - Case-insensitive column matching
 - Column name normalization to data definition casing
+- Compiling mappings into a DuckDB projection
 """
 import tempfile
 import os
 from pathlib import Path
-from django.test import TestCase
+
+import duckdb
+from django.test import SimpleTestCase, TestCase
 from django.db import connection
 
 from depot.models import Cohort, DataFileType
-from depot.services.data_mapping import DataMappingService
+from depot.services.data_mapping import DataMappingService, MalformedFileError
 
 
 # Fixture: Patient CSV with CNICS cohort column names (sitePatientId instead of cohortPatientId)
@@ -341,3 +344,121 @@ class DataProcessingServiceCNICSCohortsTest(TestCase):
                 'cnics',
                 f"{cohort_name} should be mapped to 'cnics' group"
             )
+
+
+class DataMappingProjectionTest(SimpleTestCase):
+    """Test the DuckDB projection compiled from a cohort mapping."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.service = DataMappingService(cohort_name='UNC - Chapel Hill', data_file_type='patient')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write(self, name, content, mode='w'):
+        path = Path(self.temp_dir.name) / name
+        with open(path, mode) as f:
+            f.write(content)
+        return str(path)
+
+    def test_projection_renames_and_normalizes_header_only(self):
+        expressions, changes = self.service.compile_projection(['SitePatientID', 'RACE', 'extraCol'])
+
+        self.assertEqual(expressions, [
+            '"SitePatientID" AS "cohortPatientId"',
+            '"RACE" AS "race"',
+            '"extraCol" AS "extraCol"',
+        ])
+        self.assertEqual(changes['renamed_columns'], [{'source': 'SitePatientID', 'target': 'cohortPatientId'}])
+        self.assertEqual(changes['unmapped_columns'], ['extraCol'])
+        self.assertEqual(changes['summary']['columns_normalized'], 1)
+
+    def test_value_remaps_and_defaults(self):
+        self.service.mapping_definition = {
+            'column_mappings': [{'source_column': 'sitePatientId', 'target_column': 'cohortPatientId'}],
+            'value_remaps': {'sex': {'1': 'Male', '2': "Women's"}},
+            'defaults': {'values': {'subSiteID': 'main'}},
+        }
+        raw_path = self._write('raw.csv', 'sitePatientId,sex\nP1,1\nP2,2\nP3,9\n')
+
+        conn = duckdb.connect()
+        try:
+            changes = self.service.load_into_duckdb(conn, [raw_path])
+            rows = conn.execute('SELECT cohortPatientId, sex, subSiteID FROM data ORDER BY 1').fetchall()
+        finally:
+            conn.close()
+
+        self.assertEqual(rows, [('P1', 'Male', 'main'), ('P2', "Women's", 'main'), ('P3', '9', 'main')])
+        self.assertEqual(changes['value_remaps'], {'sex': 2})
+        self.assertEqual(changes['defaults_applied'], {'subSiteID': 'main'})
+
+    def test_load_combines_files_by_column_name(self):
+        first = self._write('a.csv', b'\xef\xbb\xbfsitePatientId,race\r\nP1,1\r\n', mode='wb')
+        second = self._write('b.csv', 'race,SITEPATIENTID\n2,P2\n')
+
+        conn = duckdb.connect()
+        try:
+            changes = self.service.load_into_duckdb(conn, [first, second])
+            rows = conn.execute('SELECT cohortPatientId, race FROM data ORDER BY 1').fetchall()
+            output_path = str(Path(self.temp_dir.name) / 'processed.csv')
+            written = DataMappingService.export_processed_csv(conn, output_path)
+        finally:
+            conn.close()
+
+        self.assertEqual(rows, [('P1', '1'), ('P2', '2')])
+        self.assertEqual(changes['summary']['rows_processed'], 2)
+        self.assertTrue(changes['file_cleaning']['had_bom'])
+        self.assertEqual(written, 2)
+        with open(output_path) as f:
+            self.assertEqual(f.readline().strip(), 'cohortPatientId,race')
+
+    def test_lone_and_mixed_cr_line_endings_are_cleaned_before_loading(self):
+        raw_path = self._write('raw.csv', b'cohortPatientId,birthYear\r\nA,1990\rB,1991\nC,1992\n', mode='wb')
+
+        conn = duckdb.connect()
+        try:
+            changes = self.service.load_into_duckdb(conn, [raw_path])
+            rows = conn.execute('SELECT cohortPatientId, birthYear FROM data ORDER BY 1').fetchall()
+        finally:
+            conn.close()
+
+        self.assertEqual(rows, [('A', '1990'), ('B', '1991'), ('C', '1992')])
+        self.assertTrue(changes['file_cleaning']['had_crlf'])
+        self.assertEqual(os.listdir(self.temp_dir.name), ['raw.csv'])
+
+    def test_malformed_rows_raise_instead_of_being_dropped(self):
+        raw_path = self._write('raw.csv', 'cohortPatientId,birthYear\nA,1990\nB,1991,extra\n')
+
+        conn = duckdb.connect()
+        try:
+            with self.assertRaises(MalformedFileError) as raised:
+                self.service.load_into_duckdb(conn, [raw_path])
+        finally:
+            conn.close()
+
+        self.assertEqual(raised.exception.line, 3)
+        self.assertTrue(str(raised.exception).startswith('Line 3: Expected Number of Columns: 2 Found: 3.'))
+
+    def test_malformed_row_names_the_file_it_came_from(self):
+        good = self._write('a.csv', 'cohortPatientId,birthYear\nA,1990\n')
+        bad = self._write('b.csv', 'cohortPatientId,birthYear\nB,1991\nC,1992,extra\n')
+
+        conn = duckdb.connect()
+        try:
+            with self.assertRaises(MalformedFileError) as raised:
+                self.service.load_into_duckdb(conn, [good, bad])
+        finally:
+            conn.close()
+
+        self.assertEqual(raised.exception.file_number, 2)
+        self.assertTrue(str(raised.exception).startswith('File 2 of 2, line 3: '))
+
+    def test_process_file_reports_malformed_rows(self):
+        raw_path = self._write('raw.csv', 'SitePatientID,birthYear\nA,1990\nB,1991,extra\n')
+        output_path = str(Path(self.temp_dir.name) / 'processed.csv')
+
+        changes = self.service.process_file(raw_path, output_path)
+
+        self.assertEqual(len(changes['errors']), 1)
+        self.assertTrue(changes['errors'][0].startswith('Line 3: Expected Number of Columns: 2 Found: 3.'))
@@ -0,0 +1,28 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+
+from depot.utils.db_connections import recycle_stale_connections
+
+
+class RecycleStaleConnectionsTests(TestCase):
+
+    def test_connection_in_atomic_block_is_left_open(self):
+        connection.ensure_connection()
+        self.assertTrue(connection.in_atomic_block)
+
+        with patch.object(connection, 'close_if_unusable_or_obsolete') as close:
+            recycle_stale_connections()
+
+        close.assert_not_called()
+        self.assertTrue(connection.is_usable())
+
+    def test_connection_outside_atomic_block_is_checked(self):
+        connection.ensure_connection()
+
+        with patch.object(connection, 'in_atomic_block', False), \
+                patch.object(connection, 'close_if_unusable_or_obsolete') as close:
+            recycle_stale_connections()
+
+        close.assert_called_once()
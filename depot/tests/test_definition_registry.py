@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from depot.data.definition_loader import DefinitionRegistry, get_definition_for_type
+
+
+class DefinitionRegistryTests(SimpleTestCase):
+    databases = {}
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="definition-registry-"))
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir, ignore_errors=True))
+        self.definitions_dir = self.temp_dir / 'definitions'
+        self.mappings_dir = self.temp_dir / 'mappings'
+        self.definitions_dir.mkdir()
+        (self.mappings_dir / 'cohort_groups' / 'cnics').mkdir(parents=True)
+        self.registry = DefinitionRegistry(self.definitions_dir, self.mappings_dir)
+
+    def _write_json(self, path, data, mtime_ns=None):
+        path.write_text(json.dumps(data))
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_definition_is_cached_and_indexed(self):
+        self._write_json(self.definitions_dir / 'patient_definition.json', [
+            {'name': 'cohortPatientId', 'type': 'id', 'validators': ['no_duplicates']},
+            {'name': 'birthYear', 'type': 'year',
+             'validators': [{'name': 'range', 'params': [1900, 2025]}],
+             'summarizers': ['histogram']},
+        ])
+
+        first = self.registry.get_definition('patient')
+        second = self.registry.get_definition('patient')
+
+        self.assertIs(first, second)
+        self.assertEqual(first.get_variable_names(), ['cohortPatientId', 'birthYear'])
+        self.assertEqual(first.get_variable('birthyear', case_sensitive=False)['type'], 'year')
+        self.assertEqual(first.validators_by_name['cohortPatientId'], [('no_duplicates', {})])
+        self.assertEqual(first.validators_by_name['birthYear'], [('range', [1900, 2025])])
+        self.assertEqual(first.summarizers_by_name['birthYear'], ['histogram'])
+
+    def test_definition_reloads_when_mtime_changes(self):
+        path = self.definitions_dir / 'patient_definition.json'
+        self._write_json(path, [{'name': 'a'}], mtime_ns=1_000_000_000)
+        first = self.registry.get_definition('patient')
+
+        self._write_json(path, [{'name': 'a'}, {'name': 'b'}], mtime_ns=2_000_000_000)
+        second = self.registry.get_definition('patient')
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.get_variable_names(), ['a', 'b'])
+        self.assertNotEqual(first.version, second.version)
+
+    def test_missing_definition_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.registry.get_definition('nonexistent')
+
+    def test_mapping_path_falls_back_to_group_default(self):
+        group_dir = self.mappings_dir / 'cohort_groups' / 'cnics'
+        self._write_json(group_dir / '_default.json', {'column_mappings': []})
+        self._write_json(group_dir / 'patient.json', {'column_mappings': []})
+
+        self.assertEqual(self.registry.get_mapping_path('cnics', 'patient'), group_dir / 'patient.json')
+        self.assertEqual(self.registry.get_mapping_path('cnics', 'visit'), group_dir / '_default.json')
+        self.assertIsNone(self.registry.get_mapping_path('other', 'patient'))
+
+    def test_mapping_registry_missing_returns_none(self):
+        self.assertIsNone(self.registry.get_mapping_registry())
+
+    def test_shipped_definitions_share_one_instance(self):
+        self.assertIs(get_definition_for_type('patient'), get_definition_for_type('patient'))
+
+    def test_raw_json_and_definition_are_cached_separately(self):
+        path = self.definitions_dir / 'patient_definition.json'
+        self._write_json(path, [{'name': 'a'}])
+
+        definition = self.registry.get_definition('patient')
+        raw = self.registry.load_json(path)
+
+        self.assertEqual(raw, [{'name': 'a'}])
+        self.assertEqual(definition.get_variable_names(), ['a'])
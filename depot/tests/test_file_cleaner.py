@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, TestCase
+
+from depot.models import Cohort, PHIFileTracking, User
+from depot.services.file_cleaner import FileCleanerService
+
+
+class FileCleanerServiceTests(SimpleTestCase):
+    databases = {}
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="file-cleaner-")
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir, ignore_errors=True))
+
+    def _write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_strips_bom_and_normalizes_line_endings(self):
+        src = self._write('in.csv', FileCleanerService.UTF8_BOM + b'a,b\r\n1,2\r3,4\n5,6')
+        dst = os.path.join(self.temp_dir, 'out.csv')
+
+        result = FileCleanerService.clean_file(src, dst)
+
+        self.assertEqual(self._read(dst), b'a,b\n1,2\n3,4\n5,6')
+        self.assertTrue(result['had_bom'])
+        self.assertTrue(result['had_crlf'])
+        self.assertEqual(result['lines_processed'], 3)
+        self.assertEqual(result['bytes_after'], len(b'a,b\n1,2\n3,4\n5,6'))
+
+    def test_crlf_split_across_buffers_is_one_newline(self):
+        data = b'ab\r\ncd\r\nef\r\n'
+        src = self._write('in.csv', data)
+        dst = os.path.join(self.temp_dir, 'out.csv')
+
+        # Chunk sizes of 1-4 bytes put CR and LF in separate buffers
+        for chunk_size in (1, 2, 3, 4):
+            with self.subTest(chunk_size=chunk_size):
+                result = FileCleanerService.clean_file(src, dst, chunk_size=chunk_size)
+                self.assertEqual(self._read(dst), b'ab\ncd\nef\n')
+                self.assertEqual(result['lines_processed'], 3)
+
+    def test_bom_split_across_buffers(self):
+        src = self._write('in.csv', FileCleanerService.UTF8_BOM + b'x\n')
+        dst = os.path.join(self.temp_dir, 'out.csv')
+
+        result = FileCleanerService.clean_file(src, dst, chunk_size=1)
+
+        self.assertTrue(result['had_bom'])
+        self.assertEqual(self._read(dst), b'x\n')
+
+    def test_trailing_cr_becomes_newline(self):
+        src = self._write('in.csv', b'a\r')
+        dst = os.path.join(self.temp_dir, 'out.csv')
+
+        FileCleanerService.clean_file(src, dst, chunk_size=1)
+
+        self.assertEqual(self._read(dst), b'a\n')
+
+    def test_clean_in_place(self):
+        src = self._write('in.csv', b'a\r\nb\r\n')
+
+        FileCleanerService.clean_file(src)
+
+        self.assertEqual(self._read(src), b'a\nb\n')
+        self.assertEqual(os.listdir(self.temp_dir), ['in.csv'])
+
+    def test_clean_in_place_keeps_permissions(self):
+        src = self._write('in.csv', b'a\r\nb\r\n')
+        os.chmod(src, 0o640)
+
+        FileCleanerService.clean_file(src)
+
+        self.assertEqual(os.stat(src).st_mode & 0o777, 0o640)
+
+    def test_open_cleaned_streams_without_intermediate_file(self):
+        src = self._write('in.csv', FileCleanerService.UTF8_BOM + b'a\r\nb\r\n')
+
+        with FileCleanerService.open_cleaned(src, chunk_size=2) as reader:
+            self.assertEqual(reader.read(), b'a\nb\n')
+            self.assertTrue(reader.result()['had_bom'])
+
+    def test_needs_cleaning_only_for_bom_or_lone_cr(self):
+        cases = {
+            b'a,b\n1,2\n': False,
+            b'a,b\r\n1,2\r\n': False,
+            FileCleanerService.UTF8_BOM + b'a,b\n': True,
+            b'a,b\r\n1,2\r3,4\n': True,
+            b'a,b\n1,2\r': True,
+        }
+        for data, expected in cases.items():
+            for chunk_size in (1, 2, 3, 1024):
+                with self.subTest(data=data, chunk_size=chunk_size):
+                    src = self._write('in.csv', data)
+                    self.assertEqual(FileCleanerService.needs_cleaning(src, chunk_size)['needs_cleaning'], expected)
+
+    def test_cleaned_path_reads_clean_files_in_place(self):
+        src = self._write('in.csv', b'a,b\r\n1,2\r\n')
+
+        with FileCleanerService.cleaned_path(src, chunk_size=3) as (path, result):
+            self.assertEqual(path, src)
+            self.assertEqual(os.listdir(self.temp_dir), ['in.csv'])
+
+        self.assertTrue(result['had_crlf'])
+        self.assertEqual((result['lines_processed'], result['bytes_after']), (2, 10))
+
+    def test_cleaned_path_copies_files_with_lone_cr(self):
+        src = self._write('in.csv', b'a,b\r1,2\r')
+
+        with FileCleanerService.cleaned_path(src) as (path, result):
+            self.assertNotEqual(path, src)
+            self.assertEqual(self._read(path), b'a,b\n1,2\n')
+
+        self.assertEqual(self._read(src), b'a,b\r1,2\r')
+        self.assertEqual(os.listdir(self.temp_dir), ['in.csv'])
+
+
+class CleanedCopyTrackingTests(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="file-cleaner-")
+        self.addCleanup(lambda: shutil.rmtree(self.temp_dir, ignore_errors=True))
+        self.user = User.objects.create_user(username='cleaner', password='pw')
+        self.cohort = Cohort.objects.create(name='Cleaning Cohort')
+
+    def _write(self, data):
+        path = os.path.join(self.temp_dir, 'in.csv')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_copies_are_tracked_and_marked_cleaned_up(self):
+        src = self._write(FileCleanerService.UTF8_BOM + b'a,b\n')
+        tracking = {'cohort': self.cohort, 'user': self.user}
+
+        with PHIFileTracking.batched(), FileCleanerService.cleaned_path(src, tracking) as (path, _):
+            pass
+
+        records = PHIFileTracking.objects.filter(file_path=path).order_by('id')
+        self.assertEqual([r.action for r in records], ['work_copy_created', 'work_copy_deleted'])
+        self.assertEqual({r.file_type for r in records}, {'temp_working'})
+        self.assertTrue(records[0].cleaned_up)
+
+    def test_files_read_in_place_are_not_tracked(self):
+        src = self._write(b'a,b\n')
+
+        with FileCleanerService.cleaned_path(src, {'cohort': self.cohort, 'user': self.user}):
+            pass
+
+        self.assertFalse(PHIFileTracking.objects.exists())
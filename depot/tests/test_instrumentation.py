@@ -0,0 +1,159 @@
+"""
+Tests for pipeline span instrumentation.
+"""
+import os
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from depot.celery import record_task_message_size
+from depot.models import DataFileType, ValidationRun, ValidationVariable
+from depot.utils import instrumentation
+from depot.utils.instrumentation import collect_spans, persist_spans, span, summarize_spans, timed
+
+
+class SpanTest(SimpleTestCase):
+
+    def test_spans_collected_with_depth_bytes_and_attrs(self):
+        with collect_spans() as spans:
+            with span('outer', file_type='patient') as outer:
+                with span('inner') as inner:
+                    inner.add_bytes(10)
+                    inner.add_bytes(5)
+                outer.set(rows=3)
+
+        self.assertEqual([s['name'] for s in spans], ['inner', 'outer'])
+        inner, outer = spans
+        self.assertEqual(inner['depth'], 1)
+        self.assertEqual(inner['bytes'], 15)
+        self.assertNotIn('depth', outer)
+        self.assertEqual(outer['attrs'], {'file_type': 'patient', 'rows': 3})
+        self.assertGreater(outer['peak_rss_mb'], 0)
+        self.assertGreaterEqual(outer['ms'], inner['ms'])
+
+    def test_errors_recorded_and_reraised(self):
+        with collect_spans() as spans:
+            with self.assertRaises(ValueError):
+                with span('failing'):
+                    raise ValueError('boom')
+
+        self.assertEqual(spans[0]['error'], 'ValueError')
+
+    def test_timed_decorator_and_nested_collectors(self):
+        @timed('work')
+        def work():
+            return 42
+
+        with collect_spans() as outer:
+            with collect_spans() as inner:
+                self.assertEqual(work(), 42)
+
+        self.assertEqual([s['name'] for s in inner], ['work'])
+        self.assertEqual([s['name'] for s in outer], ['work'])
+
+    def test_spans_outside_collector_are_dropped(self):
+        with span('ignored'):
+            pass
+        with collect_spans() as spans:
+            pass
+        self.assertEqual(spans, [])
+
+    def test_summarize_spans(self):
+        spans = [
+            {'name': 'phi.hash', 'ms': 500, 'bytes': 100, 'peak_rss_mb': 10},
+            {'name': 'phi.hash', 'ms': 250, 'bytes': 50, 'peak_rss_mb': 20, 'error': 'OSError'},
+        ]
+        self.assertEqual(summarize_spans(spans)['phi.hash'], {
+            'count': 2, 'seconds': 0.75, 'bytes': 150, 'errors': 1, 'peak_rss_mb': 20,
+        })
+
+
+class PersistSpansTest(TestCase):
+
+    def setUp(self):
+        data_file_type = DataFileType.objects.create(name='patient', label='Patient Record')
+        self.run = ValidationRun.objects.create(
+            content_type=ContentType.objects.get_for_model(data_file_type),
+            object_id=data_file_type.id,
+            data_file_type=data_file_type,
+        )
+        cache.clear()
+        self.addCleanup(cache.clear)
+        patcher = mock.patch.dict(os.environ, {'INTERNAL_API_KEY': 'metrics-key'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_metrics(self, **headers):
+        return self.client.get('/health/metrics/', HTTP_X_API_KEY='metrics-key', **headers)
+
+    def test_persist_appends_and_trims(self):
+        with collect_spans() as spans:
+            for _ in range(3):
+                with span('validation.variable', column='cohortPatientId'):
+                    pass
+
+        persist_spans(ValidationRun, self.run.id, spans[:2])
+        with mock.patch.object(instrumentation, 'MAX_PERSISTED_SPANS', 2):
+            persist_spans(ValidationRun, self.run.id, spans[2:])
+
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.pipeline_spans, spans[1:])
+
+    @override_settings(SERVER_ROLE='services')
+    def test_health_metrics_exports_prometheus_text(self):
+        with collect_spans() as spans:
+            with span('phi.hash') as s:
+                s.add_bytes(2048)
+        persist_spans(ValidationRun, self.run.id, spans)
+
+        response = self.get_metrics()
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE naaccord_pipeline_span_seconds gauge', body)
+        self.assertNotIn('counter', body)
+        self.assertIn('naaccord_pipeline_span_count{span="phi.hash"} 1', body)
+        self.assertIn('naaccord_pipeline_span_bytes{span="phi.hash"} 2048', body)
+
+    @override_settings(SERVER_ROLE='services')
+    def test_health_metrics_flushes_buffered_message_sizes(self):
+        # Published outside any span collector, as workflow builders do
+        record_task_message_size(sender='depot.tasks.duckdb_creation.create_duckdb_task', body=((1,), {}, {}))
+
+        body = self.get_metrics().content.decode()
+
+        self.assertIn('naaccord_celery_messages{task="depot.tasks.duckdb_creation.create_duckdb_task"} 1', body)
+
+    @override_settings(SERVER_ROLE='services')
+    def test_health_metrics_requires_internal_api_key(self):
+        self.assertEqual(self.client.get('/health/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/health/metrics/', HTTP_X_API_KEY='wrong').status_code, 403)
+
+    @override_settings(SERVER_ROLE='services')
+    def test_health_metrics_cached_between_scrapes(self):
+        self.get_metrics()
+        with mock.patch('depot.views.health.prometheus_metrics') as render:
+            self.assertEqual(self.get_metrics().status_code, 200)
+        render.assert_not_called()
+
+    @override_settings(SERVER_ROLE='services')
+    def test_variable_spans_kept_per_variable_and_exported(self):
+        variable = ValidationVariable.objects.create(
+            validation_run=self.run, column_name='cohortPatientId', column_type='id', display_name='Patient ID'
+        )
+        with collect_spans() as spans:
+            with span('validation.variable', column='cohortPatientId'):
+                pass
+        persist_spans(ValidationVariable, variable.id, spans)
+
+        variable.refresh_from_db()
+        self.run.refresh_from_db()
+        self.assertEqual(variable.pipeline_spans, spans)
+        self.assertEqual(self.run.pipeline_spans, [])
+        self.assertIn('naaccord_pipeline_span_count{span="validation.variable"} 1', self.get_metrics().content.decode())
+
+    @override_settings(SERVER_ROLE='web')
+    def test_health_metrics_not_served_by_web(self):
+        self.assertEqual(self.get_metrics().status_code, 404)
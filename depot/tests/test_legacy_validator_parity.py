@@ -0,0 +1,166 @@
+"""
+Parity between the row-wise legacy validators (``handle``) and their
+set-based DuckDB equivalents (``handle_duckdb``) on generated string data.
+"""
+import importlib
+import random
+import types
+
+import duckdb
+import pandas as pd
+from django.test import SimpleTestCase
+
+from depot.data.validator import LEGACY_ROW_COLUMN, Validator
+
+EDGE_VALUES = [
+    None, "", " ", "0", "1", "-1", "+7", " 12 ", "1_000", "1__0", "_1", "007",
+    "1.5", "-0.25", ".5", "5.", "1e3", "1E-2", "1e", "inf", "-Infinity", "NaN", "nan ",
+    "abc", "Y", "N", "yes", "no", "true", "True", "9", "99", "１２", "\u3000٣", "\x1c5", "1\u00a0",
+    "1999", "2024", "999", "3000", "12345678901234567890123456789012345678901234",
+    "2024-01-31", "2024-02-30", "2024-2-5", "2024-02-05 ", " 2024-02-05", "2024/02/05",
+    "1677-09-21", "1677-09-22", "2262-04-11", "2262-04-12", "0001-01-01", "20240205",
+    "02/05/2024", "2/5/2024", "13/01/2024", "a'b", "\t", "1\n",
+    "NaT", "NaN", "now", "today", "epoch", "Infinity", "-infinity",
+]
+
+PARAMETER_SETS = [
+    ("required", True),
+    ("required", False),
+    ("required", {"optional_when": "other"}),
+    ("required", {"optional_when": "missing"}),
+    ("recommended", {}),
+    ("recommended", {"message": "Please provide `x`."}),
+    ("required_when", {"absent": "other"}),
+    ("required_when", {"present": "other"}),
+    ("required_when", {"absent": "missing"}),
+    ("required_when", {"present": "missing"}),
+    ("required_when", {}),
+    ("forbidden_when", {"absent": "other"}),
+    ("forbidden_when", {"present": "other"}),
+    ("forbidden_when", {"present": "missing"}),
+    ("forbidden_when", {"absent": "other", "present": "other"}),
+    ("string", None),
+    ("int", None),
+    ("float", None),
+    ("range", (0, 100)),
+    ("range", [-1.5, 1e3]),
+    ("range", (float("-inf"), 0)),
+    ("year", None),
+    ("year", {"min_year": 1900, "max_year": 2030}),
+    ("enum_allowed_values", ["Y", "N", {"value": "9", "description": "Unknown"}, 1]),
+    ("enum_allowed_values", [0, 1]),
+    ("boolean_allowed_values", {"True": ["Y", 1], "False": ["N", 0], "Unknown": [9]}),
+    ("boolean_allowed_values", {}),
+    ("no_duplicates", None),
+    ("date", {}),
+    ("date", {"date_format": "YYYY-MM-DD"}),
+    ("date", {"pd_format": "%Y-%m-%d", "date_format": None}),
+    ("date", {"pd_format": "%m/%d/%Y", "date_format": "%m/%d/%Y"}),
+    ("date", {"pd_format": "%Y%m%d", "date_format": "%Y%m%d"}),
+]
+
+
+def generate_frame(seed, rows=400):
+    rng = random.Random(seed)
+
+    def value():
+        roll = rng.random()
+        if roll < 0.6:
+            return rng.choice(EDGE_VALUES)
+        if roll < 0.8:
+            return str(rng.randint(-50, 3000))
+        return f"{rng.randint(1600, 2300):04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 31):02d}"
+
+    return pd.DataFrame(
+        {
+            "x": [value() for _ in range(rows)],
+            "other": [rng.choice([None, "", "1", "0", "abc"]) for _ in range(rows)],
+        },
+        dtype=object,
+    )
+
+
+def comparable(report):
+    return {
+        **report,
+        "failure_messages": sorted(report["failure_messages"]),
+        "warnings": sorted(report["warnings"]),
+    }
+
+
+class LegacyValidatorParityTest(SimpleTestCase):
+
+    def run_both(self, name, params, df):
+        module = importlib.import_module(f"depot.data.validators.{name}")
+        legacy = module.Validator().handle("x", df, params)
+
+        conn = Validator().connect_duckdb(df)
+        try:
+            vectorized = module.Validator().handle_duckdb("x", conn, "data", params, row_column=LEGACY_ROW_COLUMN)
+        finally:
+            conn.close()
+        return comparable(legacy), comparable(vectorized)
+
+    def test_every_validator_has_a_duckdb_form(self):
+        for name, params in PARAMETER_SETS:
+            module = importlib.import_module(f"depot.data.validators.{name}")
+            with self.subTest(validator=name, params=params):
+                self.assertIsNotNone(module.Validator().sql_rules('"x"', params or {}, ["x", "other"]))
+
+    def test_reports_match_on_generated_data(self):
+        for seed in range(3):
+            df = generate_frame(seed)
+            for name, params in PARAMETER_SETS:
+                with self.subTest(seed=seed, validator=name, params=params):
+                    legacy, vectorized = self.run_both(name, params, df)
+                    self.assertEqual(vectorized, legacy)
+
+    def test_reports_match_on_every_edge_value(self):
+        others = [None, "1"] * len(EDGE_VALUES)
+        df = pd.DataFrame({"x": EDGE_VALUES, "other": others[:len(EDGE_VALUES)]}, dtype=object)
+        for name, params in PARAMETER_SETS:
+            with self.subTest(validator=name, params=params):
+                legacy, vectorized = self.run_both(name, params, df)
+                self.assertEqual(vectorized, legacy)
+
+    def test_row_numbers_follow_the_frame_index(self):
+        df = generate_frame(7, rows=50)
+        df.index = range(100, 150)
+        legacy, vectorized = self.run_both("int", None, df)
+
+        self.assertEqual(vectorized["errors"], legacy["errors"])
+
+    def test_range_params_are_checked(self):
+        conn = duckdb.connect()
+        conn.execute("CREATE VIEW data AS SELECT '1' AS x, 1 AS row_no")
+        module = importlib.import_module("depot.data.validators.range")
+        with self.assertRaises(ValueError):
+            module.Validator().handle_duckdb("x", conn, "data", (1, 2, 3))
+        conn.close()
+
+
+class ValidatorEngineTest(SimpleTestCase):
+
+    definition = types.SimpleNamespace(definition=[
+        {"name": "x", "type": "int", "validators": ["no_duplicates"]},
+        {"name": "other", "type": "enum", "allowed_values": ["1", "0"], "value_optional": True},
+        {"name": "absent", "type": "string"},
+    ])
+
+    def test_engines_agree(self):
+        df = generate_frame(11)
+        self.assertTrue(Validator().duckdb_compatible(df))
+
+        self.assertEqual(
+            Validator().handle(self.definition, df, engine="duckdb"),
+            Validator().handle(self.definition, df, engine="pandas"),
+        )
+
+    def test_non_string_frames_run_row_wise(self):
+        df = pd.DataFrame({"x": [1, 2, 2], "other": ["1", float("nan"), "0"]})
+        self.assertFalse(Validator().duckdb_compatible(df))
+
+        self.assertEqual(
+            Validator().handle(self.definition, df, engine="duckdb"),
+            Validator().handle(self.definition, df, engine="pandas"),
+        )
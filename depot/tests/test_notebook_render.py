@@ -0,0 +1,232 @@
+"""
+Tests for notebook template staging, the warm render pool and the render cache.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from depot.models import (
+    Cohort,
+    DataFileType,
+    Notebook,
+    NotebookRenderCache,
+    PHIFileTracking,
+    PrecheckRun,
+    User,
+)
+from depot.services.notebook import NotebookService
+from depot.services.notebook_render import (
+    RENDER_POOL_DIR,
+    RenderPool,
+    evict_render_cache,
+    link_staged_template,
+    stage_template,
+    template_version,
+)
+from depot.storage.local import LocalFileSystemStorage
+
+# Speaks the worker protocol without R: echoes each forwarded call back
+FAKE_WORKER = """#!{python}
+import json, sys
+print('R startup noise', flush=True)
+print('@@NAACCORD@@' + json.dumps({{'ready': True}}), flush=True)
+for line in sys.stdin:
+    req = json.loads(line)
+    out = 'ran %s %s stdin=%s' % (req['script'].rsplit('/', 1)[-1], ' '.join(req['args']), req['stdin'])
+    print('@@NAACCORD@@' + json.dumps({{'status': 3, 'stdout': out, 'stderr': 'warn'}}), flush=True)
+"""
+
+
+class StageTemplateTest(SimpleTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.template = Path(settings.BASE_DIR) / 'depot' / 'notebooks' / 'audit' / 'generic_audit.qmd'
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_stages_once_and_links_into_working_dir(self):
+        staged = stage_template(self.template, self.root / 'staging')
+        self.assertEqual(stage_template(self.template, self.root / 'staging'), staged)
+        self.assertEqual(len(list((self.root / 'staging').iterdir())), 1)
+
+        working = self.root / 'render'
+        working.mkdir()
+        link_staged_template(staged, working)
+
+        notebook = working / 'depot' / 'notebooks' / 'notebook.qmd'
+        self.assertEqual(notebook.read_bytes(), self.template.read_bytes())
+        self.assertTrue((working / 'depot' / 'scaffold_r.R').exists())
+        self.assertTrue((working / 'depot' / 'data' / 'definitions' / 'patient_definition.json').exists())
+        self.assertTrue((working / 'depot' / 'notebooks' / 'setup.R').exists())
+        self.assertEqual(os.stat(notebook).st_ino, os.stat(staged / 'depot' / 'notebooks' / 'notebook.qmd').st_ino)
+
+    def test_version_follows_template_content(self):
+        template = self.root / 'audit' / 'custom.qmd'
+        template.parent.mkdir()
+        template.write_text('one')
+        first = template_version(template)
+
+        template.write_text('two')
+        self.assertNotEqual(template_version(template), first)
+        self.assertNotEqual(stage_template(template, self.root / 'staging').name, first[:16])
+
+    def test_missing_template_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            stage_template(self.root / 'missing.qmd', self.root / 'staging')
+
+
+class RenderPoolTest(SimpleTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rscript = Path(self.temp_dir.name) / 'fake_rscript'
+        self.rscript.write_text(FAKE_WORKER.format(python=sys.executable))
+        self.rscript.chmod(0o755)
+        self.pool = RenderPool(size=1, recycle_after=2, rscript=str(self.rscript))
+
+    def tearDown(self):
+        self.pool.shutdown()
+        self.temp_dir.cleanup()
+
+    def _run_shim(self, pool_env, *args):
+        return subprocess.run(
+            [sys.executable, str(RENDER_POOL_DIR / 'Rscript'), *args],
+            input='request-json', capture_output=True, text=True,
+            env={**os.environ, **pool_env}, cwd=self.temp_dir.name,
+        )
+
+    def test_stand_in_rscript_forwards_to_warm_session(self):
+        with self.pool.session() as pool_env:
+            self.assertEqual(pool_env['QUARTO_R'], str(RENDER_POOL_DIR))
+            result = self._run_shim(pool_env, '--no-echo', 'rmd.R', 'execute')
+
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stdout, 'ran rmd.R execute stdin=request-json')
+        self.assertEqual(result.stderr, 'warn')
+
+    def test_sessions_reused_then_recycled(self):
+        with self.pool.session():
+            first = self.pool._idle.qsize()
+        worker = self.pool._idle.queue[0]
+        with self.pool.session():
+            pass
+
+        self.assertEqual(first, 0)
+        self.assertEqual(worker.renders, 2)
+        self.assertFalse(worker.alive())
+        self.assertEqual(self.pool._idle.qsize(), 0)
+
+        with self.pool.session():
+            self.assertEqual(self.pool._started, 1)
+
+
+class NotebookRenderCacheTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.data_file = self.root / 'patient.duckdb'
+        self.data_file.write_bytes(b'duckdb bytes')
+
+        quarto_config = {
+            **settings.QUARTO_CONFIG,
+            'template_staging_dir': str(self.root / 'staging'),
+            'render_cache_max_bytes': 1000,
+            'render_cache_max_age_days': 30,
+        }
+        storage_config = {'disks': {'reports': {'driver': 'local', 'type': 'local', 'root': str(self.root / 'reports')}}}
+        self.settings_override = override_settings(QUARTO_CONFIG=quarto_config, STORAGE_CONFIG=storage_config)
+        self.settings_override.enable()
+        self.storage = LocalFileSystemStorage('reports')
+        storage_patch = mock.patch('depot.services.notebook.StorageManager.get_storage', return_value=self.storage)
+        storage_patch.start()
+        self.addCleanup(storage_patch.stop)
+
+        self.cohort = Cohort.objects.create(name='Cache Cohort')
+        self.data_file_type = DataFileType.objects.create(name='patient', label='Patient')
+        self.user = User.objects.create_user(username='cache@example.org', email='cache@example.org')
+        self.renders = 0
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.temp_dir.cleanup()
+
+    def _notebook(self):
+        precheck_run = PrecheckRun.objects.create(
+            cohort=self.cohort,
+            data_file_type=self.data_file_type,
+            uploaded_by=self.user,
+            result={'result': {'temp_file': str(self.data_file)}},
+        )
+        return Notebook.objects.create(
+            name='Patient report',
+            template_path='audit/generic_audit.qmd',
+            cohort=self.cohort,
+            data_file_type=self.data_file_type,
+            created_by=self.user,
+            content_object=precheck_run,
+        )
+
+    def _compile(self, notebook):
+        def fake_quarto(service):
+            self.renders += 1
+            (service.temp_dir / 'notebook.html').write_text(f'<html>render {self.renders}</html>')
+            service._quarto_completed = True
+
+        with mock.patch.object(NotebookService, '_run_quarto', fake_quarto):
+            self.assertTrue(NotebookService(notebook).compile())
+        notebook.refresh_from_db()
+        return notebook
+
+    def test_identical_inputs_reuse_compiled_report(self):
+        first = self._compile(self._notebook())
+        second = self._compile(self._notebook())
+
+        self.assertEqual(self.renders, 1)
+        self.assertIs(first.render_cache_hit, False)
+        self.assertIs(second.render_cache_hit, True)
+        self.assertEqual(second.status, 'completed')
+        self.assertEqual(self.storage.get_file(second.compiled_path), b'<html>render 1</html>')
+
+        entry = NotebookRenderCache.objects.get()
+        self.assertEqual(entry.hit_count, 1)
+        self.assertEqual(entry.cohort, self.cohort)
+        tracked = PHIFileTracking.objects.filter(action='nas_report_created', metadata__cache_key=entry.cache_key)
+        self.assertEqual(tracked.count(), 1)
+
+    def test_changed_data_renders_again(self):
+        self._compile(self._notebook())
+        self.data_file.write_bytes(b'resubmitted duckdb bytes')
+        notebook = self._compile(self._notebook())
+
+        self.assertEqual(self.renders, 2)
+        self.assertIs(notebook.render_cache_hit, False)
+        self.assertEqual(NotebookRenderCache.objects.count(), 2)
+
+    def test_eviction_respects_age_and_size_budget(self):
+        now = timezone.now()
+        for key, size, age in [('fresh', 400, 0), ('older', 400, 1), ('oldest', 400, 2), ('stale', 10, 60)]:
+            path = f'notebooks/cache/{key}.html'
+            self.storage.save(path, 'x' * size)
+            NotebookRenderCache.objects.create(
+                cache_key=key, storage_path=path, file_size=size, last_used_at=now - timedelta(days=age)
+            )
+
+        self.assertEqual(evict_render_cache(self.storage), 2)
+
+        self.assertEqual(set(NotebookRenderCache.objects.values_list('cache_key', flat=True)), {'fresh', 'older'})
+        self.assertFalse(self.storage.exists('notebooks/cache/oldest.html'))
+        self.assertFalse(self.storage.exists('notebooks/cache/stale.html'))
+        deleted = PHIFileTracking.objects.filter(action='nas_report_deleted')
+        self.assertEqual(sorted(r.metadata['cache_key'] for r in deleted), ['oldest', 'stale'])
@@ -0,0 +1,105 @@
+"""
+Patient IDs are extracted once per file content and reused by later stages.
+"""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from depot.models import (
+    Cohort,
+    CohortSubmission,
+    CohortSubmissionDataTable,
+    DataFileType,
+    DataTableFile,
+    DataTableFilePatientIDs,
+    ProtocolYear,
+)
+from depot.services.patient_id_extractor import PatientIDExtractor
+from depot.validation.validators.patient_ids import PatientIDValidator
+
+User = get_user_model()
+
+HASH = 'a' * 64
+
+
+def fail_scan(*args, **kwargs):
+    raise AssertionError('file should not be scanned again')
+
+
+class PatientIDExtractionReuseTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='uploader', email='u@example.com', password='pw')
+        cohort = Cohort.objects.create(name='Reuse Cohort', status='active', type='clinical')
+        protocol_year = ProtocolYear.objects.create(name='2024', year=2024, is_active=True)
+        self.submission = CohortSubmission.objects.create(
+            cohort=cohort, protocol_year=protocol_year, status='in_progress', started_by=self.user
+        )
+        self.file_type = DataFileType.objects.create(name='patient', label='Patient')
+        data_table = CohortSubmissionDataTable.objects.create(
+            submission=self.submission, data_file_type=self.file_type, status='not_started'
+        )
+        self.data_file = DataTableFile.objects.create(
+            data_table=data_table,
+            raw_file_path='1_Reuse/2024/patient/raw/patient_v1.csv',
+            file_hash='pending_async_calculation',
+            version=1,
+            uploaded_by=self.user,
+        )
+
+    def test_extraction_is_current_until_the_content_changes(self):
+        DataTableFilePatientIDs.record_extraction(self.data_file, ['P1', 'P2', 'P1'], content_hash=HASH)
+
+        record = DataTableFilePatientIDs.current_for(self.data_file)
+        self.assertEqual(sorted(record.patient_ids), ['P1', 'P2'])
+        self.assertEqual((record.source_path, record.content_hash), (self.data_file.raw_file_path, HASH))
+
+        self.data_file.file_hash = HASH
+        self.assertIsNotNone(DataTableFilePatientIDs.current_for(self.data_file))
+
+        self.data_file.file_hash = 'b' * 64
+        self.assertIsNone(DataTableFilePatientIDs.current_for(self.data_file))
+
+        self.data_file.file_hash = HASH
+        self.data_file.raw_file_path = '1_Reuse/2024/patient/raw/patient_v2.csv'
+        self.assertIsNone(DataTableFilePatientIDs.current_for(self.data_file))
+
+    def test_empty_extraction_is_not_reused(self):
+        DataTableFilePatientIDs.record_extraction(self.data_file, [])
+
+        self.assertIsNone(DataTableFilePatientIDs.current_for(self.data_file))
+
+    def test_extractor_reuses_recorded_ids(self):
+        DataTableFilePatientIDs.record_extraction(self.data_file, ['P1', 'P2'], warnings=['Found 1 duplicate'])
+        extractor = PatientIDExtractor()
+
+        with patch.object(extractor, '_extract_from_raw', fail_scan), \
+                patch.object(extractor, '_extract_from_duckdb', fail_scan):
+            self.assertEqual(sorted(extractor.extract_ids_from_data_file(self.data_file)), ['P1', 'P2'])
+            record = extractor.extract_from_data_table_file(self.data_file, self.user)
+
+        self.assertEqual(record.patient_count, 2)
+        self.assertEqual(record.extraction_error, 'Found 1 duplicate')
+        self.assertEqual(record.source_file, self.data_file)
+
+    def test_extractor_records_a_fresh_scan(self):
+        extractor = PatientIDExtractor()
+
+        with patch.object(extractor, '_extract_from_raw', return_value=(['P3'], [])) as scan:
+            extractor.extract_from_data_table_file(self.data_file, self.user)
+            extractor.extract_ids_from_data_file(self.data_file)
+
+        scan.assert_called_once()
+        self.assertEqual(DataTableFilePatientIDs.current_for(self.data_file).patient_ids, ['P3'])
+
+    def test_validator_uses_recorded_ids(self):
+        DataTableFilePatientIDs.record_extraction(self.data_file, ['P1', 'P2'])
+        validator = PatientIDValidator('unused.duckdb', self.file_type, {})
+        job = SimpleNamespace(validation_run=SimpleNamespace(content_object=self.data_file))
+
+        self.assertEqual(sorted(validator._recorded_patient_ids(job)), ['P1', 'P2'])
+
+        job.validation_run.content_object = self.submission
+        self.assertIsNone(validator._recorded_patient_ids(job))
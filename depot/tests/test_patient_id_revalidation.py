@@ -0,0 +1,94 @@
+"""
+A changed patient file revalidates other files against the added and
+removed patient IDs only.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from depot.models import (
+    Cohort,
+    CohortSubmission,
+    CohortSubmissionDataTable,
+    DataFileType,
+    DataTableFile,
+    DataTableFilePatientIDs,
+    ProtocolYear,
+    SubmissionPatientIDs,
+)
+from depot.tasks.patient_extraction import validate_submission_files_task
+
+User = get_user_model()
+
+
+class PatientIDRevalidationTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='uploader', email='u@example.com', password='pw')
+        cohort = Cohort.objects.create(name='Delta Cohort', status='active', type='clinical')
+        protocol_year = ProtocolYear.objects.create(name='2024', year=2024, is_active=True)
+        self.submission = CohortSubmission.objects.create(
+            cohort=cohort, protocol_year=protocol_year, status='in_progress', started_by=self.user
+        )
+        self.patient_ids = SubmissionPatientIDs.create_or_update_for_submission(
+            submission=self.submission, patient_ids=['P1', 'P2', 'P3'], user=self.user
+        )
+
+        data_table = CohortSubmissionDataTable.objects.create(
+            submission=self.submission,
+            data_file_type=DataFileType.objects.create(name='laboratory', label='Laboratory'),
+        )
+        self.files = []
+        for name, ids in [('lab_a.csv', ['P1', 'P2', 'P4']), ('lab_b.csv', ['P3'])]:
+            data_file = DataTableFile.objects.create(
+                data_table=data_table, raw_file_path=name, version=1, uploaded_by=self.user, is_current=True
+            )
+            record = DataTableFilePatientIDs.record_extraction(data_file, ids)
+            record.validate_against_main(self.patient_ids.patient_ids, self.patient_ids.revision)
+            self.files.append(record)
+
+    def change_patient_ids(self, patient_ids):
+        return SubmissionPatientIDs.create_or_update_for_submission(
+            submission=self.submission, patient_ids=patient_ids, user=self.user
+        )
+
+    def test_changing_the_patient_ids_records_a_delta(self):
+        record = self.change_patient_ids(['P2', 'P3', 'P4', 'P3'])
+
+        self.assertEqual(record.revision, self.patient_ids.revision + 1)
+        self.assertEqual((record.added_ids, record.removed_ids), (['P4'], ['P1']))
+
+        unchanged = self.change_patient_ids(['P4', 'P3', 'P2'])
+        self.assertEqual(unchanged.revision, record.revision)
+
+    def test_delta_revalidation_matches_full_validation(self):
+        self.change_patient_ids(['P2', 'P3', 'P4'])
+
+        result = validate_submission_files_task.apply(args=(self.submission.id, self.user.id)).result
+
+        self.assertEqual((result['delta'], result['full']), (2, 0))
+        lab_a, lab_b = [DataTableFilePatientIDs.objects.get(pk=f.pk) for f in self.files]
+        self.assertEqual((sorted(lab_a.valid_ids), lab_a.invalid_ids, lab_a.invalid_count), (['P2', 'P4'], ['P1'], 1))
+        self.assertEqual((lab_b.valid_ids, lab_b.invalid_ids), (['P3'], []))
+
+        lab_a.validate_against_main(['P2', 'P3', 'P4'])
+        self.assertEqual((sorted(lab_a.valid_ids), lab_a.invalid_ids), (['P2', 'P4'], ['P1']))
+
+    def test_files_behind_by_more_than_one_revision_are_validated_in_full(self):
+        self.change_patient_ids(['P1'])
+        self.change_patient_ids(['P1', 'P2', 'P3', 'P4'])
+
+        result = validate_submission_files_task.apply(args=(self.submission.id, self.user.id)).result
+        self.assertEqual((result['delta'], result['full']), (0, 2))
+        self.assertEqual(DataTableFilePatientIDs.objects.get(pk=self.files[0].pk).invalid_ids, [])
+
+        result = validate_submission_files_task.apply(args=(self.submission.id, self.user.id)).result
+        self.assertEqual(result['unchanged'], 2)
+
+    def test_reextracted_files_are_validated_in_full(self):
+        self.files[0].extract_and_store_ids(['P1', 'P5'])
+        self.change_patient_ids(['P1', 'P2', 'P3', 'P5'])
+
+        result = validate_submission_files_task.apply(args=(self.submission.id, self.user.id)).result
+
+        self.assertEqual((result['delta'], result['full']), (1, 1))
+        self.assertEqual(DataTableFilePatientIDs.objects.get(pk=self.files[0].pk).invalid_ids, [])
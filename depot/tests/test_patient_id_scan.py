@@ -0,0 +1,84 @@
+"""
+Patient ID scans in the upload request path: only the ID column is read,
+results stream out of DuckDB, and the scan is bounded in time.
+"""
+import io
+import os
+import tempfile
+
+import duckdb
+from django.test import SimpleTestCase
+
+from depot.services.duckdb_utils import InMemoryDuckDBExtractor, PatientIDScanTimeout
+
+CSV = (
+    "sitePatientId,visitDate,notes\n"
+    "P1,2024-01-01,a\n"
+    " P2 ,2024-01-02,b\n"
+    "P1,2024-01-03,c\n"
+    ",2024-01-04,d\n"
+    "P3,2024-01-05,\"quoted, text\"\n"
+)
+
+
+class PatientIDScanTest(SimpleTestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as f:
+            f.write(CSV)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_scans_first_candidate_column_present(self):
+        extractor = InMemoryDuckDBExtractor(self.path)
+
+        ids = extractor.scan_patient_ids(['cohortPatientId', 'SITEPATIENTID'])
+
+        self.assertEqual(ids, {'P1', 'P2', 'P3'})
+        self.assertIsNone(extractor.conn)
+
+    def test_file_like_content_is_copied_for_duckdb(self):
+        for content in (io.BytesIO(CSV.encode()), io.StringIO(CSV)):
+            with self.subTest(type=type(content).__name__):
+                content.read(5)  # pointer is reset before copying
+                ids = InMemoryDuckDBExtractor(content).extract_patient_ids_flexible(['sitePatientId'])
+                self.assertEqual(ids, {'P1', 'P2', 'P3'})
+
+    def test_temporary_uploads_are_read_in_place(self):
+        upload = type('Upload', (), {'temporary_file_path': lambda _self: self.path})()
+
+        self.assertEqual(InMemoryDuckDBExtractor(upload).extract_patient_ids('sitePatientId'), {'P1', 'P2', 'P3'})
+
+    def test_ids_are_stripped_like_python_strip(self):
+        with open(self.path, 'a', newline='') as f:
+            f.write('"\tP4\r",2024-01-06,e\n\u00a0P5\u3000,2024-01-07,f\n"\t \r",2024-01-08,g\n')
+
+        ids = InMemoryDuckDBExtractor(self.path).extract_patient_ids('sitePatientId')
+
+        self.assertEqual(ids, {'P1', 'P2', 'P3', 'P4', 'P5'})
+
+    def test_missing_column_lists_available_columns(self):
+        with self.assertRaisesMessage(ValueError, 'Available columns: sitePatientId, visitDate, notes'):
+            InMemoryDuckDBExtractor(self.path).extract_patient_ids_flexible(['cohortPatientId'])
+
+    def test_malformed_file_raises_value_error(self):
+        with open(self.path, 'a') as f:
+            f.write('P4,2024-01-06,"unterminated\n')
+
+        with self.assertRaisesMessage(ValueError, 'File is malformed or invalid'):
+            InMemoryDuckDBExtractor(self.path).extract_patient_ids('sitePatientId')
+
+    def test_scan_stops_at_time_budget(self):
+        conn = duckdb.connect()
+        conn.execute(
+            f"""
+            COPY (SELECT 'P' || (i % 500000) AS sitePatientId, repeat('x', 40) AS notes FROM range(5000000) t(i))
+            TO '{self.path}' (HEADER)
+            """
+        )
+        conn.close()
+
+        with self.assertRaises(PatientIDScanTimeout):
+            InMemoryDuckDBExtractor(self.path).scan_patient_ids(['sitePatientId'], time_budget=0.01)
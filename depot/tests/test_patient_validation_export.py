@@ -0,0 +1,128 @@
+"""
+The patient validation CSV is built by one DuckDB join over the stored ID
+sets, cached in reports storage per version of those sets and streamed in
+large chunks, optionally gzipped.
+"""
+import csv
+import gzip
+import io
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from depot.models import (
+    Cohort, CohortMembership, CohortSubmission, CohortSubmissionDataTable, DataFileType, DataTableFile,
+    DataTableFilePatientIDs, PHIFileTracking, ProtocolYear, SubmissionPatientIDs, User,
+)
+from depot.services.patient_validation_export import export_prefix
+from depot.storage.local import LocalFileSystemStorage
+
+
+class PatientValidationExportTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        storage_config = {'disks': {'reports': {'driver': 'local', 'type': 'local', 'root': self.temp_dir.name}}}
+        with self.settings(STORAGE_CONFIG=storage_config):
+            self.storage = LocalFileSystemStorage('reports')
+        patcher = mock.patch('depot.services.patient_validation_export.StorageManager.get_storage',
+                             return_value=self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username='manager', password='pw')
+        cohort = Cohort.objects.create(name='Export Cohort')
+        CohortMembership.objects.create(user=self.user, cohort=cohort)
+        self.submission = CohortSubmission.objects.create(
+            cohort=cohort, protocol_year=ProtocolYear.objects.create(year=2024),
+            status='in_progress', started_by=self.user
+        )
+        SubmissionPatientIDs.create_or_update_for_submission(self.submission, ['P3', 'P1', 'P2', 'P10'], self.user)
+        self.data_table = CohortSubmissionDataTable.objects.create(
+            submission=self.submission, data_file_type=DataFileType.objects.create(name='laboratory')
+        )
+        self.first = self.add_file('labs, 2023.csv', ['P1', 'P10', 'P1'])
+        self.second = self.add_file('', ['P10', 'P2'], original_filename='labs_2024.csv')
+        self.client.force_login(self.user)
+
+    def add_file(self, name, patient_ids, **fields):
+        data_file = DataTableFile.objects.create(
+            data_table=self.data_table, version=1, uploaded_by=self.user, name=name, **fields
+        )
+        DataTableFilePatientIDs.objects.create(data_file=data_file, patient_ids=patient_ids)
+        return data_file
+
+    def stored_exports(self):
+        return [path for path in self.storage.list_with_prefix(export_prefix(self.data_table))
+                if path.endswith('.csv.gz')]
+
+    def download(self, data_file=None, **params):
+        if data_file:
+            url = reverse('download_file_patient_validation_csv',
+                          args=[self.submission.id, self.data_table.id, data_file.id])
+        else:
+            url = reverse('download_patient_validation_csv', args=[self.submission.id, self.data_table.id])
+        response = self.client.get(url, params)
+        return response, b''.join(response.streaming_content)
+
+    def test_all_files_export_matches_the_row_layout(self):
+        response, content = self.download()
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('patient_validation_laboratory_', response['Content-Disposition'])
+        self.assertTrue(content.startswith(b'patient_id,in_patient_file,'))
+        self.assertIn(b'\r\n', content)
+        self.assertEqual(list(csv.reader(io.StringIO(content.decode()))), [
+            ['patient_id', 'in_patient_file', 'matching', 'out_of_bounds', 'files_containing_id',
+             'in_labs, 2023.csv', 'in_labs_2024.csv'],
+            ['P1', '1', '1', '0', 'labs, 2023.csv', '1', '0'],
+            ['P10', '1', '1', '0', 'labs, 2023.csv; labs_2024.csv', '1', '1'],
+            ['P2', '1', '1', '0', 'labs_2024.csv', '0', '1'],
+            ['P3', '1', '0', '1', '', '0', '0'],
+        ])
+
+    def test_single_file_export(self):
+        response, content = self.download(self.second)
+
+        self.assertIn('patient_validation_labs_2024_', response['Content-Disposition'])
+        self.assertEqual(list(csv.reader(io.StringIO(content.decode()))), [
+            ['patient_id', 'in_patient_file', 'matching', 'out_of_bounds'],
+            ['P1', '1', '0', '1'],
+            ['P10', '1', '1', '0'],
+            ['P2', '1', '1', '0'],
+            ['P3', '1', '0', '1'],
+        ])
+
+    def test_export_is_reused_until_the_id_sets_change(self):
+        _, content = self.download()
+        stored = self.stored_exports()
+        self.assertEqual(len(stored), 1)
+
+        with mock.patch('depot.services.patient_validation_export.build_export') as build:
+            _, again = self.download()
+        build.assert_not_called()
+        self.assertEqual(again, content)
+
+        self.second.delete()
+        _, changed = self.download()
+        self.assertNotIn(b'labs_2024.csv', changed)
+
+        replaced = self.stored_exports()
+        self.assertEqual(len(replaced), 1)
+        self.assertNotEqual(replaced, stored)
+        self.assertEqual(
+            list(PHIFileTracking.objects.filter(metadata__export='patient_validation')
+                 .order_by('id').values_list('action', flat=True)),
+            ['nas_report_created', 'nas_report_created', 'nas_report_deleted']
+        )
+
+    def test_gzip_download_streams_the_stored_artifact(self):
+        _, content = self.download()
+        response, compressed = self.download(compression='gzip')
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('_all.csv.gz"'))
+        self.assertEqual(gzip.decompress(compressed), content)
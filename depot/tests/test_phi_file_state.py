@@ -0,0 +1,143 @@
+"""
+PHI tracking keeps a per-path state table, can batch its audit writes and
+archives aged records without losing them.
+"""
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from depot.models import Cohort, PHIFileState, PHIFileTracking, PHIFileTrackingArchive
+from depot.storage.phi_manager import PHIStorageManager
+from depot.tasks.cleanup import archive_phi_tracking
+
+
+class PHIFileStateTest(TestCase):
+
+    def setUp(self):
+        self.cohort = Cohort.objects.create(name='State Cohort')
+
+    def log(self, action, file_path, **kwargs):
+        return PHIFileTracking.log_operation(
+            cohort=self.cohort, user=None, action=action, file_path=file_path, **kwargs
+        )
+
+    def test_state_follows_creation_and_deletion(self):
+        created = self.log('work_copy_created', '/ws/a.csv')
+        self.log('conversion_started', '/ws/a.csv')
+        self.log('work_copy_deleted', '/ws/a.csv', error_message='permission denied')
+
+        state = PHIFileState.objects.get(file_path='/ws/a.csv')
+        self.assertEqual((state.last_action, state.last_tracking_id, state.is_present),
+                         ('work_copy_created', created.pk, True))
+
+        deleted = self.log('work_copy_deleted', '/ws/a.csv')
+        state.refresh_from_db()
+        self.assertEqual((state.last_tracking_id, state.is_present), (deleted.pk, False))
+
+    def test_uncleaned_workspace_files_use_current_state(self):
+        self.log('work_copy_created', '/ws/reused.csv')
+        self.log('work_copy_deleted', '/ws/reused.csv')
+        recopied = self.log('work_copy_created', '/ws/reused.csv')
+        cleaned = self.log('work_copy_created', '/ws/cleaned.csv')
+        self.log('nas_raw_created', '/nas/raw.csv')
+
+        self.assertCountEqual(PHIFileTracking.get_uncleaned_workspace_files(), [recopied, cleaned])
+
+        cleaned.mark_cleaned_up()
+        self.assertEqual(list(PHIFileTracking.get_uncleaned_workspace_files()), [recopied])
+        self.assertFalse(PHIFileState.objects.get(file_path='/ws/cleaned.csv').is_present)
+
+    def test_batched_operations_are_written_together(self):
+        with PHIFileTracking.batched():
+            with PHIFileTracking.batched():
+                first = self.log('work_copy_created', '/ws/b.csv')
+            self.log('conversion_started', '/ws/b.duckdb')
+            self.assertFalse(PHIFileTracking.objects.exists())
+
+            PHIFileTracking.flush_batch()
+            self.assertEqual(PHIFileTracking.objects.count(), 2)
+
+            self.log('work_copy_deleted', '/ws/b.csv')
+            with self.assertNumQueries(0):
+                self.log('nas_duckdb_created', '/nas/b.duckdb', cleanup_required=True)
+
+        self.assertEqual(PHIFileTracking.objects.count(), 4)
+        self.assertTrue(first.pk and first.server_hostname)
+        self.assertEqual(
+            dict(PHIFileState.objects.values_list('file_path', 'is_present')),
+            {'/ws/b.csv': False, '/nas/b.duckdb': True}
+        )
+        self.assertTrue(PHIFileTracking.objects.get(action='nas_duckdb_created').cleanup_required)
+
+    def test_mysql_upserts_without_a_conflict_target(self):
+        # MySQL's ON DUPLICATE KEY UPDATE cannot name the conflicting column
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(PHIFileState.objects, 'bulk_create') as bulk_create:
+            self.log('work_copy_created', '/ws/mysql.csv')
+
+        args, kwargs = bulk_create.call_args
+        self.assertEqual([state.file_path for state in args[0]], ['/ws/mysql.csv'])
+        self.assertTrue(kwargs['update_conflicts'])
+        self.assertNotIn('unique_fields', kwargs)
+
+    def test_state_updated_row_by_row_without_upsert_support(self):
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(connection.features, 'supports_update_conflicts', False):
+            self.log('work_copy_created', '/ws/f.csv')
+            with PHIFileTracking.batched():
+                self.log('work_copy_created', '/ws/g.csv')
+                deleted = self.log('work_copy_deleted', '/ws/f.csv')
+
+        self.assertEqual(
+            dict(PHIFileState.objects.values_list('file_path', 'is_present')),
+            {'/ws/f.csv': False, '/ws/g.csv': True}
+        )
+        self.assertEqual(PHIFileState.objects.get(file_path='/ws/f.csv').last_tracking_id, deleted.pk)
+
+    def test_workspace_cleanup_finds_a_buffered_creation_record(self):
+        with tempfile.TemporaryDirectory() as workspace:
+            path = Path(workspace) / 'h.csv'
+            path.write_text('cohortPatientId\n1\n')
+            with PHIFileTracking.batched():
+                self.log('work_copy_created', str(path))
+                PHIStorageManager().cleanup_workspace_file(str(path), self.cohort, None)
+
+        self.assertFalse(path.exists())
+        self.assertTrue(PHIFileTracking.objects.get(action='work_copy_created').cleaned_up)
+        self.assertFalse(PHIFileState.objects.get(file_path=str(path)).is_present)
+
+    def test_batch_is_written_when_the_block_fails(self):
+        with self.assertRaises(ValueError):
+            with PHIFileTracking.batched():
+                self.log('conversion_failed', '/ws/c.duckdb', error_message='bad mapping')
+                raise ValueError('bad mapping')
+
+        self.assertEqual(PHIFileTracking.objects.get().action, 'conversion_failed')
+
+    @override_settings(PHI_TRACKING_HOT_DAYS=30)
+    def test_archive_moves_aged_records_and_keeps_live_ones(self):
+        nas = self.log('nas_raw_created', '/nas/raw.csv')
+        copied = self.log('work_copy_created', '/ws/d.csv')
+        copied.mark_cleaned_up()
+        deleted = self.log('work_copy_deleted', '/ws/d.csv')
+        started = self.log('conversion_started', '/ws/d.duckdb', metadata={'rows': 3})
+        pending = self.log('work_copy_created', '/ws/e.csv')
+        recent = self.log('conversion_completed', '/nas/raw.duckdb')
+        PHIFileTracking.objects.exclude(pk=recent.pk).update(created_at=timezone.now() - timedelta(days=60))
+
+        result = archive_phi_tracking.apply().result
+
+        self.assertEqual(result['archived'], 2)
+        self.assertEqual(
+            set(PHIFileTracking.objects.values_list('pk', flat=True)),
+            {nas.pk, deleted.pk, pending.pk, recent.pk}
+        )
+        archived = PHIFileTrackingArchive.objects.get(original_id=started.pk)
+        self.assertEqual((archived.action, archived.record['metadata']), ('conversion_started', {'rows': 3}))
+        self.assertEqual(archived.record['cohort_id'], self.cohort.pk)
+        self.assertTrue(PHIFileTrackingArchive.objects.filter(original_id=copied.pk).exists())
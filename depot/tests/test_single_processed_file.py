@@ -9,12 +9,14 @@ Requirements:
 """
 
 import unittest
+from unittest.mock import patch
 from django.test import TestCase
 from pathlib import Path
 from depot.models import (
     CohortSubmission, DataTableFile, CohortSubmissionDataTable,
     Cohort, ProtocolYear, DataFileType, User, PHIFileTracking
 )
+from depot.services.data_mapping import MalformedFileError
 from depot.tasks.duckdb_creation import create_duckdb_task
 from depot.storage.phi_manager import PHIStorageManager
 
@@ -46,6 +48,25 @@ class TestSingleProcessedFileWorkflow(TestCase):
             data_file_type=self.file_type
         )
 
+    def test_malformed_upload_fails_without_retrying(self):
+        """A malformed row is reported on the file straight away instead of after retries."""
+        data_file = DataTableFile.objects.create(
+            data_table=self.data_table,
+            raw_file_path='18_Vanderbilt/2024/diagnosis/raw/file1.csv',
+            uploaded_by=self.user
+        )
+        error = MalformedFileError(3, 'Expected Number of Columns: 2 Found: 3')
+
+        with patch.object(PHIStorageManager, 'convert_multiple_files_to_duckdb', side_effect=error) as convert:
+            with self.assertRaises(MalformedFileError):
+                create_duckdb_task.apply(args=[{'data_file_id': data_file.id, 'user_id': self.user.id}], throw=True)
+
+        self.assertEqual(convert.call_count, 1)
+        data_file.refresh_from_db()
+        self.data_table.refresh_from_db()
+        self.assertEqual(data_file.duckdb_conversion_error, str(error))
+        self.assertEqual(self.data_table.status, 'failed')
+
     @unittest.skip("Requires actual file creation and full Celery pipeline - use E2E tests instead")
     def test_single_file_upload_creates_one_processed_file(self):
         """
@@ -0,0 +1,66 @@
+"""
+Import-time gate for web workers: services-only dependencies stay out of
+web start-up and cold-start RSS stays within target.
+"""
+import sys
+
+from django.test import SimpleTestCase
+
+from depot.benchmarks.startup import (
+    WEB_STARTUP_TARGETS,
+    check_web_startup,
+    import_chain,
+    parse_importtime,
+    profile_web_startup,
+)
+
+IMPORTTIME_SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     numpy.core
+import time:       300 |        420 |   numpy
+import time:       900 |       1320 | pandas
+import time:        50 |         50 | json
+"""
+
+
+class ImportTimeParsingTest(SimpleTestCase):
+
+    def test_parses_entries_and_chains(self):
+        entries = parse_importtime(IMPORTTIME_SAMPLE)
+
+        self.assertEqual(entries[0], ('numpy.core', 120, 120, 2))
+        self.assertEqual(entries[2], ('pandas', 900, 1320, 0))
+        self.assertEqual(import_chain(entries, 'numpy.core'), ['numpy.core', 'numpy', 'pandas'])
+        self.assertEqual(import_chain(entries, 'duckdb'), [])
+
+    def test_check_reports_services_only_imports_and_targets(self):
+        profile = {
+            'wall_seconds': 1.0,
+            'peak_rss_mb': WEB_STARTUP_TARGETS['peak_rss_mb'] + 1,
+            'services_only': {'pandas': ['pandas', 'depot.views.reports']},
+        }
+        problems = check_web_startup(profile)
+
+        self.assertEqual(len(problems), 2)
+        self.assertIn('pandas imported at web start-up via pandas <- depot.views.reports', problems)
+
+
+class WebStartupGateTest(SimpleTestCase):
+
+    def test_web_startup_skips_services_only_dependencies(self):
+        profile = profile_web_startup('depot.test_settings', env={'USE_MOCK_SAML': 'True'})
+
+        self.assertEqual(profile['services_only'], {})
+        # Wall time depends on the machine running the suite; manage.py
+        # profile_startup checks it on deployment hardware
+        self.assertEqual(check_web_startup(profile, {'wall_seconds': float('inf')}), [])
+
+    def test_lazy_packages_still_resolve_exports(self):
+        import depot.services
+        import depot.tasks
+
+        self.assertEqual(depot.services.VariableSummaryService.__name__, 'VariableSummaryService')
+        self.assertEqual(depot.tasks.create_duckdb_task.name, 'depot.tasks.duckdb_creation.create_duckdb_task')
+        with self.assertRaises(AttributeError):
+            depot.tasks.not_a_task
+        self.assertIn('depot.tasks.duckdb_creation', sys.modules)
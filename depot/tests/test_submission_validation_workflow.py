@@ -138,6 +138,18 @@ class SubmissionValidationWorkflowTests(TransactionTestCase):
         self.assertGreater(run.total_variables, 0)
         self.assertEqual(run.variables.count(), run.total_variables)
 
+        # Each workflow stage records its timing on the data file.
+        stages = data_file.workflow_timings.get('stages', {})
+        self.assertIn('duckdb', stages)
+        self.assertIn('validation', stages)
+        self.assertIn('critical_path_seconds', data_file.workflow_timings)
+
+        # Pipeline spans land on the data file and the validation run.
+        file_spans = {entry['name'] for entry in data_file.pipeline_spans}
+        self.assertTrue({'phi.copy_to_workspace', 'duckdb.load', 'phi.hash', 'patient_ids.extract'} <= file_spans)
+        run.refresh_from_db()
+        self.assertIn('validation.variable', {entry['name'] for entry in run.pipeline_spans})
+
     def test_revalidate_existing_file_reuses_single_run(self):
         data_file = self._create_data_file()
 
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from depot import celery as celery_module
+from depot.celery import flush_task_message_stats, get_task_message_stats, record_task_message_size
+from depot.data.definition_loader import get_definition_for_type
+from depot.models import TaskMessageStats
+from depot.tasks.validation_orchestration import _resolve_variable_definition
+from depot.utils.instrumentation import collect_spans, prometheus_metrics
+
+
+class TaskPayloadTests(SimpleTestCase):
+    databases = {}
+
+    def _variable(self, column_name, file_type='patient'):
+        run = SimpleNamespace(data_file_type=SimpleNamespace(name=file_type))
+        return SimpleNamespace(id=1, column_name=column_name, validation_run=run)
+
+    def test_resolves_definition_from_version_key(self):
+        definition = get_definition_for_type('patient')
+        variable_def = _resolve_variable_definition(self._variable('birthYear'), definition.version)
+        self.assertEqual(variable_def['type'], 'year')
+
+    def test_stale_version_still_resolves_current_definition(self):
+        variable_def = _resolve_variable_definition(self._variable('birthYear'), 'stale')
+        self.assertEqual(variable_def['name'], 'birthYear')
+
+    def test_legacy_definition_list_payload_is_supported(self):
+        variable_def = _resolve_variable_definition(
+            self._variable('custom'), [{'name': 'other'}, {'name': 'custom', 'type': 'string'}]
+        )
+        self.assertEqual(variable_def['type'], 'string')
+
+    def test_version_payload_is_smaller_than_definition_list(self):
+        definition = get_definition_for_type('patient')
+        record_task_message_size(sender='test.slim', body=((1, definition.version), {}, {}))
+        record_task_message_size(sender='test.full', body=((1, definition.get_definition()), {}, {}))
+
+        stats = get_task_message_stats()
+        self.assertEqual(stats['test.slim']['count'], 1)
+        self.assertLess(stats['test.slim']['max_bytes'], 200)
+        self.assertGreater(stats['test.full']['max_bytes'], stats['test.slim']['max_bytes'] * 10)
+
+
+class TaskMessageMetricsTests(TestCase):
+
+    def setUp(self):
+        # Drop sizes buffered by earlier tests in this process and make the next flush due
+        with celery_module._message_size_lock:
+            celery_module._pending_message_stats.clear()
+            celery_module._last_message_stats_flush = 0.0
+
+    @override_settings(CELERY_MESSAGE_SIZE_WARNING_BYTES=500)
+    def test_message_sizes_reach_the_timeline_and_metrics(self):
+        definition = get_definition_for_type('patient')
+        with collect_spans() as spans, self.assertLogs('depot.celery', level='WARNING'), \
+                self.captureOnCommitCallbacks(execute=True):
+            record_task_message_size(sender='metrics.slim', body=((1, definition.version), {}, {}))
+            record_task_message_size(sender='metrics.full', body=((1, definition.get_definition()), {}, {}))
+
+        self.assertEqual([s['attrs']['task'] for s in spans], ['metrics.slim', 'metrics.full'])
+        self.assertNotIn('over_threshold', spans[0]['attrs'])
+        self.assertTrue(spans[1]['attrs']['over_threshold'])
+
+        # Recorded without persisting the spans anywhere
+        body = prometheus_metrics()
+        self.assertIn('# TYPE naaccord_celery_message_max_bytes gauge', body)
+        self.assertIn(f'naaccord_celery_message_max_bytes{{task="metrics.full"}} {spans[1]["bytes"]}', body)
+        self.assertIn('naaccord_celery_messages{task="metrics.full"} 1', body)
+        self.assertIn('naaccord_celery_messages_over_threshold{task="metrics.full"} 1', body)
+        self.assertIn('naaccord_celery_messages_over_threshold{task="metrics.slim"} 0', body)
+
+    def test_flush_folds_into_existing_hour(self):
+        record_task_message_size(sender='metrics.merge', body=(('x' * 100,), {}, {}))
+        flush_task_message_stats()
+        record_task_message_size(sender='metrics.merge', body=(('x' * 10,), {}, {}))
+        flush_task_message_stats()
+
+        stats = TaskMessageStats.objects.get(task='metrics.merge')
+        self.assertEqual(stats.count, 2)
+        self.assertGreater(stats.max_bytes, 100)
+        self.assertGreater(stats.total_bytes, stats.max_bytes)
+
+    def test_publishes_are_buffered_until_the_flush_interval(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_task_message_size(sender='metrics.first', body=((1,), {}, {}))
+        with self.captureOnCommitCallbacks(execute=True):
+            record_task_message_size(sender='metrics.buffered', body=((1,), {}, {}))
+
+        self.assertTrue(TaskMessageStats.objects.filter(task='metrics.first').exists())
+        self.assertFalse(TaskMessageStats.objects.filter(task='metrics.buffered').exists())
+
+    def test_old_hours_leave_the_window(self):
+        TaskMessageStats.objects.create(
+            task='metrics.old', hour=timezone.now() - timedelta(days=2), count=3, max_bytes=10
+        )
+        self.assertNotIn('metrics.old', prometheus_metrics(timedelta(hours=24)))
@@ -0,0 +1,57 @@
+from django.test import SimpleTestCase
+
+from depot.tasks.upload_workflow import (
+    UPLOAD_WORKFLOW_STAGES,
+    build_upload_workflow,
+    critical_path_seconds,
+    merge_workflow_results,
+    workflow_levels,
+)
+
+
+class UploadWorkflowTests(SimpleTestCase):
+    databases = {}
+
+    def test_independent_stages_share_a_level(self):
+        levels = workflow_levels()
+        self.assertEqual(sorted(levels[0]), ['duckdb', 'raw_hash'])
+        self.assertEqual(levels[-1], ['cleanup'])
+
+    def test_cycle_is_rejected(self):
+        stages = {
+            'a': {'task': 'x', 'depends_on': ['b']},
+            'b': {'task': 'y', 'depends_on': ['a']},
+        }
+        with self.assertRaises(ValueError):
+            workflow_levels(stages)
+
+    def test_unknown_dependency_is_rejected(self):
+        with self.assertRaises(ValueError):
+            workflow_levels({'a': {'task': 'x', 'depends_on': ['missing']}})
+
+    def test_merge_combines_branches_and_propagates_stop(self):
+        merged = merge_workflow_results([
+            {'data_file_id': 1, 'workflow_should_stop': True},
+            {'data_file_id': 1, 'duckdb_path': '/tmp/x.duckdb', 'workflow_should_stop': False},
+        ])
+        self.assertEqual(merged['duckdb_path'], '/tmp/x.duckdb')
+        self.assertTrue(merged['workflow_should_stop'])
+
+    def test_critical_path_follows_longest_branch(self):
+        timings = {
+            'raw_hash': {'duration_seconds': 5.0},
+            'duckdb': {'duration_seconds': 3.0},
+            'patient_ids': {'duration_seconds': 1.0},
+            'validation': {'duration_seconds': 2.0},
+            'cleanup': {'duration_seconds': 0.5},
+        }
+        # duckdb → patient_ids → validation (6.0) outruns raw_hash (5.0)
+        self.assertEqual(critical_path_seconds(timings), 6.5)
+
+    def test_first_level_runs_as_chord(self):
+        workflow = build_upload_workflow({'data_file_id': 1})
+        first = workflow.tasks[0]
+        header_names = sorted(sig.task for sig in first.tasks)
+        self.assertEqual(header_names, sorted(
+            UPLOAD_WORKFLOW_STAGES[name]['task'] for name in ('raw_hash', 'duckdb')
+        ))
@@ -4,6 +4,7 @@ import shutil
 import tempfile
 
 import duckdb
+from unittest import mock
 from django.test import SimpleTestCase
 
 from depot.validators.variable_validator import VariableValidator
@@ -139,3 +140,62 @@ class VariableValidatorCategoricalSummaryTests(SimpleTestCase):
         # Meta counts support template guards.
         self.assertEqual(summary['unique_raw_values'], len(raw_counts))
         self.assertEqual(summary['raw_total'], sum(raw_counts.values()))
+
+    @mock.patch.object(VariableValidator, 'RAW_VALUE_LIMIT', 2)
+    def test_high_cardinality_counts_are_bounded_and_definition_counts_exact(self):
+        values = ["Male"] * 3 + ["male "] * 2 + ["F"] * 2 + [f"junk{i}" for i in range(100)]
+        db_path = self._create_duckdb_with_column("presentSex", values)
+
+        variable_def = {
+            'name': 'presentSex',
+            'type': 'enum',
+            'allowed_values': {'Male': ['Male', 'M'], 'Female': ['Female', 'F']},
+            'summarizers': ['bar_chart'],
+        }
+
+        with VariableValidator(db_path, variable_def, None) as validator:
+            summary = validator.validate()['summary']
+
+        definition_counts = {entry['label']: entry['count'] for entry in summary['definition_counts']}
+        self.assertEqual(definition_counts, {'Male': 5, 'Female': 2})
+
+        self.assertEqual([row['raw'] for row in summary['raw_counts']], ['Male', 'F'])
+        self.assertEqual((summary['raw_total'], summary['unique_raw_values']), (107, 103))
+        self.assertEqual(summary['raw_values_omitted'], 101)
+        self.assertEqual(summary['unexpected_values'], [('junk0', 1), ('junk1', 1)])
+
+    @mock.patch.object(VariableValidator, 'RAW_VALUE_LIMIT', 2)
+    def test_undefined_categories_use_most_frequent_values(self):
+        db_path = self._create_duckdb_with_column(
+            "source", ["EHR", "ehr", "ehr", "Lab", "Lab", "Manual"]
+        )
+
+        variable_def = {'name': 'source', 'type': 'enum', 'summarizers': ['bar_chart']}
+
+        with VariableValidator(db_path, variable_def, None) as validator:
+            summary = validator.validate()['summary']
+
+        self.assertEqual(
+            [(entry['normalized_key'], entry['label'], entry['count']) for entry in summary['definition_counts']],
+            [('ehr', 'ehr', 3), ('lab', 'Lab', 2)]
+        )
+        self.assertEqual(summary['unexpected_values'], [])
+
+    def test_values_are_stripped_like_python(self):
+        db_path = self._create_duckdb_with_column(
+            "presentSex", ["Male", "Male\u00a0", "\u3000Male", "\tFemale\n"]
+        )
+
+        variable_def = {
+            'name': 'presentSex',
+            'type': 'enum',
+            'allowed_values': ["Female", "Male"],
+            'summarizers': ['bar_chart'],
+        }
+
+        with VariableValidator(db_path, variable_def, None) as validator:
+            summary = validator.validate()['summary']
+
+        raw_counts = {row['value']: row['count'] for row in summary['raw_counts']}
+        self.assertEqual(raw_counts, {'Male': 3, 'Female': 1})
+        self.assertEqual(summary['unexpected_values'], [])
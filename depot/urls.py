@@ -55,11 +55,13 @@ from depot.views.submissions.table_manage import (
     revalidate_submission_variable,
     submission_validation_status,
     submission_validation_status_json,
+    download_validation_check_rows,
+    validation_check_rows,
     mark_file_failed,
     retry_file_processing,
 )
 from depot.views.upload import upload_temp_file
-from depot.views.health import health_check
+from depot.views.health import health_check, health_metrics
 from depot.views.attachments import upload_attachment, upload_attachment_secure, upload_submission_attachment_secure, download_attachment, remove_attachment
 from depot.views.api.review import (
     toggle_table_review,
@@ -89,6 +91,7 @@ from depot.views.internal_storage import (
 urlpatterns = [
     # Public health check endpoint (no authentication required)
     path("health/", health_check, name="health_check"),
+    path("health/metrics/", health_metrics, name="health_metrics"),
 
     path("", index_page, name="index"),
     path("upload-precheck", precheck_run_page, name="upload_precheck"),
@@ -132,6 +135,16 @@ urlpatterns = [
         submission_validation_status_json,
         name="submission_validation_status_json",
     ),
+    path(
+        "submissions/<int:submission_id>/<str:table_name>/validation/<int:validation_run_id>/checks/<int:check_id>/rows",
+        validation_check_rows,
+        name="validation_check_rows",
+    ),
+    path(
+        "submissions/<int:submission_id>/<str:table_name>/validation/<int:validation_run_id>/checks/<int:check_id>/rows.csv",
+        download_validation_check_rows,
+        name="download_validation_check_rows",
+    ),
     path("submissions/<int:submission_id>/tables/<int:table_id>/validation-csv", download_patient_validation_csv, name="download_patient_validation_csv"),
     path("submissions/<int:submission_id>/tables/<int:table_id>/files/<int:file_id>/validation-csv", download_file_patient_validation_csv, name="download_file_patient_validation_csv"),
     path("submissions/<int:submission_id>/tables/<int:table_id>/files/<int:file_id>/mark-failed", mark_file_failed, name="mark_file_failed"),
@@ -0,0 +1,23 @@
+"""
+Database connection lifecycle helpers for long-lived processes.
+
+Django only recycles persistent connections (CONN_MAX_AGE) around HTTP
+requests. Celery workers and long-running tasks call
+``recycle_stale_connections`` instead, at task boundaries and after long
+non-database work such as DuckDB scans, so a connection dropped by the
+server (wait_timeout, pooler restart) is replaced before it is used.
+"""
+from django.db import connections
+
+
+def recycle_stale_connections():
+    """
+    Close connections that are unusable or older than CONN_MAX_AGE.
+
+    Connections inside an atomic block are left alone: closing them would
+    break the surrounding transaction.
+    """
+    for conn in connections.all(initialized_only=True):
+        if conn.in_atomic_block:
+            continue
+        conn.close_if_unusable_or_obsolete()
@@ -0,0 +1,247 @@
+"""
+Lightweight span instrumentation for the ingestion and validation pipeline.
+
+``span`` times a block of work and ``timed`` does the same for a whole
+function. Finished spans are appended to the innermost active
+``collect_spans`` block (a no-op when none is active), and tasks persist the
+collected timeline onto the run they belong to with ``persist_spans``::
+
+    with collect_spans() as spans:
+        with span('phi.copy_to_workspace') as s:
+            ...
+            s.add_bytes(size)
+    persist_spans(DataTableFile, data_file.id, spans)
+
+Each span records ``peak_rss_mb``: the process's peak resident set size
+(ru_maxrss) when the span ended. That is a high-water mark for the whole
+worker process so far, not the memory the span itself used.
+
+Persisted timelines are aggregated into Prometheus text format by
+``prometheus_metrics`` for the services health endpoint.
+"""
+import functools
+import logging
+import resource
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Oldest spans are dropped once a timeline grows past this many entries
+MAX_PERSISTED_SPANS = 500
+
+_collector: ContextVar = ContextVar('pipeline_span_collector', default=None)
+_depth: ContextVar = ContextVar('pipeline_span_depth', default=0)
+
+
+def _peak_rss_bytes():
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Span:
+    """One timed block of work. Use ``set`` and ``add_bytes`` while it is open."""
+
+    __slots__ = ('name', 'attrs', 'depth', 'started_at', 'duration_ms', 'bytes', 'peak_rss_bytes', 'error')
+
+    def __init__(self, name, attrs, depth):
+        self.name = name
+        self.attrs = attrs
+        self.depth = depth
+        self.started_at = timezone.now()
+        self.duration_ms = None
+        self.bytes = None
+        self.peak_rss_bytes = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add_bytes(self, count):
+        self.bytes = (self.bytes or 0) + int(count)
+
+    def as_dict(self):
+        """Compact JSON form; optional keys are omitted when unset."""
+        data = {
+            'name': self.name,
+            'at': self.started_at.isoformat(),
+            'ms': self.duration_ms,
+            'peak_rss_mb': round(self.peak_rss_bytes / 2**20, 1),
+        }
+        if self.depth:
+            data['depth'] = self.depth
+        if self.bytes is not None:
+            data['bytes'] = self.bytes
+        if self.error:
+            data['error'] = self.error
+        if self.attrs:
+            data['attrs'] = self.attrs
+        return data
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block of work as a named span.
+
+    Yields the Span so callers can record bytes processed or extra attributes.
+    Exceptions are recorded on the span and re-raised.
+    """
+    depth = _depth.get()
+    current = Span(name, attrs, depth)
+    depth_token = _depth.set(depth + 1)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        current.peak_rss_bytes = _peak_rss_bytes()
+        _depth.reset(depth_token)
+
+        collected = _collector.get()
+        if collected is not None:
+            collected.append(current.as_dict())
+        logger.debug("span %s took %.2f ms", name, current.duration_ms)
+
+
+def timed(name=None):
+    """Decorator that records every call of a function as a span."""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def collect_spans():
+    """Collect spans finished inside the block into the yielded list."""
+    collected = []
+    token = _collector.set(collected)
+    try:
+        yield collected
+    finally:
+        _collector.reset(token)
+        # Spans also bubble up to an enclosing collector (e.g. nested eager tasks)
+        outer = _collector.get()
+        if outer is not None:
+            outer.extend(collected)
+
+
+def persist_spans(model, pk, spans, field='pipeline_spans'):
+    """
+    Append spans to a model instance's timeline field.
+
+    The row lock only guards against a retried task racing its predecessor;
+    callers pick a row with one writer at a time (per-variable tasks write
+    to their ValidationVariable, not the shared ValidationRun). Failures are
+    logged, never raised: instrumentation must not fail the pipeline.
+    """
+    if not spans or pk is None:
+        return
+    try:
+        with transaction.atomic():
+            instance = model.objects.select_for_update().filter(pk=pk).first()
+            if instance is None:
+                return
+            timeline = (getattr(instance, field) or []) + list(spans)
+            setattr(instance, field, timeline[-MAX_PERSISTED_SPANS:])
+            instance.save(update_fields=[field, 'updated_at'])
+    except Exception as e:
+        logger.warning(f"Failed to persist pipeline spans on {model.__name__} {pk}: {e}")
+
+
+def summarize_spans(spans):
+    """
+    Aggregate spans by name.
+
+    Returns:
+        dict: name -> {count, seconds, bytes, errors, peak_rss_mb}
+    """
+    totals = defaultdict(lambda: {'count': 0, 'seconds': 0.0, 'bytes': 0, 'errors': 0, 'peak_rss_mb': 0.0})
+    for entry in spans:
+        stats = totals[entry['name']]
+        stats['count'] += 1
+        stats['seconds'] += (entry.get('ms') or 0) / 1000
+        stats['bytes'] += entry.get('bytes') or 0
+        stats['errors'] += 1 if entry.get('error') else 0
+        stats['peak_rss_mb'] = max(stats['peak_rss_mb'], entry.get('peak_rss_mb') or 0)
+    return dict(totals)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_metrics(window=timedelta(hours=24)):
+    """
+    Render span totals from timelines persisted within ``window`` as Prometheus text.
+
+    Spans are read from the database rather than process memory because
+    they are recorded by Celery workers, not the process serving the request.
+    Totals cover a sliding window and fall as old spans leave it, so every
+    metric is a gauge.
+    """
+    from django.db.models import Max, Sum
+    from depot.models import DataTableFile, TaskMessageStats, ValidationRun, ValidationVariable
+
+    since = timezone.now() - window
+    spans = []
+    for model in (DataTableFile, ValidationRun, ValidationVariable):
+        for timeline in model.objects.filter(updated_at__gte=since).values_list('pipeline_spans', flat=True):
+            spans.extend(
+                entry for entry in timeline or []
+                if datetime.fromisoformat(entry['at']) >= since
+            )
+
+    metrics = [
+        ('naaccord_pipeline_span_count', 'gauge', 'Pipeline spans finished', 'count'),
+        ('naaccord_pipeline_span_seconds', 'gauge', 'Time spent in pipeline spans', 'seconds'),
+        ('naaccord_pipeline_span_bytes', 'gauge', 'Bytes processed in pipeline spans', 'bytes'),
+        ('naaccord_pipeline_span_errors', 'gauge', 'Pipeline spans that raised', 'errors'),
+        ('naaccord_pipeline_span_peak_rss_megabytes', 'gauge', 'Highest worker process peak RSS seen at the end of a span', 'peak_rss_mb'),
+    ]
+    totals = summarize_spans(spans)
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines.append(f"# HELP {metric} {help_text} (last {int(window.total_seconds())}s)")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name in sorted(totals):
+            value = totals[name][key]
+            lines.append(f'{metric}{{span="{_escape_label(name)}"}} {round(value, 4) if isinstance(value, float) else value}')
+
+    # Published Celery message sizes per task, counted in whole hours (see depot/celery.py)
+    messages = {
+        row['task']: row
+        for row in TaskMessageStats.objects.filter(
+            hour__gte=since.replace(minute=0, second=0, microsecond=0)
+        ).values('task').annotate(
+            count=Sum('count'), max_bytes=Max('max_bytes'), over_threshold=Sum('over_threshold')
+        )
+    }
+    for metric, help_text, key in (
+        ('naaccord_celery_messages', 'Published task messages', 'count'),
+        ('naaccord_celery_message_max_bytes', 'Largest published task message', 'max_bytes'),
+        ('naaccord_celery_messages_over_threshold', 'Task messages above CELERY_MESSAGE_SIZE_WARNING_BYTES', 'over_threshold'),
+    ):
+        lines.append(f"# HELP {metric} {help_text} (last {int(window.total_seconds())}s)")
+        lines.append(f"# TYPE {metric} gauge")
+        for task in sorted(messages):
+            lines.append(f'{metric}{{task="{_escape_label(task)}"}} {messages[task][key]}')
+    return '\n'.join(lines) + '\n'
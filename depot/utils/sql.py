@@ -0,0 +1,30 @@
+"""
+Quoting helpers for SQL built as text, such as DuckDB queries over uploaded files.
+
+Column names come from uploaded headers, so they are always quoted rather
+than interpolated. Prefer bound parameters for values; ``sql_literal`` is
+for the places DuckDB does not accept them (table function options, COPY).
+"""
+
+
+def quote_identifier(name):
+    """Double-quote a column or table name, escaping embedded quotes."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def sql_literal(value):
+    """Single-quote a string literal, escaping embedded quotes."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# Every character Python's str.isspace() accepts, as an RE2 class. SQL
+# trim() only removes spaces and RE2's \s only ASCII whitespace.
+_WHITESPACE_CLASS = (
+    r'[\x{9}-\x{d}\x{1c}-\x{20}\x{85}\x{a0}\x{1680}\x{2000}-\x{200a}'
+    r'\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}]'
+)
+
+
+def sql_strip(expression):
+    """DuckDB SQL for Python's ``str.strip()`` on a VARCHAR expression."""
+    return f"regexp_replace({expression}, '^{_WHITESPACE_CLASS}+|{_WHITESPACE_CLASS}+$', '', 'g')"
@@ -110,20 +110,10 @@ class PatientIDValidator(BaseValidator):
 
         self.update_progress(validation_job, 40)
 
-        # Extract unique patient IDs
-        query = f"""
-            SELECT DISTINCT "{patient_id_col}"
-            FROM data
-            WHERE "{patient_id_col}" IS NOT NULL
-        """
-        result = self.conn.execute(query).fetchall()
-
-        # Filter out None and empty strings
-        patient_ids = [
-            str(row[0]).strip()
-            for row in result
-            if row[0] is not None and str(row[0]).strip() != ''
-        ]
+        # Extract unique patient IDs, reusing the file's recorded extraction
+        patient_ids = self._recorded_patient_ids(validation_job)
+        if patient_ids is None:
+            patient_ids = self._query_patient_ids(patient_id_col)
 
         self.update_progress(validation_job, 60)
 
@@ -256,19 +246,10 @@ class PatientIDValidator(BaseValidator):
 
         self.update_progress(validation_job, 60)
 
-        # Extract patient IDs from this file
-        query = f"""
-            SELECT DISTINCT "{patient_id_col}"
-            FROM data
-            WHERE "{patient_id_col}" IS NOT NULL
-        """
-        result = self.conn.execute(query).fetchall()
-
-        file_patient_ids = [
-            str(row[0]).strip()
-            for row in result
-            if row[0] is not None and str(row[0]).strip() != ''
-        ]
+        # Extract patient IDs from this file, reusing the recorded extraction
+        file_patient_ids = self._recorded_patient_ids(validation_job)
+        if file_patient_ids is None:
+            file_patient_ids = self._query_patient_ids(patient_id_col)
         file_ids_set = set(file_patient_ids)
 
         self.update_progress(validation_job, 75)
@@ -311,6 +292,47 @@ class PatientIDValidator(BaseValidator):
             'issues': issues
         }
 
+    def _recorded_patient_ids(self, validation_job):
+        """
+        Patient IDs already extracted from this data file's current content.
+
+        Returns:
+            list: Recorded patient IDs, or None if the file must be queried
+        """
+        from depot.models import DataTableFile, DataTableFilePatientIDs
+
+        data_file = validation_job.validation_run.content_object
+        if not isinstance(data_file, DataTableFile):
+            return None
+
+        record = DataTableFilePatientIDs.current_for(data_file)
+        if record is None:
+            return None
+
+        logger.info(f"Using {record.patient_count} recorded patient IDs for file {data_file.id}")
+        return list(record.patient_ids)
+
+    def _query_patient_ids(self, patient_id_col):
+        """
+        Query distinct non-empty patient IDs from the DuckDB data.
+
+        Returns:
+            list: Patient IDs
+        """
+        query = f"""
+            SELECT DISTINCT "{patient_id_col}"
+            FROM data
+            WHERE "{patient_id_col}" IS NOT NULL
+        """
+        result = self.conn.execute(query).fetchall()
+
+        # Filter out None and empty strings
+        return [
+            str(row[0]).strip()
+            for row in result
+            if row[0] is not None and str(row[0]).strip() != ''
+        ]
+
     def _find_patient_id_column(self) -> str:
         """
         Find patient ID column name (case-insensitive match).
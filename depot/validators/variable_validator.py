@@ -10,6 +10,12 @@ from datetime import date
 from collections import OrderedDict
 from typing import Dict, List, Optional
 
+from depot.data.definition_loader import parse_validator
+from depot.services.affected_rows import AFFECTED_ROW_SAMPLE
+from depot.services.data_statistics import read_column_stats
+from depot.utils.instrumentation import span, timed
+from depot.utils.sql import quote_identifier, sql_strip
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,6 +26,10 @@ class VariableValidator:
     Uses DuckDB for efficient querying and validation.
     """
 
+    # Raw and unexpected values listed in categorical summaries; counts for
+    # definition values are always exact
+    RAW_VALUE_LIMIT = 50
+
     def __init__(self, duckdb_path: str, variable_def: Dict, validation_variable, submission=None, data_file=None):
         """
         Initialize validator for a single variable.
@@ -40,6 +50,8 @@ class VariableValidator:
         self.is_combined_duckdb = False  # Will be set when connection opens
         self.submission = submission
         self.data_file = data_file
+        # Check type -> (query, params) selecting the rows a failed check affects
+        self.affected_row_queries: Dict[str, tuple] = {}
 
     def __enter__(self):
         """Context manager entry - open DuckDB connection."""
@@ -74,6 +86,12 @@ class VariableValidator:
                 'summary': dict  # Type-specific summary statistics
             }
         """
+        with span('validation.variable', column=self.column_name, type=self.column_type) as variable_span:
+            results = self._validate()
+            variable_span.set(errors=results['error_count'], warnings=results['warning_count'])
+            return results
+
+    def _validate(self) -> Dict:
         results = {
             'passed': True,
             'total_rows': 0,
@@ -95,8 +113,7 @@ class VariableValidator:
                 # Check if this column has conditional validators
                 validators = self.variable_def.get('validators', [])
                 has_conditional = any(
-                    (isinstance(v, dict) and v.get('name') in ['required_when', 'forbidden_when']) or
-                    (isinstance(v, str) and v in ['required_when', 'forbidden_when'])
+                    parse_validator(v)[0] in ['required_when', 'forbidden_when']
                     for v in validators
                 )
 
@@ -191,8 +208,24 @@ class VariableValidator:
         except Exception:
             return False
 
+    def _sidecar_stats(self) -> Optional[Dict]:
+        """This column's statistics from the sidecar written at conversion, if any."""
+        if not hasattr(self, '_column_stats'):
+            stats = read_column_stats(self.conn, columns=[self.column_name]) or {}
+            self._column_stats = stats.get(self.column_name)
+        return self._column_stats
+
+    @timed('validation.stats')
     def _get_basic_stats(self) -> Dict:
         """Get basic statistics for the column."""
+        column = self._sidecar_stats()
+        if column:
+            return {
+                'total_rows': column['row_count'],
+                'null_count': column['null_count'],
+                'empty_count': column['empty_count']
+            }
+
         query = f"""
             SELECT
                 COUNT(*) as total_rows,
@@ -215,38 +248,13 @@ class VariableValidator:
         value = value.strip()
         return value if case_sensitive else value.lower()
 
-    def _fetch_raw_value_counts(self) -> List[Dict[str, object]]:
-        """Return trimmed raw value counts for the column."""
-        query = f"""
-            SELECT trim(CAST("{self.column_name}" AS TEXT)) AS raw_value,
-                   COUNT(*) AS count
-            FROM data
-            WHERE "{self.column_name}" IS NOT NULL
-            GROUP BY trim(CAST("{self.column_name}" AS TEXT))
-        """
-
-        rows = self.conn.execute(query).fetchall()
-        counts: List[Dict[str, object]] = []
-        for raw_value, count in rows:
-            value = (raw_value or "").strip()
-            display = value if value else "(blank)"
-            counts.append({
-                "raw": value,
-                "display": display,
-                "count": count or 0
-            })
-
-        counts.sort(key=lambda item: (-item["count"], item["display"]))
-        return counts
-
-    def _build_categorical_summary(
+    def _categorical_entries(
         self,
-        raw_counts: List[Dict[str, object]],
         allowed_values,
         case_sensitive: bool = False,
         default_synonyms: Optional[Dict[str, List[str]]] = None,
-    ) -> Dict:
-        """Normalize raw value counts against allowed categories."""
+    ) -> List[Dict[str, object]]:
+        """Build the definition's categories and their normalized synonyms."""
 
         entries: List[Dict[str, object]] = []
 
@@ -344,28 +352,107 @@ class VariableValidator:
             display = None if case_sensitive else normalized_key.title()
             add_entry(normalized_key, synonyms, display)
 
-        if not entries:
-            for item in raw_counts:
-                add_entry(item["raw"], [item["raw"]], item["display"])
+        return entries
+
+    def _fetch_value_frequencies(self, synonyms_lookup: Dict[str, str], case_sensitive: bool) -> Dict:
+        """
+        Count the column's trimmed values against a synonym mapping in SQL.
+
+        The mapping is joined as a relation, so only bounded results reach
+        Python: exact totals for every mapped key, plus the RAW_VALUE_LIMIT
+        most frequent raw values and unmapped values. With an empty mapping
+        each normalized value is its own key and only the most frequent keys
+        are returned.
+        """
+        column = quote_identifier(self.column_name)
+        limit = int(self.RAW_VALUE_LIMIT)
+        token = "raw_value" if case_sensitive else "lower(raw_value)"
+        params: List[str] = []
+
+        if synonyms_lookup:
+            params += [item for pair in synonyms_lookup.items() for item in pair]
+            placeholders = ', '.join('(?, ?)' for _ in synonyms_lookup)
+            tagged = f"""
+                SELECT raw.raw_value, raw.n, mapping.key
+                FROM raw
+                LEFT JOIN (VALUES {placeholders}) AS mapping(token, key)
+                    ON mapping.token = {token}
+            """
+            key_counts = """
+                SELECT 'key', key, NULL, SUM(n) FROM tagged
+                WHERE key IS NOT NULL GROUP BY key
+            """
+        else:
+            tagged = f"SELECT raw_value, n, {token} AS key FROM raw"
+            key_counts = f"""
+                (SELECT 'key', key, arg_max(raw_value, n), SUM(n) FROM tagged
+                 GROUP BY key ORDER BY SUM(n) DESC, key LIMIT {limit})
+            """
+
+        query = f"""
+            WITH raw AS MATERIALIZED (
+                SELECT {sql_strip(f'CAST({column} AS TEXT)')} AS raw_value,
+                       COUNT(*) AS n
+                FROM data
+                WHERE {column} IS NOT NULL
+                GROUP BY ALL
+            ),
+            tagged AS MATERIALIZED ({tagged})
+            SELECT 'total', NULL, CAST(COUNT(*) AS VARCHAR), SUM(n) FROM tagged
+            UNION ALL {key_counts}
+            UNION ALL (SELECT 'raw', NULL, raw_value, n FROM tagged
+                       ORDER BY n DESC, raw_value LIMIT {limit})
+            UNION ALL (SELECT 'unexpected', NULL, raw_value, n FROM tagged WHERE key IS NULL
+                       ORDER BY n DESC, raw_value LIMIT {limit})
+        """
+
+        frequencies = {'raw_total': 0, 'unique_raw_values': 0, 'key_counts': [], 'raw_counts': [], 'unexpected': []}
+        for kind, key, value, count in self.conn.execute(query, params).fetchall():
+            count = int(count or 0)
+            if kind == 'total':
+                frequencies['unique_raw_values'] = int(value)
+                frequencies['raw_total'] = count
+                continue
+            value = (value or "").strip()
+            display = value if value else "(blank)"
+            if kind == 'key':
+                frequencies['key_counts'].append((key, value, display, count))
+            elif kind == 'raw':
+                frequencies['raw_counts'].append({"raw": value, "display": display, "count": count})
+            else:
+                frequencies['unexpected'].append((display, count))
+
+        frequencies['key_counts'].sort(key=lambda item: (-item[3], item[2]))
+        frequencies['raw_counts'].sort(key=lambda item: (-item["count"], item["display"]))
+        frequencies['unexpected'].sort(key=lambda item: (-item[1], item[0]))
+        return frequencies
+
+    def _build_categorical_summary(
+        self,
+        allowed_values,
+        case_sensitive: bool = False,
+        default_synonyms: Optional[Dict[str, List[str]]] = None,
+    ) -> Dict:
+        """Normalize value counts against allowed categories."""
+
+        entries = self._categorical_entries(allowed_values, case_sensitive, default_synonyms)
 
         synonyms_lookup = {}
-        counts_by_key = {}
         for entry in entries:
-            normalized = entry["normalized"]
-            counts_by_key[normalized] = 0
             for synonym in entry["synonyms"]:
-                synonyms_lookup[synonym] = normalized
-
-        unexpected: Dict[str, int] = {}
-        for item in raw_counts:
-            normalized_value = self._normalize_token(item["raw"], case_sensitive)
-            key = synonyms_lookup.get(normalized_value)
-            count = item["count"]
-            if key is not None:
-                counts_by_key[key] += count
-            else:
-                display = item["display"]
-                unexpected[display] = unexpected.get(display, 0) + count
+                synonyms_lookup[synonym] = entry["normalized"]
+
+        frequencies = self._fetch_value_frequencies(synonyms_lookup, case_sensitive)
+
+        counts_by_key = {entry["normalized"]: 0 for entry in entries}
+        if entries:
+            for key, _, _, count in frequencies['key_counts']:
+                counts_by_key[key] = count
+        else:
+            # No definition: the most frequent observed values are the categories
+            for key, raw, display, count in frequencies['key_counts']:
+                entries.append({"original": raw, "normalized": key, "display": display})
+                counts_by_key[key] = count
 
         normalized_entries = []
         for entry in entries:
@@ -377,14 +464,13 @@ class VariableValidator:
                 "count": counts_by_key.get(normalized, 0),
             })
 
-        unexpected_list = sorted(unexpected.items(), key=lambda item: (-item[1], item[0]))
         raw_counts_display = [
             {
                 "value": item["display"],
                 "raw": item["raw"],
                 "count": item["count"],
             }
-            for item in raw_counts
+            for item in frequencies['raw_counts']
         ]
 
         labels = [entry["label"] for entry in normalized_entries if entry["count"] > 0]
@@ -401,11 +487,14 @@ class VariableValidator:
         return {
             "normalized_entries": normalized_entries,
             "counts_by_key": counts_by_key,
-            "unexpected_values": unexpected_list,
+            "unexpected_values": frequencies['unexpected'],
             "raw_counts": raw_counts_display,
+            "raw_total": frequencies['raw_total'],
+            "unique_raw_values": frequencies['unique_raw_values'],
             "chart_data": chart_data,
         }
 
+    @timed('validation.rule')
     def _run_validator(self, validator_def, stats: Dict, column_exists: bool = True) -> Dict:
         """
         Run a single validator.
@@ -418,13 +507,7 @@ class VariableValidator:
         Returns:
             dict: Check result
         """
-        # Handle string validators
-        if isinstance(validator_def, str):
-            validator_name = validator_def
-            validator_params = {}
-        else:
-            validator_name = validator_def.get('name')
-            validator_params = validator_def.get('params', {})
+        validator_name, validator_params = parse_validator(validator_def)
 
         # Check for cross-file validators (format: in_file:<table>:<column>)
         if validator_name and validator_name.startswith('in_file:'):
@@ -529,37 +612,39 @@ class VariableValidator:
             }
         }
 
-        # If validation failed and we have source metadata, query for affected rows
+        # If validation failed and we have source metadata, sample the affected rows;
+        # the full list is exported with write_affected_rows
         if not passed and self.is_combined_duckdb:
             row_info_query = f"""
                 WITH duplicates AS (
-                    SELECT "{self.column_name}", COUNT(*) as cnt
+                    SELECT "{self.column_name}"
                     FROM data
                     WHERE "{self.column_name}" IS NOT NULL
                     GROUP BY "{self.column_name}"
                     HAVING COUNT(*) > 1
                 )
-                SELECT DISTINCT
-                    d.__source_file_id,
-                    d.__source_row_number,
-                    d.row_no
+                SELECT
+                    d.__source_file_id AS file_id,
+                    d.__source_row_number AS source_row,
+                    d.row_no AS duckdb_row
                 FROM data d
                 INNER JOIN duplicates dup ON d."{self.column_name}" = dup."{self.column_name}"
-                WHERE d."{self.column_name}" IS NOT NULL
-                ORDER BY d.__source_file_id, d.__source_row_number
-                LIMIT 500
             """
             try:
-                affected_rows = self.conn.execute(row_info_query).fetchall()
+                affected_count = self.conn.execute(f"SELECT COUNT(*) FROM ({row_info_query})").fetchone()[0]
+                sample = self.conn.execute(
+                    f"{row_info_query} ORDER BY file_id, source_row LIMIT {AFFECTED_ROW_SAMPLE}"
+                ).fetchall()
                 check_result['affected_rows'] = [
                     {
                         'file_id': row[0],
                         'source_row': row[1],
                         'duckdb_row': row[2]
                     }
-                    for row in affected_rows
+                    for row in sample
                 ]
-                check_result['affected_row_count'] = len(affected_rows)
+                check_result['affected_row_count'] = affected_count
+                self.affected_row_queries['no_duplicates'] = (row_info_query, [])
             except Exception as e:
                 logger.warning(f"Failed to query affected rows for duplicates: {e}")
 
@@ -597,22 +682,24 @@ class VariableValidator:
             }
         }
 
-        # If validation failed and we have source metadata, query for affected rows
+        # If validation failed and we have source metadata, sample the affected rows;
+        # the full list is exported with write_affected_rows
         if not passed and self.is_combined_duckdb:
             row_info_query = f"""
                 SELECT
-                    __source_file_id,
-                    __source_row_number,
-                    row_no,
+                    __source_file_id AS file_id,
+                    __source_row_number AS source_row,
+                    row_no AS duckdb_row,
                     CAST("{self.column_name}" AS INTEGER) as value
                 FROM data
                 WHERE "{self.column_name}" IS NOT NULL
                   AND (CAST("{self.column_name}" AS INTEGER) < ? OR CAST("{self.column_name}" AS INTEGER) > ?)
-                ORDER BY __source_file_id, __source_row_number
-                LIMIT 500
             """
             try:
-                affected_rows = self.conn.execute(row_info_query, [min_val, max_val]).fetchall()
+                sample = self.conn.execute(
+                    f"{row_info_query} ORDER BY file_id, source_row LIMIT {AFFECTED_ROW_SAMPLE}",
+                    [min_val, max_val]
+                ).fetchall()
                 check_result['affected_rows'] = [
                     {
                         'file_id': row[0],
@@ -620,9 +707,10 @@ class VariableValidator:
                         'duckdb_row': row[2],
                         'value': row[3]
                     }
-                    for row in affected_rows
+                    for row in sample
                 ]
-                check_result['affected_row_count'] = len(affected_rows)
+                check_result['affected_row_count'] = out_of_range_count
+                self.affected_row_queries['range'] = (row_info_query, [min_val, max_val])
             except Exception as e:
                 logger.warning(f"Failed to query affected rows for range validation: {e}")
 
@@ -807,6 +895,7 @@ class VariableValidator:
         except Exception:
             return False
 
+    @timed('validation.summary')
     def _generate_summary(self, stats: Dict) -> Dict:
         """
         Generate type-specific summary statistics for visualization and display.
@@ -844,17 +933,22 @@ class VariableValidator:
 
     def _generate_id_summary(self, stats: Dict) -> Dict:
         """Generate summary for ID columns."""
-        # Get unique and duplicate counts
-        query = f"""
-            SELECT
-                COUNT(*) as total_non_null,
-                COUNT(DISTINCT "{self.column_name}") as unique_count
-            FROM data
-            WHERE "{self.column_name}" IS NOT NULL
-        """
-        result = self.conn.execute(query).fetchone()
-        total_non_null = result[0]
-        unique_count = result[1]
+        # Get unique and duplicate counts (the sidecar counts '' separately).
+        # High-cardinality columns only have an estimate there, which would
+        # report duplicates that do not exist, so those are counted here.
+        column = self._sidecar_stats()
+        if column and column['distinct_exact']:
+            total_non_null = column['row_count'] - column['null_count']
+            unique_count = column['distinct_count'] + (1 if column['empty_count'] else 0)
+        else:
+            query = f"""
+                SELECT
+                    COUNT(*) as total_non_null,
+                    COUNT(DISTINCT "{self.column_name}") as unique_count
+                FROM data
+                WHERE "{self.column_name}" IS NOT NULL
+            """
+            total_non_null, unique_count = self.conn.execute(query).fetchone()
         duplicate_count = total_non_null - unique_count
 
         # Get sample values (first 20)
@@ -1012,34 +1106,24 @@ class VariableValidator:
         If 'bar_chart' in summarizers, generates value distribution for visualization.
         """
         summary: Dict[str, object] = {}
-        raw_counts = self._fetch_raw_value_counts()
-
-        raw_distribution = [
-            {
-                "value": item["display"],
-                "raw": item["raw"],
-                "count": item["count"],
-            }
-            for item in raw_counts
-        ]
-
-        summary['raw_counts'] = raw_distribution
-        summary['raw_total'] = sum(item['count'] for item in raw_distribution)
-        summary['unique_raw_values'] = len(raw_distribution)
-        summary['value_distribution'] = {
-            item['value']: item['count'] for item in raw_distribution
-        }
-        summary['unique_values'] = summary['unique_raw_values']
-
         allowed_values = self.variable_def.get('allowed_values', [])
         case_sensitive = self.variable_def.get('case_sensitive', False)
 
         categorical = self._build_categorical_summary(
-            raw_counts,
             allowed_values,
             case_sensitive=case_sensitive,
         )
 
+        raw_distribution = categorical['raw_counts']
+        summary['raw_counts'] = raw_distribution
+        summary['raw_total'] = categorical['raw_total']
+        summary['unique_raw_values'] = categorical['unique_raw_values']
+        summary['raw_values_omitted'] = categorical['unique_raw_values'] - len(raw_distribution)
+        summary['value_distribution'] = {
+            item['value']: item['count'] for item in raw_distribution
+        }
+        summary['unique_values'] = summary['unique_raw_values']
+
         summary['definition_counts'] = [
             {
                 "label": entry['label'],
@@ -1117,7 +1201,6 @@ class VariableValidator:
         """Generate summary for boolean columns."""
         summary = {}
 
-        raw_counts = self._fetch_raw_value_counts()
         case_sensitive = self.variable_def.get('case_sensitive', False)
         allowed_values = self.variable_def.get('allowed_values', {})
 
@@ -1128,7 +1211,6 @@ class VariableValidator:
         }
 
         categorical = self._build_categorical_summary(
-            raw_counts,
             allowed_values,
             case_sensitive=case_sensitive,
             default_synonyms=default_synonyms,
@@ -1137,8 +1219,9 @@ class VariableValidator:
         summary['normalized_entries'] = categorical['normalized_entries']
         summary['unexpected_values'] = categorical['unexpected_values']
         summary['raw_counts'] = categorical['raw_counts']
-        summary['raw_total'] = sum(item['count'] for item in summary['raw_counts'])
-        summary['unique_raw_values'] = len(summary['raw_counts'])
+        summary['raw_total'] = categorical['raw_total']
+        summary['unique_raw_values'] = categorical['unique_raw_values']
+        summary['raw_values_omitted'] = categorical['unique_raw_values'] - len(summary['raw_counts'])
         summary['value_distribution'] = {
             entry['label']: entry['count'] for entry in categorical['normalized_entries']
         }
@@ -2,12 +2,20 @@
 Public health check endpoint for container health monitoring.
 
 This endpoint MUST NOT require authentication as it's used by Docker health checks.
+The pipeline metrics endpoint next to it requires the internal API key.
 """
 
-from django.http import JsonResponse
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse
 from django.db import connection
 from django.conf import settings
 
+from depot.celery import flush_task_message_stats
+from depot.utils.instrumentation import prometheus_metrics
+from depot.views.internal_storage import require_internal_api_key
+
 
 def health_check(request):
     """
@@ -41,3 +49,31 @@ def health_check(request):
             "error": str(e),
             "server_role": settings.SERVER_ROLE,
         }, status=500)
+
+
+@require_internal_api_key
+def health_metrics(request):
+    """
+    Prometheus-style pipeline span metrics for the services server.
+
+    Aggregates span timelines persisted on DataTableFile, ValidationRun and
+    ValidationVariable within PIPELINE_METRICS_WINDOW_HOURS, and published
+    task message sizes from TaskMessageStats. Only counts, sizes and
+    durations per span or task name are exported, never file paths or
+    identifiers.
+    Scrapers send the internal API key as X-API-Key; the aggregate is cached
+    for PIPELINE_METRICS_CACHE_SECONDS so scrapes do not rescan timelines.
+    Not served by the web server, which has no pipeline workers.
+    """
+    if settings.SERVER_ROLE == 'web':
+        raise Http404
+
+    # Sizes of tasks this process published; other processes flush their own
+    flush_task_message_stats()
+    window = timedelta(hours=settings.PIPELINE_METRICS_WINDOW_HOURS)
+    body = cache.get_or_set(
+        f'pipeline_metrics:{int(window.total_seconds())}',
+        lambda: prometheus_metrics(window),
+        settings.PIPELINE_METRICS_CACHE_SECONDS,
+    )
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -18,6 +18,7 @@ from depot.models import (
     UploadType,
     FileAttachment,
     SubmissionPatientIDs,
+    ValidationCheck,
     ValidationRun,
     ValidationVariable,
 )
@@ -27,23 +28,16 @@ from depot.storage.manager import StorageManager
 from depot.services.file_upload_service import FileUploadService
 from depot.services.activity_logger import SubmissionActivityLogger
 from depot.services.submission_validation_service import SubmissionValidationService
-from depot.tasks.validation_orchestration import (
-    revalidate_single_variable,
-    ensure_validation_run_for_data_file,
-)
 
 
 def schedule_submission_file_workflow(submission, data_table, data_file, user):
-    """Schedule the async workflow (duckdb → extraction → validation) for a data file."""
-    from celery import chain
-    from depot.tasks import (
-        create_duckdb_task,
-        extract_patient_ids_task,
-        cleanup_workflow_files_task,
-        start_validation_for_data_file,
-    )
-    from depot.tasks.file_integrity import calculate_hashes_in_workflow
-    from depot.tasks.upload_precheck import process_precheck_run_with_duckdb
+    """
+    Schedule the async workflow for a data file.
+
+    Runs as a DAG (see depot/tasks/upload_workflow.py): raw file hashing runs
+    alongside DuckDB creation, followed by extraction → validation → cleanup.
+    """
+    from depot.tasks.upload_workflow import build_upload_workflow
 
     task_data = {
         'data_file_id': data_file.id,
@@ -54,17 +48,10 @@ def schedule_submission_file_workflow(submission, data_table, data_file, user):
         'raw_file_path': data_file.raw_file_path,
     }
 
-    # Build workflow steps for granular validation system
-    # Note: No longer using legacy Quarto notebook compilation (process_precheck_run_with_duckdb)
-    workflow_steps = [
-        create_duckdb_task.si(task_data),
-        extract_patient_ids_task.s(),
-        calculate_hashes_in_workflow.s(),
-        start_validation_for_data_file.s(),
-        cleanup_workflow_files_task.s(),
-    ]
+    # Reset timings and spans from any previous run of the workflow for this file
+    DataTableFile.objects.filter(id=data_file.id).update(workflow_timings={}, pipeline_spans=[])
 
-    chain(*workflow_steps).apply_async(countdown=2)
+    build_upload_workflow(task_data).apply_async(countdown=2)
 
 import hashlib
 import os
@@ -531,6 +518,8 @@ def revalidate_submission_file(request, submission_id, table_name, file_id):
         messages.warning(request, message)
         return redirect('submission_table_manage', submission_id=submission.id, table_name=table_name)
 
+    from depot.tasks.validation_orchestration import ensure_validation_run_for_data_file
+
     ensure_validation_run_for_data_file(data_file)
     schedule_submission_file_workflow(submission, data_table, data_file, request.user)
 
@@ -583,6 +572,8 @@ def revalidate_submission_variable(request, submission_id, table_name, variable_
         messages.warning(request, message)
         return redirect('submission_table_manage', submission_id=submission.id, table_name=table_name)
 
+    from depot.tasks.validation_orchestration import revalidate_single_variable
+
     revalidate_single_variable.delay(variable.id)
 
     message = "Variable validation re-run queued"
@@ -657,6 +648,8 @@ def submission_validation_status(request, submission_id, table_name, validation_
 
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return render(request, 'partials/validation_status.html', {
+            'submission': submission,
+            'data_table': data_table,
             'validation_run': validation_run,
             'validation_variables': validation_variables,
             'ordered_variables': ordered_variables,
@@ -738,6 +731,111 @@ def submission_validation_status_json(request, submission_id, table_name, valida
     })
 
 
+def _get_submission_check(request, submission_id, table_name, validation_run_id, check_id):
+    """
+    Look up a validation check of a submission file the user may view.
+
+    Returns:
+        ValidationCheck, or an HttpResponseForbidden
+    """
+    submission = get_object_or_404(CohortSubmission, pk=submission_id)
+
+    if not SubmissionPermissions.can_view(request.user, submission):
+        return HttpResponseForbidden("You don't have permission to view this submission.")
+
+    check = get_object_or_404(
+        ValidationCheck.objects.select_related(
+            'validation_variable__validation_run__content_type',
+            'validation_variable__validation_run__data_file_type',
+        ),
+        pk=check_id,
+        validation_variable__validation_run_id=validation_run_id,
+    )
+    validation_run = check.validation_variable.validation_run
+
+    content_object = validation_run.content_object
+    if not isinstance(content_object, DataTableFile):
+        raise Http404("Validation run is not associated with a submission file.")
+
+    data_table = content_object.data_table
+    if data_table.data_file_type.name != table_name or data_table.submission_id != submission.id:
+        raise Http404("Validation run does not belong to this submission")
+
+    if not check.meta.get('affected_rows_artifact'):
+        raise Http404("No affected rows were recorded for this check.")
+    return check
+
+
+@login_required
+def validation_check_rows(request, submission_id, table_name, validation_run_id, check_id):
+    """
+    One page of the rows affected by a failed validation check, as JSON.
+
+    Pages are read from the check's affected-rows artifact, so the validation
+    status page can browse past the sample kept in the database. Query
+    parameters: ``offset`` and ``limit`` (at most AFFECTED_ROW_PAGE_SIZE).
+    """
+    from depot.services.affected_rows import AFFECTED_ROW_PAGE_SIZE, read_affected_rows
+
+    check = _get_submission_check(request, submission_id, table_name, validation_run_id, check_id)
+    if isinstance(check, HttpResponseForbidden):
+        return check
+
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        limit = min(max(int(request.GET.get('limit', AFFECTED_ROW_PAGE_SIZE)), 1), AFFECTED_ROW_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'offset and limit must be integers'}, status=400)
+
+    try:
+        rows = read_affected_rows(check.meta['affected_rows_artifact'], check.rule_key, offset, limit)
+    except FileNotFoundError:
+        # Removed with the run's workspace; only the stored sample remains
+        raise Http404("Affected rows are no longer available for this check.")
+
+    return JsonResponse({
+        'rows': rows,
+        'offset': offset,
+        'limit': limit,
+        'total': check.affected_row_count,
+        'has_next': offset + len(rows) < check.affected_row_count,
+    })
+
+
+@login_required
+def download_validation_check_rows(request, submission_id, table_name, validation_run_id, check_id):
+    """
+    Stream every row affected by a failed validation check as CSV.
+
+    Rows are paged out of the check's affected-rows artifact; the database
+    only holds a sample.
+    """
+    from django.http import StreamingHttpResponse
+    from depot.services.affected_rows import iter_affected_rows
+
+    check = _get_submission_check(request, submission_id, table_name, validation_run_id, check_id)
+    if isinstance(check, HttpResponseForbidden):
+        return check
+    artifact = check.meta['affected_rows_artifact']
+
+    def generate_csv_rows():
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['file_id', 'source_row', 'duckdb_row'])
+        for index, row in enumerate(iter_affected_rows(artifact, check.rule_key), start=1):
+            writer.writerow(row)
+            if index % 1000 == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+        yield output.getvalue()
+
+    response = StreamingHttpResponse(generate_csv_rows(), content_type='text/csv')
+    filename = f"affected_rows_{table_name}_{check.validation_variable.column_name}_{check.rule_key}.csv"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 def _get_status_badge_class(status):
     base_classes = "inline-flex items-center px-2 py-1 rounded-full text-xs font-medium"
 
@@ -1554,12 +1652,11 @@ def handle_attachment_upload(request, data_table):
 @login_required
 def download_patient_validation_csv(request, submission_id, table_id, file_id=None):
     """
-    Generate and stream CSV file with patient ID validation data.
-    Can generate for all files in table or for a specific file.
+    Stream CSV file with patient ID validation data.
+    Can generate for all files in table or for a specific file; pass
+    ?compression=gzip to download it gzipped.
     """
     from django.http import StreamingHttpResponse
-    import csv
-    import io
 
     # Get submission and table
     submission = get_object_or_404(
@@ -1577,122 +1674,28 @@ def download_patient_validation_csv(request, submission_id, table_id, file_id=No
     if not SubmissionPermissions.can_view(request.user, submission):
         return HttpResponseForbidden("You don't have permission to view this submission.")
 
-    def generate_csv_rows():
-        """Generator function to stream CSV rows."""
-        # Create CSV writer with string IO
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Get patient IDs from submission's patient file
-        if hasattr(submission, 'patient_ids_record') and submission.patient_ids_record:
-            patient_file_ids = set(submission.patient_ids_record.patient_ids) if submission.patient_ids_record.patient_ids else set()
-        else:
-            patient_file_ids = set(submission.patient_ids) if submission.patient_ids else set()
-
-        # Get patient ID records
-        from depot.models import DataTableFilePatientIDs
-
-        if file_id:
-            # Single file mode
-            from depot.models import DataTableFile
-            data_file = get_object_or_404(DataTableFile, pk=file_id, data_table=data_table)
-
-            # Write simple header for single file
-            writer.writerow(['patient_id', 'in_patient_file', 'matching', 'out_of_bounds'])
-            yield output.getvalue()
-            output.seek(0)
-            output.truncate(0)
-
-            # Get patient IDs for this specific file
-            patient_record = DataTableFilePatientIDs.objects.filter(
-                data_file=data_file
-            ).first()
-
-            file_patient_ids = set(patient_record.patient_ids) if patient_record and patient_record.patient_ids else set()
-
-            # Write rows for ALL patient IDs from patient file (not just this file's IDs)
-            for patient_id in sorted(patient_file_ids):
-                is_in_file = patient_id in file_patient_ids
-                writer.writerow([
-                    patient_id,
-                    1,  # Always 1 since we're iterating over patient_file_ids
-                    1 if is_in_file else 0,  # matching = is this ID in the uploaded file
-                    0 if is_in_file else 1   # out_of_bounds (inverted - 1 if NOT in file)
-                ])
-                yield output.getvalue()
-                output.seek(0)
-                output.truncate(0)
-        else:
-            # All files mode - enhanced with per-file columns
-            patient_records = DataTableFilePatientIDs.objects.filter(
-                data_file__data_table=data_table,
-                data_file__is_current=True
-            ).select_related('data_file')
+    from depot.services.patient_validation_export import ensure_export, stream_export
 
-            # Build per-file data
-            file_data = []
-            all_uploaded_ids = set()
-            patient_id_to_files = {}
+    data_file = get_object_or_404(DataTableFile, pk=file_id, data_table=data_table) if file_id else None
 
-            for record in patient_records:
-                file_name = record.data_file.name or record.data_file.original_filename or f"File {record.data_file.id}"
-                file_patient_ids = set(record.patient_ids) if record.patient_ids else set()
-
-                file_data.append({
-                    'name': file_name,
-                    'patient_ids': file_patient_ids
-                })
-
-                for pid in file_patient_ids:
-                    all_uploaded_ids.add(pid)
-                    if pid not in patient_id_to_files:
-                        patient_id_to_files[pid] = []
-                    patient_id_to_files[pid].append(file_name)
-
-            # Write enhanced header
-            header = ['patient_id', 'in_patient_file', 'matching', 'out_of_bounds', 'files_containing_id']
-            for file_info in file_data:
-                header.append(f"in_{file_info['name']}")
-            writer.writerow(header)
-            yield output.getvalue()
-            output.seek(0)
-            output.truncate(0)
-
-            # Write rows for ALL patient IDs from patient file (not just uploaded ones)
-            # This ensures we see which patient IDs are missing from uploaded files
-            for patient_id in sorted(patient_file_ids):
-                is_in_uploaded = patient_id in all_uploaded_ids
-
-                row = [
-                    patient_id,
-                    1,  # Always 1 since we're iterating over patient_file_ids
-                    1 if is_in_uploaded else 0,  # matching = is this ID in any uploaded file
-                    0 if is_in_uploaded else 1,  # out_of_bounds (inverted - 1 if NOT in uploaded)
-                    '; '.join(patient_id_to_files.get(patient_id, [])) if is_in_uploaded else ''
-                ]
-
-                for file_info in file_data:
-                    row.append(1 if patient_id in file_info['patient_ids'] else 0)
-
-                writer.writerow(row)
-                yield output.getvalue()
-                output.seek(0)
-                output.truncate(0)
+    # The export is built once per version of the stored ID sets and
+    # streamed from reports storage; ?compression=gzip skips inflating it
+    compressed = request.GET.get('compression') == 'gzip'
+    path = ensure_export(data_table, data_file, user=request.user)
 
-    # Create streaming response
     response = StreamingHttpResponse(
-        generate_csv_rows(),
-        content_type='text/csv'
+        stream_export(path, compressed=compressed),
+        content_type='application/gzip' if compressed else 'text/csv'
     )
 
     # Set filename based on mode
-    if file_id:
-        from depot.models import DataTableFile
-        data_file = DataTableFile.objects.get(pk=file_id)
+    if data_file:
         file_name_part = (data_file.name or data_file.original_filename or f"file_{file_id}").replace('.csv', '')
         filename = f"patient_validation_{file_name_part}_{submission_id}.csv"
     else:
         filename = f"patient_validation_{data_table.data_file_type.name}_{submission_id}_all.csv"
+    if compressed:
+        filename += '.gz'
 
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
 